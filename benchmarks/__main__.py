@@ -0,0 +1,77 @@
+"""Run the benchmarks, or compare the results of two runs
+
+    python -m benchmarks run --size medium --output results.json
+    python -m benchmarks compare baseline.json results.json --threshold 0.1
+    python -m benchmarks corpus --size large > large.ivan
+"""
+import argparse
+import sys
+from pathlib import Path
+from typing import Optional, Sequence
+
+from benchmarks.corpus import SIZES, generate_corpus
+from benchmarks.runner import TARGETS, run_benchmarks, save_results, load_results, compare_results
+
+
+def run(args: argparse.Namespace) -> int:
+    sizes = list(SIZES) if args.size == ["all"] else args.size
+    configs = {size: SIZES[size] for size in sizes}
+    results = run_benchmarks(configs, args.target, repeat=args.repeat)
+    for result in results:
+        phases = "  ".join(f"{phase} {seconds * 1000:8.3f}" for phase, seconds in result.phases.items())
+        print(f"{result.name:14} {phases}  (ms)")
+    if args.output is not None:
+        save_results(results, args.output)
+    return 0
+
+
+def compare(args: argparse.Namespace) -> int:
+    comparisons = compare_results(load_results(args.baseline), load_results(args.current), args.min_seconds)
+    if not comparisons:
+        print("No benchmarks in common", file=sys.stderr)
+        return 2
+    regressions = 0
+    for comparison in comparisons:
+        change = comparison.ratio - 1
+        regressed = change > args.threshold
+        regressions += regressed
+        print(f"{comparison.name:14} {comparison.phase:18} {comparison.baseline * 1000:9.3f} ms "
+              f"-> {comparison.current * 1000:9.3f} ms  {change:+7.1%}{'  REGRESSION' if regressed else ''}")
+    if regressions:
+        print(f"{regressions} regression(s) beyond {args.threshold:.0%}", file=sys.stderr)
+        return 1
+    return 0
+
+
+def corpus(args: argparse.Namespace) -> int:
+    sys.stdout.write(generate_corpus(SIZES[args.size]))
+    return 0
+
+
+def main(argv: Optional[Sequence[str]] = None) -> int:
+    parser = argparse.ArgumentParser(prog="python -m benchmarks")
+    commands = parser.add_subparsers(dest="command", metavar="COMMAND", required=True)
+    run_parser = commands.add_parser("run", help="time every phase of the compiler")
+    run_parser.add_argument("--size", nargs="+", choices=[*SIZES, "all"], default=["medium"])
+    run_parser.add_argument("--target", nargs="+", choices=list(TARGETS), default=list(TARGETS))
+    run_parser.add_argument("--repeat", type=int, default=5,
+                            help="the number of times to run each phase (keeping the fastest)")
+    run_parser.add_argument("--output", type=Path, help="save the results as JSON")
+    run_parser.set_defaults(func=run)
+    compare_parser = commands.add_parser("compare", help="flag regressions between two runs")
+    compare_parser.add_argument("baseline", type=Path)
+    compare_parser.add_argument("current", type=Path)
+    compare_parser.add_argument("--threshold", type=float, default=0.1,
+                                help="the relative slowdown that counts as a regression (default: %(default)s)")
+    compare_parser.add_argument("--min-seconds", type=float, default=0.0001,
+                                help="ignore phases faster than this, which are mostly noise")
+    compare_parser.set_defaults(func=compare)
+    corpus_parser = commands.add_parser("corpus", help="print a synthetic module")
+    corpus_parser.add_argument("--size", choices=list(SIZES), default="medium")
+    corpus_parser.set_defaults(func=corpus)
+    args = parser.parse_args(argv)
+    return args.func(args)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,116 @@
+"""Generating synthetic (but realistic) modules to benchmark the compiler with
+
+The corpus is completely determined by its configuration (including the seed),
+so benchmarks of the same configuration are always comparable.
+"""
+from __future__ import annotations
+
+import random
+from dataclasses import dataclass
+from typing import Dict, List
+
+BUILTIN_TYPES = ["i32", "u32", "i64", "u64", "usize", "isize", "bool", "byte", "double"]
+RETURN_TYPES = BUILTIN_TYPES + [None] * 3
+"""The return types of methods, where `None` is the implicit unit type"""
+DOC_WORDS = ["the", "value", "buffer", "returns", "specified", "if", "pointer", "must", "be", "valid",
+             "for", "duration", "of", "call", "shape", "object", "index", "length", "mutable", "result"]
+
+
+@dataclass(frozen=True)
+class CorpusConfig:
+    """The size and shape of a synthetic module"""
+    seed: int = 0
+    interfaces: int = 10
+    methods: int = 10
+    """The number of methods in each interface"""
+    args: int = 3
+    """The maximum number of arguments to each method (or function)"""
+    structs: int = 5
+    fields: int = 8
+    """The number of fields in each struct"""
+    opaque_types: int = 5
+    functions: int = 10
+    """The number of top-level functions"""
+    doc_density: float = 0.5
+    """The fraction of items (and members) that have doc comments"""
+
+
+SIZES: Dict[str, CorpusConfig] = {
+    "small": CorpusConfig(interfaces=2, methods=5, structs=2, fields=4, opaque_types=2, functions=2),
+    "medium": CorpusConfig(),
+    "large": CorpusConfig(interfaces=100, methods=20, args=5, structs=50, fields=12,
+                          opaque_types=20, functions=100),
+}
+
+
+class _CorpusWriter:
+    def __init__(self, config: CorpusConfig):
+        self.config = config
+        self.random = random.Random(config.seed)
+        self.lines: List[str] = []
+        self.opaque_names = [f"Opaque{index}" for index in range(max(config.opaque_types, 1))]
+
+    def doc(self, indent: str):
+        if self.random.random() >= self.config.doc_density:
+            return
+        self.lines.append(f"{indent}/**")
+        for _ in range(self.random.randint(1, 4)):
+            words = self.random.choices(DOC_WORDS, k=self.random.randint(4, 12))
+            self.lines.append(f"{indent} * {' '.join(words).capitalize()}.")
+        self.lines.append(f"{indent} */")
+
+    def arg_type(self) -> str:
+        kind = self.random.random()
+        if kind < 0.5:
+            return self.random.choice(BUILTIN_TYPES)
+        elif kind < 0.8:
+            pointer = self.random.choice(["&", "&mut ", "&raw ", "opt &raw "])
+            return f"{pointer}{self.random.choice(self.opaque_names)}"
+        else:
+            return self.random.choice(["&[byte]", "&mut [u64]", "&str", "&[usize]"])
+
+    def field_type(self) -> str:
+        if self.random.random() < 0.7:
+            return self.random.choice(BUILTIN_TYPES)
+        return f"{self.random.choice(['&raw ', 'opt &raw '])}{self.random.choice(self.opaque_names)}"
+
+    def signature(self, name: str) -> str:
+        args = ", ".join(
+            f"arg{index}: {self.arg_type()}"
+            for index in range(self.random.randint(0, self.config.args))
+        )
+        return_type = self.random.choice(RETURN_TYPES)
+        return f"fun {name}({args}){f': {return_type}' if return_type is not None else ''};"
+
+    def write(self) -> str:
+        config = self.config
+        for name in self.opaque_names[:config.opaque_types]:
+            self.doc("")
+            self.lines.append(f"opaque type {name};")
+            self.lines.append("")
+        for struct_index in range(config.structs):
+            self.doc("")
+            self.lines.append(f"struct Struct{struct_index} {{")
+            for field_index in range(config.fields):
+                self.doc("    ")
+                self.lines.append(f"    field field{field_index}: {self.field_type()};")
+            self.lines.append("}")
+            self.lines.append("")
+        for interface_index in range(config.interfaces):
+            self.doc("")
+            self.lines.append(f'@GenerateWrappers(prefix="iface{interface_index}")')
+            self.lines.append(f"interface Interface{interface_index} {{")
+            for method_index in range(config.methods):
+                self.doc("    ")
+                self.lines.append(f"    {self.signature(f'method{method_index}')}")
+            self.lines.append("}")
+            self.lines.append("")
+        for function_index in range(config.functions):
+            self.doc("")
+            self.lines.append(self.signature(f"function{function_index}"))
+        return '\n'.join(self.lines) + '\n'
+
+
+def generate_corpus(config: CorpusConfig) -> str:
+    """Generate the text of a synthetic module"""
+    return _CorpusWriter(config).write()
@@ -0,0 +1,142 @@
+"""Timing each phase of the compiler separately, and comparing the results of different runs"""
+from __future__ import annotations
+
+import dataclasses
+import json
+import platform
+import time
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Dict, List, Type, Any
+
+from ivan.ast.lexer import lex_all
+from ivan.ast.parser import Parser, parse_module
+from ivan.generate import CodeGenerator
+from ivan.generate.c11 import C11CodeGenerator
+from ivan.generate.rust import RustCodeGenerator
+from ivan.types.context import TypeContext
+
+from benchmarks.corpus import CorpusConfig, generate_corpus
+
+RESULTS_VERSION = 1
+PHASES = ("lex", "parse", "resolve", "declare_types", "generate_wrappers", "render")
+TARGETS: Dict[str, Type[CodeGenerator]] = {
+    "c11": C11CodeGenerator,
+    "rust": RustCodeGenerator,
+}
+
+
+def time_phases(text: str, target: str, repeat: int = 5) -> Dict[str, float]:
+    """Time each phase of compiling the text, returning the fastest time of each phase (in seconds)"""
+    generator_type = TARGETS[target]
+    best = {phase: float("inf") for phase in PHASES}
+
+    def record(phase: str, start: float) -> float:
+        end = time.perf_counter()
+        best[phase] = min(best[phase], end - start)
+        return end
+
+    for _ in range(repeat):
+        start = time.perf_counter()
+        tokens = list(lex_all(text))
+        start = record("lex", start)
+        module = parse_module(Parser(tokens), name="bench.corpus")
+        start = record("parse", start)
+        context = TypeContext.build_context(module)
+        module = context.resolve_module(module)
+        record("resolve", start)
+        generator = generator_type(module, context)
+        generator.write_header()
+        start = time.perf_counter()
+        generator.declare_types()
+        start = record("declare_types", start)
+        generator.generate_wrappers()
+        record("generate_wrappers", start)
+        generator.write_footer()
+        start = time.perf_counter()
+        str(generator)
+        record("render", start)
+    return best
+
+
+@dataclass
+class BenchmarkResult:
+    name: str
+    """The name of the corpus and the target, like `medium/c11`"""
+    config: CorpusConfig
+    phases: Dict[str, float]
+
+    @property
+    def total(self) -> float:
+        return sum(self.phases.values())
+
+
+def run_benchmarks(configs: Dict[str, CorpusConfig], targets: List[str], repeat: int = 5) -> List[BenchmarkResult]:
+    results = []
+    for name, config in configs.items():
+        text = generate_corpus(config)
+        for target in targets:
+            results.append(BenchmarkResult(
+                name=f"{name}/{target}",
+                config=config,
+                phases=time_phases(text, target, repeat=repeat)
+            ))
+    return results
+
+
+def save_results(results: List[BenchmarkResult], path: Path):
+    data = {
+        "version": RESULTS_VERSION,
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "results": {
+            result.name: {"config": dataclasses.asdict(result.config), "phases": result.phases}
+            for result in results
+        }
+    }
+    with open(path, "wt") as f:
+        json.dump(data, f, indent=2)
+        f.write("\n")
+
+
+def load_results(path: Path) -> Dict[str, Any]:
+    with open(path, "rt") as f:
+        data = json.load(f)
+    if data.get("version") != RESULTS_VERSION:
+        raise ValueError(f"Unsupported results version in {path}: {data.get('version')}")
+    return data["results"]
+
+
+@dataclass
+class Comparison:
+    name: str
+    phase: str
+    baseline: float
+    current: float
+
+    @property
+    def ratio(self) -> float:
+        return self.current / self.baseline
+
+
+def compare_results(
+        baseline: Dict[str, Any], current: Dict[str, Any],
+        min_seconds: float = 0.0001
+) -> List[Comparison]:
+    """Compare the phases the results have in common
+
+    Phases faster than `min_seconds` in both runs are skipped,
+    since they're dominated by timer noise.
+    Benchmarks of different corpora are never compared.
+    """
+    comparisons = []
+    for name, current_result in current.items():
+        baseline_result = baseline.get(name)
+        if baseline_result is None or baseline_result["config"] != current_result["config"]:
+            continue
+        for phase, seconds in current_result["phases"].items():
+            baseline_seconds = baseline_result["phases"].get(phase)
+            if baseline_seconds is None or max(baseline_seconds, seconds) < min_seconds:
+                continue
+            comparisons.append(Comparison(name, phase, baseline_seconds, seconds))
+    return comparisons
@@ -0,0 +1,5 @@
+import sys
+
+from ivan.cli import main
+
+sys.exit(main())
@@ -7,18 +7,18 @@ from typing import List, Optional, Union, Dict, Tuple
 
 from .expr import IvanStatement
 from .lexer import Span
-from .types import TypeRef, ResolvedType, BuiltinType, BuiltinKind
+from .types import TypeRef, ResolvedType, BuiltinType, BuiltinKind, ReferenceKind, NamedTypeRef
 
 __all__ = [
     "lexer", "parser", "DocString",
     # AST Items
     "PrimaryItem", "InterfaceDef", "FunctionDeclaration", "OpaqueTypeDef",
-    "StructDef",
+    "StructDef", "ImplDef", "EnumDef",
     # AST Nodes
     "FunctionArg", "Annotation", "AnnotationValue", "IvanModule", "FunctionBody",
-    "FieldDef", "TypeMember",
+    "FieldDef", "TypeMember", "ImplFunction", "VariantDef",
     # Misc
-    "FunctionSignature",
+    "FunctionSignature", "MethodSelfArgument",
 ]
 
 AnnotationValue = Union[str, int, bool, Tuple[str]]
@@ -109,15 +109,16 @@ class FieldDef(TypeMember):
 @dataclass(frozen=True)
 class MethodSelfArgument:
     """The initial 'self' argument to the method"""
-    reference_kind: Optional[ReferenceKind]
-    """None if the method is passed by value,
-    otherwise it is the kind of reference.
-     
+    reference_kind: ReferenceKind
+    """The kind of reference.
+
     For example `&self` vs `&mut self`"""
-    resolved_type: ResolvedType
-    """The resolved type of self.
-    
-    Points to the type that declared the method"""
+    declared_type: TypeRef
+    """The type of self, which is always resolved.
+
+    Implementations of the method have different types,
+    so this is an untyped pointer (see `SelfType`)"""
+    name: str = "self"
 
 
 @dataclass(frozen=True)
@@ -169,6 +170,18 @@ class FunctionDeclaration(PrimaryItem, TypeMember):
 class InterfaceDef(PrimaryItem):
     """The definition of an interface"""
     members: Dict[str, TypeMember]
+    base: Optional[NamedTypeRef] = None
+    """The interface this one extends (if any)
+
+    The vtable of the base is embedded as the first member of this one,
+    so a pointer to this vtable is also a valid pointer to the base's.
+    """
+
+    @property
+    def methods(self) -> List[FunctionDeclaration]:
+        """The methods of this interface, in declaration order"""
+        return [member for member in self.members.values()
+                if isinstance(member, FunctionDeclaration)]
 
 
 @dataclass(frozen=True)
@@ -176,6 +189,62 @@ class StructDef(PrimaryItem):
     fields: Dict[str, FieldDef]
 
 
+@dataclass(frozen=True)
+class VariantDef(TypeMember):
+    """A variant of an enum, along with the fields it holds (if any)"""
+    fields: Dict[str, FieldDef]
+
+
+@dataclass(frozen=True)
+class EnumDef(PrimaryItem):
+    """The definition of an enum (a tagged union of variants)
+
+    Its methods are implemented separately for each variant,
+    and dispatched with a switch on the tag (instead of through a vtable).
+    """
+    members: Dict[str, TypeMember]
+
+    @property
+    def variants(self) -> List[VariantDef]:
+        """The variants of this enum, in declaration order (which is also the order of their tags)"""
+        return [member for member in self.members.values()
+                if isinstance(member, VariantDef)]
+
+    @property
+    def methods(self) -> List[FunctionDeclaration]:
+        """The methods of this enum, in declaration order"""
+        return [member for member in self.members.values()
+                if isinstance(member, FunctionDeclaration)]
+
+
 @dataclass(frozen=True)
 class OpaqueTypeDef(PrimaryItem):
     """The definition of an opaque type"""
+
+
+@dataclass(frozen=True)
+class ImplFunction:
+    """A slot of an implementation's vtable, filled by a concrete function"""
+    slot: str
+    """The name of the method (or batch slot) being implemented"""
+    function: str
+    """The name of the function implementing it"""
+    span: Span
+
+
+@dataclass(frozen=True)
+class ImplDef(PrimaryItem):
+    """An implementation of an interface, by concrete functions
+
+    Its name combines the target and the interface, like `File_Reader`.
+    """
+    interface: NamedTypeRef
+    target: NamedTypeRef
+    """The type implementing the interface"""
+    functions: Dict[str, ImplFunction]
+    """The functions implementing each slot, keyed by slot name"""
+
+    @property
+    def vtable_name(self) -> str:
+        """The name of the generated vtable constant"""
+        return f"{self.name}_vtable"
@@ -10,11 +10,16 @@ class Span:
     line: int
     column: int
 
+    def __reduce__(self):
+        # Frozen dataclasses with explicit slots can't be unpickled by default
+        return Span, (self.line, self.column)
 
-VALID_SYMBOLS = {"{", "}", ":", ";", ",", "&", "*", '@', '=', "(", ")"}
+
+VALID_SYMBOLS = {"{", "}", ":", ";", ",", "&", "*", '@', '=', "(", ")", "[", "]"}
 VALID_KEYWORDS = {"Self", "self", "interface", "fun", "raw", "mut", "own", "opaque",
                   "type", "true", "false", "opt", "field", "default", "null",
-                  "return", "struct", "impl", "for", "vtable",}
+                  "return", "struct", "impl", "for", "vtable", "atomic", "dyn",
+                  "enum", "variant",}
 
 
 class TokenType(Enum):
@@ -1,12 +1,15 @@
 import dataclasses
-from typing import List, Optional, Set
+from typing import List, Optional, Set, Dict
 
 from ivan.ast import lexer, DocString, OpaqueTypeDef, InterfaceDef, \
     FunctionDeclaration, PrimaryItem, \
     FunctionSignature, Annotation, AnnotationValue, IvanModule, FunctionBody, \
-    StructDef, FieldDef, TypeMember, SimpleArgument
+    StructDef, FieldDef, TypeMember, SimpleArgument, ImplDef, ImplFunction, MethodSelfArgument, \
+    EnumDef, VariantDef
 from ivan.ast.lexer import Token, Span, ParseException, TokenType
-from ivan.ast.types import ReferenceKind, TypeRef, ReferenceTypeRef, OptionalTypeRef, NamedTypeRef
+from ivan.ast.types import ReferenceKind, TypeRef, ReferenceTypeRef, OptionalTypeRef, NamedTypeRef, \
+    SliceTypeRef, StrTypeRef, AtomicTypeRef, DynTypeRef, SyntheticTypeRef, SelfType
+from ivan.timings import timed
 
 
 class Parser:
@@ -92,7 +95,9 @@ class Parser:
 
         implicitly running it through the lexer."""
         # TODO: Handle empty tokens
-        return Parser(list(lexer.lex_all(s)))
+        with timed("lex", "lex"):
+            tokens = list(lexer.lex_all(s))
+        return Parser(tokens)
 
     def __repr__(self):
         return f"Parser(index={self.index}, tokens={self.tokens})"
@@ -219,6 +224,17 @@ def parse_struct(parser: Parser, header: ItemHeader) -> StructDef:
     parser.expect_keyword('struct')
     start_span = parser.current_span
     name = parser.expect_identifier()
+    return StructDef(
+        name=name,
+        fields=parse_fields(parser, name, start_span),
+        doc_string=header.doc_string,
+        span=start_span,
+        annotations=header.annotations
+    )
+
+
+def parse_fields(parser: Parser, name: str, start_span: Span) -> Dict[str, FieldDef]:
+    """Parse the fields of a struct (or a variant), in braces"""
     parser.expect_symbol('{')
     fields = {}
     while True:
@@ -227,13 +243,7 @@ def parse_struct(parser: Parser, header: ItemHeader) -> StructDef:
             raise ParseException(f"Expected closing brace for {name}", start_span)
         elif token.is_symbol('}'):
             parser.pop()
-            return StructDef(
-                name=name,
-                fields=fields,
-                doc_string=header.doc_string,
-                span=start_span,
-                annotations=header.annotations
-            )
+            return fields
         else:
             member = parse_type_member(parser)
             if isinstance(member, FunctionDeclaration):
@@ -261,6 +271,13 @@ def parse_interface(parser: Parser, header: ItemHeader) -> InterfaceDef:
     parser.expect_keyword("interface")
     start_span = parser.current_span
     name = parser.expect_identifier()
+    base = None
+    if parser.peek() is not None and parser.peek().is_symbol(':'):
+        parser.pop()
+        base_span = parser.current_span
+        base = NamedTypeRef(usage_span=base_span, name=parser.expect_identifier())
+        if parser.peek() is not None and parser.peek().is_symbol(','):
+            raise ParseException(f"Interfaces can only extend a single base: {name}", parser.current_span)
     parser.expect_symbol('{')
     members = {}
     while True:
@@ -272,6 +289,7 @@ def parse_interface(parser: Parser, header: ItemHeader) -> InterfaceDef:
             return InterfaceDef(
                 name=name,
                 members=members,
+                base=base,
                 doc_string=header.doc_string,
                 span=start_span,
                 annotations=header.annotations
@@ -294,6 +312,104 @@ def parse_interface(parser: Parser, header: ItemHeader) -> InterfaceDef:
                 )
 
 
+def parse_enum(parser: Parser, header: ItemHeader) -> EnumDef:
+    header.expect_type_header(parser.current_span)
+    parser.expect_keyword("enum")
+    start_span = parser.current_span
+    name = parser.expect_identifier()
+    parser.expect_symbol('{')
+    members = {}
+    while True:
+        token = parser.peek()
+        if token is None:
+            raise ParseException(f"Expected closing brace for {name}", start_span)
+        elif token.is_symbol('}'):
+            parser.pop()
+            return EnumDef(
+                name=name,
+                members=members,
+                doc_string=header.doc_string,
+                span=start_span,
+                annotations=header.annotations
+            )
+        member = parse_type_member(parser)
+        if isinstance(member, FunctionDeclaration):
+            if not member.signature.is_method:
+                raise ParseException(f"Enum methods must take self: {name}.{member.name}", member.span)
+            elif member.body is not None:
+                raise ParseException(
+                    f"Enum methods are implemented by each variant, so can't have a body: {name}.{member.name}",
+                    member.span
+                )
+        elif not isinstance(member, VariantDef):
+            raise ParseException(
+                f"Unexpected member type: {type(member)}",
+                member.span
+            )
+        if member.name in members:
+            raise ParseException(
+                f"Duplicate member: {member.name}",
+                member.span
+            )
+        members[member.name] = member
+
+
+def parse_variant_def(parser: Parser, header: ItemHeader) -> VariantDef:
+    header.expect_type_header(parser.current_span)
+    parser.expect_keyword('variant')
+    start_span = parser.current_span
+    name = parser.expect_identifier()
+    token = parser.peek()
+    if token is not None and token.is_symbol(';'):
+        # A variant without any fields
+        parser.pop()
+        fields = {}
+    else:
+        fields = parse_fields(parser, name, start_span)
+    return VariantDef(
+        name=name,
+        span=start_span,
+        fields=fields,
+        annotations=header.annotations,
+        doc_string=header.doc_string
+    )
+
+
+def parse_impl(parser: Parser, header: ItemHeader) -> ImplDef:
+    header.expect_type_header(parser.current_span)
+    parser.expect_keyword("impl")
+    start_span = parser.current_span
+    interface = NamedTypeRef(usage_span=start_span, name=parser.expect_identifier())
+    parser.expect_keyword("for")
+    target = NamedTypeRef(usage_span=parser.current_span, name=parser.expect_identifier())
+    parser.expect_symbol('{')
+    functions = {}
+    while True:
+        token = parser.peek()
+        if token is None:
+            raise ParseException(f"Expected closing brace for impl {interface.name}", start_span)
+        elif token.is_symbol('}'):
+            parser.pop()
+            return ImplDef(
+                name=f"{target.name}_{interface.name}",
+                span=start_span,
+                doc_string=header.doc_string,
+                annotations=header.annotations,
+                interface=interface,
+                target=target,
+                functions=functions
+            )
+        parser.expect_keyword("fun")
+        slot_span = parser.current_span
+        slot = parser.expect_identifier()
+        parser.expect_symbol('=')
+        function = parser.expect_identifier()
+        parser.expect_symbol(';')
+        if slot in functions:
+            raise ParseException(f"Duplicate implementation of {slot}", slot_span)
+        functions[slot] = ImplFunction(slot=slot, function=function, span=slot_span)
+
+
 def parse_type_member(parser: Parser) -> TypeMember:
     token = parser.peek()
     if token.token_type == TokenType.DOC_COMMENT \
@@ -309,6 +425,8 @@ def parse_type_member(parser: Parser) -> TypeMember:
         return parse_function_declaration(parser, header)
     elif token.is_keyword('field'):
         return parse_field_def(parser, header)
+    elif token.is_keyword('variant'):
+        return parse_variant_def(parser, header)
     else:
         raise ParseException(f"Expected type member, but got {token.value}", token.span)
 
@@ -338,11 +456,14 @@ def parse_function_signature(parser: Parser) -> FunctionSignature:
         token = parser.peek()
         if token is None:
             raise ParseException(f"Expected closing brace", start_span)
-        elif token.token_type == TokenType.IDENTIFIER:
-            arg_name = parser.expect_identifier()
-            parser.expect_symbol(':')
-            arg_type = parse_type(parser)
-            args.append(SimpleArgument(name=arg_name, declared_type=arg_type))
+        elif token.token_type == TokenType.IDENTIFIER or (token.is_symbol('&') and not args):
+            if token.is_symbol('&'):
+                args.append(parse_self_argument(parser))
+            else:
+                arg_name = parser.expect_identifier()
+                parser.expect_symbol(':')
+                arg_type = parse_type(parser)
+                args.append(SimpleArgument(name=arg_name, declared_type=arg_type))
             trailing = parser.pop()
             if trailing.is_symbol(','):
                 continue  # continue parsing args
@@ -359,10 +480,10 @@ def parse_function_signature(parser: Parser) -> FunctionSignature:
         else:
             raise ParseException(f"Unexpected token {token.value!r}", token.span)
     t = parser.peek()
-    if t.is_symbol(';'):
+    if t.is_symbol(';') or t.is_symbol('{'):
         # TODO: Clearer handling of unit (C11's void != Rust's `()`)
         return_type = NamedTypeRef(
-            usage_span=t.span,  # The semicolin is an implicit reference (I guess)
+            usage_span=t.span,  # The semicolin (or body) is an implicit reference (I guess)
             name='unit'
         )
     elif t.is_symbol(':'):
@@ -373,6 +494,25 @@ def parse_function_signature(parser: Parser) -> FunctionSignature:
     return FunctionSignature(return_type=return_type, args=args)
 
 
+def parse_self_argument(parser: Parser) -> MethodSelfArgument:
+    start_span = parser.current_span
+    parser.expect_symbol('&')
+    token = parser.peek()
+    if token is not None and token.is_keyword('mut'):
+        kind = ReferenceKind.MUTABLE
+        parser.pop()
+    elif token is not None and token.is_keyword('raw'):
+        kind = ReferenceKind.RAW
+        parser.pop()
+    else:
+        kind = ReferenceKind.IMMUTABLE
+    parser.expect_keyword('self')
+    return MethodSelfArgument(
+        reference_kind=kind,
+        declared_type=SyntheticTypeRef(start_span, SelfType(mutable=kind != ReferenceKind.IMMUTABLE))
+    )
+
+
 def parse_function_body(parser: Parser, is_default: bool) -> FunctionBody:
     start_body_span = parser.current_span
     parser.expect_symbol('{')
@@ -444,11 +584,43 @@ def parse_type(parser: Parser) -> TypeRef:
             ref_kind = ReferenceKind.IMMUTABLE
         if ref_kind != ReferenceKind.IMMUTABLE:
             parser.pop()  # We need to eat the ref_kind token!
+        target_token = parser.peek()
+        if target_token is None:
+            raise ParseException("Unexpected EOF", parser.current_span)
+        if target_token.is_symbol('['):
+            parser.pop()
+            element = parse_type(parser)
+            parser.expect_symbol(']')
+            return SliceTypeRef(
+                usage_span=first_token.span,
+                element=element,
+                kind=ref_kind
+            )
+        elif target_token.token_type == TokenType.IDENTIFIER \
+                and target_token.value == 'str':
+            if ref_kind != ReferenceKind.IMMUTABLE:
+                raise ParseException(
+                    f"String views must be immutable, not {ref_kind.value}",
+                    first_token.span
+                )
+            parser.pop()
+            return StrTypeRef(usage_span=first_token.span)
         return ReferenceTypeRef(
             usage_span=first_token.span,
             inner=parse_type(parser),
             kind=ref_kind
         )
+    elif first_token.is_keyword('dyn'):
+        interface_span = parser.current_span
+        return DynTypeRef(
+            usage_span=first_token.span,
+            interface=NamedTypeRef(usage_span=interface_span, name=parser.expect_identifier())
+        )
+    elif first_token.is_keyword('atomic'):
+        return AtomicTypeRef(
+            usage_span=first_token.span,
+            inner=parse_type(parser)
+        )
     elif first_token.is_keyword('opt'):
         inner_type = parse_type(parser)
         if isinstance(inner_type, ReferenceTypeRef):
@@ -490,21 +662,29 @@ def parse_item(parser: Parser) -> PrimaryItem:
     if token is None:
         raise ParseException("Unexpected EOF: Expected item", parser.current_span)
     elif token.is_keyword('fun'):
-        return parse_function_declaration(parser, header)
+        func = parse_function_declaration(parser, header)
+        if func.signature.is_method:
+            raise ParseException(f"Only interface methods can take self: {func.name}", func.span)
+        return func
     elif token.is_keyword('interface'):
         return parse_interface(parser, header)
     elif token.is_keyword('struct'):
         return parse_struct(parser, header)
     elif token.is_keyword('opaque'):
         return parse_opaque_type(parser, header)
+    elif token.is_keyword('impl'):
+        return parse_impl(parser, header)
+    elif token.is_keyword('enum'):
+        return parse_enum(parser, header)
     else:
         raise ParseException(f"Expected item but got {token.value!r}", token.span)
 
 
 def parse_module(parser: Parser, name: str) -> IvanModule:
     items = []
-    while parser.peek() is not None:
-        items.append(parse_item(parser))
+    with timed("parse", "parse", module=name):
+        while parser.peek() is not None:
+            items.append(parse_item(parser))
     return IvanModule(
         items=items,
         name=name
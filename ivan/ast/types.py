@@ -6,7 +6,7 @@ from abc import ABCMeta, abstractmethod
 from dataclasses import dataclass
 from enum import Enum
 
-from ivan.ast.lexer import Span
+from ivan.ast.lexer import Span, ParseException
 
 
 class UnresolvedTypeError(RuntimeError):
@@ -42,6 +42,10 @@ class TypeRef(metaclass=ABCMeta):
         self.usage_span = usage_span
         self._resolved = None
 
+    @property
+    def is_resolved(self) -> bool:
+        return self._resolved is not None
+
     @property
     def resolved(self) -> ResolvedType:
         resolved = self._resolved
@@ -106,6 +110,70 @@ class ReferenceTypeRef(TypeRef):
             return f"{self.kind} {self.inner}"
 
 
+class SliceTypeRef(TypeRef):
+    """An unresolved slice type (`&[T]` or `&mut [T]`)"""
+    element: TypeRef
+    kind: ReferenceKind
+
+    def __init__(self, usage_span: Span, element: TypeRef, kind: ReferenceKind):
+        super().__init__(usage_span)
+        if kind not in (ReferenceKind.IMMUTABLE, ReferenceKind.MUTABLE):
+            raise ParseException(f"Invalid slice kind: {kind.value}", usage_span)
+        self.element = element
+        self.kind = kind
+
+    def __str__(self) -> str:
+        if self.kind == ReferenceKind.IMMUTABLE:
+            return f"&[{self.element}]"
+        else:
+            return f"{self.kind.value} [{self.element}]"
+
+
+class StrTypeRef(TypeRef):
+    """A (borrowed) UTF-8 string view - `&str`"""
+
+    def __str__(self) -> str:
+        return "&str"
+
+
+class SyntheticTypeRef(TypeRef):
+    """A reference to a type synthesized by the generator
+
+    These never appear in Ivan source code, so they are always resolved.
+    """
+
+    def __init__(self, usage_span: Span, resolved: ResolvedType):
+        super().__init__(usage_span)
+        self._resolved = resolved
+
+    def __str__(self) -> str:
+        return str(self._resolved)
+
+
+class AtomicTypeRef(TypeRef):
+    """An unresolved atomic type (`atomic T`)"""
+    inner: TypeRef
+
+    def __init__(self, usage_span: Span, inner: TypeRef):
+        super().__init__(usage_span)
+        self.inner = inner
+
+    def __str__(self):
+        return f"atomic {self.inner}"
+
+
+class DynTypeRef(TypeRef):
+    """An unresolved object type (`dyn Interface`)"""
+    interface: NamedTypeRef
+
+    def __init__(self, usage_span: Span, interface: NamedTypeRef):
+        super().__init__(usage_span)
+        self.interface = interface
+
+    def __str__(self):
+        return f"dyn {self.interface}"
+
+
 class OptionalTypeRef(TypeRef):
     inner: TypeRef
 
@@ -245,6 +313,7 @@ class BuiltinType(ResolvedType):
 
     def __init__(self, kind: BuiltinKind):
         super().__init__(kind.ivan_name)
+        self.kind = kind
 
     def __repr__(self):
         return f"BuiltinType({self.kind!r})"
@@ -264,8 +333,8 @@ class ReferenceType(ResolvedType):
     def __init__(self, target: ResolvedType, kind: ReferenceKind, optional: bool = False):
         super().__init__(
             ("opt " if optional else "") +
-            f"&{target.name}" if kind == ReferenceKind.IMMUTABLE
-            else f"{kind.value} {target.name}"
+            (f"&{target.name}" if kind == ReferenceKind.IMMUTABLE
+             else f"{kind.value} {target.name}")
         )
         self.optional = optional
         self.target = target
@@ -296,9 +365,206 @@ class ReferenceType(ResolvedType):
             raise AssertionError(f"Unknown kind: {self.kind}")
         assert ref_type
         if self.optional:
-            return f"Optional<{ref_type}>"
+            return f"Option<{ref_type}>"
         else:
             return ref_type
 
     def __repr__(self):
         return f"ReferenceType({self.target}, {self.kind}, optional={self.optional})"
+
+
+class UserDefinedType(ResolvedType):
+    """A type declared by an item in an Ivan module
+
+    This could be an interface, a struct, an enum or an opaque type.
+    The name is the same in Ivan, C11 and Rust.
+    """
+
+    def print_c11(self) -> str:
+        return self.name
+
+    def print_rust(self) -> str:
+        return self.name
+
+    def __repr__(self):
+        return f"UserDefinedType({self.name!r})"
+
+
+class SliceType(ResolvedType):
+    """A borrowed slice of elements
+
+    This is passed by value as a `{ptr, len}` pair, so buffers
+    can cross the FFI boundary without copying them.
+    """
+    element: ResolvedType
+    mutable: bool
+
+    def __init__(self, element: ResolvedType, mutable: bool = False):
+        super().__init__(f"&mut [{element.name}]" if mutable else f"&[{element.name}]")
+        self.element = element
+        self.mutable = mutable
+
+    def print_c11(self) -> str:
+        prefix = "IvanSliceMut" if self.mutable else "IvanSlice"
+        return f"{prefix}_{mangle_type_name(self.element)}"
+
+    def print_rust(self) -> str:
+        prefix = "IvanSliceMut" if self.mutable else "IvanSlice"
+        return f"{prefix}<'_, {self.element.print_rust()}>"
+
+    def __repr__(self):
+        return f"SliceType({self.element!r}, mutable={self.mutable})"
+
+
+class StrType(ResolvedType):
+    """A borrowed view of UTF-8 text
+
+    Like a slice of bytes, this is passed by value as `{ptr, len}`.
+    It is not null-terminated.
+    """
+
+    def __init__(self):
+        super().__init__("&str")
+
+    def print_c11(self) -> str:
+        return "IvanStr"
+
+    def print_rust(self) -> str:
+        return "IvanStr<'_>"
+
+    def __repr__(self):
+        return "StrType()"
+
+
+class SelfType(ResolvedType):
+    """The object a method is called on (`&self`)
+
+    Each implementation of an interface has its own type,
+    so the vtable only knows the object by an untyped pointer.
+    """
+    mutable: bool
+
+    def __init__(self, mutable: bool):
+        super().__init__("&mut self" if mutable else "&self")
+        self.mutable = mutable
+
+    def print_c11(self) -> str:
+        return "void*" if self.mutable else "const void*"
+
+    def print_rust(self) -> str:
+        return "*mut core::ffi::c_void" if self.mutable else "*const core::ffi::c_void"
+
+    def __repr__(self):
+        return f"SelfType(mutable={self.mutable})"
+
+
+class DynType(ResolvedType):
+    """An object implementing an interface, along with its vtable
+
+    This is passed by value as a `{self, vtable}` pair (which fits in two registers),
+    so calling a method doesn't need to load the vtable out of the object first.
+    """
+    interface: ResolvedType
+
+    def __init__(self, interface: ResolvedType):
+        super().__init__(f"dyn {interface.name}")
+        self.interface = interface
+
+    def print_c11(self) -> str:
+        return f"IvanDyn_{self.interface.print_c11()}"
+
+    def print_rust(self) -> str:
+        return f"IvanDyn<{self.interface.print_rust()}>"
+
+    def __repr__(self):
+        return f"DynType({self.interface!r})"
+
+
+_RUST_ATOMIC_BUILTINS = {
+    BuiltinKind.INT: "AtomicI32",
+    BuiltinKind.BYTE: "AtomicU8",
+    BuiltinKind.BOOLEAN: "AtomicBool",
+    BuiltinKind.USIZE: "AtomicUsize",
+    BuiltinKind.ISIZE: "AtomicIsize",
+}
+
+
+class AtomicType(ResolvedType):
+    """A value that can be accessed atomically
+
+    This can only be used for the fields of structs,
+    which are then safe to share across threads without locking.
+    Only integers, bools and references can be atomic.
+    """
+    inner: ResolvedType
+
+    def __init__(self, inner: ResolvedType):
+        super().__init__(f"atomic {inner.name}")
+        assert AtomicType.supports(inner), inner
+        self.inner = inner
+
+    @staticmethod
+    def supports(inner: ResolvedType) -> bool:
+        """Whether the specified type can be made atomic"""
+        if isinstance(inner, BuiltinType):
+            return inner.kind in _RUST_ATOMIC_BUILTINS
+        return isinstance(inner, (FixedIntegerType, ReferenceType))
+
+    def print_c11(self) -> str:
+        return f"_Atomic({self.inner.print_c11()})"
+
+    def print_rust(self) -> str:
+        inner = self.inner
+        if isinstance(inner, BuiltinType):
+            return _RUST_ATOMIC_BUILTINS[inner.kind]
+        elif isinstance(inner, FixedIntegerType):
+            return f"Atomic{'I' if inner.signed else 'U'}{inner.bits}"
+        else:
+            assert isinstance(inner, ReferenceType), inner
+            return f"AtomicPtr<{inner.target.print_rust()}>"
+
+    def print_rust_value(self) -> str:
+        """The Rust type of the values that are loaded and stored
+
+        References are loaded as raw pointers, since that's what `AtomicPtr` uses.
+        """
+        inner = self.inner
+        if isinstance(inner, ReferenceType):
+            return f"*mut {inner.target.print_rust()}"
+        else:
+            return inner.print_rust()
+
+    def __repr__(self):
+        return f"AtomicType({self.inner!r})"
+
+
+_MANGLED_REFERENCE_KINDS = {
+    ReferenceKind.IMMUTABLE: "ref",
+    ReferenceKind.MUTABLE: "mutref",
+    ReferenceKind.OWNED: "ownref",
+    ReferenceKind.RAW: "rawref",
+}
+
+
+def mangle_type_name(target: ResolvedType) -> str:
+    """Give the type a name that is a valid C identifier
+
+    This is used to name the C types that are generated per element type
+    (like slices), so `&[&mut Foo]` becomes `slice_mutref_Foo`
+    """
+    if isinstance(target, ReferenceType):
+        prefix = ("opt" if target.optional else "") + \
+            _MANGLED_REFERENCE_KINDS[target.kind]
+        return f"{prefix}_{mangle_type_name(target.target)}"
+    elif isinstance(target, SliceType):
+        prefix = "mutslice" if target.mutable else "slice"
+        return f"{prefix}_{mangle_type_name(target.element)}"
+    elif isinstance(target, StrType):
+        return "str"
+    elif isinstance(target, AtomicType):
+        return f"atomic_{mangle_type_name(target.inner)}"
+    elif isinstance(target, DynType):
+        return f"dyn_{mangle_type_name(target.interface)}"
+    else:
+        assert target.name.isidentifier(), target.name
+        return target.name
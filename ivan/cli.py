@@ -0,0 +1,350 @@
+"""The `ivan` command line interface
+
+The `build` command generates code for every `.ivan` file in the input directories.
+Each file is parsed, resolved and generated independently,
+so the files are built concurrently across `-j N` worker processes.
+The `watch` command does the same, then keeps rebuilding whenever the files change.
+The `serve` command runs a server that `ivan-client build ...` forwards builds to (see `ivan.server`).
+
+Every build pays for starting the interpreter, so the subsystems are only imported
+by the commands that need them (`ivan --version` doesn't import the parser at all).
+"""
+from __future__ import annotations
+
+import argparse
+import os
+import sys
+import time
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Dict, List, Optional, Sequence, Tuple, TYPE_CHECKING
+
+from ivan import __version__
+
+if TYPE_CHECKING:
+    from ivan.ast.lexer import Span
+    from ivan.memory import MemoryProfile
+    from ivan.pipeline import Target
+    from ivan.timings import TimingEvent, TimingRegistry
+
+SOURCE_EXTENSION = ".ivan"
+
+WRAPPER_DEFINITIONS = ("header", "source", "inline")
+"""The values of `ivan.generate.c11.WrapperDefinitions`, without having to import it"""
+
+EXIT_SUCCESS = 0
+EXIT_FAILURE = 1
+"""At least one file failed to build"""
+EXIT_USAGE = 2
+"""The command line was invalid (this matches argparse)"""
+
+
+class DuplicateModuleException(Exception):
+    """Two source files in the inputs have the same module name, so they would overwrite each other's outputs"""
+
+
+def discover_sources(inputs: Sequence[Path], allow_duplicates: bool = False) -> List[Tuple[Path, str]]:
+    """Find the source files in the inputs, along with their module names
+
+    Inputs can either be directories (which are searched recursively) or single files.
+    The module name is the path relative to the input directory,
+    so `shapes/circle.ivan` becomes the module `shapes.circle`.
+    Unless `allow_duplicates` is true, two sources with the same module name are an error.
+    """
+    sources = []
+    for input_path in inputs:
+        if input_path.is_dir():
+            for source in sorted(input_path.rglob(f"*{SOURCE_EXTENSION}")):
+                sources.append((source, module_name_for(input_path, source)))
+        else:
+            sources.append((input_path, input_path.stem))
+    if not allow_duplicates:
+        declared: Dict[str, Path] = {}
+        for source, module_name in sources:
+            existing = declared.setdefault(module_name, source)
+            if existing != source:
+                raise DuplicateModuleException(
+                    f"{existing} and {source} are both the module {module_name!r}"
+                )
+    return sources
+
+
+def module_name_for(input_dir: Path, source: Path) -> str:
+    """The name of the module declared by a source file in the input directory"""
+    relative = source.relative_to(input_dir).with_suffix("")
+    return '.'.join(relative.parts)
+
+
+@dataclass
+class BuildJob:
+    source: Path
+    module_name: str
+    targets: List[Target]
+    collect_timings: bool = False
+
+
+@dataclass
+class FileResult:
+    """The outcome of building a single source file"""
+    source: Path
+    seconds: float
+    error: Optional[str] = None
+    updated: List[Path] = field(default_factory=list)
+    outputs: List[Path] = field(default_factory=list)
+    dependencies: List[Path] = field(default_factory=list)
+    timings: List[TimingEvent] = field(default_factory=list)
+
+    @property
+    def failed(self) -> bool:
+        return self.error is not None
+
+    @property
+    def total_outputs(self) -> int:
+        return len(self.outputs)
+
+
+def describe_error(source: Path, error: Exception) -> str:
+    """Describe an error building the source, including its location (if known)"""
+    from ivan.ast.lexer import ParseException
+    from ivan.generate import CodegenException
+    from ivan.types.context import TypeResolutionException
+    span: Optional[Span] = getattr(error, "span", None)
+    if isinstance(error, (ParseException, TypeResolutionException, CodegenException, DuplicateModuleException)):
+        kind = "error"
+    elif isinstance(error, OSError):
+        kind = "I/O error"
+    else:
+        kind = f"internal error ({type(error).__name__})"
+    location = f"{source}:{span.line}:{span.column}" if span is not None else str(source)
+    return f"{location}: {kind}: {error}"
+
+
+def build_file(job: BuildJob, memory_profile: Optional[MemoryProfile] = None) -> FileResult:
+    """Build a single source file, capturing any error instead of raising it
+
+    This needs to be a top-level function, so it can run in a worker process.
+    If a memory profile is given (and active), the targets are generated one at a time,
+    and the memory retained by the module is recorded in the profile.
+    """
+    if job.collect_timings:
+        from ivan.timings import collect_timings
+        with collect_timings() as registry:
+            result = _build_file(job, memory_profile)
+        result.timings = registry.events
+        return result
+    return _build_file(job, memory_profile)
+
+
+def _build_file(job: BuildJob, memory_profile: Optional[MemoryProfile]) -> FileResult:
+    from ivan.pipeline import run_pipeline
+    start = time.perf_counter()
+    try:
+        result = run_pipeline(job.source, job.targets, module_name=job.module_name,
+                              max_workers=1 if memory_profile is not None else None)
+        if memory_profile is not None:
+            memory_profile.record_module(result.module, job.source.read_text())
+    except Exception as e:
+        return FileResult(
+            source=job.source,
+            seconds=time.perf_counter() - start,
+            error=describe_error(job.source, e)
+        )
+    return FileResult(
+        source=job.source,
+        seconds=time.perf_counter() - start,
+        updated=result.updated,
+        outputs=result.outputs,
+        dependencies=result.dependencies
+    )
+
+
+def build(jobs: Sequence[BuildJob], workers: int = 1) -> List[FileResult]:
+    """Build all the jobs, using the specified number of worker processes
+
+    The results are in the same order as the jobs.
+    """
+    if workers <= 1 or len(jobs) <= 1:
+        return [build_file(job) for job in jobs]
+    from concurrent.futures import ProcessPoolExecutor
+    with ProcessPoolExecutor(max_workers=min(workers, len(jobs))) as executor:
+        return list(executor.map(build_file, jobs))
+
+
+def create_targets(args: argparse.Namespace) -> List[Target]:
+    from ivan.generate.c11 import C11Options, WrapperDefinitions
+    from ivan.generate.cache import FragmentCache
+    from ivan.pipeline import C11Target, RustTarget
+    cache = FragmentCache(args.cache_dir) if args.cache_dir is not None else None
+    targets: List[Target] = []
+    if args.c_out is not None:
+        options = C11Options(
+            pointer_attributes=args.pointer_attributes,
+            wrapper_definitions=WrapperDefinitions(args.definitions),
+            source_shards=args.shards
+        )
+        targets.append(C11Target(args.c_out, options, split=args.split, cache=cache))
+    if args.rust_out is not None:
+        targets.append(RustTarget(args.rust_out, cache=cache))
+    return targets
+
+
+def _positive_int(text: str) -> int:
+    value = int(text)
+    if value < 1:
+        raise argparse.ArgumentTypeError(f"must be at least 1: {value}")
+    return value
+
+
+def _add_build_arguments(parser: argparse.ArgumentParser):
+    """Add the arguments shared by all the commands that build code"""
+    parser.add_argument("inputs", nargs="+", type=Path, metavar="INPUT",
+                        help="directories to search for .ivan files (or individual files)")
+    parser.add_argument("--c-out", type=Path, metavar="DIR",
+                        help="the output root for the generated C headers (and sources)")
+    parser.add_argument("--rust-out", type=Path, metavar="DIR",
+                        help="the output root for the generated Rust modules")
+    parser.add_argument("--cache-dir", type=Path, metavar="DIR",
+                        help="persist the generated fragments, so later builds can reuse them")
+    parser.add_argument("-v", "--verbose", action="store_true",
+                        help="print the outcome of every file, not just the failures")
+    c11_group = parser.add_argument_group("C options")
+    c11_group.add_argument("--split", action="store_true",
+                           help="generate a header per type, plus an umbrella header")
+    c11_group.add_argument("--definitions", choices=WRAPPER_DEFINITIONS, default="header",
+                           help="where to define the generated functions (default: %(default)s)")
+    c11_group.add_argument("--shards", type=_positive_int, default=1,
+                           help="the number of source files to split the definitions across")
+    c11_group.add_argument("--pointer-attributes", action="store_true",
+                           help="mark pointers with restrict and nonnull attributes")
+
+
+def create_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(prog="ivan", description="Generate FFI bindings from Ivan declarations")
+    parser.add_argument("--version", action="version", version=f"%(prog)s {__version__}")
+    commands = parser.add_subparsers(dest="command", metavar="COMMAND", required=True)
+    build_parser = commands.add_parser("build", help="generate code for all the .ivan files in the inputs")
+    _add_build_arguments(build_parser)
+    build_parser.add_argument("-j", "--jobs", type=_positive_int, default=os.cpu_count() or 1,
+                              help="the number of files to build in parallel (default: %(default)s)")
+    build_parser.add_argument("--timings", action="store_true",
+                              help="print how long each phase (and the slowest files and items) took")
+    build_parser.add_argument("--trace", type=Path, metavar="PATH",
+                              help="write the timings of every file and item as a Chrome trace")
+    build_parser.add_argument("--memory-profile", action="store_true",
+                              help="report the memory used by each phase, the top allocation sites "
+                                   "and the AST types (this builds one file at a time, and is much slower)")
+    build_parser.add_argument("--depfile", type=Path, metavar="PATH",
+                              help="write a Makefile-style depfile (which ninja also accepts), "
+                                   "listing the sources each output depends on")
+    watch_parser = commands.add_parser("watch", help="rebuild the outputs whenever the inputs change")
+    _add_build_arguments(watch_parser)
+    watch_parser.add_argument("--poll", action="store_true",
+                              help="poll for changes, even if inotify is available")
+    watch_parser.add_argument("--interval", type=float, default=0.1, metavar="SECONDS",
+                              help="how often to poll for changes (default: %(default)s)")
+    serve_parser = commands.add_parser("serve", help="run a build server, which keeps its caches warm between builds")
+    serve_parser.add_argument("--socket", metavar="PATH",
+                              help="the Unix socket to listen on "
+                                   "(default: $IVAN_SOCKET, or ivan.sock in the runtime directory)")
+    return parser
+
+
+def check_build_arguments(args: argparse.Namespace, parser: argparse.ArgumentParser):
+    if args.c_out is None and args.rust_out is None:
+        parser.error(f"{args.command}: at least one of --c-out or --rust-out is required")
+    for input_path in args.inputs:
+        if not input_path.exists():
+            parser.error(f"{args.command}: input does not exist: {input_path}")
+
+
+def run_build(args: argparse.Namespace, parser: argparse.ArgumentParser) -> int:
+    check_build_arguments(args, parser)
+    try:
+        sources = discover_sources(args.inputs)
+    except DuplicateModuleException as e:
+        parser.error(f"{args.command}: {e}")
+    targets = create_targets(args)
+    for target in targets:
+        target.output_dir.mkdir(parents=True, exist_ok=True)
+    # A memory profile is already the active registry, which collecting
+    # the timings of each file would replace (so it would miss every event)
+    collect_timings = (args.timings or args.trace is not None) and not args.memory_profile
+    jobs = [BuildJob(source, module_name, targets, collect_timings) for source, module_name in sources]
+    start = time.perf_counter()
+    if args.memory_profile:
+        from ivan.memory import MemoryProfile
+        from ivan.timings import collect_timings
+        profile = MemoryProfile()
+        with profile.tracing(), collect_timings(profile):
+            results = [build_file(job, profile) for job in jobs]
+        return report_build(args, results, time.perf_counter() - start, profile)
+    results = build(jobs, workers=args.jobs)
+    return report_build(args, results, time.perf_counter() - start)
+
+
+def report_build(
+        args: argparse.Namespace, results: Sequence[FileResult], elapsed: float,
+        timings: Optional[TimingRegistry] = None
+) -> int:
+    """Print a summary of the build (and write its depfile), returning the exit code
+
+    Unless the timings are given, they are taken from the results.
+    With `--memory-profile`, the timings must be the `MemoryProfile`.
+    """
+    if not results:
+        print(f"ivan build: no {SOURCE_EXTENSION} files found", file=sys.stderr)
+        return EXIT_USAGE
+    failures = [result for result in results if result.failed]
+    if args.verbose:
+        for result in results:
+            if not result.failed:
+                print(f"{result.source}: updated {len(result.updated)} of {result.total_outputs} outputs "
+                      f"({result.seconds * 1000:.2f} ms)")
+    num_updated = sum(len(result.updated) for result in results)
+    num_outputs = sum(result.total_outputs for result in results)
+    print(f"Built {len(results) - len(failures)} of {len(results)} files in {elapsed:.2f} s "
+          f"(updated {num_updated} of {num_outputs} outputs)")
+    if args.timings or args.trace is not None:
+        if timings is None:
+            from ivan.timings import TimingRegistry
+            timings = TimingRegistry([event for result in results for event in result.timings])
+        if args.timings:
+            print()
+            print(timings.summary())
+        if args.trace is not None:
+            timings.write_chrome_trace(args.trace)
+    if args.memory_profile:
+        print()
+        print(timings.report())
+    if args.depfile is not None and not failures:
+        from ivan.generate.output import OutputTracker, format_depfile
+        OutputTracker().write_text(args.depfile, format_depfile([
+            (output, result.dependencies) for result in results for output in result.outputs
+        ]))
+    if failures:
+        print(f"{len(failures)} file(s) failed:", file=sys.stderr)
+        for result in failures:
+            print(f"  {result.error}", file=sys.stderr)
+        return EXIT_FAILURE
+    return EXIT_SUCCESS
+
+
+def main(argv: Optional[Sequence[str]] = None) -> int:
+    parser = create_parser()
+    args = parser.parse_args(argv)
+    if args.command == "build":
+        return run_build(args, parser)
+    elif args.command == "watch":
+        check_build_arguments(args, parser)
+        from ivan.watch import run_watch
+        return run_watch(args.inputs, create_targets(args), poll=args.poll,
+                         interval=args.interval, verbose=args.verbose)
+    elif args.command == "serve":
+        from ivan.client import default_socket_path
+        from ivan.server import run_server
+        return run_server(args.socket or default_socket_path())
+    raise AssertionError(f"Unknown command: {args.command}")
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,88 @@
+"""A tiny client, which forwards builds to a running `ivan serve`
+
+This only depends on the standard library, so it starts much faster
+than importing the parser and code generators for every build.
+If no server is running, the build runs in this process instead.
+
+Each connection carries a single request and response, both encoded as JSON.
+The request is `{"cwd": ..., "argv": [...]}` (or `{"command": "shutdown"}`),
+and the response is `{"exit_code": ..., "stdout": ..., "stderr": ...}`.
+"""
+import argparse
+import json
+import os
+import socket
+import sys
+import tempfile
+from typing import Any, Dict, Optional, Sequence
+
+
+def default_socket_path() -> str:
+    """The socket used by default, which can be overridden with `$IVAN_SOCKET`"""
+    path = os.environ.get("IVAN_SOCKET")
+    if path:
+        return path
+    runtime_dir = os.environ.get("XDG_RUNTIME_DIR")
+    if runtime_dir:
+        return os.path.join(runtime_dir, "ivan.sock")
+    return os.path.join(tempfile.gettempdir(), f"ivan-{os.getuid()}.sock")
+
+
+def send_request(socket_path: str, request: Dict[str, Any]) -> Dict[str, Any]:
+    """Send a request to the server, and wait for its response
+
+    Raises an `OSError` (like `FileNotFoundError`) if the server isn't running.
+    The server must belong to the current user, since it runs builds on their behalf
+    (otherwise this raises a `PermissionError`).
+    """
+    if os.stat(socket_path).st_uid != os.getuid():
+        raise PermissionError(f"{socket_path} belongs to another user")
+    with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as connection:
+        connection.connect(socket_path)
+        connection.sendall(json.dumps(request).encode("utf-8"))
+        connection.shutdown(socket.SHUT_WR)
+        chunks = []
+        while True:
+            chunk = connection.recv(64 * 1024)
+            if not chunk:
+                break
+            chunks.append(chunk)
+    return json.loads(b''.join(chunks).decode("utf-8"))
+
+
+def main(argv: Optional[Sequence[str]] = None) -> int:
+    parser = argparse.ArgumentParser(
+        prog="ivan-client",
+        description="Forward a command (like `build ...`) to a running `ivan serve`"
+    )
+    parser.add_argument("--socket", default=default_socket_path(), metavar="PATH",
+                        help="the socket the server is listening on (default: %(default)s)")
+    parser.add_argument("--shutdown", action="store_true", help="stop the server")
+    parser.add_argument("argv", nargs=argparse.REMAINDER, metavar="COMMAND ...",
+                        help="the command to run, with the same arguments as `ivan`")
+    args = parser.parse_args(argv)
+    if args.shutdown:
+        request = {"command": "shutdown"}
+    elif args.argv:
+        request = {"cwd": os.getcwd(), "argv": args.argv}
+    else:
+        parser.error("expected a command")
+    try:
+        response = send_request(args.socket, request)
+    except (FileNotFoundError, ConnectionRefusedError):
+        if args.shutdown:
+            print(f"ivan-client: no server is listening on {args.socket}", file=sys.stderr)
+            return 1
+        # Fall back to building in this process (which is slower, but still works)
+        from ivan.cli import main as ivan_main
+        return ivan_main(args.argv)
+    except PermissionError as e:
+        print(f"ivan-client: {e}", file=sys.stderr)
+        return 1
+    sys.stdout.write(response.get("stdout", ""))
+    sys.stderr.write(response.get("stderr", ""))
+    return response["exit_code"]
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -3,13 +3,12 @@ from abc import ABCMeta, abstractmethod
 from dataclasses import dataclass
 from typing import Dict, List
 
-from ivan.compiler.types import IvanType, BuiltinType, BuiltinKind
-
 from ivan import ast
-from ivan.ast import FunctionBody, ResolvedType, FunctionArg, MethodSelfArgument
+from ivan.ast import FunctionBody, ResolvedType, FunctionSignature
 from ivan.ast.expr import IvanExpr, NullExpr, StatementVisitor
 from ivan.ast.lexer import Span
 from ivan.generate import CodeWriter
+from ivan.types import IvanType
 
 
 class CompileException(Exception):
@@ -22,7 +21,7 @@ class CompileException(Exception):
     def __str__(self):
         # TODO: This seems inconsistent with other error printing
         # We need a more consistent way to handle error spans :p
-        return str(super()) + f" @ {self.span}"
+        return super().__str__() + f" @ {self.span}"
 
 
 class IncompatibleTypeException(CompileException):
@@ -58,6 +57,10 @@ class CodeCompiler(StatementVisitor, metaclass=ABCMeta):
         self.writer = writer
         self.func_signature = func_signature
 
+    def compile_body(self, body: FunctionBody):
+        for statement in body.statements:
+            statement.visit(self)
+
     def compile_expr(self, expr: IvanExpr, desired_type: IvanType) -> CompiledExpr:
         if isinstance(expr, NullExpr):
             return self.compile_null_expr(expr, desired_type)
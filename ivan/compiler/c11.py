@@ -1,20 +1,20 @@
 from ivan.ast.expr import ReturnStatement, NullExpr
 from ivan.compiler import CodeCompiler, CompileException, IvanType, CompiledExpr, IncompatibleTypeException
-from ivan.compiler.types import ReferenceType
+from ivan.types import ReferenceType
 
 
 class C11CodeCompiler(CodeCompiler):
     def visit_return(self, r: ReturnStatement):
         self.writer.write('return')
         if r.value is None:
-            if self.func_signature.is_unit_return:
+            if not self.func_signature.is_unit_return:
                 raise CompileException(
                     f"Expected a {self.func_signature.return_type!r}, "
                     "but got no return value",
                     span=r.span
                 )
         else:
-            value = self.compile_expr(r.value, desired_type=self.func_signature.return_type)
+            value = self.compile_expr(r.value, desired_type=self.func_signature.return_type.resolved)
             self.writer.write(f' {value.code}')
         self.writer.writeln(';')
 
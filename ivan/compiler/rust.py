@@ -0,0 +1,38 @@
+from ivan.ast.expr import ReturnStatement, NullExpr
+from ivan.compiler import CodeCompiler, CompileException, IvanType, CompiledExpr, IncompatibleTypeException
+from ivan.types import ReferenceType, ReferenceKind
+
+
+class RustCodeCompiler(CodeCompiler):
+    def visit_return(self, r: ReturnStatement):
+        self.writer.write('return')
+        if r.value is None:
+            if not self.func_signature.is_unit_return:
+                raise CompileException(
+                    f"Expected a {self.func_signature.return_type!r}, "
+                    "but got no return value",
+                    span=r.span
+                )
+        else:
+            value = self.compile_expr(r.value, desired_type=self.func_signature.return_type.resolved)
+            self.writer.write(f' {value.code}')
+        self.writer.writeln(';')
+
+    def compile_null_expr(self, expr: NullExpr, desired_type: IvanType) -> CompiledExpr:
+        if isinstance(desired_type, ReferenceType) and desired_type.optional:
+            if desired_type.kind in (ReferenceKind.OWNED, ReferenceKind.RAW):
+                # These are raw pointers in Rust
+                code = "core::ptr::null_mut()"
+            else:
+                code = "None"
+            return CompiledExpr(
+                original=expr,
+                static_type=desired_type,
+                code=code
+            )
+        else:
+            raise IncompatibleTypeException(
+                desired_type=desired_type,
+                actual_type="null reference",
+                span=expr.span
+            )
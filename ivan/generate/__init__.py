@@ -1,28 +1,294 @@
+import dataclasses
 from dataclasses import dataclass
 from abc import ABCMeta, abstractmethod
 from contextlib import contextmanager
-from typing import ContextManager, Optional, Iterable, List
+from enum import Enum
+from typing import ContextManager, Optional, Iterable, List, Iterator, Set, Union, Dict, Tuple, TextIO, \
+    Callable
 
-from ivan.ast import IvanModule, OpaqueTypeDef, InterfaceDef, FunctionDeclaration, DocString, FunctionBody
-from ivan.types import IvanType
+from ivan.ast import IvanModule, OpaqueTypeDef, InterfaceDef, FunctionDeclaration, DocString, FunctionBody, \
+    PrimaryItem, StructDef, FieldDef, FunctionSignature, SimpleArgument, Annotation, AnnotationValue, ImplDef, \
+    EnumDef, VariantDef, MethodSelfArgument
+from ivan.ast.types import SyntheticTypeRef
+from ivan.types import IvanType, ReferenceType, SliceType, StrType, AtomicType, DynType, FixedIntegerType, \
+    UserDefinedType
+from ivan.generate.cache import FragmentCache, item_fingerprint
+from ivan.timings import timed
 from ivan.types.context import TypeContext
 
 
+def _signature_types(signature: FunctionSignature) -> Iterator[IvanType]:
+    for arg in signature.args:
+        if isinstance(arg, SimpleArgument):
+            yield arg.declared_type.resolved
+    yield signature.return_type.resolved
+
+
+def _nested_types(target: IvanType) -> Iterator[IvanType]:
+    if isinstance(target, ReferenceType):
+        yield from _nested_types(target.target)
+    elif isinstance(target, SliceType):
+        yield from _nested_types(target.element)
+    elif isinstance(target, AtomicType):
+        yield from _nested_types(target.inner)
+    elif isinstance(target, DynType):
+        yield from _nested_types(target.interface)
+    yield target
+
+
+def direct_item_types(item: PrimaryItem) -> List[IvanType]:
+    """The resolved types directly referenced by the item
+
+    Unlike `item_types`, this doesn't include nested types.
+    """
+    direct = []
+    if isinstance(item, FunctionDeclaration):
+        direct.extend(_signature_types(item.signature))
+    elif isinstance(item, InterfaceDef):
+        if item.base is not None:
+            direct.append(item.base.resolved)
+        for member in item.members.values():
+            if isinstance(member, FunctionDeclaration):
+                direct.extend(_signature_types(member.signature))
+            elif isinstance(member, FieldDef):
+                direct.append(member.static_type.resolved)
+    elif isinstance(item, StructDef):
+        direct.extend(field.static_type.resolved for field in item.fields.values())
+    elif isinstance(item, EnumDef):
+        for variant in item.variants:
+            direct.extend(field.static_type.resolved for field in variant.fields.values())
+        for method in item.methods:
+            direct.extend(_signature_types(method.signature))
+    elif isinstance(item, ImplDef):
+        # The vtable needs the complete interface, which declares everything else
+        direct.append(item.interface.resolved)
+    return direct
+
+
+def item_types(item: PrimaryItem) -> Iterator[IvanType]:
+    """All the resolved types referenced by the item
+
+    Nested types (like the element of a slice) are yielded
+    before the types that contain them.
+    """
+    for target in direct_item_types(item):
+        yield from _nested_types(target)
+
+
+def module_file_name(module: IvanModule, extension: str) -> str:
+    """The name of a file generated for the module, like `ivan_basic.h`"""
+    return module.name.replace('.', '_') + extension
+
+
+@dataclass(frozen=True)
+class AnnotationSchema:
+    """The values accepted by an annotation
+
+    Each value has a type and a default.
+    An annotation without any values accepts no parentheses.
+    """
+    name: str
+    values: Dict[str, Tuple[type, AnnotationValue]] = dataclasses.field(default_factory=dict)
+
+    def parse(self, annotation: Annotation, target: str) -> Dict[str, AnnotationValue]:
+        """Check the annotation against the schema, filling in the defaults
+
+        The target is the name of the annotated item (for error messages).
+        """
+        assert annotation.name == self.name
+        actual_values = annotation.values or {}
+        if actual_values.keys() - self.values.keys():
+            if not self.values:
+                raise CodegenException(f"@{self.name} doesn't accept any values: {target}")
+            raise CodegenException(f"{self.name} has forbidden "
+                                   f"keys for {target}")
+        result = {}
+        for key, (expected_type, default) in self.values.items():
+            value = actual_values.get(key, default)
+            if type(value) is not expected_type:
+                raise CodegenException(f"{self.name}.{key} must be a {expected_type.__name__}")
+            result[key] = value
+        return result
+
+
+GENERATE_WRAPPERS_SCHEMA = AnnotationSchema("GenerateWrappers", {
+    "indirect_vtable": (bool, True),
+    "include_doc": (bool, True),
+    "prefix": (str, ""),
+})
+BATCH_SCHEMA = AnnotationSchema("Batch")
+
+
+class OptimizationHint(Enum):
+    """Performance annotations for functions and interface methods
+
+    The enum's value is the name of the annotation.
+    """
+    PURE = "Pure"
+    """No side effects, and the result only depends on the arguments and global memory"""
+    CONST = "Const"
+    """No side effects, and the result only depends on the arguments"""
+    HOT = "Hot"
+    """Called frequently, so it should be optimized aggressively"""
+    COLD = "Cold"
+    """Rarely called, so calls to it are considered unlikely"""
+    NO_RETURN = "NoReturn"
+    """Never returns to the caller"""
+
+    @property
+    def schema(self) -> AnnotationSchema:
+        return AnnotationSchema(self.value)
+
+
+def optimization_hints(func: FunctionDeclaration) -> List[OptimizationHint]:
+    """The optimization hints the function is annotated with"""
+    hints = []
+    for hint in OptimizationHint:
+        annotation = func.get_annotation(hint.value)
+        if annotation is not None:
+            hint.schema.parse(annotation, target=func.name)
+            hints.append(hint)
+    if OptimizationHint.HOT in hints and OptimizationHint.COLD in hints:
+        raise CodegenException(f"Function can't be both @Hot and @Cold: {func.name}")
+    if OptimizationHint.NO_RETURN in hints:
+        if not func.signature.is_unit_return:
+            raise CodegenException(f"@NoReturn functions must return unit: {func.name}")
+        if OptimizationHint.PURE in hints or OptimizationHint.CONST in hints:
+            raise CodegenException(f"@NoReturn functions can't be @Pure or @Const: {func.name}")
+    elif OptimizationHint.PURE in hints or OptimizationHint.CONST in hints:
+        if func.signature.is_unit_return:
+            raise CodegenException(f"@Pure and @Const functions must return a value: {func.name}")
+    return hints
+
+
+BATCH_RESERVED_NAMES = {"results", "count", "i", "batch_ptr", "func_ptr"}
+"""The names of the extra arguments to batch methods, and the locals of their wrappers"""
+
+
+def is_batch_method(method: FunctionDeclaration) -> bool:
+    """If the method is annotated with `@Batch`
+
+    Batch methods get an extra vtable slot (`<name>_batch`),
+    which takes arrays of arguments and results plus a count.
+    """
+    annotation = method.get_annotation("Batch")
+    if annotation is None:
+        return False
+    BATCH_SCHEMA.parse(annotation, target=method.name)
+    if OptimizationHint.NO_RETURN in optimization_hints(method):
+        raise CodegenException(f"@Batch methods can't be @NoReturn: {method.name}")
+    if method.body is not None:
+        raise CodegenException(
+            f"@Batch methods can't have a default implementation: {method.name}"
+        )
+    for arg in method.signature.args:
+        if arg.name in BATCH_RESERVED_NAMES:
+            raise CodegenException(
+                f"@Batch methods can't have an argument named {arg.name!r}: {method.name}"
+            )
+    return True
+
+
+DYN_RESERVED_NAMES = {"object"}
+"""The names of the extra arguments to the wrappers called on a `dyn` object"""
+
+
+VARIANT_RESERVED_NAMES = {"fields"}
+"""The names of the extra arguments to the functions implementing each variant"""
+
+
+def discriminant_type(enum: EnumDef) -> FixedIntegerType:
+    """The smallest unsigned integer that can hold the tag of every variant
+
+    This is almost always a `u8`, which keeps the tag (and any padding after it) small.
+    """
+    for bits in (8, 16, 32):
+        if len(enum.variants) <= 2 ** bits:
+            return FixedIntegerType(bits, signed=False)
+    raise CodegenException(f"Too many variants in {enum.name}: {len(enum.variants)}")
+
+
+@dataclass(frozen=True)
+class WrapperOptions:
+    """The options for an interface's `@GenerateWrappers` annotation"""
+    indirect_vtable: bool
+    """If we should accept a pointer to the vtable instead
+    of passing by value (default=True)"""
+    include_doc: bool
+    """If we should copy the documentation to the generated method"""
+    prefix: str
+    """The prefix for the generated method
+
+    This only applies if the use_prefixes option is true
+    If the string is empty, there will be no prefix (default)"""
+
+    @staticmethod
+    def parse(interface: InterfaceDef) -> "WrapperOptions":
+        generate_annotation = interface.get_annotation("GenerateWrappers")
+        if generate_annotation is None:
+            raise CodegenException(f"Missing @GenerateWrappers for {interface.name}")
+        return WrapperOptions(**GENERATE_WRAPPERS_SCHEMA.parse(
+            generate_annotation, target=interface.name
+        ))
+
+    def wrapper_name(self, method: FunctionDeclaration, use_prefixes: bool = True) -> str:
+        if self.prefix and use_prefixes:
+            return f"{self.prefix}_{method.name}"
+        else:
+            return method.name
+
+
 @dataclass(frozen=True)
 class VTableAccess:
     code: str
 
 
+_INDENT_CACHE = [""]
+"""Cached indentation prefixes, indexed by the indentation level"""
+
+
+def _indent_prefix(level: int) -> str:
+    try:
+        return _INDENT_CACHE[level]
+    except IndexError:
+        while len(_INDENT_CACHE) <= level:
+            _INDENT_CACHE.append("    " * len(_INDENT_CACHE))
+        return _INDENT_CACHE[level]
+
+
 class CodeWriter:
+    """Writes indented lines of code
+
+    By default, the lines are kept in memory until the writer is converted to a string.
+    If a `sink` is given, lines are instead buffered and streamed into it
+    once the buffer reaches `flush_threshold` characters.
+    The rest of the output is written by `flush()`, which must be called at the end.
+    """
     current_indent: int
-    __slots__ = "_lines", "current_indent", "_current_line_buffer"
+    flush_threshold: int
+    __slots__ = "_lines", "current_indent", "_current_line_buffer", \
+        "_sink", "_pending_size", "_has_written_line", "flush_threshold", "_captured"
 
-    def __init__(self):
+    DEFAULT_FLUSH_THRESHOLD = 64 * 1024
+    """The default number of buffered characters before flushing to the sink"""
+
+    def __init__(self, sink: Optional[TextIO] = None, flush_threshold: int = DEFAULT_FLUSH_THRESHOLD):
         self._lines = []
         self.current_indent = 0
         self._current_line_buffer = []
+        self._sink = sink
+        self._pending_size = 0
+        self._has_written_line = False
+        self.flush_threshold = flush_threshold
+        self._captured = None
+
+    @property
+    def is_streaming(self) -> bool:
+        return self._sink is not None
 
     def lines(self) -> Iterable[str]:
+        if self.is_streaming:
+            raise RuntimeError("Lines have already been streamed to the sink")
         yield from self._lines
         if self._current_line_buffer:
             yield ''.join(self._current_line_buffer)
@@ -30,50 +296,86 @@ class CodeWriter:
     def writeln(self, s: Optional[str] = None) -> "CodeWriter":
         if s:
             self.write(s)
-        self.write('\n')
+        self._finish_line()
         return self
 
-    def _flush_buffer(self):
+    def _emit_line(self, line: str):
+        if self._captured is not None:
+            self._captured.append(line)
+            return
+        if self._sink is None:
+            self._lines.append(line)
+            return
+        # Lines are separated (not terminated) by newlines, exactly like `str()`
+        if self._has_written_line:
+            self._lines.append('\n')
+            self._pending_size += 1
+        self._has_written_line = True
+        self._lines.append(line)
+        self._pending_size += len(line)
+        if self._pending_size >= self.flush_threshold:
+            self._flush_pending()
+
+    def _flush_pending(self):
+        self._sink.write(''.join(self._lines))
+        self._lines.clear()
+        self._pending_size = 0
+
+    def _finish_line(self):
         buffer = self._current_line_buffer
-        if buffer:
-            self._lines.append(
-                "    " * self.current_indent +
-                ''.join(buffer)
-            )
+        text = ''.join(buffer)
         buffer.clear()
-
-    def _write_multiline(self, s: str, first_newline: int):
-        assert 0 <= first_newline < len(s)
-        self._flush_buffer()
-        last_written = 0
-        newline_index = first_newline
-        buffer = []
-        indent = "    " * self.current_indent
-        while True:
-            buffer.append(indent)
-            buffer.append(s[last_written:newline_index])
-            self._lines.append('\n')
-            last_written = newline_index + 1
-            if last_written >= len(s): return
-            newline_index = s.find('\n', last_written)
-            if newline_index < 0:
-                break
-        self._current_line_buffer.append(s[last_written:len(s)])
+        # Blank lines are never indented
+        self._emit_line(_indent_prefix(self.current_indent) + text if text else '')
 
     def write(self, s: str) -> "CodeWriter":
         first_newline = s.find('\n')
-        if first_newline >= 0:
-            if first_newline == 0:
-                if self._current_line_buffer:
-                    self._flush_buffer()
-                else:
-                    self._lines.append('')
-                return self
-            self._write_multiline(s, first_newline)
-        else:
+        if first_newline < 0:
             self._current_line_buffer.append(s)
+            return self
+        parts = s.split('\n')
+        for part in parts[:-1]:
+            self._current_line_buffer.append(part)
+            self._finish_line()
+        if parts[-1]:
+            self._current_line_buffer.append(parts[-1])
         return self
 
+    def flush(self):
+        """Write everything to the sink, including any unfinished line
+
+        This does nothing if the writer isn't streaming.
+        """
+        if self._sink is None:
+            return
+        if self._current_line_buffer:
+            self._emit_line(''.join(self._current_line_buffer))
+            self._current_line_buffer.clear()
+        self._flush_pending()
+        self._sink.flush()
+
+    @contextmanager
+    def capture_lines(self) -> ContextManager[List[str]]:
+        """Capture the lines that are written, instead of outputting them
+
+        The captured lines can be output later with `write_lines`.
+        Captures can be nested, in which case only the innermost one sees the lines.
+        """
+        assert not self._current_line_buffer, "Unfinished line"
+        outer = self._captured
+        captured = self._captured = []
+        try:
+            yield captured
+        finally:
+            self._captured = outer
+        assert not self._current_line_buffer, "Unfinished line"
+
+    def write_lines(self, lines: Iterable[str]):
+        """Output already indented lines, as returned by `capture_lines`"""
+        assert not self._current_line_buffer, "Unfinished line"
+        for line in lines:
+            self._emit_line(line)
+
     @contextmanager
     def with_indent(self) -> ContextManager["CodeWriter"]:
         self.current_indent += 1
@@ -92,94 +394,349 @@ class CodeGenerator(CodeWriter, metaclass=ABCMeta):
     """The target module we're generating"""
     _queued_wrappers: Optional[List[InterfaceDef]]
     """The list of interfaces want to generate wrappers for"""
+    _declared_slices: Set[Union[SliceType, StrType]]
+    """The slice types that have already been declared"""
+    _declared_dyn_types: Set[DynType]
+    """The object types that have already been declared"""
+    cache: Optional[FragmentCache]
+    """The cache of the code generated for each item (if any)"""
+    source_definitions: List[Tuple[str, List[str]]]
+    """Function definitions for separate source files, as `(name, lines)` pairs
 
-    def __init__(self, module: IvanModule, context: TypeContext):
-        super(CodeGenerator, self).__init__()
+    Only used by generators that can separate declarations from definitions.
+    """
+
+    def __init__(
+            self, module: IvanModule, context: TypeContext,
+            sink: Optional[TextIO] = None,
+            cache: Optional[FragmentCache] = None
+    ):
+        super(CodeGenerator, self).__init__(sink=sink)
+        self.cache = cache
+        self.source_definitions = []
         self.context = context
         self.module = context.resolve_module(module)
         self._queued_wrappers = []
+        self._declared_slices = set()
+        self._declared_dyn_types = set()
+
+    @property
+    def declared_items(self) -> List[PrimaryItem]:
+        """The items declared by this generator
+
+        By default, this is every item in the module.
+        """
+        return self.module.items
+
+    def referenced_types(self) -> Iterator[IvanType]:
+        """All the resolved types referenced by the declared items"""
+        for item in self.declared_items:
+            yield from item_types(item)
 
     def declare_types(self):
-        for item in self.module.items:
-            # TODO: Visitor pattern?
-            wrapper_annotation = item.get_annotation("GenerateWrappers")
-            if wrapper_annotation is not None:
+        with timed("declare_types", "generate", module=self.module.name, generator=type(self).__name__):
+            for item in self.declared_items:
+                if not isinstance(item, FunctionDeclaration):
+                    for hint in OptimizationHint:
+                        if item.get_annotation(hint.value) is not None:
+                            raise CodegenException(
+                                f"@{hint.value} is only allowed on functions: {item.name}"
+                            )
                 if isinstance(item, InterfaceDef):
-                    self._queued_wrappers.append(item)
-                else:
-                    raise CodegenException(
-                        f"Unable to generate wrappers "
-                        f"for {item.name!r}: not an interface"
-                    )
-            if isinstance(item, InterfaceDef):
-                self._declare_interface(item)
-            elif isinstance(item, FunctionDeclaration):
-                self._declare_top_level_function(item)
-            elif isinstance(item, OpaqueTypeDef):
-                self._declare_opaque_type(item)
+                    self.check_batch_slots(item)
+                wrapper_annotation = item.get_annotation("GenerateWrappers")
+                referenced_types = list(item_types(item))
+                if wrapper_annotation is not None and isinstance(item, InterfaceDef) and \
+                        any(method.signature.is_method for _, _, method in self.wrapped_methods(item)):
+                    # The wrappers for methods with a receiver also accept objects
+                    referenced_types.append(DynType(self.context.resolve_type_name(item.name, item.span)))
+                for referenced in referenced_types:
+                    if isinstance(referenced, (SliceType, StrType)) and \
+                            referenced not in self._declared_slices:
+                        self._declared_slices.add(referenced)
+                        self._declare_slice_type(referenced)
+                    elif isinstance(referenced, DynType) and referenced not in self._declared_dyn_types:
+                        self._declared_dyn_types.add(referenced)
+                        self._declare_dyn_type(referenced)
+                # TODO: Visitor pattern?
+                if wrapper_annotation is not None:
+                    if isinstance(item, InterfaceDef):
+                        self._queued_wrappers.append(item)
+                    else:
+                        raise CodegenException(
+                            f"Unable to generate wrappers "
+                            f"for {item.name!r}: not an interface"
+                        )
+                self.write_cached(item, "declaration", lambda: self._declare_item(item))
+
+    def check_batch_slots(self, interface: InterfaceDef):
+        """Check that the extra vtable slot of each batch method is free
+
+        This includes the members (and batch slots) inherited from the bases.
+        """
+        declaring = [interface, *self.context.base_interfaces(interface)]
+        names = {name for owner in declaring for name in owner.members}
+        for owner in declaring:
+            for method in owner.methods:
+                if is_batch_method(method):
+                    slot = f"{method.name}_batch"
+                    if slot in names:
+                        raise CodegenException(
+                            f"@Batch methods need {slot!r} to be free: {owner.name}.{method.name}"
+                        )
+                    names.add(slot)
+
+    def _declare_item(self, item: PrimaryItem):
+        if isinstance(item, InterfaceDef):
+            self._declare_interface(item)
+        elif isinstance(item, FunctionDeclaration):
+            self._declare_top_level_function(item)
+        elif isinstance(item, OpaqueTypeDef):
+            self._declare_opaque_type(item)
+        elif isinstance(item, StructDef):
+            self._declare_struct(item)
+        elif isinstance(item, ImplDef):
+            self._declare_impl(item)
+        elif isinstance(item, EnumDef):
+            self._declare_enum(item)
+        else:
+            raise TypeError(f"Unexpected item type: {type(item)}")
+        self.writeln()  # Trailing whitespace
+
+    @property
+    def fingerprint_options(self) -> str:
+        """The generator's options, as included in the fingerprint of each item"""
+        return ""
+
+    def related_items(self, item: PrimaryItem) -> List[PrimaryItem]:
+        """The other items whose definitions affect the code generated for the item
+
+        Derived interfaces include the members they inherit,
+        and implementations fill the slots of their interface.
+        """
+        if isinstance(item, InterfaceDef):
+            return self.context.base_interfaces(item)
+        elif isinstance(item, ImplDef):
+            interface = self.implemented_interface(item)
+            return [interface, *self.context.base_interfaces(interface)]
+        else:
+            return []
+
+    def implemented_interface(self, impl: ImplDef) -> InterfaceDef:
+        interface = self.context.find_item(impl.interface.name)
+        assert isinstance(interface, InterfaceDef), interface
+        return interface
+
+    def write_cached(self, item: PrimaryItem, kind: str, write: Callable[[], None]):
+        """Write code for the item, reusing the cached fragment if it is unchanged
+
+        The generated code must only depend on the item,
+        the kind of fragment and the `fingerprint_options`.
+        """
+        with timed(item.name, "item", module=self.module.name, generator=type(self).__name__, kind=kind):
+            if self.cache is None:
+                write()
+                return
+            assert self.current_indent == 0
+            related = [item_fingerprint(other) for other in self.related_items(item)]
+            key = item_fingerprint(item, type(self).__qualname__, kind, self.fingerprint_options, *related)
+            fragment = self.cache.get(key)
+            if fragment is None:
+                num_definitions = len(self.source_definitions)
+                with self.capture_lines() as lines:
+                    write()
+                self.cache.put(key, {
+                    "lines": lines,
+                    "source_definitions": self.source_definitions[num_definitions:]
+                })
             else:
-                raise TypeError(f"Unexpected item type: {type(item)}")
-            self.writeln()  # Trailing whitespace
+                self.write_lines(fragment["lines"])
+                self.source_definitions.extend(
+                    (name, definition) for name, definition in fragment["source_definitions"]
+                )
+                return
+            self.write_lines(lines)
 
     def generate_wrappers(self, use_prefixes=True):
         if self._queued_wrappers is None:
             raise RuntimeError(f"Already generated wrappers")
-        for target_interface in self._queued_wrappers:
-            interface_type = self.context.resolve_type_name(
-                target_interface.name, target_interface.span
+        with timed("generate_wrappers", "generate", module=self.module.name, generator=type(self).__name__):
+            wrapped: Dict[str, str] = {}
+            for target_interface in self._queued_wrappers:
+                for _, _, method, wrapper_name in self.interface_wrappers(target_interface, use_prefixes):
+                    target = f"{target_interface.name}.{method.name}"
+                    existing = wrapped.setdefault(wrapper_name, target)
+                    if existing != target:
+                        raise CodegenException(
+                            f"The wrappers for {existing} and {target} would both be named {wrapper_name!r}"
+                        )
+            for target_interface in self._queued_wrappers:
+                self.write_cached(
+                    target_interface, f"wrappers(use_prefixes={use_prefixes})",
+                    lambda: self._write_interface_wrappers(target_interface, use_prefixes)
+                )
+            self._queued_wrappers = None
+
+    def _write_interface_wrappers(self, target_interface: InterfaceDef, use_prefixes: bool):
+        interface_type = self.context.resolve_type_name(
+            target_interface.name, target_interface.span
+        )
+        options = WrapperOptions.parse(target_interface)
+        for owner, vtable_path, method, wrapper_name in self.interface_wrappers(target_interface, use_prefixes):
+            if options.include_doc and method.doc_string is not None:
+                doc_string = dataclasses.replace(
+                    method.doc_string, lines=method.doc_string.lines + [
+                        "", "[AUTO] Generated wrapper which "
+                            f"delegates to {owner.name}"
+                    ]
+                )
+            else:
+                doc_string = None
+            # TODO: These joined ifs seem to make IntellIJ thhink `method.body` is None from here on out
+            if method.body is not None and not method.body.default:
+                raise CodegenException(
+                    f"Method must be default: "
+                    f"{owner.name}.{method.name}"
+                )
+            self._write_wrapper_method(
+                wrapper_name=wrapper_name, indirect_vtable=options.indirect_vtable,
+                target_method=method, interface_type=interface_type,
+                default_impl=method.body,
+                doc_string=doc_string,
+                vtable_path=vtable_path
             )
-            generate_annotation = target_interface.get_annotation("GenerateWrappers")
-            # TODO: Utils for checking validity of annotations
-            if generate_annotation.values is None:
-                generate_annotation.values = {}  # HACK
-            if generate_annotation.values.keys() > {"indirect_vtable", "include_doc", "prefix"}:
-                raise CodegenException(f"GenerateWrappers has forbidden "
-                                       f"keys for {target_interface.name}")
-            # If we should accept a pointer to the vtable instead
-            # of passing by value (default=True)
-            indirect_vtable = generate_annotation.values.get("indirect_vtable", True)
-            if type(indirect_vtable) is not bool:
-                raise CodegenException("GenerateWrappers.indirect_vtable must be a bool")
-            # If we should copy the documentation to the generated method
-            include_doc = generate_annotation.values.get("include_doc", True)
-            if type(include_doc) is not bool:
-                raise CodegenException("GenerateWrappers.include_doc must be a bool")
-            # The prefix for the generated method
-            # This only applies if the use_prefixes option is true
-            # If the string is empty, there will be no prefix (default)
-            prefix = generate_annotation.values.get("prefix", "")
-            if type(prefix) is not str:
-                raise CodegenException("GenerateWrappers.prefix must be a str")
-            for method in target_interface.methods:
-                if method.get_annotation("SkipWrapper"):
-                    continue
-                if prefix and use_prefixes:
-                    wrapper_name = f"{prefix}_{method.name}"
-                else:
-                    wrapper_name = method.name
-                if include_doc and method.doc_string is not None:
+            self.writeln()  # Trailing whitespace
+            if method.signature.is_method:
+                for arg in method.signature.args:
+                    if arg.name in DYN_RESERVED_NAMES:
+                        raise CodegenException(
+                            f"Methods with a receiver can't have an argument named {arg.name!r}: "
+                            f"{owner.name}.{method.name}"
+                        )
+                if doc_string is not None:
                     doc_string = dataclasses.replace(
                         method.doc_string, lines=method.doc_string.lines + [
                             "", "[AUTO] Generated wrapper which "
-                                f"delegates to {target_interface.name}"
+                                f"delegates to the vtable of a `dyn {target_interface.name}`"
                         ]
                     )
-                else:
-                    doc_string = None
-                # TODO: These joined ifs seem to make IntellIJ thhink `method.body` is None from here on out
-                if method.body is not None and not method.body.default:
-                    raise CodegenException(
-                        f"Method must be default: "
-                        f"{target_interface.name}.{method.name}"
-                    )
-                self._write_wrapper_method(
-                    wrapper_name=wrapper_name, indirect_vtable=indirect_vtable,
+                self._write_dyn_wrapper_method(
+                    wrapper_name=f"{wrapper_name}_dyn",
                     target_method=method, interface_type=interface_type,
                     default_impl=method.body,
-                    doc_string=doc_string
+                    doc_string=doc_string,
+                    vtable_path=vtable_path
+                )
+                self.writeln()  # Trailing whitespace
+            if is_batch_method(method):
+                if doc_string is not None:
+                    doc_string = dataclasses.replace(
+                        method.doc_string, lines=method.doc_string.lines + [
+                            "", "[AUTO] Generated batch wrapper which "
+                                f"delegates to {owner.name}"
+                        ]
+                    )
+                self._write_batch_wrapper_method(
+                    wrapper_name=f"{wrapper_name}_batch", indirect_vtable=options.indirect_vtable,
+                    target_method=method, interface_type=interface_type,
+                    doc_string=doc_string,
+                    vtable_path=vtable_path
                 )
                 self.writeln()  # Trailing whitespace
-        self._queued_wrappers = None
+
+    def wrapped_methods(self, interface: InterfaceDef) -> Iterator[Tuple[InterfaceDef, str, FunctionDeclaration]]:
+        """The methods of the interface (including inherited ones) in vtable order
+
+        Each method is given with the interface that declared it,
+        and the path to its vtable (like `base.base.`).
+        """
+        bases = self.context.base_interfaces(interface)
+        for depth, base in reversed(list(enumerate(bases, start=1))):
+            for method in base.methods:
+                yield base, "base." * depth, method
+        for method in interface.methods:
+            yield interface, "", method
+
+    def interface_wrappers(
+            self, interface: InterfaceDef,
+            use_prefixes: bool = True
+    ) -> Iterator[Tuple[InterfaceDef, str, FunctionDeclaration, str]]:
+        """The methods of the interface which get wrappers, along with the name of each wrapper
+
+        An inherited method is skipped if its base already has a wrapper with the same name
+        (like when neither interface has a prefix). That wrapper can be called after upcasting.
+        """
+        options = WrapperOptions.parse(interface)
+        for owner, vtable_path, method in self.wrapped_methods(interface):
+            if method.get_annotation("SkipWrapper"):
+                continue
+            wrapper_name = options.wrapper_name(method, use_prefixes=use_prefixes)
+            if owner is not interface and owner.get_annotation("GenerateWrappers") is not None and \
+                    WrapperOptions.parse(owner).wrapper_name(method, use_prefixes=use_prefixes) == wrapper_name:
+                continue
+            yield owner, vtable_path, method, wrapper_name
+
+    def impl_slots(self, impl: ImplDef) -> Iterator[Tuple[str, str, FunctionDeclaration, Optional[str]]]:
+        """The slots of the implementation's vtable, in order
+
+        Each slot is given as `(vtable_path, slot, method, function)`, where the function
+        is None if it isn't implemented (so it uses the default, or is NULL for batch slots).
+        """
+        for _, vtable_path, method in self.wrapped_methods(self.implemented_interface(impl)):
+            entry = impl.functions.get(method.name)
+            yield vtable_path, method.name, method, entry.function if entry is not None else None
+            if is_batch_method(method):
+                entry = impl.functions.get(f"{method.name}_batch")
+                yield vtable_path, f"{method.name}_batch", method, entry.function if entry is not None else None
+
+    def enum_method_signature(self, enum: EnumDef, method: FunctionDeclaration) -> FunctionSignature:
+        """The signature of the function dispatching the method, which takes a pointer to the enum as `self`"""
+        receiver = method.signature.args[0]
+        assert isinstance(receiver, MethodSelfArgument), method.name
+        enum_type = self.context.resolve_type_name(enum.name, enum.span)
+        return FunctionSignature(
+            args=[
+                SimpleArgument("self", SyntheticTypeRef(method.span, ReferenceType(enum_type, receiver.reference_kind))),
+                *method.signature.args[1:]
+            ],
+            return_type=method.signature.return_type
+        )
+
+    @staticmethod
+    def variant_function(
+            enum: EnumDef, variant: VariantDef,
+            method: FunctionDeclaration
+    ) -> Tuple[str, FunctionSignature]:
+        """The name and signature of the function implementing the method for the variant
+
+        Instead of the enum, it takes a pointer to the fields of the variant
+        (or nothing at all, if the variant has no fields).
+        """
+        receiver = method.signature.args[0]
+        assert isinstance(receiver, MethodSelfArgument), method.name
+        args = list(method.signature.args[1:])
+        for arg in args:
+            if arg.name in VARIANT_RESERVED_NAMES:
+                raise CodegenException(
+                    f"Enum methods can't have an argument named {arg.name!r}: {enum.name}.{method.name}"
+                )
+        if variant.fields:
+            fields_type = UserDefinedType(f"{enum.name}_{variant.name}")
+            args.insert(0, SimpleArgument(
+                "fields", SyntheticTypeRef(method.span, ReferenceType(fields_type, receiver.reference_kind))
+            ))
+        return f"{enum.name}_{variant.name}_{method.name}", FunctionSignature(
+            args=args,
+            return_type=method.signature.return_type
+        )
+
+    @staticmethod
+    def impl_doc(impl: ImplDef) -> DocString:
+        """The documentation of the implementation's vtable"""
+        summary = f"[AUTO] The `{impl.interface.name}` vtable of `{impl.target.name}`, in read-only memory"
+        if impl.doc_string is None:
+            return DocString(lines=[summary], span=impl.span)
+        return dataclasses.replace(impl.doc_string, lines=impl.doc_string.lines + ["", summary])
 
     @abstractmethod
     def _write_wrapper_method(
@@ -187,8 +744,43 @@ class CodeGenerator(CodeWriter, metaclass=ABCMeta):
             target_method: FunctionDeclaration,
             doc_string: Optional[DocString],
             default_impl: Optional[FunctionBody],
-            indirect_vtable: bool
+            indirect_vtable: bool,
+            vtable_path: str = ""
     ):
+        """Generate a wrapper for the specified method
+
+        Inherited methods are reached through the `vtable_path` (like `base.`),
+        so the wrapper accepts the derived vtable without copying it.
+        """
+        pass
+
+    @abstractmethod
+    def _write_dyn_wrapper_method(
+            self, wrapper_name: str, interface_type: IvanType,
+            target_method: FunctionDeclaration,
+            doc_string: Optional[DocString],
+            default_impl: Optional[FunctionBody],
+            vtable_path: str = ""
+    ):
+        """Generate a wrapper for the specified method, which is called on a `dyn` object
+
+        The object replaces both the vtable and the `self` argument.
+        """
+        pass
+
+    @abstractmethod
+    def _write_batch_wrapper_method(
+            self, wrapper_name: str, interface_type: IvanType,
+            target_method: FunctionDeclaration,
+            doc_string: Optional[DocString],
+            indirect_vtable: bool,
+            vtable_path: str = ""
+    ):
+        """Generate a wrapper for the batch version of the specified method
+
+        This calls the batch slot if the implementation provides one,
+        otherwise it falls back to calling the regular method in a loop.
+        """
         pass
 
     @abstractmethod
@@ -199,6 +791,22 @@ class CodeGenerator(CodeWriter, metaclass=ABCMeta):
     def write_footer(self):
         pass
 
+    @abstractmethod
+    def _declare_slice_type(self, slice_type: Union[SliceType, StrType]):
+        """Declare the `{ptr, len}` representation of a slice
+
+        This is called before the first item that uses the slice.
+        """
+        pass
+
+    @abstractmethod
+    def _declare_dyn_type(self, dyn_type: DynType):
+        """Declare the `{self, vtable}` representation of an object
+
+        This is called before the first item that uses the object type.
+        """
+        pass
+
     @abstractmethod
     def _declare_opaque_type(self, opaque: OpaqueTypeDef):
         pass
@@ -207,10 +815,31 @@ class CodeGenerator(CodeWriter, metaclass=ABCMeta):
     def _declare_interface(self, interface: InterfaceDef):
         pass
 
+    @abstractmethod
+    def _declare_struct(self, struct: StructDef):
+        """Declare the struct, along with accessors for its atomic fields"""
+        pass
+
+    @abstractmethod
+    def _declare_enum(self, enum: EnumDef):
+        """Declare the tagged union, along with the functions implementing its methods
+
+        Each method gets a function for every variant, which is called by switching on the tag.
+        """
+        pass
+
     @abstractmethod
     def _declare_top_level_function(self, func: FunctionDeclaration):
         pass
 
+    @abstractmethod
+    def _declare_impl(self, impl: ImplDef):
+        """Declare a constant vtable, filled with the implementation's functions
+
+        Methods which aren't implemented use generated functions with their default bodies.
+        """
+        pass
+
 
 class CodegenException(Exception):
     pass
@@ -1,26 +1,139 @@
 from __future__ import annotations
 
-from typing import Sequence, Optional
+import zlib
+from contextlib import contextmanager
+from dataclasses import dataclass
+from enum import Enum
+from typing import Sequence, Optional, Union, List, Iterable, TextIO, Dict, Set, Tuple, Iterator
 
-from ivan import types
-from ivan.ast import OpaqueTypeDef, InterfaceDef, FunctionDeclaration, FunctionSignature, FunctionArg, \
-    DocString, FunctionBody
-from ivan.compiler import C11Compiler
-from ivan.generate import CodeWriter, CodeGenerator
-from ivan.types import IvanType, ReferenceType, ReferenceKind
+from ivan.ast import IvanModule, OpaqueTypeDef, InterfaceDef, FunctionDeclaration, FunctionSignature, \
+    DocString, FunctionBody, SimpleArgument, StructDef, PrimaryItem, ImplDef, EnumDef
+from ivan.ast.types import SyntheticTypeRef
+from ivan.compiler.c11 import C11CodeCompiler
+from ivan.generate import CodeGenerator, CodeWriter, is_batch_method, WrapperOptions, OptimizationHint, \
+    optimization_hints, direct_item_types, module_file_name, discriminant_type
+from ivan.generate.cache import FragmentCache
+from ivan.types import IvanType, ReferenceType, ReferenceKind, SliceType, StrType, \
+    BuiltinType, BuiltinKind, FixedIntegerType, AtomicType, UserDefinedType, SelfType, DynType
+from ivan.types.context import TypeContext
+
+
+class WrapperDefinitions(Enum):
+    """Where the definitions of wrappers (and other generated functions) are placed"""
+    HEADER = "header"
+    """Define them in the header, which can then only be included by a single translation unit"""
+    SOURCE = "source"
+    """Declare them in the header, and define them in separate source files"""
+    INLINE = "inline"
+    """Define them `inline` in the header, with `extern inline` declarations in a source file
+
+    This is the C99 inline model: callers can inline the definitions without LTO,
+    and the source file provides the single external definition.
+    """
+
+
+@dataclass(frozen=True)
+class C11Options:
+    """Options for the generated C code"""
+    pointer_attributes: bool = False
+    """Derive aliasing and nullability attributes from the pointer kinds
+
+    Mutable (`&mut`) parameters are exclusive, so they are marked `restrict`.
+    Non-optional references are never NULL, so they're marked as `nonnull`
+    (or `returns_nonnull` for return values).
+    """
+    wrapper_definitions: WrapperDefinitions = WrapperDefinitions.HEADER
+    """Where to place the definitions of the generated functions"""
+    source_shards: int = 1
+    """The number of source files to split the definitions across
+
+    Each definition is assigned to a shard by hashing its name,
+    so adding a function doesn't change the other shards.
+    """
+
+
+HINT_ATTRIBUTES = {
+    OptimizationHint.PURE: "IVAN_PURE",
+    OptimizationHint.CONST: "IVAN_CONST",
+    OptimizationHint.HOT: "IVAN_HOT",
+    OptimizationHint.COLD: "IVAN_COLD",
+    OptimizationHint.NO_RETURN: "IVAN_NORETURN",
+}
+"""The attribute macros corresponding to each optimization hint"""
 
 
 class C11CodeGenerator(CodeGenerator):
+    options: C11Options
+
+    def __init__(
+            self, module: IvanModule, context: TypeContext,
+            options: C11Options = C11Options(),
+            sink: Optional[TextIO] = None,
+            cache: Optional[FragmentCache] = None
+    ):
+        super().__init__(module, context, sink=sink, cache=cache)
+        self.options = options
+
+    @property
+    def fingerprint_options(self) -> str:
+        return repr(self.options)
+
     @property
     def header_name(self) -> str:
         return self.module.name.upper().replace('.', '_') + "_H"
 
+    @property
+    def header_file(self) -> str:
+        """The file name of the generated header"""
+        return module_file_name(self.module, ".h")
+
+    @contextmanager
+    def function_definition(self, name: str) -> Iterator[None]:
+        """Place the function definition written in the block according to the options
+
+        The definition must start with a signature line ending in `{`.
+        """
+        with self.capture_lines() as lines:
+            yield
+        signature = lines[0]
+        assert signature.endswith(" {") and lines[-1] == "}", lines
+        prototype = signature[:-len(" {")] + ";"
+        mode = self.options.wrapper_definitions
+        if mode == WrapperDefinitions.HEADER:
+            self.write_lines(lines)
+        elif mode == WrapperDefinitions.SOURCE:
+            self.writeln(prototype)
+            self.source_definitions.append((name, lines))
+        elif mode == WrapperDefinitions.INLINE:
+            self.writeln(f"inline {signature}")
+            self.write_lines(lines[1:])
+            self.source_definitions.append((name, [f"extern inline {prototype}"]))
+        else:
+            raise AssertionError(mode)
+
+    def source_files(self) -> Dict[str, str]:
+        """The source files with the definitions, keyed by file name
+
+        This is empty unless the definitions are placed in source files.
+        Must be called after everything has been generated.
+        """
+        return generate_source_files(
+            self.module, self.header_file,
+            self.source_definitions, self.options
+        )
+
+    def includes(self) -> List[str]:
+        """Additional headers to include, like `<stdio.h>` or `"other.h"`"""
+        return []
+
     def write_header(self):
-        imports = []  # TODO: Configurable imports
+        imports = self.includes()
         self.writeln(f"#ifndef {self.header_name}")
         self.writeln(f"#define {self.header_name}")
         self.writeln()
         std_imports = ["<stdint.h>", "<stdbool.h>", "<stdlib.h>", "<assert.h>"]
+        if any(isinstance(referenced, AtomicType) for referenced in self.referenced_types()):
+            std_imports.append("<stdatomic.h>")
         global_imports = []
         local_imports = []
         for header in imports:
@@ -36,12 +149,14 @@ class C11CodeGenerator(CodeGenerator):
             for include in std_imports:
                 self.writeln(f"#include {include}")
             self.writeln()
+        if self.options.pointer_attributes or self._uses_optimization_hints():
+            self.write_attribute_macros()
         if global_imports:
             for include in global_imports:
                 self.writeln(f"#include {include}")
             self.writeln()
         if local_imports:
-            for include in global_imports:
+            for include in local_imports:
                 self.writeln(f"#include {include}")
             self.writeln()
 
@@ -54,85 +169,914 @@ class C11CodeGenerator(CodeGenerator):
             for line in doc_string.print_like_java():
                 self.writeln(line)
 
-    def write_function_signature(self, name: str, signature: FunctionSignature):
-        self.write(f'{signature.return_type.print_c11()} {name}(')
-        self.write(', '.join(f"{arg.arg_type.print_c11()} {arg.arg_name}"
-                                    for arg in signature.args))
+    def write_attribute_macros(self):
+        # These are guarded, so that multiple headers can define them
+        self.writeln("#ifndef IVAN_ATTRIBUTES_DEFINED")
+        self.writeln("#define IVAN_ATTRIBUTES_DEFINED")
+        self.writeln("#if defined(__GNUC__)")
+        self.writeln("#define IVAN_NONNULL(...) __attribute__((nonnull(__VA_ARGS__)))")
+        self.writeln("#define IVAN_RETURNS_NONNULL __attribute__((returns_nonnull))")
+        self.writeln("#define IVAN_PURE __attribute__((pure))")
+        self.writeln("#define IVAN_CONST __attribute__((const))")
+        self.writeln("#define IVAN_HOT __attribute__((hot))")
+        self.writeln("#define IVAN_COLD __attribute__((cold))")
+        self.writeln("#define IVAN_NORETURN __attribute__((noreturn))")
+        self.writeln("#else")
+        self.writeln("#define IVAN_NONNULL(...)")
+        self.writeln("#define IVAN_RETURNS_NONNULL")
+        self.writeln("#define IVAN_PURE")
+        self.writeln("#define IVAN_CONST")
+        self.writeln("#define IVAN_HOT")
+        self.writeln("#define IVAN_COLD")
+        self.writeln("#define IVAN_NORETURN")
+        self.writeln("#endif")
+        self.writeln("#if defined(__cplusplus)")
+        self.writeln("#define IVAN_RESTRICT __restrict")
+        self.writeln("#else")
+        self.writeln("#define IVAN_RESTRICT restrict")
+        self.writeln("#endif")
+        self.writeln("#endif /* IVAN_ATTRIBUTES_DEFINED */")
+        self.writeln()
+
+    def print_args(self, signature: FunctionSignature) -> str:
+        result = []
+        for arg in signature.args:
+            arg_type = arg.declared_type.resolved
+            if self.options.pointer_attributes and isinstance(arg_type, ReferenceType) \
+                    and arg_type.kind == ReferenceKind.MUTABLE:
+                result.append(f"{arg_type.print_c11()} IVAN_RESTRICT {arg.name}")
+            else:
+                result.append(f"{arg_type.print_c11()} {arg.name}")
+        return ', '.join(result)
+
+    def _uses_optimization_hints(self) -> bool:
+        for item in self.declared_items:
+            if isinstance(item, FunctionDeclaration) and optimization_hints(item):
+                return True
+            elif isinstance(item, (InterfaceDef, EnumDef)) and any(
+                    optimization_hints(method) for method in item.methods):
+                return True
+        return False
+
+    def function_attributes(
+            self, signature: FunctionSignature,
+            hints: Iterable[OptimizationHint] = ()
+    ) -> List[str]:
+        """The attributes for a function with the specified signature and hints"""
+        attributes = [HINT_ATTRIBUTES[hint] for hint in hints]
+        if self.options.pointer_attributes:
+            # NOTE: Argument indexes start at one
+            nonnull_indexes = [
+                str(index) for index, arg in enumerate(signature.args, start=1)
+                if isinstance(arg.declared_type.resolved, ReferenceType)
+                and not arg.declared_type.resolved.optional
+            ]
+            if nonnull_indexes:
+                attributes.append(f"IVAN_NONNULL({', '.join(nonnull_indexes)})")
+            return_type = signature.return_type.resolved
+            if isinstance(return_type, ReferenceType) and not return_type.optional:
+                attributes.append("IVAN_RETURNS_NONNULL")
+        return attributes
+
+    @staticmethod
+    def print_const_pointer(target: IvanType) -> str:
+        """Print a pointer to a const value of the specified type"""
+        if isinstance(target, (ReferenceType, SelfType)):
+            # The pointer itself is what needs to be const
+            return f"{target.print_c11()} const*"
+        else:
+            return f"const {target.print_c11()}*"
+
+    def print_batch_args(self, method: FunctionDeclaration) -> str:
+        signature = method.signature
+        args = [f"{self.print_const_pointer(arg.declared_type.resolved)} {arg.name}"
+                for arg in signature.args]
+        if not signature.is_unit_return:
+            args.append(f"{signature.return_type.resolved.print_c11()}* results")
+        args.append("size_t count")
+        return ', '.join(args)
+
+    def declare_batch_function_pointer(self, name: str, method: FunctionDeclaration):
+        self.write(f'void (*{name})({self.print_batch_args(method)})')
+
+    def write_function_signature(
+            self, name: str, signature: FunctionSignature,
+            hints: Iterable[OptimizationHint] = ()
+    ):
+        for attribute in self.function_attributes(signature, hints):
+            self.write(f'{attribute} ')
+        self.write(f'{signature.return_type.resolved.print_c11()} {name}(')
+        self.write(self.print_args(signature))
         self.write(')')
 
     def declare_function_pointer(self, name: str, signature: FunctionSignature):
-        self.write(f'{signature.return_type.print_c11()} (*{name})(')
-        self.write(', '.join(f"{arg.arg_type.print_c11()} {arg.arg_name}"
-                             for arg in signature.args))
+        self.write(f'{signature.return_type.resolved.print_c11()} (*{name})(')
+        self.write(self.print_args(signature))
         self.write(')')
 
     def _declare_top_level_function(self, func: FunctionDeclaration):
         self.write_doc(func.doc_string)
-        self.write_function_signature(func.name, func.signature)
+        self.write_function_signature(func.name, func.signature, optimization_hints(func))
         self.writeln(';')
 
     def _declare_interface(self, interface: InterfaceDef):
         self.write_doc(interface.doc_string)
         self.writeln(f"typedef struct {interface.name} {{")
         with self.with_indent():
+            if interface.base is not None:
+                self.writeln("/**")
+                self.writeln(f" * [AUTO] The vtable of the base interface `{interface.base.name}`")
+                self.writeln(" *")
+                self.writeln(" * This must be the first member, so upcasting is free.")
+                self.writeln(" */")
+                self.writeln(f"{interface.base.name} base;")
             for method in interface.methods:
                 self.write_doc(method.doc_string)
                 self.declare_function_pointer(method.name, method.signature)
                 self.writeln(';')
+                if is_batch_method(method):
+                    self.writeln("/**")
+                    self.writeln(f" * [AUTO] Batched version of `{method.name}`, "
+                                 f"called once for `count` elements")
+                    self.writeln(" *")
+                    self.writeln(f" * If this is NULL, `{method.name}` is called for each element instead.")
+                    self.writeln(" */")
+                    self.declare_batch_function_pointer(f"{method.name}_batch", method)
+                    self.writeln(';')
         self.writeln(f"}} {interface.name};")
+        for depth, base in enumerate(self.context.base_interfaces(interface), start=1):
+            self.writeln()
+            self.write_upcast(interface, base, depth)
+
+    def write_upcast(self, interface: InterfaceDef, base: InterfaceDef, depth: int):
+        """Write a function converting a vtable pointer into one to its (indirect) base
+
+        The base is always at the start of the vtable, so this never copies.
+        """
+        name = f"{interface.name}_as_{base.name}"
+        self.writeln(f"/** [AUTO] Upcast to the `{base.name}` vtable, which is at the same address */")
+        with self.function_definition(name):
+            self.writeln(f"const {base.name}* {name}(const {interface.name}* vtable) {{")
+            with self.with_indent():
+                self.writeln(f"return &vtable->{'base.' * (depth - 1)}base;")
+            self.writeln("}")
+
+    def _declare_impl(self, impl: ImplDef):
+        interface = self.implemented_interface(impl)
+        slots = list(self.impl_slots(impl))
+        # Declaring the functions checks their signatures against the slots
+        for _, slot, method, function in slots:
+            if function is None:
+                continue
+            elif slot == method.name:
+                self.write_function_signature(function, method.signature, optimization_hints(method))
+            else:
+                self.write(f"void {function}({self.print_batch_args(method)})")
+            self.writeln(';')
+        initializers = []
+        for vtable_path, slot, method, function in slots:
+            if function is None:
+                if slot != method.name:
+                    continue  # Unimplemented batch slots are NULL
+                function = f"{impl.name}_{method.name}"
+                self.writeln()
+                self.write_default_function(function, method)
+            initializers.append(f".{vtable_path}{slot} = {function},")
+        self.writeln()
+        self.write_doc(self.impl_doc(impl))
+        self.writeln(f"static const {interface.name} {impl.vtable_name} = {{")
+        with self.with_indent():
+            for initializer in initializers:
+                self.writeln(initializer)
+        self.writeln("};")
+
+    def _declare_enum(self, enum: EnumDef):
+        tag_type = discriminant_type(enum).print_c11()
+        for variant in enum.variants:
+            if not variant.fields:
+                continue
+            self.writeln(f"/** [AUTO] The fields of `{enum.name}.{variant.name}` */")
+            self.writeln(f"typedef struct {enum.name}_{variant.name} {{")
+            with self.with_indent():
+                for field in variant.fields.values():
+                    self.write_doc(field.doc_string)
+                    self.writeln(f"{field.static_type.resolved.print_c11()} {field.name};")
+            self.writeln(f"}} {enum.name}_{variant.name};")
+            self.writeln()
+        self.writeln(f"/** [AUTO] The tags of `{enum.name}` (stored as a `{tag_type}`) */")
+        self.writeln("enum {")
+        with self.with_indent():
+            for index, variant in enumerate(enum.variants):
+                self.write_doc(variant.doc_string)
+                self.writeln(f"{enum.name}_Tag_{variant.name} = {index},")
+        self.writeln("};")
+        self.writeln()
+        self.write_doc(enum.doc_string)
+        self.writeln(f"typedef struct {enum.name} {{")
+        with self.with_indent():
+            self.writeln(f"{tag_type} tag;")
+            if any(variant.fields for variant in enum.variants):
+                # The variants overlap, so the enum is only as large as the largest one
+                self.writeln("union {")
+                with self.with_indent():
+                    for variant in enum.variants:
+                        if variant.fields:
+                            self.writeln(f"{enum.name}_{variant.name} {variant.name};")
+                self.writeln("};")
+        self.writeln(f"}} {enum.name};")
+        for method in enum.methods:
+            self.writeln()
+            for variant in enum.variants:
+                name, signature = self.variant_function(enum, variant, method)
+                self.write_function_signature(name, signature, optimization_hints(method))
+                self.writeln(';')
+            self.writeln()
+            self.write_enum_dispatch(enum, method)
+
+    def write_enum_dispatch(self, enum: EnumDef, method: FunctionDeclaration):
+        """Write a function calling the implementation of the method for the variant of `self`"""
+        signature = self.enum_method_signature(enum, method)
+        hints = [
+            # Reading the tag means this is only pure (even if the method is const)
+            OptimizationHint.PURE if hint == OptimizationHint.CONST else hint
+            for hint in optimization_hints(method)
+        ]
+        name = f"{enum.name}_{method.name}"
+        self.write_doc(method.doc_string)
+        with self.function_definition(name):
+            self.write_function_signature(name, signature, hints)
+            self.writeln(" {")
+            with self.with_indent():
+                self.writeln("switch (self->tag) {")
+                with self.with_indent():
+                    for variant in enum.variants:
+                        function, _ = self.variant_function(enum, variant, method)
+                        args = [arg.name for arg in signature.args[1:]]
+                        if variant.fields:
+                            args.insert(0, f"&self->{variant.name}")
+                        call = f"{function}({', '.join(args)});"
+                        self.writeln(f"case {enum.name}_Tag_{variant.name}:")
+                        with self.with_indent():
+                            if signature.is_unit_return:
+                                self.writeln(call)
+                                if OptimizationHint.NO_RETURN not in hints:
+                                    self.writeln("return;")
+                            else:
+                                self.writeln(f"return {call}")
+                self.writeln("}")
+                self.writeln("// Not a valid tag")
+                self.writeln("abort();")
+            self.writeln("}")
+
+    def write_default_function(self, name: str, method: FunctionDeclaration):
+        """Write a function with the default body of the method, for use in a constant vtable"""
+        hints = optimization_hints(method)
+        self.writeln(f"/** [AUTO] The default implementation of `{method.name}` */")
+        self.write("static ")
+        self.write_function_signature(name, method.signature, hints)
+        self.writeln(" {")
+        with self.with_indent():
+            C11CodeCompiler(writer=self, func_signature=method.signature).compile_body(method.body)
+            if OptimizationHint.NO_RETURN in hints:
+                self.writeln("// @NoReturn methods must never return")
+                self.writeln("abort();")
+        self.writeln("}")
+
+    def _declare_slice_type(self, slice_type: Union[SliceType, StrType]):
+        name = slice_type.print_c11()
+        if isinstance(slice_type, StrType):
+            description = "A borrowed view of UTF-8 text (not null-terminated)"
+            ptr_type = "const char*"
+        else:
+            description = f"A borrowed slice `{slice_type.name}`"
+            if slice_type.mutable:
+                ptr_type = f"{slice_type.element.print_c11()}*"
+            else:
+                ptr_type = self.print_const_pointer(slice_type.element)
+        # Guard, so that multiple headers can share the definition
+        guard = f"IVAN_DEFINED_{name}"
+        self.writeln(f"#ifndef {guard}")
+        self.writeln(f"#define {guard}")
+        self.writeln("/**")
+        self.writeln(f" * {description}")
+        self.writeln(" *")
+        self.writeln(" * This is always passed by value.")
+        self.writeln(" */")
+        self.writeln(f"typedef struct {name} {{")
+        with self.with_indent():
+            self.writeln(f"{ptr_type} ptr;")
+            self.writeln("size_t len;")
+        self.writeln(f"}} {name};")
+        self.writeln(f"#endif /* {guard} */")
+        self.writeln()
+
+    def _declare_dyn_type(self, dyn_type: DynType):
+        name = dyn_type.print_c11()
+        interface_name = dyn_type.interface.print_c11()
+        guard = f"IVAN_DEFINED_{name}"
+        self.writeln(f"#ifndef {guard}")
+        self.writeln(f"#define {guard}")
+        self.writeln("/**")
+        self.writeln(f" * An object implementing `{interface_name}`, along with its vtable")
+        self.writeln(" *")
+        self.writeln(" * This is always passed by value, which fits in two registers.")
+        self.writeln(" * So calling a method doesn't need to load the vtable from the object.")
+        self.writeln(" */")
+        self.writeln(f"typedef struct {name} {{")
+        with self.with_indent():
+            self.writeln("void* self;")
+            # Using the tag, so the interface only needs to be forward declared
+            self.writeln(f"const struct {interface_name}* vtable;")
+        self.writeln(f"}} {name};")
+        self.writeln(f"#endif /* {guard} */")
+        self.writeln()
 
     def _declare_opaque_type(self, opaque: OpaqueTypeDef):
         self.write_doc(opaque.doc_string)
         self.writeln(f"typedef struct {opaque.name} {opaque.name};")
 
+    def _declare_struct(self, struct: StructDef):
+        self.write_doc(struct.doc_string)
+        self.writeln(f"typedef struct {struct.name} {{")
+        with self.with_indent():
+            for field in struct.fields.values():
+                self.write_doc(field.doc_string)
+                self.writeln(f"{field.static_type.resolved.print_c11()} {field.name};")
+        self.writeln(f"}} {struct.name};")
+        for field in struct.fields.values():
+            field_type = field.static_type.resolved
+            if isinstance(field_type, AtomicType):
+                self.writeln()
+                self.write_atomic_accessors(struct, field.name, field_type)
+
+    def write_atomic_accessors(self, struct: StructDef, field_name: str, field_type: AtomicType):
+        value_type = field_type.inner.print_c11()
+        self.writeln(f"/** [AUTO] Atomically load `{struct.name}.{field_name}` */")
+        with self.function_definition(f"{struct.name}_load_{field_name}"):
+            self.writeln(f"{value_type} {struct.name}_load_{field_name}"
+                         f"(const {struct.name}* self, memory_order order) {{")
+            with self.with_indent():
+                self.writeln(f"return atomic_load_explicit(&self->{field_name}, order);")
+            self.writeln("}")
+        self.writeln()
+        self.writeln(f"/** [AUTO] Atomically store `{struct.name}.{field_name}` */")
+        with self.function_definition(f"{struct.name}_store_{field_name}"):
+            self.writeln(f"void {struct.name}_store_{field_name}"
+                         f"({struct.name}* self, {value_type} value, memory_order order) {{")
+            with self.with_indent():
+                self.writeln(f"atomic_store_explicit(&self->{field_name}, value, order);")
+            self.writeln("}")
+
     def _write_wrapper_method(
             self, wrapper_name: str, interface_type: IvanType,
             target_method: FunctionDeclaration,
             doc_string: Optional[DocString],
             default_impl: Optional[FunctionBody],
-            indirect_vtable: bool
+            indirect_vtable: bool,
+            vtable_path: str = ""
     ):
         """Generate a wrapper method for the specified interface"""
-        assert all('vtable' != arg.arg_name for arg in target_method.signature.args)
+        assert all('vtable' != arg.name for arg in target_method.signature.args)
+        hints = [
+            # The wrapper reads the vtable, so it's only pure (even if the method is const)
+            OptimizationHint.PURE if hint == OptimizationHint.CONST else hint
+            for hint in optimization_hints(target_method)
+        ]
         self.write_doc(doc_string)
         if indirect_vtable:
             vtable_type = ReferenceType(interface_type, ReferenceKind.IMMUTABLE)
         else:
             vtable_type = interface_type
-        self.write_function_signature(wrapper_name, FunctionSignature(
-            args=[FunctionArg("vtable", vtable_type), *target_method.signature.args],
-            return_type=target_method.signature.return_type
-        ))
-        self.writeln(' {')
-        with self.with_indent() as writer:
-            self.declare_function_pointer('func_ptr', target_method.signature)
-            writer.write(' = ')
-            if indirect_vtable:
-                writer.write('vtable->')
-            else:
-                writer.write('vtable.')
-            writer.write(target_method.name)
-            writer.writeln(';')
-
-            def call_vtable():
-                if target_method.signature.return_type != types.UNIT:
-                    writer.write("return ")
-                writer.write('(*func_ptr)(')
-                writer.write(', '.join(f"{arg.arg_name}" for arg in target_method.signature.args))
-                writer.writeln(');')
-            if default_impl is None:
-                writer.writeln('assert(func_ptr != NULL);')
-                call_vtable()
-            else:
-                writer.writeln("if (func_ptr == NULL) {")
+        with self.function_definition(wrapper_name):
+            self.write_function_signature(wrapper_name, FunctionSignature(
+                args=[
+                    SimpleArgument("vtable", SyntheticTypeRef(target_method.span, vtable_type)),
+                    # The receiver (if any) is no longer the first argument
+                    *(SimpleArgument(arg.name, arg.declared_type) for arg in target_method.signature.args)
+                ],
+                return_type=target_method.signature.return_type
+            ), hints=hints)
+            self.writeln(' {')
+            with self.with_indent() as writer:
+                self.declare_function_pointer('func_ptr', target_method.signature)
+                writer.write(' = ')
+                if indirect_vtable:
+                    writer.write('vtable->')
+                else:
+                    writer.write('vtable.')
+                writer.write(vtable_path)
+                writer.write(target_method.name)
+                writer.writeln(';')
+
+                def call_vtable():
+                    if not target_method.signature.is_unit_return:
+                        writer.write("return ")
+                    writer.write('(*func_ptr)(')
+                    writer.write(', '.join(arg.name for arg in target_method.signature.args))
+                    writer.writeln(');')
+                if default_impl is None:
+                    writer.writeln('assert(func_ptr != NULL);')
+                    call_vtable()
+                else:
+                    writer.writeln("if (func_ptr == NULL) {")
+                    with self.with_indent():
+                        compiler = C11CodeCompiler(
+                            writer=self,
+                            func_signature=target_method.signature
+                        )
+                        compiler.compile_body(default_impl)
+                    writer.writeln("} else {")
+                    with self.with_indent():
+                        call_vtable()
+                    writer.writeln("}")
+                if OptimizationHint.NO_RETURN in hints:
+                    writer.writeln("// @NoReturn methods must never return")
+                    writer.writeln("abort();")
+            self.writeln('}')
+
+    def _write_dyn_wrapper_method(
+            self, wrapper_name: str, interface_type: IvanType,
+            target_method: FunctionDeclaration,
+            doc_string: Optional[DocString],
+            default_impl: Optional[FunctionBody],
+            vtable_path: str = ""
+    ):
+        signature = target_method.signature
+        assert all('object' != arg.name for arg in signature.args)
+        hints = [
+            OptimizationHint.PURE if hint == OptimizationHint.CONST else hint
+            for hint in optimization_hints(target_method)
+        ]
+        self.write_doc(doc_string)
+        with self.function_definition(wrapper_name):
+            self.write_function_signature(wrapper_name, FunctionSignature(
+                args=[
+                    SimpleArgument("object", SyntheticTypeRef(target_method.span, DynType(interface_type))),
+                    *signature.args[1:]
+                ],
+                return_type=signature.return_type
+            ), hints=hints)
+            self.writeln(' {')
+            with self.with_indent() as writer:
+                self.declare_function_pointer('func_ptr', signature)
+                writer.writeln(f' = object.vtable->{vtable_path}{target_method.name};')
+
+                def call_vtable():
+                    if not signature.is_unit_return:
+                        writer.write("return ")
+                    writer.write('(*func_ptr)(')
+                    writer.write(', '.join(['object.self', *(arg.name for arg in signature.args[1:])]))
+                    writer.writeln(');')
+                if default_impl is None:
+                    writer.writeln('assert(func_ptr != NULL);')
+                    call_vtable()
+                else:
+                    writer.writeln("if (func_ptr == NULL) {")
+                    with self.with_indent():
+                        compiler = C11CodeCompiler(writer=self, func_signature=signature)
+                        compiler.compile_body(default_impl)
+                    writer.writeln("} else {")
+                    with self.with_indent():
+                        call_vtable()
+                    writer.writeln("}")
+                if OptimizationHint.NO_RETURN in hints:
+                    writer.writeln("// @NoReturn methods must never return")
+                    writer.writeln("abort();")
+            self.writeln('}')
+
+    def _write_batch_wrapper_method(
+            self, wrapper_name: str, interface_type: IvanType,
+            target_method: FunctionDeclaration,
+            doc_string: Optional[DocString],
+            indirect_vtable: bool,
+            vtable_path: str = ""
+    ):
+        signature = target_method.signature
+        self.write_doc(doc_string)
+        if indirect_vtable:
+            vtable_type = ReferenceType(interface_type, ReferenceKind.IMMUTABLE)
+        else:
+            vtable_type = interface_type
+        with self.function_definition(wrapper_name):
+            for hint in optimization_hints(target_method):
+                # Writing the results is a side effect, so only these apply
+                if hint in (OptimizationHint.HOT, OptimizationHint.COLD):
+                    self.write(f"{HINT_ATTRIBUTES[hint]} ")
+            self.writeln(
+                f"void {wrapper_name}({vtable_type.print_c11()} vtable, "
+                f"{self.print_batch_args(target_method)}) {{"
+            )
+            access = ('vtable->' if indirect_vtable else 'vtable.') + vtable_path
+            with self.with_indent() as writer:
+                self.declare_batch_function_pointer('batch_ptr', target_method)
+                writer.writeln(f' = {access}{target_method.name}_batch;')
+                writer.writeln("if (batch_ptr != NULL) {")
                 with self.with_indent():
-                    compiler = C11Compiler(
-                        writer=self,
-                        func_signature=target_method.signature
-                    )
-                    compiler.compile_body(default_impl)
-                writer.writeln("} else {")
+                    batch_args = [arg.name for arg in signature.args]
+                    if not signature.is_unit_return:
+                        batch_args.append("results")
+                    batch_args.append("count")
+                    writer.writeln(f"(*batch_ptr)({', '.join(batch_args)});")
+                    writer.writeln("return;")
+                writer.writeln("}")
+                # Fallback to calling the regular method for each element
+                self.declare_function_pointer('func_ptr', signature)
+                writer.writeln(f' = {access}{target_method.name};')
+                writer.writeln('assert(func_ptr != NULL);')
+                writer.writeln("for (size_t i = 0; i < count; i++) {")
                 with self.with_indent():
-                    call_vtable()
+                    if not signature.is_unit_return:
+                        writer.write("results[i] = ")
+                    writer.write('(*func_ptr)(')
+                    writer.write(', '.join(f"{arg.name}[i]" for arg in signature.args))
+                    writer.writeln(');')
                 writer.writeln("}")
-        self.writeln('}')
+            self.writeln('}')
+
+    @staticmethod
+    def _bench_value(target: IvanType, index: int = 0) -> Optional[str]:
+        """A dummy value of the specified type, or None if we can't create one
+
+        Each argument index gets its own storage, so that pointers don't alias.
+        """
+        if isinstance(target, (ReferenceType, SelfType)):
+            return f"({target.print_c11()}) &bench_storage[{index}]"
+        elif isinstance(target, BuiltinType):
+            return "false" if target.kind == BuiltinKind.BOOLEAN else "0"
+        elif isinstance(target, FixedIntegerType):
+            return "0"
+        elif isinstance(target, (SliceType, StrType)):
+            return f"({target.print_c11()}) {{0}}"
+        else:
+            # Opaque types can't be passed by value
+            return None
+
+    def _is_benchmarked(self, method: FunctionDeclaration, signature: FunctionSignature) -> bool:
+        if OptimizationHint.NO_RETURN in optimization_hints(method):
+            return False  # The trivial implementation would return
+        return all(self._bench_value(arg.declared_type.resolved) is not None
+                   for arg in signature.args) and \
+            (signature.is_unit_return or
+             self._bench_value(signature.return_type.resolved) is not None)
+
+    def _benchmarked_methods(self, interface: InterfaceDef):
+        for method in interface.methods:
+            if self._is_benchmarked(method, method.signature):
+                yield method
+
+    def _benchmarked_enum_methods(self, enum: EnumDef):
+        for method in enum.methods:
+            if self._is_benchmarked(method, self.enum_method_signature(enum, method)):
+                yield method
+
+    def write_benchmark(self, iterations: int = 10_000_000):
+        """Write a `main` function that benchmarks the cost of calling each method
+
+        This fills every vtable with trivial implementations, then times
+        direct calls, raw vtable calls and the generated wrappers.
+        Enums get trivial implementations of each variant too,
+        which are timed against the `switch` dispatching to them.
+        The output is a self-contained C program, which must come after the
+        declarations (and any wrappers).
+
+        The number of iterations can be overridden by the first argument to the program.
+        """
+        if self._queued_wrappers is not None:
+            raise RuntimeError("Must generate wrappers before the benchmark")
+        if self.source_definitions:
+            # The benchmark is a single translation unit, so it needs the definitions too
+            self.writeln("// definitions")
+            self.writeln()
+            for _, definition in self.source_definitions:
+                self.write_lines(definition)
+                self.writeln()
+        interfaces = [
+            item for item in self.module.items
+            if isinstance(item, InterfaceDef) and any(self._benchmarked_methods(item))
+        ]
+        self.writeln("// benchmark")
+        self.writeln()
+        self.writeln("#include <stddef.h>")
+        self.writeln("#include <stdio.h>")
+        self.writeln("#include <time.h>")
+        self.writeln()
+        self.writeln("#if defined(__GNUC__)")
+        self.writeln("#define BENCH_NOINLINE __attribute__((noinline))")
+        self.writeln('#define BENCH_KEEP(ptr) __asm__ volatile("" : : "g"(ptr) : "memory")')
+        self.writeln("#else")
+        self.writeln("#define BENCH_NOINLINE")
+        self.writeln("static const void* volatile bench_sink;")
+        self.writeln("#define BENCH_KEEP(ptr) (bench_sink = (ptr))")
+        self.writeln("#endif")
+        self.writeln()
+        enums = [item for item in self.module.items if isinstance(item, EnumDef)]
+        max_args = max(
+            [len(method.signature.args) for interface in interfaces
+             for method in self._benchmarked_methods(interface)] +
+            [len(method.signature.args) for enum in enums
+             for method in self._benchmarked_enum_methods(enum)],
+            default=0
+        )
+        self.writeln(f"static max_align_t bench_storage[{max(max_args, 1)}];")
+        self.writeln()
+        self.writeln("static double bench_now_ns(void) {")
+        with self.with_indent():
+            self.writeln("struct timespec ts;")
+            self.writeln("timespec_get(&ts, TIME_UTC);")
+            self.writeln("return (double) ts.tv_sec * 1e9 + (double) ts.tv_nsec;")
+        self.writeln("}")
+        self.writeln()
+        # Trivial implementations of each interface
+        for interface in interfaces:
+            for method in self._benchmarked_methods(interface):
+                signature = method.signature
+                self.write("BENCH_NOINLINE static ")
+                self.write_function_signature(f"bench_{interface.name}_{method.name}", signature)
+                self.writeln(" {")
+                with self.with_indent():
+                    for arg in signature.args:
+                        self.writeln(f"(void) {arg.name};")
+                    if not signature.is_unit_return:
+                        self.writeln(f"return {self._bench_value(signature.return_type.resolved)};")
+                self.writeln("}")
+                self.writeln()
+            self.writeln(f"static {interface.name} bench_{interface.name}_vtable = {{")
+            with self.with_indent():
+                for method in self._benchmarked_methods(interface):
+                    self.writeln(f".{method.name} = bench_{interface.name}_{method.name},")
+            self.writeln("};")
+            self.writeln()
+        # Trivial implementations of each variant, which must be defined even if they aren't timed
+        for enum in enums:
+            for method in enum.methods:
+                for variant in enum.variants:
+                    name, signature = self.variant_function(enum, variant, method)
+                    self.write("BENCH_NOINLINE ")
+                    self.write_function_signature(name, signature)
+                    self.writeln(" {")
+                    with self.with_indent():
+                        for arg in signature.args:
+                            self.writeln(f"(void) {arg.name};")
+                        if OptimizationHint.NO_RETURN in optimization_hints(method):
+                            self.writeln("abort();")
+                        elif not signature.is_unit_return:
+                            return_type = signature.return_type.resolved
+                            value = self._bench_value(return_type)
+                            if value is None:
+                                value = f"({return_type.print_c11()}) {{0}}"
+                            self.writeln(f"return {value};")
+                    self.writeln("}")
+                    self.writeln()
+            if any(self._benchmarked_enum_methods(enum)):
+                # Zero-initialized, so this is always the first variant
+                self.writeln(f"static {enum.name} bench_{enum.name}_value;")
+                self.writeln()
+        self.writeln("int main(int argc, char** argv) {")
+        with self.with_indent():
+            self.writeln(f"size_t iterations = {iterations};")
+            self.writeln("if (argc > 1) {")
+            with self.with_indent():
+                self.writeln("iterations = (size_t) strtoull(argv[1], NULL, 10);")
+            self.writeln("}")
+            self.writeln('printf("%-40s %10s %10s %10s\\n", "ns/call", "direct", "vtable", "wrapper");')
+            for interface in interfaces:
+                if interface.get_annotation("GenerateWrappers") is not None:
+                    options = WrapperOptions.parse(interface)
+                else:
+                    options = None
+                for method in self._benchmarked_methods(interface):
+                    signature = method.signature
+                    args = ', '.join(self._bench_value(arg.declared_type.resolved, index)
+                                     for index, arg in enumerate(signature.args))
+                    calls = [
+                        ("direct", f"bench_{interface.name}_{method.name}({args})"),
+                        ("vtable", f"(*vtable->{method.name})({args})"),
+                    ]
+                    if options is not None and not method.get_annotation("SkipWrapper"):
+                        vtable_arg = "vtable" if options.indirect_vtable else "*vtable"
+                        wrapper_args = ', '.join([vtable_arg, args]) if args else vtable_arg
+                        calls.append(("wrapper", f"{options.wrapper_name(method)}({wrapper_args})"))
+                    self.writeln("{")
+                    with self.with_indent():
+                        self.writeln(f"const {interface.name}* vtable = &bench_{interface.name}_vtable;")
+                        for (kind, call) in calls:
+                            self.writeln(f"double {kind}_start = bench_now_ns();")
+                            self.writeln("for (size_t i = 0; i < iterations; i++) {")
+                            with self.with_indent():
+                                if signature.is_unit_return:
+                                    self.writeln(f"{call};")
+                                    self.writeln("BENCH_KEEP(NULL);")
+                                else:
+                                    self.writeln(f"{signature.return_type.resolved.print_c11()} result = {call};")
+                                    self.writeln("BENCH_KEEP(&result);")
+                            self.writeln("}")
+                            self.writeln(f"double {kind}_ns = (bench_now_ns() - {kind}_start) / (double) iterations;")
+                        if len(calls) == 2:
+                            self.writeln(f'printf("%-40s %10.2f %10.2f %10s\\n", '
+                                         f'"{interface.name}.{method.name}", direct_ns, vtable_ns, "-");')
+                        else:
+                            self.writeln(f'printf("%-40s %10.2f %10.2f %10.2f\\n", '
+                                         f'"{interface.name}.{method.name}", direct_ns, vtable_ns, wrapper_ns);')
+                    self.writeln("}")
+            if any(method for enum in enums for method in self._benchmarked_enum_methods(enum)):
+                self.writeln('printf("%-40s %10s %10s\\n", "ns/call", "direct", "switch");')
+            for enum in enums:
+                for method in self._benchmarked_enum_methods(enum):
+                    signature = self.enum_method_signature(enum, method)
+                    args = [self._bench_value(arg.declared_type.resolved, index)
+                            for index, arg in enumerate(signature.args[1:])]
+                    # Both call the implementation for the first variant
+                    variant = enum.variants[0]
+                    function, _ = self.variant_function(enum, variant, method)
+                    variant_args = [f"&value->{variant.name}", *args] if variant.fields else args
+                    calls = [
+                        ("direct", f"{function}({', '.join(variant_args)})"),
+                        ("switch", f"{enum.name}_{method.name}({', '.join(['value', *args])})"),
+                    ]
+                    self.writeln("{")
+                    with self.with_indent():
+                        self.writeln(f"{enum.name}* value = &bench_{enum.name}_value;")
+                        for (kind, call) in calls:
+                            self.writeln(f"double {kind}_start = bench_now_ns();")
+                            self.writeln("for (size_t i = 0; i < iterations; i++) {")
+                            with self.with_indent():
+                                if signature.is_unit_return:
+                                    self.writeln(f"{call};")
+                                    self.writeln("BENCH_KEEP(NULL);")
+                                else:
+                                    self.writeln(f"{signature.return_type.resolved.print_c11()} result = {call};")
+                                    self.writeln("BENCH_KEEP(&result);")
+                            self.writeln("}")
+                            self.writeln(f"double {kind}_ns = (bench_now_ns() - {kind}_start) / (double) iterations;")
+                        self.writeln(f'printf("%-40s %10.2f %10.2f\\n", '
+                                     f'"{enum.name}.{method.name}", direct_ns, switch_ns);')
+                    self.writeln("}")
+            self.writeln("return 0;")
+        self.writeln("}")
+        self.writeln()
+
+
+def _item_dependencies(item: PrimaryItem) -> Tuple[Set[str], Set[str]]:
+    """The other types the item needs complete, and the ones it only needs to point to"""
+    by_value, by_reference = set(), set()
+    for direct in direct_item_types(item):
+        if isinstance(direct, UserDefinedType):
+            by_value.add(direct.name)
+            continue
+        pending = [direct]
+        while pending:
+            target = pending.pop()
+            if isinstance(target, UserDefinedType):
+                by_reference.add(target.name)
+            elif isinstance(target, ReferenceType):
+                pending.append(target.target)
+            elif isinstance(target, SliceType):
+                pending.append(target.element)
+            elif isinstance(target, AtomicType):
+                pending.append(target.inner)
+            elif isinstance(target, DynType):
+                pending.append(target.interface)
+    by_value.discard(item.name)
+    by_reference.discard(item.name)
+    return by_value, by_reference - by_value
+
+
+class C11SplitHeaderGenerator(C11CodeGenerator):
+    """Generates one of the headers for a module in split mode
+
+    Only the specified items are declared. Other types the items need are
+    either included (if used by value) or forward declared (if only used by pointer).
+    """
+    _items: List[PrimaryItem]
+    _header_name: str
+    _local_includes: List[str]
+    _forward_declarations: List[str]
+
+    def __init__(
+            self, module: IvanModule, context: TypeContext,
+            items: List[PrimaryItem], header_name: str,
+            local_includes: Sequence[str] = (),
+            forward_declarations: Sequence[str] = (),
+            **kwargs
+    ):
+        super().__init__(module, context, **kwargs)
+        self._items = items
+        self._header_name = header_name
+        self._local_includes = list(local_includes)
+        self._forward_declarations = list(forward_declarations)
+
+    @property
+    def header_name(self) -> str:
+        return self._header_name
+
+    @property
+    def declared_items(self) -> List[PrimaryItem]:
+        return self._items
+
+    def includes(self) -> List[str]:
+        return [f'"{include}"' for include in self._local_includes]
+
+    def write_header(self):
+        super().write_header()
+        for name in self._forward_declarations:
+            self.writeln(f"typedef struct {name} {name};")
+        if self._forward_declarations:
+            self.writeln()
+
+
+def generate_source_files(
+        module: IvanModule, header_file: str,
+        definitions: List[Tuple[str, List[str]]],
+        options: C11Options
+) -> Dict[str, str]:
+    """Generate the source files containing the definitions, keyed by file name
+
+    The definitions are sharded across `options.source_shards` files,
+    each of which includes the header. Shards are always generated (even if empty),
+    so the list of files doesn't change.
+    """
+    if options.wrapper_definitions == WrapperDefinitions.HEADER:
+        assert not definitions
+        return {}
+    if options.source_shards < 1:
+        raise ValueError(f"Invalid number of shards: {options.source_shards}")
+    shards = [[] for _ in range(options.source_shards)]
+    for name, definition in definitions:
+        shards[zlib.crc32(name.encode('utf-8')) % len(shards)].append(definition)
+    result = {}
+    for index, shard in enumerate(shards):
+        writer = CodeWriter()
+        writer.writeln(f"// Generated from the Ivan module `{module.name}`")
+        writer.writeln(f'#include "{header_file}"')
+        writer.writeln()
+        for definition in shard:
+            writer.write_lines(definition)
+            writer.writeln()
+        if len(shards) == 1:
+            result[module_file_name(module, ".c")] = str(writer)
+        else:
+            result[module_file_name(module, f"_{index}.c")] = str(writer)
+    return result
+
+
+def split_header_file(module: IvanModule, item: Optional[PrimaryItem] = None) -> str:
+    """The file name of a header in split mode
+
+    Without an item, this is the name of the umbrella header.
+    """
+    if item is None:
+        return module_file_name(module, ".h")  # Same as the monolithic header
+    else:
+        return module_file_name(module, f"_{item.name}.h")
+
+
+def generate_split_headers(
+        module: IvanModule, context: TypeContext,
+        options: C11Options = C11Options(),
+        **kwargs
+) -> Dict[str, str]:
+    """Generate a header for each interface, struct and opaque type in the module
+
+    Translation units can then include only the headers they need.
+    The umbrella header includes all of them, and declares the top-level functions.
+    Returns the contents of each header (and any source files), keyed by file name.
+    """
+    module = context.resolve_module(module)
+    umbrella_name = C11CodeGenerator(module, context, options).header_name
+    assert umbrella_name.endswith("_H")
+    type_items = [item for item in module.items if not isinstance(item, FunctionDeclaration)]
+    headers = {}
+    definitions = []
+    for item in type_items:
+        by_value, by_reference = _item_dependencies(item)
+        generator = C11SplitHeaderGenerator(
+            module, context, items=[item],
+            header_name=f"{umbrella_name[:-len('_H')]}_{item.name.upper()}_H",
+            local_includes=[
+                split_header_file(module, context.find_item(name))
+                for name in sorted(by_value)
+            ],
+            forward_declarations=sorted(by_reference),
+            options=options, **kwargs
+        )
+        headers[split_header_file(module, item)] = _generate_split_header(generator)
+        definitions.extend(generator.source_definitions)
+    umbrella = C11SplitHeaderGenerator(
+        module, context,
+        items=[item for item in module.items if isinstance(item, FunctionDeclaration)],
+        header_name=umbrella_name,
+        local_includes=[split_header_file(module, item) for item in type_items],
+        options=options, **kwargs
+    )
+    headers[split_header_file(module)] = _generate_split_header(umbrella)
+    definitions.extend(umbrella.source_definitions)
+    headers.update(generate_source_files(module, split_header_file(module), definitions, options))
+    return headers
+
+
+def _generate_split_header(generator: C11SplitHeaderGenerator) -> str:
+    generator.write_header()
+    generator.declare_types()
+    generator.generate_wrappers()
+    generator.write_footer()
+    return str(generator)
@@ -0,0 +1,123 @@
+"""Caching of the code generated for each item
+
+Each item is identified by a fingerprint of its structure,
+so regenerating a module only needs to re-emit the items that changed.
+"""
+from __future__ import annotations
+
+import dataclasses
+import hashlib
+import json
+import os
+import tempfile
+from enum import Enum
+from pathlib import Path
+from typing import Dict, Optional, Any
+
+from ivan.ast import PrimaryItem
+from ivan.ast.lexer import Span
+from ivan.ast.types import TypeRef
+
+CACHE_VERSION = 2
+"""Incremented whenever the cached output format (or generated code) changes incompatibly"""
+
+
+def _structure(value: Any) -> Any:
+    """A stable, hashable representation of part of the AST
+
+    Source locations are ignored, since they don't affect the generated code.
+    Type references are represented by the type they resolve to.
+    """
+    if value is None or isinstance(value, (str, int, float, bool)):
+        return value
+    elif isinstance(value, Span):
+        raise AssertionError("Spans should be skipped")
+    elif isinstance(value, Enum):
+        return f"{type(value).__name__}.{value.name}"
+    elif isinstance(value, TypeRef):
+        if value.is_resolved:
+            resolved = value.resolved
+            return f"{type(resolved).__name__}({resolved.name})"
+        else:
+            return f"unresolved({value})"
+    elif dataclasses.is_dataclass(value):
+        return (type(value).__name__, tuple(
+            (field.name, _structure(getattr(value, field.name)))
+            for field in dataclasses.fields(value)
+            if field.name not in ("span", "usage_span")
+        ))
+    elif isinstance(value, dict):
+        # NOTE: Declaration order matters (for example with struct fields)
+        return tuple((key, _structure(item)) for key, item in value.items())
+    elif isinstance(value, (list, tuple)):
+        return tuple(_structure(item) for item in value)
+    elif isinstance(value, (set, frozenset)):
+        return tuple(sorted(repr(_structure(item)) for item in value))
+    else:
+        raise TypeError(f"Unable to fingerprint {type(value)}")
+
+
+def item_fingerprint(item: PrimaryItem, *extra: str) -> str:
+    """A stable fingerprint of the item's structure
+
+    This covers its resolved types, docs and annotations.
+    The `extra` strings should identify anything else that affects
+    the generated code (like the generator and its options).
+    """
+    structure = (CACHE_VERSION, extra, _structure(item))
+    return hashlib.sha256(repr(structure).encode('utf-8')).hexdigest()
+
+
+class FragmentCache:
+    """Generated code fragments, keyed by fingerprint
+
+    A fragment can be any JSON-compatible value.
+    Fragments are always kept in memory. If a directory is given,
+    they are also persisted there so they can be reused by later runs.
+    """
+    directory: Optional[Path]
+    hits: int
+    misses: int
+    _fragments: Dict[str, Any]
+
+    def __init__(self, directory: Optional[Path] = None):
+        self.directory = Path(directory) if directory is not None else None
+        self.hits = 0
+        self.misses = 0
+        self._fragments = {}
+
+    def _path(self, key: str) -> Path:
+        assert self.directory is not None
+        return self.directory / key[:2] / f"{key}.json"
+
+    def get(self, key: str) -> Optional[Any]:
+        """Get the cached fragment, or None if it is missing"""
+        fragment = self._fragments.get(key)
+        if fragment is None and self.directory is not None:
+            try:
+                with open(self._path(key), "rt", encoding="utf-8") as f:
+                    fragment = json.load(f)
+            except (OSError, ValueError):
+                fragment = None
+            else:
+                self._fragments[key] = fragment
+        if fragment is None:
+            self.misses += 1
+        else:
+            self.hits += 1
+        return fragment
+
+    def put(self, key: str, fragment: Any):
+        self._fragments[key] = fragment
+        if self.directory is not None:
+            path = self._path(key)
+            path.parent.mkdir(parents=True, exist_ok=True)
+            # Write atomically, so concurrent runs never see a partial fragment
+            fd, temp_path = tempfile.mkstemp(dir=path.parent, suffix=".tmp")
+            try:
+                with os.fdopen(fd, "wt", encoding="utf-8") as f:
+                    json.dump(fragment, f)
+                os.replace(temp_path, path)
+            except BaseException:
+                os.unlink(temp_path)
+                raise
@@ -0,0 +1,113 @@
+"""Writing generated files, without touching the ones that haven't changed
+
+Rewriting an identical header still bumps its modification time,
+which makes build systems recompile everything that includes it.
+"""
+from __future__ import annotations
+
+import os
+import tempfile
+from contextlib import contextmanager
+from pathlib import Path
+from typing import List, TextIO, Iterator, Union, Sequence, Tuple
+
+_CHUNK_SIZE = 64 * 1024
+
+
+def _same_contents(first: Path, second: Path) -> bool:
+    """Compare the contents of two files, one chunk at a time"""
+    if os.path.getsize(first) != os.path.getsize(second):
+        return False
+    with open(first, "rb") as a, open(second, "rb") as b:
+        while True:
+            chunk = a.read(_CHUNK_SIZE)
+            if chunk != b.read(_CHUNK_SIZE):
+                return False
+            if not chunk:
+                return True
+
+
+def _read_umask() -> int:
+    # There is no way to read the umask without setting it, which would race with
+    # any other threads creating files. So this is only done once, at import time.
+    umask = os.umask(0)
+    os.umask(umask)
+    return umask
+
+
+_DEFAULT_MODE = 0o666 & ~_read_umask()
+"""The mode of new outputs, which is what `open` would have used"""
+
+
+class OutputTracker:
+    """Writes generated outputs, only replacing the ones that changed
+
+    Each output is first written to a temporary file in the same directory.
+    If it differs from the existing file, it atomically replaces it.
+    Otherwise, the existing file (and its modification time) is left alone.
+    """
+    updated: List[Path]
+    """The outputs that were actually written"""
+    unchanged: List[Path]
+    """The outputs that were identical to the existing files"""
+
+    def __init__(self):
+        self.updated = []
+        self.unchanged = []
+
+    @contextmanager
+    def open(self, path: Union[str, Path]) -> Iterator[TextIO]:
+        """Open a sink for the output, which is committed once the block exits
+
+        If the block raises an exception, the existing file is left untouched.
+        """
+        path = Path(path)
+        fd, temp_name = tempfile.mkstemp(dir=path.parent, prefix=f".{path.name}.", suffix=".tmp")
+        temp_path = Path(temp_name)
+        try:
+            with os.fdopen(fd, "wt", encoding="utf-8", newline="") as sink:
+                yield sink
+            if path.exists() and _same_contents(path, temp_path):
+                temp_path.unlink()
+                self.unchanged.append(path)
+            else:
+                try:
+                    mode = os.stat(path).st_mode & 0o777
+                except FileNotFoundError:
+                    mode = _DEFAULT_MODE
+                os.chmod(temp_path, mode)
+                os.replace(temp_path, path)
+                self.updated.append(path)
+        except BaseException:
+            if temp_path.exists():
+                temp_path.unlink()
+            raise
+
+    def write_text(self, path: Union[str, Path], text: str) -> bool:
+        """Write the output, returning whether the file actually changed"""
+        num_updated = len(self.updated)
+        with self.open(path) as sink:
+            sink.write(text)
+        return len(self.updated) > num_updated
+
+    def summary(self) -> str:
+        total = len(self.updated) + len(self.unchanged)
+        return f"Updated {len(self.updated)} of {total} outputs"
+
+
+def _escape_make_path(path: Union[str, Path]) -> str:
+    # The same escaping as GCC, which both make and ninja understand
+    return str(path).replace('$', '$$').replace('#', '\\#').replace(' ', '\\ ')
+
+
+def format_depfile(rules: Sequence[Tuple[Path, Sequence[Path]]]) -> str:
+    """Format a depfile, with a rule listing the dependencies of each output
+
+    This is the Makefile subset emitted by `gcc -MD`, which ninja also accepts.
+    """
+    lines = []
+    for output, dependencies in rules:
+        parts = [_escape_make_path(output) + ":"]
+        parts.extend(_escape_make_path(dependency) for dependency in dependencies)
+        lines.append(" \\\n  ".join(parts))
+    return ''.join(line + "\n" for line in lines)
@@ -0,0 +1,740 @@
+from __future__ import annotations
+
+from typing import Optional, Union, Set, Iterable, Dict, Tuple
+
+from ivan.ast import OpaqueTypeDef, InterfaceDef, FunctionDeclaration, FunctionSignature, \
+    DocString, FunctionBody, StructDef, ImplDef, FunctionArg, MethodSelfArgument, EnumDef
+from ivan.compiler.rust import RustCodeCompiler
+from ivan.generate import CodeGenerator, is_batch_method, OptimizationHint, optimization_hints, \
+    CodegenException, module_file_name, discriminant_type
+from ivan.types import IvanType, ReferenceType, ReferenceKind, SliceType, StrType, AtomicType, DynType
+
+
+def _arg_name(arg: FunctionArg) -> str:
+    # `self` is reserved for methods in Rust, and these are free functions
+    return "this" if isinstance(arg, MethodSelfArgument) else arg.name
+
+
+class RustCodeGenerator(CodeGenerator):
+    """Generates Rust FFI declarations
+
+    Each interface becomes a `#[repr(C)]` vtable struct, where every method
+    is an `Option<unsafe extern "C" fn(..)>`. Thanks to the niche optimization,
+    this has exactly the same layout as the corresponding C function pointer
+    (with `None` being NULL).
+
+    Implementations of an interface can be written as a trait impl,
+    which allows static dispatch and gives a constant vtable.
+    """
+    _declared_slice_structs: Set[str]
+    """The generic slice structs we've already declared"""
+    _declared_dyn_struct: bool
+    """If we've already declared the generic `IvanDyn` struct"""
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self._declared_slice_structs = set()
+        self._declared_dyn_struct = False
+
+    @property
+    def module_file(self) -> str:
+        """The file name of the generated Rust module"""
+        return module_file_name(self.module, ".rs")
+
+    def write_header(self):
+        self.writeln(f"//! Generated from the Ivan module `{self.module.name}`")
+        self.writeln("#![allow(non_snake_case, unused_variables, dead_code)]")
+        self.writeln()
+        atomic_imports = {
+            # Strip generics like `AtomicPtr<T>`
+            referenced.print_rust().split('<')[0]
+            for referenced in self.referenced_types()
+            if isinstance(referenced, AtomicType)
+        }
+        if atomic_imports:
+            atomic_imports.add("Ordering")
+            self.writeln(f"use core::sync::atomic::{{{', '.join(sorted(atomic_imports))}}};")
+            self.writeln()
+
+    def write_footer(self):
+        pass
+
+    def write_doc(self, doc_string: Optional[DocString]):
+        if doc_string:
+            for line in doc_string.print_like_rust():
+                self.writeln(line)
+
+    @staticmethod
+    def print_args(signature: FunctionSignature) -> str:
+        return ', '.join(f"{_arg_name(arg)}: {arg.declared_type.resolved.print_rust()}"
+                         for arg in signature.args)
+
+    @staticmethod
+    def print_return(signature: FunctionSignature, hints: Iterable[OptimizationHint] = ()) -> str:
+        if OptimizationHint.NO_RETURN in hints:
+            return " -> !"
+        elif signature.is_unit_return:
+            return ""
+        else:
+            return f" -> {signature.return_type.resolved.print_rust()}"
+
+    @staticmethod
+    def print_batch_args(method: FunctionDeclaration) -> str:
+        signature = method.signature
+        args = [f"{_arg_name(arg)}: *const {arg.declared_type.resolved.print_rust()}"
+                for arg in signature.args]
+        if not signature.is_unit_return:
+            args.append(f"results: *mut {signature.return_type.resolved.print_rust()}")
+        args.append("count: usize")
+        return ', '.join(args)
+
+    @staticmethod
+    def print_batch_call(method: FunctionDeclaration, func: str) -> str:
+        """Call the function for the i'th element of the batch"""
+        args = ', '.join(f"{_arg_name(arg)}.add(i).read()" for arg in method.signature.args)
+        if method.signature.is_unit_return:
+            return f"{func}({args});"
+        else:
+            return f"results.add(i).write({func}({args}));"
+
+    def print_function_pointer(
+            self, signature: FunctionSignature,
+            hints: Iterable[OptimizationHint] = ()
+    ) -> str:
+        return f'unsafe extern "C" fn({self.print_args(signature)}){self.print_return(signature, hints)}'
+
+    def write_hint_attributes(self, hints: Iterable[OptimizationHint]):
+        """Write the attributes corresponding to the optimization hints
+
+        Rust has no equivalent of `pure` or `const`,
+        so the closest we can get is warning about unused results.
+        """
+        hints = list(hints)
+        if OptimizationHint.PURE in hints or OptimizationHint.CONST in hints:
+            self.writeln("#[must_use]")
+        if OptimizationHint.COLD in hints:
+            self.writeln("#[cold]")
+
+    def write_function_signature(
+            self, name: str, signature: FunctionSignature,
+            abi: Optional[str] = None,
+            hints: Iterable[OptimizationHint] = ()
+    ):
+        if abi is not None:
+            self.write(f'{abi} ')
+        self.write(f'fn {name}({self.print_args(signature)}){self.print_return(signature, hints)}')
+
+    def _declare_top_level_function(self, func: FunctionDeclaration):
+        self.writeln('extern "C" {')
+        with self.with_indent():
+            self.write_doc(func.doc_string)
+            hints = optimization_hints(func)
+            self.write_hint_attributes(hints)
+            self.write('pub ')
+            self.write_function_signature(func.name, func.signature, hints=hints)
+            self.writeln(';')
+        self.writeln('}')
+
+    def _declare_interface(self, interface: InterfaceDef):
+        self.write_doc(interface.doc_string)
+        self.writeln("#[repr(C)]")
+        self.writeln("#[derive(Copy, Clone)]")
+        self.writeln(f"pub struct {interface.name} {{")
+        with self.with_indent():
+            if interface.base is not None:
+                self.writeln(f"/// [AUTO] The vtable of the base interface [{interface.base.name}]")
+                self.writeln("///")
+                self.writeln("/// This must be the first field, so upcasting is free.")
+                self.writeln(f"pub base: {interface.base.name},")
+            for method in interface.methods:
+                self.write_doc(method.doc_string)
+                self.writeln(f"pub {method.name}: Option<"
+                             f"{self.print_function_pointer(method.signature, optimization_hints(method))}>,")
+                if is_batch_method(method):
+                    self.write_batch_doc(method)
+                    self.writeln(f'pub {method.name}_batch: Option<unsafe extern "C" fn('
+                                 f'{self.print_batch_args(method)})>,')
+        self.writeln("}")
+        self.writeln()
+        if interface.base is not None:
+            self._declare_upcast(interface)
+        self._declare_interface_trait(interface)
+
+    def _declare_upcast(self, interface: InterfaceDef):
+        """Dereference to the base vtable, so the derived one can be passed wherever the base is expected"""
+        base = interface.base.name
+        self.writeln(f"/// [AUTO] Upcast to the [{base}] vtable, which is at the same address")
+        self.writeln(f"impl core::ops::Deref for {interface.name} {{")
+        with self.with_indent():
+            self.writeln(f"type Target = {base};")
+            self.writeln("#[inline(always)]")
+            self.writeln(f"fn deref(&self) -> &{base} {{")
+            with self.with_indent():
+                self.writeln("&self.base")
+            self.writeln("}")
+        self.writeln("}")
+        self.writeln()
+
+    def _declare_interface_trait(self, interface: InterfaceDef):
+        """Declare a trait for implementations of the interface
+
+        Generic code bounded by this trait is statically dispatched,
+        and `VTABLE` is a constant vtable for dynamic dispatch."""
+        self.writeln(f"/// An implementation of the [{interface.name}] interface")
+        if interface.base is not None:
+            self.writeln(f"pub trait {interface.name}Impl: {interface.base.name}Impl {{")
+        else:
+            self.writeln(f"pub trait {interface.name}Impl {{")
+        with self.with_indent():
+            for method in interface.methods:
+                self.write_doc(method.doc_string)
+                hints = optimization_hints(method)
+                self.write_hint_attributes(hints)
+                self.write_function_signature(
+                    method.name, method.signature,
+                    abi='unsafe extern "C"', hints=hints
+                )
+                if method.body is not None:
+                    self.writeln(' {')
+                    with self.with_indent():
+                        compiler = RustCodeCompiler(
+                            writer=self,
+                            func_signature=method.signature
+                        )
+                        compiler.compile_body(method.body)
+                        if OptimizationHint.NO_RETURN in hints:
+                            self.write_no_return_guard()
+                    self.writeln('}')
+                else:
+                    self.writeln(';')
+                if is_batch_method(method):
+                    self.write_batch_doc(method)
+                    self.writeln(f'unsafe extern "C" fn {method.name}_batch('
+                                 f'{self.print_batch_args(method)}) {{')
+                    with self.with_indent():
+                        self.writeln("for i in 0..count {")
+                        with self.with_indent():
+                            self.writeln(self.print_batch_call(method, f"Self::{method.name}"))
+                        self.writeln("}")
+                    self.writeln("}")
+            if interface.methods:
+                self.writeln()
+            self.writeln(f"const VTABLE: {interface.name} = {interface.name} {{")
+            with self.with_indent():
+                if interface.base is not None:
+                    self.writeln(f"base: <Self as {interface.base.name}Impl>::VTABLE,")
+                for method in interface.methods:
+                    self.writeln(f"{method.name}: Some(Self::{method.name}),")
+                    if is_batch_method(method):
+                        self.writeln(f"{method.name}_batch: Some(Self::{method.name}_batch),")
+            self.writeln("};")
+        self.writeln("}")
+
+    def _declare_impl(self, impl: ImplDef):
+        """Declare a static vtable, which is placed in read-only memory
+
+        The functions are declared inside the initializer, so that multiple
+        implementations can share them (and they can't clash with other items).
+        """
+        interface = self.implemented_interface(impl)
+        slots = list(self.impl_slots(impl))
+        self.write_doc(self.impl_doc(impl))
+        self.writeln("#[allow(non_upper_case_globals)]")
+        self.writeln(f"pub static {impl.vtable_name}: {interface.name} = {{")
+        with self.with_indent():
+            functions = {}
+            for _, slot, method, function in slots:
+                if function is not None and function not in functions:
+                    functions[function] = (slot, method)
+            if functions:
+                self.writeln('extern "C" {')
+                with self.with_indent():
+                    for function, (slot, method) in functions.items():
+                        if slot == method.name:
+                            self.write_function_signature(
+                                function, method.signature,
+                                hints=optimization_hints(method)
+                            )
+                            self.writeln(';')
+                        else:
+                            self.writeln(f"fn {function}({self.print_batch_args(method)});")
+                self.writeln('}')
+            for _, slot, method, function in slots:
+                if function is None and slot == method.name:
+                    self.write_default_function(f"default_{method.name}", method)
+            self.write_vtable_literal(interface, {
+                (vtable_path, slot): function if function is not None else f"default_{slot}"
+                for vtable_path, slot, method, function in slots
+                if function is not None or slot == method.name
+            })
+        self.writeln("};")
+
+    def write_default_function(self, name: str, method: FunctionDeclaration):
+        """Write a function with the default body of the method, for use in a static vtable"""
+        hints = optimization_hints(method)
+        self.write_function_signature(name, method.signature, abi='unsafe extern "C"', hints=hints)
+        self.writeln(' {')
+        with self.with_indent():
+            RustCodeCompiler(writer=self, func_signature=method.signature).compile_body(method.body)
+            if OptimizationHint.NO_RETURN in hints:
+                self.write_no_return_guard()
+        self.writeln('}')
+
+    def write_vtable_literal(self, interface: InterfaceDef, functions: Dict[Tuple[str, str], str], path: str = ""):
+        """Write the vtable of the interface, with the functions for each `(vtable_path, slot)`
+
+        Rust needs every field to be initialized, so missing slots are `None`.
+        """
+        self.writeln(f"{interface.name} {{")
+        with self.with_indent():
+            if interface.base is not None:
+                self.write("base: ")
+                base = self.context.find_item(interface.base.name)
+                self.write_vtable_literal(base, functions, path="base." + path)
+            for method in interface.methods:
+                slots = [method.name]
+                if is_batch_method(method):
+                    slots.append(f"{method.name}_batch")
+                for slot in slots:
+                    function = functions.get((path, slot))
+                    self.writeln(f"{slot}: {f'Some({function})' if function is not None else 'None'},")
+        self.writeln("}," if path else "}")
+
+    def _declare_slice_type(self, slice_type: Union[SliceType, StrType]):
+        # Rust slices aren't FFI-safe, so we declare `#[repr(C)]` equivalents
+        # which convert to and from them without copying.
+        # These are generic, so they only need to be declared once
+        if isinstance(slice_type, StrType):
+            struct_name = "IvanStr"
+        elif slice_type.mutable:
+            struct_name = "IvanSliceMut"
+        else:
+            struct_name = "IvanSlice"
+        if struct_name in self._declared_slice_structs:
+            return
+        self._declared_slice_structs.add(struct_name)
+        if isinstance(slice_type, StrType):
+            self.write_slice_struct(
+                "IvanStr", "/// A borrowed view of UTF-8 text, passed by value as `{ptr, len}`",
+                generics="'a", ptr_type="*const u8", marker="&'a str"
+            )
+            self.write_copy_impl("IvanStr<'a>", generics="'a")
+            self.writeln("impl<'a> From<&'a str> for IvanStr<'a> {")
+            with self.with_indent():
+                self.writeln("#[inline(always)]")
+                self.writeln("fn from(s: &'a str) -> Self {")
+                with self.with_indent():
+                    self.writeln("IvanStr { ptr: s.as_ptr(), len: s.len(), _marker: core::marker::PhantomData }")
+                self.writeln("}")
+            self.writeln("}")
+            self.writeln("impl<'a> core::ops::Deref for IvanStr<'a> {")
+            with self.with_indent():
+                self.writeln("type Target = str;")
+                self.writeln("#[inline(always)]")
+                self.writeln("fn deref(&self) -> &str {")
+                with self.with_indent():
+                    self.writeln("// The sender guarantees this is valid UTF-8")
+                    self.writeln("unsafe { core::str::from_utf8_unchecked(slice_from_raw(self.ptr, self.len)) }")
+                self.writeln("}")
+            self.writeln("}")
+        elif slice_type.mutable:
+            self.write_slice_struct(
+                "IvanSliceMut", "/// A mutably borrowed slice, passed by value as `{ptr, len}`",
+                generics="'a, T", ptr_type="*mut T", marker="&'a mut [T]"
+            )
+            self.writeln("impl<'a, T> From<&'a mut [T]> for IvanSliceMut<'a, T> {")
+            with self.with_indent():
+                self.writeln("#[inline(always)]")
+                self.writeln("fn from(s: &'a mut [T]) -> Self {")
+                with self.with_indent():
+                    self.writeln("IvanSliceMut { ptr: s.as_mut_ptr(), len: s.len(), _marker: core::marker::PhantomData }")
+                self.writeln("}")
+            self.writeln("}")
+            self.writeln("impl<'a, T> core::ops::Deref for IvanSliceMut<'a, T> {")
+            with self.with_indent():
+                self.writeln("type Target = [T];")
+                self.writeln("#[inline(always)]")
+                self.writeln("fn deref(&self) -> &[T] {")
+                with self.with_indent():
+                    self.writeln("unsafe { slice_from_raw(self.ptr, self.len) }")
+                self.writeln("}")
+            self.writeln("}")
+            self.writeln("impl<'a, T> core::ops::DerefMut for IvanSliceMut<'a, T> {")
+            with self.with_indent():
+                self.writeln("#[inline(always)]")
+                self.writeln("fn deref_mut(&mut self) -> &mut [T] {")
+                with self.with_indent():
+                    self.writeln("if self.len == 0 {")
+                    with self.with_indent():
+                        self.writeln("&mut []")
+                    self.writeln("} else {")
+                    with self.with_indent():
+                        self.writeln("unsafe { core::slice::from_raw_parts_mut(self.ptr, self.len) }")
+                    self.writeln("}")
+                self.writeln("}")
+            self.writeln("}")
+        else:
+            self.write_slice_struct(
+                "IvanSlice", "/// A borrowed slice, passed by value as `{ptr, len}`",
+                generics="'a, T", ptr_type="*const T", marker="&'a [T]"
+            )
+            self.write_copy_impl("IvanSlice<'a, T>", generics="'a, T")
+            self.writeln("impl<'a, T> From<&'a [T]> for IvanSlice<'a, T> {")
+            with self.with_indent():
+                self.writeln("#[inline(always)]")
+                self.writeln("fn from(s: &'a [T]) -> Self {")
+                with self.with_indent():
+                    self.writeln("IvanSlice { ptr: s.as_ptr(), len: s.len(), _marker: core::marker::PhantomData }")
+                self.writeln("}")
+            self.writeln("}")
+            self.writeln("impl<'a, T> core::ops::Deref for IvanSlice<'a, T> {")
+            with self.with_indent():
+                self.writeln("type Target = [T];")
+                self.writeln("#[inline(always)]")
+                self.writeln("fn deref(&self) -> &[T] {")
+                with self.with_indent():
+                    self.writeln("unsafe { slice_from_raw(self.ptr, self.len) }")
+                self.writeln("}")
+            self.writeln("}")
+        self.writeln()
+
+    def _declare_dyn_type(self, dyn_type: DynType):
+        # Like slices, this is generic so it only needs to be declared once
+        if self._declared_dyn_struct:
+            return
+        self._declared_dyn_struct = True
+        self.writeln("/// An object implementing the interface `V`, passed by value as `{self, vtable}`")
+        self.writeln("///")
+        self.writeln("/// This fits in two registers, so calling a method doesn't need to load the vtable from the object.")
+        self.writeln("/// Vtables are constants (like the ones generated for `impl` blocks), so they are `'static`.")
+        self.writeln("#[repr(C)]")
+        self.writeln("pub struct IvanDyn<V: 'static> {")
+        with self.with_indent():
+            self.writeln("pub this: *mut core::ffi::c_void,")
+            self.writeln("pub vtable: &'static V,")
+        self.writeln("}")
+        self.write_copy_impl("IvanDyn<V>", generics="V")
+        self.writeln()
+
+    def write_copy_impl(self, target: str, generics: str):
+        # NOTE: Can't derive these, since that would require `T: Copy`
+        self.writeln(f"impl<{generics}> Clone for {target} {{")
+        with self.with_indent():
+            self.writeln("#[inline(always)]")
+            self.writeln("fn clone(&self) -> Self {")
+            with self.with_indent():
+                self.writeln("*self")
+            self.writeln("}")
+        self.writeln("}")
+        self.writeln(f"impl<{generics}> Copy for {target} {{}}")
+
+    def write_slice_struct(self, name: str, doc: str, generics: str, ptr_type: str, marker: str):
+        if len(self._declared_slice_structs) == 1:
+            # First slice struct, so we need the shared helper
+            self.writeln("/// Convert a `{ptr, len}` pair from C into a slice")
+            self.writeln("///")
+            self.writeln("/// C code is allowed to pass NULL for an empty slice, but Rust isn't.")
+            self.writeln("#[inline(always)]")
+            self.writeln("unsafe fn slice_from_raw<'a, T>(ptr: *const T, len: usize) -> &'a [T] {")
+            with self.with_indent():
+                self.writeln("if len == 0 {")
+                with self.with_indent():
+                    self.writeln("&[]")
+                self.writeln("} else {")
+                with self.with_indent():
+                    self.writeln("core::slice::from_raw_parts(ptr, len)")
+                self.writeln("}")
+            self.writeln("}")
+            self.writeln()
+        self.writeln(doc)
+        self.writeln("#[repr(C)]")
+        self.writeln(f"pub struct {name}<{generics}> {{")
+        with self.with_indent():
+            self.writeln(f"pub ptr: {ptr_type},")
+            self.writeln("pub len: usize,")
+            self.writeln(f"_marker: core::marker::PhantomData<{marker}>,")
+        self.writeln("}")
+
+    def write_batch_doc(self, method: FunctionDeclaration):
+        self.writeln(f"/// [AUTO] Batched version of `{method.name}`, called once for `count` elements")
+        self.writeln("///")
+        self.writeln(f"/// If this is `None`, `{method.name}` is called for each element instead.")
+
+    @staticmethod
+    def print_field_type(struct: Union[StructDef, EnumDef], field_type: IvanType) -> str:
+        """Print the type of a struct field
+
+        Fields aren't tied to the duration of a call (like arguments are),
+        so references become raw pointers.
+        """
+        if isinstance(field_type, ReferenceType):
+            if field_type.kind == ReferenceKind.IMMUTABLE:
+                return f"*const {field_type.target.print_rust()}"
+            else:
+                return f"*mut {field_type.target.print_rust()}"
+        elif isinstance(field_type, (SliceType, StrType)):
+            raise CodegenException(f"Rust structs can't contain borrowed slices: {struct.name}")
+        elif isinstance(field_type, DynType):
+            raise CodegenException(f"Rust structs can't contain borrowed objects: {struct.name}")
+        else:
+            return field_type.print_rust()
+
+    def _declare_struct(self, struct: StructDef):
+        self.write_doc(struct.doc_string)
+        self.writeln("#[repr(C)]")
+        self.writeln(f"pub struct {struct.name} {{")
+        with self.with_indent():
+            for field in struct.fields.values():
+                self.write_doc(field.doc_string)
+                field_type = self.print_field_type(struct, field.static_type.resolved)
+                self.writeln(f"pub {field.name}: {field_type},")
+        self.writeln("}")
+        atomic_fields = [
+            field for field in struct.fields.values()
+            if isinstance(field.static_type.resolved, AtomicType)
+        ]
+        if atomic_fields:
+            self.writeln(f"impl {struct.name} {{")
+            with self.with_indent():
+                for field in atomic_fields:
+                    self.write_atomic_accessors(struct, field.name, field.static_type.resolved)
+            self.writeln("}")
+
+    def write_atomic_accessors(self, struct: StructDef, field_name: str, field_type: AtomicType):
+        value_type = field_type.print_rust_value()
+        self.writeln(f"/// [AUTO] Atomically load `{struct.name}.{field_name}`")
+        self.writeln("#[inline(always)]")
+        self.writeln(f"pub fn load_{field_name}(&self, order: Ordering) -> {value_type} {{")
+        with self.with_indent():
+            self.writeln(f"self.{field_name}.load(order)")
+        self.writeln("}")
+        self.writeln(f"/// [AUTO] Atomically store `{struct.name}.{field_name}`")
+        self.writeln("#[inline(always)]")
+        self.writeln(f"pub fn store_{field_name}(&self, value: {value_type}, order: Ordering) {{")
+        with self.with_indent():
+            self.writeln(f"self.{field_name}.store(value, order)")
+        self.writeln("}")
+
+    def _declare_enum(self, enum: EnumDef):
+        for variant in enum.variants:
+            if not variant.fields:
+                continue
+            self.writeln(f"/// [AUTO] The fields of [{enum.name}::{variant.name}]")
+            self.writeln("#[repr(C)]")
+            self.writeln("#[allow(non_camel_case_types)]")
+            self.writeln(f"pub struct {enum.name}_{variant.name} {{")
+            with self.with_indent():
+                for field in variant.fields.values():
+                    self.write_doc(field.doc_string)
+                    self.writeln(f"pub {field.name}: {self.print_field_type(enum, field.static_type.resolved)},")
+            self.writeln("}")
+            self.writeln()
+        tag_type = discriminant_type(enum).print_rust()
+        self.write_doc(enum.doc_string)
+        if any(variant.fields for variant in enum.variants):
+            # The same layout as a C struct of the tag and a union of the variants
+            self.writeln(f"#[repr(C, {tag_type})]")
+        else:
+            self.writeln(f"#[repr({tag_type})]")
+        self.writeln(f"pub enum {enum.name} {{")
+        with self.with_indent():
+            for variant in enum.variants:
+                self.write_doc(variant.doc_string)
+                if variant.fields:
+                    self.writeln(f"{variant.name}({enum.name}_{variant.name}),")
+                else:
+                    self.writeln(f"{variant.name},")
+        self.writeln("}")
+        if not enum.methods:
+            return
+        self.writeln()
+        self.writeln('extern "C" {')
+        with self.with_indent():
+            for method in enum.methods:
+                hints = optimization_hints(method)
+                for variant in enum.variants:
+                    name, signature = self.variant_function(enum, variant, method)
+                    self.write_hint_attributes(hints)
+                    self.write('pub ')
+                    self.write_function_signature(name, signature, hints=hints)
+                    self.writeln(';')
+        self.writeln('}')
+        self.writeln()
+        self.writeln(f"impl {enum.name} {{")
+        with self.with_indent():
+            for index, method in enumerate(enum.methods):
+                if index > 0:
+                    self.writeln()
+                self.write_enum_dispatch(enum, method)
+        self.writeln("}")
+
+    def write_enum_dispatch(self, enum: EnumDef, method: FunctionDeclaration):
+        """Write a method calling the implementation for the variant of `self`"""
+        signature = method.signature
+        receiver = signature.args[0]
+        hints = optimization_hints(method)
+        self.write_doc(method.doc_string)
+        self.write_wrapper_attributes(hints)
+        self_arg = "&self" if receiver.reference_kind == ReferenceKind.IMMUTABLE else "&mut self"
+        args = ''.join(f", {arg.name}: {arg.declared_type.resolved.print_rust()}" for arg in signature.args[1:])
+        self.writeln(f"pub unsafe fn {method.name}({self_arg}{args}){self.print_return(signature, hints)} {{")
+        with self.with_indent():
+            self.writeln("match self {")
+            with self.with_indent():
+                for variant in enum.variants:
+                    function, _ = self.variant_function(enum, variant, method)
+                    call_args = [arg.name for arg in signature.args[1:]]
+                    if variant.fields:
+                        call_args.insert(0, "fields")
+                        pattern = f"{enum.name}::{variant.name}(fields)"
+                    else:
+                        pattern = f"{enum.name}::{variant.name}"
+                    self.writeln(f"{pattern} => {function}({', '.join(call_args)}),")
+            self.writeln("}")
+        self.writeln("}")
+
+    def _declare_opaque_type(self, opaque: OpaqueTypeDef):
+        self.write_doc(opaque.doc_string)
+        self.writeln("#[repr(C)]")
+        self.writeln(f"pub struct {opaque.name} {{")
+        with self.with_indent():
+            self.writeln("_private: [u8; 0],")
+        self.writeln("}")
+
+    def _write_wrapper_method(
+            self, wrapper_name: str, interface_type: IvanType,
+            target_method: FunctionDeclaration,
+            doc_string: Optional[DocString],
+            default_impl: Optional[FunctionBody],
+            indirect_vtable: bool,
+            vtable_path: str = ""
+    ):
+        """Generate a wrapper method for the specified interface"""
+        signature = target_method.signature
+        assert all('vtable' != arg.name for arg in signature.args)
+        hints = optimization_hints(target_method)
+        self.write_doc(doc_string)
+        if indirect_vtable:
+            vtable_type = ReferenceType(interface_type, ReferenceKind.IMMUTABLE)
+        else:
+            vtable_type = interface_type
+        self.write_wrapper_attributes(hints)
+        self.write(f"pub unsafe fn {wrapper_name}(vtable: {vtable_type.print_rust()}")
+        if signature.args:
+            self.write(f", {self.print_args(signature)}")
+        self.writeln(f"){self.print_return(signature, hints)} {{")
+        with self.with_indent() as writer:
+            call_args = ', '.join(_arg_name(arg) for arg in signature.args)
+            if default_impl is None:
+                writer.writeln(
+                    f'let func_ptr = vtable.{vtable_path}{target_method.name}'
+                    f'.expect("Missing {interface_type.name}.{target_method.name}");'
+                )
+                writer.writeln(f'func_ptr({call_args})')
+            else:
+                writer.writeln(f"if let Some(func_ptr) = vtable.{vtable_path}{target_method.name} {{")
+                with self.with_indent():
+                    writer.writeln(f'func_ptr({call_args})')
+                writer.writeln("} else {")
+                with self.with_indent():
+                    compiler = RustCodeCompiler(
+                        writer=self,
+                        func_signature=signature
+                    )
+                    compiler.compile_body(default_impl)
+                    if OptimizationHint.NO_RETURN in hints:
+                        self.write_no_return_guard()
+                writer.writeln("}")
+        self.writeln('}')
+
+    def _write_dyn_wrapper_method(
+            self, wrapper_name: str, interface_type: IvanType,
+            target_method: FunctionDeclaration,
+            doc_string: Optional[DocString],
+            default_impl: Optional[FunctionBody],
+            vtable_path: str = ""
+    ):
+        signature = target_method.signature
+        assert all('object' != arg.name for arg in signature.args)
+        hints = optimization_hints(target_method)
+        self.write_doc(doc_string)
+        self.write_wrapper_attributes(hints)
+        self.write(f"pub unsafe fn {wrapper_name}(object: {DynType(interface_type).print_rust()}")
+        for arg in signature.args[1:]:
+            self.write(f", {arg.name}: {arg.declared_type.resolved.print_rust()}")
+        self.writeln(f"){self.print_return(signature, hints)} {{")
+        with self.with_indent() as writer:
+            call_args = ', '.join(['object.this', *(arg.name for arg in signature.args[1:])])
+            if default_impl is None:
+                writer.writeln(
+                    f'let func_ptr = object.vtable.{vtable_path}{target_method.name}'
+                    f'.expect("Missing {interface_type.name}.{target_method.name}");'
+                )
+                writer.writeln(f'func_ptr({call_args})')
+            else:
+                writer.writeln(f"if let Some(func_ptr) = object.vtable.{vtable_path}{target_method.name} {{")
+                with self.with_indent():
+                    writer.writeln(f'func_ptr({call_args})')
+                writer.writeln("} else {")
+                with self.with_indent():
+                    compiler = RustCodeCompiler(
+                        writer=self,
+                        func_signature=signature
+                    )
+                    compiler.compile_body(default_impl)
+                    if OptimizationHint.NO_RETURN in hints:
+                        self.write_no_return_guard()
+                writer.writeln("}")
+        self.writeln('}')
+
+    def write_wrapper_attributes(self, hints: Iterable[OptimizationHint]):
+        hints = list(hints)
+        self.write_hint_attributes(hints)
+        if OptimizationHint.COLD in hints:
+            # Keep the (unlikely) call out of line, instead of bloating the caller
+            self.writeln("#[inline(never)]")
+        else:
+            self.writeln("#[inline(always)]")
+
+    def write_no_return_guard(self):
+        self.writeln('unreachable!("@NoReturn methods must never return")')
+
+    def _write_batch_wrapper_method(
+            self, wrapper_name: str, interface_type: IvanType,
+            target_method: FunctionDeclaration,
+            doc_string: Optional[DocString],
+            indirect_vtable: bool,
+            vtable_path: str = ""
+    ):
+        signature = target_method.signature
+        self.write_doc(doc_string)
+        if indirect_vtable:
+            vtable_type = ReferenceType(interface_type, ReferenceKind.IMMUTABLE)
+        else:
+            vtable_type = interface_type
+        # Writing the results is a side effect, so `#[must_use]` doesn't apply
+        self.write_wrapper_attributes(
+            hint for hint in optimization_hints(target_method)
+            if hint in (OptimizationHint.HOT, OptimizationHint.COLD)
+        )
+        self.writeln(f"pub unsafe fn {wrapper_name}(vtable: {vtable_type.print_rust()}, "
+                     f"{self.print_batch_args(target_method)}) {{")
+        with self.with_indent() as writer:
+            batch_args = [_arg_name(arg) for arg in signature.args]
+            if not signature.is_unit_return:
+                batch_args.append("results")
+            batch_args.append("count")
+            writer.writeln(f"if let Some(batch_ptr) = vtable.{vtable_path}{target_method.name}_batch {{")
+            with self.with_indent():
+                writer.writeln(f"return batch_ptr({', '.join(batch_args)});")
+            writer.writeln("}")
+            # Fallback to calling the regular method for each element
+            writer.writeln(
+                f'let func_ptr = vtable.{vtable_path}{target_method.name}'
+                f'.expect("Missing {interface_type.name}.{target_method.name}");'
+            )
+            writer.writeln("for i in 0..count {")
+            with self.with_indent():
+                writer.writeln(self.print_batch_call(target_method, "func_ptr"))
+            writer.writeln("}")
+        self.writeln('}')
@@ -0,0 +1,243 @@
+"""Profiling how much memory each phase (and item) of a build uses
+
+The profile is a timing registry, so it is reported into by the same `timed` calls
+(see `ivan.timings`). Around each of them, it measures the memory traced by `tracemalloc`.
+Since `tracemalloc` can't tell threads apart, profiled builds run one target at a time.
+"""
+from __future__ import annotations
+
+import os
+import sys
+import tracemalloc
+from collections import defaultdict
+from contextlib import contextmanager
+from dataclasses import dataclass
+from enum import Enum
+from types import FunctionType, ModuleType
+from typing import Dict, Iterator, List, Any, Tuple, Iterable, Optional
+
+from ivan.ast import IvanModule
+from ivan.ast.lexer import lex_all
+from ivan.timings import TimingRegistry, PHASE_CATEGORIES
+
+_PACKAGE_DIR = os.path.dirname(os.path.abspath(__file__))
+_PROFILER_FILES = {os.path.join(_PACKAGE_DIR, name) for name in ("memory.py", "timings.py")}
+_CONTAINERS = (list, tuple, set, frozenset, dict)
+_TRACEBACK_FRAMES = 4
+"""The number of frames to trace, to reach the code in ivan that called the allocating function
+
+Every allocation records this many frames, so the overhead of tracing grows quickly with it.
+"""
+
+
+@dataclass(frozen=True)
+class MemoryEvent:
+    name: str
+    category: str
+    peak: int
+    """The most memory used at once (relative to the start of the phase), in bytes"""
+    retained: int
+    """The memory still allocated at the end of the phase (relative to its start), in bytes"""
+    args: Dict[str, str]
+
+
+@dataclass
+class TypeMemory:
+    count: int = 0
+    size: int = 0
+    """The approximate size of the objects (and the strings and containers they own), in bytes"""
+
+
+@dataclass
+class _Frame:
+    start: int
+    peak: int
+
+
+def _attributes(value: Any) -> Iterator[Any]:
+    if hasattr(value, "__dict__"):
+        yield from vars(value).values()
+    for cls in type(value).__mro__:
+        for slot in getattr(cls, "__slots__", ()):
+            if hasattr(value, slot):
+                yield getattr(value, slot)
+
+
+def memory_by_type(roots: Iterable[Any]) -> Dict[str, TypeMemory]:
+    """Approximate the memory used by each type of object reachable from the roots
+
+    Strings and containers (like lists and dicts) aren't counted as types of their own.
+    Instead, their size is attributed to the object that owns them.
+    Objects that are shared are only counted once, and enums aren't counted at all.
+    """
+    types: Dict[str, TypeMemory] = defaultdict(TypeMemory)
+    seen = set()
+    stack: List[Tuple[Any, str]] = [(root, type(root).__name__) for root in roots]
+    while stack:
+        value, owner = stack.pop()
+        if id(value) in seen or isinstance(value, (type, FunctionType, ModuleType, Enum)):
+            continue
+        seen.add(id(value))
+        size = sys.getsizeof(value)
+        if isinstance(value, _CONTAINERS) or isinstance(value, (str, bytes, int, float, bool)) or value is None:
+            types[owner].size += size
+        else:
+            owner = type(value).__name__
+            if hasattr(value, "__dict__"):
+                size += sys.getsizeof(vars(value))
+            types[owner].count += 1
+            types[owner].size += size
+        if isinstance(value, dict):
+            children = [*value.keys(), *value.values()]
+        elif isinstance(value, _CONTAINERS):
+            children = list(value)
+        else:
+            children = list(_attributes(value))
+        stack.extend((child, owner) for child in children)
+    return dict(types)
+
+
+class MemoryProfile(TimingRegistry):
+    """Timings, along with the memory used by each phase and item
+
+    The profile must be active (with `tracing()`) for the memory to be measured.
+    """
+    memory_events: List[MemoryEvent]
+    types: Dict[str, TypeMemory]
+    """The approximate memory used by each type of AST node, in every profiled module"""
+    sites: Dict[Tuple[str, int], TypeMemory]
+    """The memory allocated by each line of code in ivan, that was still retained at the end of each file"""
+    _stack: List[_Frame]
+    _file_snapshot: Optional[tracemalloc.Snapshot]
+
+    def __init__(self):
+        super().__init__()
+        self.memory_events = []
+        self.types = defaultdict(TypeMemory)
+        self.sites = defaultdict(TypeMemory)
+        self._stack = []
+        self._file_snapshot = None
+
+    @contextmanager
+    def tracing(self) -> Iterator[MemoryProfile]:
+        """Trace memory allocations within the block"""
+        already_tracing = tracemalloc.is_tracing()
+        if not already_tracing:
+            tracemalloc.start(_TRACEBACK_FRAMES)
+        try:
+            yield self
+        finally:
+            if not already_tracing:
+                tracemalloc.stop()
+
+    @contextmanager
+    def span(self, name: str, category: str, **args: str) -> Iterator[None]:
+        if not tracemalloc.is_tracing():
+            with super().span(name, category, **args):
+                yield
+            return
+        if category == "file":
+            # The allocations retained by the file are compared to this
+            self._file_snapshot = tracemalloc.take_snapshot()
+        # Resetting the peak would lose the peak of the enclosing span, so save it first
+        current, peak = tracemalloc.get_traced_memory()
+        if self._stack:
+            self._stack[-1].peak = max(self._stack[-1].peak, peak)
+        frame = _Frame(start=current, peak=current)
+        self._stack.append(frame)
+        tracemalloc.reset_peak()
+        try:
+            with super().span(name, category, **args):
+                yield
+        finally:
+            current, peak = tracemalloc.get_traced_memory()
+            assert self._stack.pop() is frame
+            frame.peak = max(frame.peak, peak)
+            if self._stack:
+                self._stack[-1].peak = max(self._stack[-1].peak, frame.peak)
+            self.memory_events.append(MemoryEvent(
+                name=name,
+                category=category,
+                peak=frame.peak - frame.start,
+                retained=current - frame.start,
+                args=args
+            ))
+
+    def record_module(self, module: IvanModule, text: str):
+        """Record the memory retained by the module, once it has been generated
+
+        The tokens are discarded once the module is parsed, so they are measured by lexing the text again.
+        Allocations are attributed to the innermost line of ivan (outside the profiler) that made them.
+        """
+        if tracemalloc.is_tracing() and self._file_snapshot is not None:
+            snapshot = tracemalloc.take_snapshot()
+            for difference in snapshot.compare_to(self._file_snapshot, "traceback"):
+                if difference.size_diff <= 0 or \
+                        any(frame.filename in _PROFILER_FILES for frame in difference.traceback):
+                    # Allocated by the profiler itself
+                    continue
+                # Frames are ordered from the oldest to the most recent
+                frame = next((
+                    frame for frame in reversed(difference.traceback)
+                    if frame.filename.startswith(_PACKAGE_DIR)
+                ), None)
+                if frame is None:
+                    continue
+                site = self.sites[(frame.filename, frame.lineno)]
+                site.count += difference.count_diff
+                site.size += difference.size_diff
+            self._file_snapshot = None
+        # Tracing every allocation makes this many times slower, and the memory used by one file
+        # never affects the measurements of the next one, so tracing is paused in the meantime
+        traceback_limit = tracemalloc.get_traceback_limit() if tracemalloc.is_tracing() else None
+        if traceback_limit is not None:
+            tracemalloc.stop()
+        try:
+            for roots in ([module], list(lex_all(text))):
+                for name, memory in memory_by_type(roots).items():
+                    self.types[name].count += memory.count
+                    self.types[name].size += memory.size
+        finally:
+            if traceback_limit is not None:
+                tracemalloc.start(traceback_limit)
+
+    def report(self, num_entries: int = 10) -> str:
+        """A human-readable report of the memory used by each phase, the top allocation sites and AST types"""
+        phases: Dict[Tuple[int, str], List[MemoryEvent]] = defaultdict(list)
+        for event in self.memory_events:
+            if event.category in PHASE_CATEGORIES:
+                phases[(PHASE_CATEGORIES.index(event.category), event.name)].append(event)
+        lines = [f"{'phase':24} {'peak KiB':>10} {'retained KiB':>13}"]
+        for (_, name), events in sorted(phases.items()):
+            # Files are built one at a time, so the peak is the largest of any file
+            peak = max(event.peak for event in events)
+            retained = sum(event.retained for event in events)
+            lines.append(f"{name:24} {peak / 1024:10.1f} {retained / 1024:13.1f}")
+        items = sorted(
+            (event for event in self.memory_events if event.category == "item"),
+            key=lambda event: event.peak, reverse=True
+        )[:num_entries]
+        if items:
+            lines.append("")
+            lines.append("Largest items (peak KiB):")
+            for event in items:
+                details = ", ".join(event.args.values())
+                lines.append(f"  {event.peak / 1024:10.1f}  {event.name} ({details})")
+        if self.sites:
+            lines.append("")
+            lines.append("Top allocation sites (retained at the end of each file):")
+            for (filename, lineno), memory in sorted(
+                    self.sites.items(), key=lambda entry: entry[1].size, reverse=True
+            )[:num_entries]:
+                if filename.startswith(_PACKAGE_DIR):
+                    filename = "ivan" + filename[len(_PACKAGE_DIR):]
+                lines.append(f"  {memory.size / 1024:10.1f} KiB  {filename}:{lineno} ({memory.count} blocks)")
+        if self.types:
+            lines.append("")
+            lines.append(f"{'AST type':24} {'count':>10} {'KiB':>10} {'bytes each':>11}")
+            for name, memory in sorted(self.types.items(), key=lambda entry: entry[1].size, reverse=True):
+                if memory.count == 0:
+                    continue
+                lines.append(f"{name:24} {memory.count:10} {memory.size / 1024:10.1f} "
+                             f"{memory.size / memory.count:11.0f}")
+        return '\n'.join(lines)
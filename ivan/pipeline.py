@@ -0,0 +1,199 @@
+"""Generating code for multiple targets from a single parse
+
+The module is parsed and resolved once, then each target
+is generated concurrently from the same (immutable) resolved module.
+"""
+from __future__ import annotations
+
+import time
+from abc import ABCMeta, abstractmethod
+from concurrent.futures import Executor, ThreadPoolExecutor
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import List, Optional, Sequence, Union, Callable, TextIO, TypeVar
+
+from ivan.ast import IvanModule
+from ivan.ast.parser import parse_module, Parser
+from ivan.generate import CodeGenerator, module_file_name
+from ivan.generate.c11 import C11CodeGenerator, C11Options, generate_split_headers
+from ivan.generate.cache import FragmentCache
+from ivan.generate.output import OutputTracker, format_depfile
+from ivan.generate.rust import RustCodeGenerator
+from ivan.timings import timed
+from ivan.types.context import TypeContext
+
+GeneratorType = TypeVar("GeneratorType", bound=CodeGenerator)
+
+
+def _generate_into(
+        create_generator: Callable[[TextIO], GeneratorType],
+        tracker: OutputTracker, path: Path
+) -> GeneratorType:
+    """Stream the output of a new generator into the path"""
+    with tracker.open(path) as sink:
+        generator = create_generator(sink)
+        generator.write_header()
+        generator.declare_types()
+        generator.generate_wrappers()
+        generator.write_footer()
+        generator.flush()
+    return generator
+
+
+class Target(metaclass=ABCMeta):
+    """A language (or configuration) to generate code for
+
+    Targets must be picklable, so they can run in a separate process.
+    """
+    name: str
+    output_dir: Path
+
+    @abstractmethod
+    def generate(self, module: IvanModule, context: TypeContext, tracker: OutputTracker):
+        """Generate the outputs for the resolved module, writing them with the tracker"""
+        pass
+
+
+@dataclass
+class C11Target(Target):
+    output_dir: Path
+    options: C11Options = C11Options()
+    split: bool = False
+    """Generate a header per type, instead of a single header"""
+    cache: Optional[FragmentCache] = None
+    name: str = "c11"
+
+    def generate(self, module: IvanModule, context: TypeContext, tracker: OutputTracker):
+        if self.split:
+            files = generate_split_headers(module, context, self.options, cache=self.cache)
+            for file_name, text in files.items():
+                tracker.write_text(self.output_dir / file_name, text)
+            return
+        generator = _generate_into(
+            lambda sink: C11CodeGenerator(module, context, self.options, sink=sink, cache=self.cache),
+            tracker, self.output_dir / module_file_name(module, ".h")
+        )
+        for file_name, text in generator.source_files().items():
+            tracker.write_text(self.output_dir / file_name, text)
+
+
+@dataclass
+class RustTarget(Target):
+    output_dir: Path
+    cache: Optional[FragmentCache] = None
+    name: str = "rust"
+
+    def generate(self, module: IvanModule, context: TypeContext, tracker: OutputTracker):
+        _generate_into(
+            lambda sink: RustCodeGenerator(module, context, sink=sink, cache=self.cache),
+            tracker, self.output_dir / module_file_name(module, ".rs")
+        )
+
+
+@dataclass
+class TargetResult:
+    """The outcome of generating a single target"""
+    name: str
+    seconds: float
+    updated: List[Path]
+    unchanged: List[Path]
+
+
+@dataclass
+class PipelineResult:
+    source: Path
+    module: IvanModule
+    parse_seconds: float
+    resolve_seconds: float
+    targets: List[TargetResult] = field(default_factory=list)
+
+    @property
+    def updated(self) -> List[Path]:
+        return [path for target in self.targets for path in target.updated]
+
+    @property
+    def outputs(self) -> List[Path]:
+        """All the outputs of the targets, whether or not they were updated"""
+        return [path for target in self.targets for path in target.updated + target.unchanged]
+
+    @property
+    def dependencies(self) -> List[Path]:
+        """The source files that contributed to the outputs
+
+        Modules can't import other modules, so this is just the source of the module itself.
+        """
+        return [self.source]
+
+    def depfile(self) -> str:
+        """A Makefile-style depfile, listing the dependencies of each output"""
+        return format_depfile([(output, self.dependencies) for output in self.outputs])
+
+    def summary(self) -> str:
+        lines = [
+            f"parse    {self.parse_seconds * 1000:8.2f} ms",
+            f"resolve  {self.resolve_seconds * 1000:8.2f} ms",
+        ]
+        for target in self.targets:
+            total = len(target.updated) + len(target.unchanged)
+            lines.append(f"{target.name:8} {target.seconds * 1000:8.2f} ms "
+                         f"(updated {len(target.updated)} of {total} outputs)")
+        return '\n'.join(lines)
+
+
+def _run_target(target: Target, module: IvanModule, context: TypeContext) -> TargetResult:
+    start = time.perf_counter()
+    tracker = OutputTracker()
+    target.output_dir.mkdir(parents=True, exist_ok=True)
+    with timed(target.name, "target", module=module.name):
+        target.generate(module, context, tracker)
+    return TargetResult(
+        name=target.name,
+        seconds=time.perf_counter() - start,
+        updated=tracker.updated,
+        unchanged=tracker.unchanged
+    )
+
+
+def run_pipeline(
+        source: Union[str, Path], targets: Sequence[Target],
+        module_name: Optional[str] = None,
+        use_processes: bool = False,
+        max_workers: Optional[int] = None,
+        depfile: Optional[Path] = None
+) -> PipelineResult:
+    """Parse and resolve the source file once, then generate all the targets concurrently
+
+    The module name defaults to the name of the source file (without its extension).
+    Targets run in a thread pool by default. Generation is CPU-bound,
+    so a process pool is faster for many targets (at the cost of pickling the module).
+    If a depfile path is given, a depfile listing the dependencies of every output is written there.
+    Timings are only collected for targets that run in this process.
+    """
+    source = Path(source)
+    with timed(str(source), "file", module=module_name or source.stem):
+        start = time.perf_counter()
+        text = source.read_text()
+        module = parse_module(Parser.parse_str(text), name=module_name or source.stem)
+        parsed = time.perf_counter()
+        context = TypeContext.build_context(module)
+        module = context.resolve_module(module)
+        resolved = time.perf_counter()
+        result = PipelineResult(
+            source=source,
+            module=module,
+            parse_seconds=parsed - start,
+            resolve_seconds=resolved - parsed
+        )
+        executor: Executor
+        if use_processes:
+            # Importing multiprocessing is relatively slow, so only do it when it's needed
+            from concurrent.futures import ProcessPoolExecutor
+            executor = ProcessPoolExecutor(max_workers=max_workers)
+        else:
+            executor = ThreadPoolExecutor(max_workers=max_workers)
+        with executor:
+            futures = [executor.submit(_run_target, target, module, context) for target in targets]
+            result.targets.extend(future.result() for future in futures)
+        if depfile is not None:
+            OutputTracker().write_text(depfile, result.depfile())
+        return result
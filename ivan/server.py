@@ -0,0 +1,148 @@
+"""A build server, which keeps its caches warm between builds
+
+Every build otherwise pays for starting the interpreter and importing the code generators.
+The server keeps a workspace for each distinct build configuration,
+so unchanged files are never re-parsed and unchanged items are never re-generated.
+Requests are handled one at a time (in the client's working directory),
+so their output is exactly the same as running `ivan build` directly.
+"""
+from __future__ import annotations
+
+import io
+import json
+import os
+import socket
+import socketserver
+import sys
+import time
+from contextlib import redirect_stdout, redirect_stderr
+from typing import Any, Dict, Tuple
+
+from ivan.cli import EXIT_SUCCESS, EXIT_FAILURE, EXIT_USAGE, create_parser, check_build_arguments, \
+    create_targets, report_build
+from ivan.timings import collect_timings
+from ivan.watch import Workspace
+
+_PER_BUILD_ARGUMENTS = ("command", "verbose", "jobs", "depfile", "timings", "trace")
+"""Arguments which don't affect the generated code, so builds can share a workspace regardless of them"""
+
+
+class _RequestHandler(socketserver.StreamRequestHandler):
+    server: CompileServer
+
+    def handle(self):
+        data = self.rfile.read()
+        if not data:
+            # Just checking whether the server is running
+            return
+        request = json.loads(data.decode("utf-8"))
+        response = self.server.handle_request_json(request)
+        self.wfile.write(json.dumps(response).encode("utf-8"))
+
+
+class CompileServer(socketserver.UnixStreamServer):
+    """Runs the builds forwarded by `ivan-client`"""
+    workspaces: Dict[Tuple[str, str], Workspace]
+    """The workspace for each working directory and build configuration"""
+
+    def __init__(self, socket_path: str):
+        self.workspaces = {}
+        self._stopping = False
+        if os.path.exists(socket_path):
+            _remove_stale_socket(socket_path)
+        super().__init__(socket_path, _RequestHandler)
+
+    def server_bind(self):
+        # Only the current user is allowed to run builds, so the socket must never be accessible to anyone else
+        # (even briefly, before it could be chmod'ed). No builds are running yet, so changing the umask is safe.
+        umask = os.umask(0o077)
+        try:
+            super().server_bind()
+        finally:
+            os.umask(umask)
+
+    def handle_request_json(self, request: Dict[str, Any]) -> Dict[str, Any]:
+        if request.get("command") == "shutdown":
+            self._stopping = True
+            return {"exit_code": EXIT_SUCCESS, "stdout": "", "stderr": ""}
+        stdout, stderr = io.StringIO(), io.StringIO()
+        original_cwd = os.getcwd()
+        try:
+            os.chdir(request["cwd"])
+            with redirect_stdout(stdout), redirect_stderr(stderr):
+                exit_code = self.run(request["argv"])
+        except SystemExit as e:
+            # Invalid arguments
+            exit_code = e.code if isinstance(e.code, int) else EXIT_USAGE
+        except Exception as e:
+            stderr.write(f"ivan serve: internal error ({type(e).__name__}): {e}\n")
+            exit_code = EXIT_FAILURE
+        finally:
+            os.chdir(original_cwd)
+        return {"exit_code": exit_code, "stdout": stdout.getvalue(), "stderr": stderr.getvalue()}
+
+    def run(self, argv) -> int:
+        parser = create_parser()
+        args = parser.parse_args(argv)
+        if args.command != "build":
+            parser.error(f"{args.command}: only builds can be run by the server")
+        check_build_arguments(args, parser)
+        if args.memory_profile:
+            parser.error("build: --memory-profile can't be used with the server, since it runs builds differently")
+        configuration = repr(sorted(
+            (name, value) for name, value in vars(args).items()
+            if name not in _PER_BUILD_ARGUMENTS
+        ))
+        key = (os.getcwd(), configuration)
+        workspace = self.workspaces.get(key)
+        if workspace is None:
+            workspace = self.workspaces[key] = Workspace(args.inputs, create_targets(args))
+        for target in workspace.targets:
+            target.output_dir.mkdir(parents=True, exist_ok=True)
+        start = time.perf_counter()
+        if args.timings or args.trace is not None:
+            with collect_timings() as timings:
+                results = workspace.build_all()
+        else:
+            timings = None
+            results = workspace.build_all()
+        return report_build(args, results, time.perf_counter() - start, timings)
+
+    def serve_until_shutdown(self):
+        while not self._stopping:
+            self.handle_request()
+
+    def server_close(self):
+        super().server_close()
+        try:
+            os.unlink(self.server_address)
+        except FileNotFoundError:
+            pass
+
+
+def _remove_stale_socket(socket_path: str):
+    """Remove the socket left behind by a server that exited, or fail if one is still running"""
+    with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as probe:
+        try:
+            probe.connect(socket_path)
+        except (ConnectionRefusedError, FileNotFoundError):
+            pass
+        else:
+            raise OSError(f"A server is already listening on {socket_path}")
+    os.unlink(socket_path)
+
+
+def run_server(socket_path: str) -> int:
+    try:
+        server = CompileServer(socket_path)
+    except OSError as e:
+        print(f"ivan serve: {e}", file=sys.stderr)
+        return EXIT_FAILURE
+    print(f"Listening on {socket_path}")
+    sys.stdout.flush()
+    with server:
+        try:
+            server.serve_until_shutdown()
+        except KeyboardInterrupt:
+            pass
+    return EXIT_SUCCESS
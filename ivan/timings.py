@@ -0,0 +1,134 @@
+"""Optional instrumentation of how long each phase (and item) of a build takes
+
+The lexer, parser, type context and code generators report into the active registry with `timed`.
+Timings are only collected inside `collect_timings()`. Otherwise, `timed` returns a shared
+no-op context manager, so the instrumentation costs little more than a function call.
+"""
+from __future__ import annotations
+
+import json
+import os
+import threading
+import time
+from collections import defaultdict
+from contextlib import contextmanager, nullcontext
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import ContextManager, Dict, Iterator, List, Optional, Union
+
+PHASE_CATEGORIES = ("lex", "parse", "resolve", "generate", "target")
+"""The categories of events which are phases of the build (in the order they happen)"""
+
+
+@dataclass(frozen=True)
+class TimingEvent:
+    name: str
+    category: str
+    """One of the `PHASE_CATEGORIES`, or `file` and `item` for the whole file or a single item"""
+    start_ns: int
+    duration_ns: int
+    pid: int
+    thread_id: int
+    args: Dict[str, str] = field(default_factory=dict)
+
+
+class TimingRegistry:
+    """The events reported while collecting timings"""
+    events: List[TimingEvent]
+
+    def __init__(self, events: Optional[List[TimingEvent]] = None):
+        self.events = events if events is not None else []
+
+    @contextmanager
+    def span(self, name: str, category: str, **args: str) -> Iterator[None]:
+        start = time.perf_counter_ns()
+        try:
+            yield
+        finally:
+            self.events.append(TimingEvent(
+                name=name,
+                category=category,
+                start_ns=start,
+                duration_ns=time.perf_counter_ns() - start,
+                pid=os.getpid(),
+                thread_id=threading.get_ident(),
+                args=args
+            ))
+
+    def summary(self, num_slowest: int = 10) -> str:
+        """A human-readable summary of the time spent in each phase, and the slowest files and items
+
+        Phases can be nested (the time of each target includes generating its code),
+        so their totals don't add up to the total time of the build.
+        """
+        phases: Dict[tuple, List[int]] = defaultdict(list)
+        for event in self.events:
+            if event.category in PHASE_CATEGORIES:
+                phases[(PHASE_CATEGORIES.index(event.category), event.name)].append(event.duration_ns)
+        lines = [f"{'phase':24} {'total ms':>10} {'count':>6}"]
+        for (_, name), durations in sorted(phases.items()):
+            lines.append(f"{name:24} {sum(durations) / 1e6:10.2f} {len(durations):6}")
+        for category, title in (("file", "Slowest files"), ("item", "Slowest items")):
+            events = sorted(
+                (event for event in self.events if event.category == category),
+                key=lambda event: event.duration_ns, reverse=True
+            )[:num_slowest]
+            if not events:
+                continue
+            lines.append("")
+            lines.append(f"{title}:")
+            for event in events:
+                details = ", ".join(event.args.values())
+                lines.append(f"  {event.duration_ns / 1e6:8.2f} ms  {event.name}"
+                             + (f" ({details})" if details else ""))
+        return '\n'.join(lines)
+
+    def chrome_trace(self) -> dict:
+        """The events in the Chrome trace format (which can be loaded by `chrome://tracing` or Perfetto)"""
+        base = min((event.start_ns for event in self.events), default=0)
+        return {
+            "traceEvents": [
+                {
+                    "name": event.name,
+                    "cat": event.category,
+                    "ph": "X",
+                    "ts": (event.start_ns - base) / 1000,
+                    "dur": event.duration_ns / 1000,
+                    "pid": event.pid,
+                    "tid": event.thread_id,
+                    "args": event.args,
+                }
+                for event in sorted(self.events, key=lambda event: event.start_ns)
+            ],
+            "displayTimeUnit": "ms",
+        }
+
+    def write_chrome_trace(self, path: Union[str, Path]):
+        with open(path, "wt") as f:
+            json.dump(self.chrome_trace(), f)
+
+
+_active: Optional[TimingRegistry] = None
+_DISABLED = nullcontext()
+
+
+def timed(name: str, category: str, **args: str) -> ContextManager[None]:
+    """Time the block, if timings are currently being collected"""
+    registry = _active
+    if registry is None:
+        return _DISABLED
+    return registry.span(name, category, **args)
+
+
+@contextmanager
+def collect_timings(registry: Optional[TimingRegistry] = None) -> Iterator[TimingRegistry]:
+    """Collect the timings reported (by any thread) within the block"""
+    global _active
+    if registry is None:
+        registry = TimingRegistry()
+    previous = _active
+    _active = registry
+    try:
+        yield registry
+    finally:
+        _active = previous
@@ -0,0 +1,21 @@
+"""Resolved types, as used by the code generators
+
+The types themselves are defined in `ivan.ast.types`,
+this just gives them their shorter public names.
+"""
+from ivan.ast.types import ResolvedType, BuiltinType, BuiltinKind, \
+    FixedIntegerType, ReferenceType, ReferenceKind, UserDefinedType, \
+    SliceType, StrType, AtomicType, SelfType, DynType
+
+__all__ = [
+    "IvanType", "BuiltinType", "BuiltinKind", "FixedIntegerType",
+    "ReferenceType", "ReferenceKind", "UserDefinedType", "SliceType",
+    "StrType", "AtomicType", "SelfType", "DynType",
+    # Builtins
+    "UNIT",
+]
+
+IvanType = ResolvedType
+
+UNIT = BuiltinType(BuiltinKind.UNIT)
+"""The unit type, returned by functions without any value"""
@@ -0,0 +1,272 @@
+"""Resolution of the types referenced by an Ivan module"""
+from __future__ import annotations
+
+from typing import Dict, Optional, List, Set
+
+from ivan.ast import IvanModule, PrimaryItem, FunctionDeclaration, \
+    InterfaceDef, StructDef, FieldDef, FunctionSignature, SimpleArgument, ImplDef, EnumDef
+from ivan.ast.lexer import Span
+from ivan.ast.types import TypeRef, NamedTypeRef, ReferenceTypeRef, \
+    OptionalTypeRef, FixedIntegerType, SliceTypeRef, StrTypeRef, AtomicTypeRef, DynTypeRef
+from ivan.types import IvanType, BuiltinType, BuiltinKind, ReferenceType, \
+    UserDefinedType, SliceType, StrType, ReferenceKind, AtomicType, DynType
+from ivan.timings import timed
+
+
+class TypeResolutionException(Exception):
+    span: Span
+
+    def __init__(self, msg: str, span: Span):
+        super().__init__(msg)
+        self.span = span
+
+
+class TypeContext:
+    """Knows about all the types visible to a module
+
+    Resolving a module fills in the `resolved` type of every `TypeRef`
+    it contains. This is only done once per module, so multiple code
+    generators can share the same context (and resolved module).
+    """
+    _named_types: Dict[str, IvanType]
+    _items: Dict[str, PrimaryItem]
+    _resolved_modules: Dict[str, IvanModule]
+
+    def __init__(self):
+        self._named_types = {
+            kind.ivan_name: BuiltinType(kind)
+            for kind in BuiltinKind
+        }
+        self._items = {}
+        self._resolved_modules = {}
+
+    @staticmethod
+    def build_context(module: IvanModule) -> TypeContext:
+        """Build a context that knows about all the types declared in the module"""
+        context = TypeContext()
+        for item in module.items:
+            context.declare_item(item)
+        return context
+
+    def declare_item(self, item: PrimaryItem):
+        if isinstance(item, (FunctionDeclaration, ImplDef)):
+            return  # Functions and implementations aren't types
+        if item.name in self._named_types:
+            raise TypeResolutionException(
+                f"Duplicate definition of type {item.name!r}",
+                item.span
+            )
+        self._named_types[item.name] = UserDefinedType(item.name)
+        self._items[item.name] = item
+
+    def find_item(self, name: str) -> Optional[PrimaryItem]:
+        """Find the item that declared the specified type (if any)"""
+        return self._items.get(name)
+
+    def base_interfaces(self, interface: InterfaceDef) -> List[InterfaceDef]:
+        """The interfaces the specified one extends, starting with its direct base"""
+        bases = []
+        while interface.base is not None:
+            interface = self.find_item(interface.base.name)
+            assert isinstance(interface, InterfaceDef), interface
+            bases.append(interface)
+        return bases
+
+    def resolve_type_name(self, name: str, span: Span) -> IvanType:
+        try:
+            return self._named_types[name]
+        except KeyError:
+            pass
+        if FixedIntegerType.PATTERN.fullmatch(name):
+            return FixedIntegerType.parse(name, span)
+        raise TypeResolutionException(f"Unknown type: {name!r}", span)
+
+    def resolve_type(self, ref: TypeRef, allow_atomic: bool = False) -> IvanType:
+        """Resolve the type reference
+
+        Atomic types are only allowed if explicitly requested (for struct fields).
+        """
+        if ref.is_resolved:
+            return ref.resolved
+        if isinstance(ref, NamedTypeRef):
+            resolved = self.resolve_type_name(ref.name, ref.usage_span)
+        elif isinstance(ref, ReferenceTypeRef):
+            resolved = ReferenceType(self.resolve_type(ref.inner), ref.kind)
+        elif isinstance(ref, OptionalTypeRef):
+            inner = self.resolve_type(ref.inner)
+            assert isinstance(inner, ReferenceType), inner
+            resolved = ReferenceType(inner.target, inner.kind, optional=True)
+        elif isinstance(ref, SliceTypeRef):
+            resolved = SliceType(
+                self.resolve_type(ref.element),
+                mutable=ref.kind == ReferenceKind.MUTABLE
+            )
+        elif isinstance(ref, StrTypeRef):
+            resolved = StrType()
+        elif isinstance(ref, DynTypeRef):
+            interface = self.resolve_type(ref.interface)
+            if not isinstance(self.find_item(ref.interface.name), InterfaceDef):
+                raise TypeResolutionException(
+                    f"Only interfaces can be used as dyn objects: {ref}",
+                    ref.usage_span
+                )
+            resolved = DynType(interface)
+        elif isinstance(ref, AtomicTypeRef):
+            if not allow_atomic:
+                raise TypeResolutionException(
+                    f"Atomic types are only allowed as struct fields: {ref}",
+                    ref.usage_span
+                )
+            inner = self.resolve_type(ref.inner)
+            if not AtomicType.supports(inner):
+                raise TypeResolutionException(
+                    f"Only integers, bools and references can be atomic: {ref}",
+                    ref.usage_span
+                )
+            resolved = AtomicType(inner)
+        else:
+            raise TypeError(f"Unexpected type ref: {type(ref)}")
+        ref.resolved = resolved
+        return resolved
+
+    def resolve_signature(self, signature: FunctionSignature):
+        for arg in signature.args:
+            if isinstance(arg, SimpleArgument):
+                self.resolve_type(arg.declared_type)
+        self.resolve_type(signature.return_type)
+
+    def resolve_base(self, interface: InterfaceDef, declared_interfaces: Set[str]):
+        """Resolve the base of the interface, checking that it can be extended
+
+        The base must be declared first (since C needs the complete vtable to embed it),
+        which also rules out cycles. Members can't shadow the ones they inherit.
+        """
+        base_ref = interface.base
+        self.resolve_type(base_ref)
+        if not isinstance(self.find_item(base_ref.name), InterfaceDef):
+            raise TypeResolutionException(
+                f"{interface.name} can only extend an interface, not {base_ref.name!r}",
+                base_ref.usage_span
+            )
+        if base_ref.name not in declared_interfaces:
+            raise TypeResolutionException(
+                f"Base interface {base_ref.name} must be declared before {interface.name}",
+                base_ref.usage_span
+            )
+        if "base" in interface.members:
+            raise TypeResolutionException(
+                f"Interfaces with a base can't have a member named 'base': {interface.name}",
+                interface.members["base"].span
+            )
+        for base in self.base_interfaces(interface):
+            for name, member in interface.members.items():
+                if name in base.members:
+                    raise TypeResolutionException(
+                        f"{interface.name}.{name} conflicts with the member inherited from {base.name}",
+                        member.span
+                    )
+
+    def resolve_impl(self, impl: ImplDef, declared_interfaces: Set[str]):
+        """Resolve the interface and target of the implementation, checking its functions
+
+        Like a base, the interface must be declared first. Every method without a default
+        must be implemented, and only methods (and batch slots) of the interface can be.
+        """
+        interface_ref = impl.interface
+        self.resolve_type(interface_ref)
+        interface = self.find_item(interface_ref.name)
+        if not isinstance(interface, InterfaceDef):
+            raise TypeResolutionException(
+                f"Can only implement an interface, not {interface_ref.name!r}",
+                interface_ref.usage_span
+            )
+        if interface.name not in declared_interfaces:
+            raise TypeResolutionException(
+                f"Interface {interface.name} must be declared before implementing it",
+                interface_ref.usage_span
+            )
+        if not isinstance(self.resolve_type(impl.target), UserDefinedType):
+            raise TypeResolutionException(
+                f"Only user-defined types can implement {interface.name}, not {impl.target.name!r}",
+                impl.target.usage_span
+            )
+        declaring = [interface, *self.base_interfaces(interface)]
+        slots: Dict[str, FunctionDeclaration] = {
+            method.name: method for owner in declaring for method in owner.methods
+        }
+        for owner in declaring:
+            for method in owner.methods:
+                if method.get_annotation("Batch") is not None:
+                    slot = f"{method.name}_batch"
+                    if slot in slots:
+                        raise TypeResolutionException(
+                            f"The batch slot of {owner.name}.{method.name} conflicts with {slot!r}",
+                            method.span
+                        )
+                    slots[slot] = method
+        for entry in impl.functions.values():
+            if entry.slot not in slots:
+                raise TypeResolutionException(
+                    f"{interface.name} has no method named {entry.slot!r}",
+                    entry.span
+                )
+        for name, method in slots.items():
+            if name == method.name and method.body is None and name not in impl.functions:
+                raise TypeResolutionException(
+                    f"Missing implementation of {interface.name}.{name} for {impl.target.name}",
+                    impl.span
+                )
+
+    def resolve_enum(self, enum: EnumDef):
+        """Resolve the fields of each variant, and the signatures of the methods
+
+        Variants are stored in a union, so their fields can't be atomic.
+        """
+        if not enum.variants:
+            raise TypeResolutionException(f"Enums must have at least one variant: {enum.name}", enum.span)
+        for variant in enum.variants:
+            for field in variant.fields.values():
+                self.resolve_type(field.static_type)
+        for method in enum.methods:
+            self.resolve_signature(method.signature)
+
+    def resolve_module(self, module: IvanModule) -> IvanModule:
+        """Resolve all the types referenced in the module
+
+        If the module has already been resolved by this context,
+        the existing result is reused.
+        """
+        try:
+            return self._resolved_modules[module.name]
+        except KeyError:
+            pass
+        with timed("resolve", "resolve", module=module.name):
+            declared_interfaces: Set[str] = set()
+            declared_impls: Set[str] = set()
+            for item in module.items:
+                if isinstance(item, ImplDef):
+                    if item.name in declared_impls:
+                        raise TypeResolutionException(
+                            f"Duplicate implementation of {item.interface.name} for {item.target.name}",
+                            item.span
+                        )
+                    self.resolve_impl(item, declared_interfaces)
+                    declared_impls.add(item.name)
+                elif isinstance(item, FunctionDeclaration):
+                    self.resolve_signature(item.signature)
+                elif isinstance(item, InterfaceDef):
+                    if item.base is not None:
+                        self.resolve_base(item, declared_interfaces)
+                    declared_interfaces.add(item.name)
+                    for member in item.members.values():
+                        if isinstance(member, FunctionDeclaration):
+                            self.resolve_signature(member.signature)
+                        elif isinstance(member, FieldDef):
+                            self.resolve_type(member.static_type)
+                elif isinstance(item, StructDef):
+                    for field in item.fields.values():
+                        self.resolve_type(field.static_type, allow_atomic=True)
+                elif isinstance(item, EnumDef):
+                    self.resolve_enum(item)
+        self._resolved_modules[module.name] = module
+        return module
@@ -0,0 +1,329 @@
+"""Rebuilding the outputs whenever the source files change
+
+The workspace keeps every module (and the fragments generated for its items) in memory,
+so an edit only needs to re-parse the changed file and re-emit the items that changed.
+Modules are independent of each other, so only the outputs of the changed files are affected.
+
+Changes are detected with inotify when the optional `inotify_simple` package is installed
+(on Linux), falling back to polling the modification times of the sources.
+"""
+from __future__ import annotations
+
+import dataclasses
+import os
+import sys
+import time
+from abc import ABCMeta, abstractmethod
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Dict, List, Optional, Sequence, Set, Tuple, Iterable
+
+from ivan.ast import IvanModule
+from ivan.cli import SOURCE_EXTENSION, EXIT_SUCCESS, FileResult, DuplicateModuleException, discover_sources, \
+    module_name_for, describe_error
+from ivan.generate.cache import FragmentCache
+from ivan.pipeline import Target, run_pipeline
+
+try:
+    import inotify_simple
+except ImportError:
+    inotify_simple = None
+
+
+@dataclass
+class WorkspaceModule:
+    """A source file in the workspace, along with the outputs generated from it"""
+    source: Path
+    module_name: str
+    text: Optional[str] = None
+    """The text the outputs were last generated from"""
+    module: Optional[IvanModule] = None
+    """The resolved module, or None if it failed to build"""
+    outputs: List[Path] = field(default_factory=list)
+
+
+class Workspace:
+    """The resident state of all the source files in the inputs
+
+    All the targets share a single in-memory fragment cache,
+    so regenerating a file only re-emits the items that actually changed.
+    """
+    inputs: List[Path]
+    targets: List[Target]
+    cache: FragmentCache
+    modules: Dict[Path, WorkspaceModule]
+    duplicates: Dict[Path, str]
+    """The sources that weren't built because another source already has their module name"""
+
+    def __init__(self, inputs: Sequence[Path], targets: Sequence[Target]):
+        self.inputs = list(inputs)
+        self.cache = next((target.cache for target in targets if getattr(target, "cache", None) is not None),
+                          FragmentCache())
+        self.targets = [dataclasses.replace(target, cache=self.cache) for target in targets]
+        self.modules = {}
+        self.duplicates = {}
+
+    def _module_name(self, source: Path) -> Optional[str]:
+        """The name of the source's module, or None if it isn't part of the inputs"""
+        for input_path in self.inputs:
+            if source == input_path:
+                return input_path.stem
+            elif input_path.is_dir() and input_path in source.parents:
+                return module_name_for(input_path, source)
+        return None
+
+    def build_all(self) -> List[FileResult]:
+        """Build every source file in the inputs (and forget the ones that were removed)"""
+        # Duplicates are reported as failures of the individual files
+        sources = {source for source, _ in discover_sources(self.inputs, allow_duplicates=True)}
+        return self.rebuild(sources | self.modules.keys())
+
+    def rebuild(self, changed: Iterable[Path]) -> List[FileResult]:
+        """Rebuild the outputs affected by the changed (or removed) source files
+
+        Files whose text hasn't changed since they were last built aren't regenerated
+        (as long as their outputs still exist), since editors often touch files without changing them.
+        A file with the same module name as one that's already built fails, until the other is removed.
+        """
+        results = []
+        for source in sorted(set(changed)):
+            if not source.exists():
+                self.duplicates.pop(source, None)
+                self._remove(source)
+                continue
+            entry = self.modules.get(source)
+            if entry is None:
+                module_name = self._module_name(source)
+                if module_name is None:
+                    continue
+                existing = next((other.source for other in self.modules.values()
+                                 if other.module_name == module_name), None)
+                if existing is not None:
+                    self.duplicates[source] = module_name
+                    error = DuplicateModuleException(f"{existing} and {source} are both the module {module_name!r}")
+                    results.append(FileResult(source=source, seconds=0, error=describe_error(source, error)))
+                    continue
+                self.duplicates.pop(source, None)
+                entry = self.modules[source] = WorkspaceModule(source, module_name)
+            result = self._build(entry)
+            if result is not None:
+                results.append(result)
+        built_modules = {entry.module_name for entry in self.modules.values()}
+        freed = [source for source, module_name in self.duplicates.items() if module_name not in built_modules]
+        if freed:
+            results.extend(self.rebuild(freed))
+        return results
+
+    def _build(self, entry: WorkspaceModule) -> Optional[FileResult]:
+        start = time.perf_counter()
+        try:
+            text = entry.source.read_text()
+        except FileNotFoundError:
+            # Removed after it was detected
+            self._remove(entry.source)
+            return None
+        if text == entry.text and entry.module is not None and all(path.exists() for path in entry.outputs):
+            return FileResult(
+                source=entry.source,
+                seconds=time.perf_counter() - start,
+                outputs=entry.outputs,
+                dependencies=[entry.source]
+            )
+        entry.text = text
+        try:
+            result = run_pipeline(entry.source, self.targets, module_name=entry.module_name)
+        except Exception as e:
+            entry.module = None
+            return FileResult(
+                source=entry.source,
+                seconds=time.perf_counter() - start,
+                error=describe_error(entry.source, e)
+            )
+        entry.module = result.module
+        # Outputs that are no longer generated (like the header for a removed type) are stale
+        self._delete_outputs(set(entry.outputs) - set(result.outputs))
+        entry.outputs = result.outputs
+        return FileResult(
+            source=entry.source,
+            seconds=time.perf_counter() - start,
+            updated=result.updated,
+            outputs=result.outputs,
+            dependencies=result.dependencies
+        )
+
+    def _remove(self, source: Path):
+        entry = self.modules.pop(source, None)
+        if entry is not None:
+            self._delete_outputs(entry.outputs)
+
+    @staticmethod
+    def _delete_outputs(outputs: Iterable[Path]):
+        for output in outputs:
+            try:
+                output.unlink()
+            except FileNotFoundError:
+                pass
+
+
+class ChangeWatcher(metaclass=ABCMeta):
+    """Detects changes to the source files in the inputs"""
+
+    @abstractmethod
+    def wait(self, timeout: Optional[float] = None) -> Set[Path]:
+        """Wait until some source files have changed (or been added or removed)
+
+        Returns an empty set if the timeout expires first.
+        """
+        pass
+
+    def close(self):
+        pass
+
+
+class PollingWatcher(ChangeWatcher):
+    """Detects changes by periodically comparing the modification time and size of every source"""
+    inputs: List[Path]
+    interval: float
+    _snapshot: Dict[Path, Tuple[int, int]]
+
+    def __init__(self, inputs: Sequence[Path], interval: float = 0.1):
+        self.inputs = list(inputs)
+        self.interval = interval
+        self._snapshot = self._scan()
+
+    def _scan(self) -> Dict[Path, Tuple[int, int]]:
+        snapshot = {}
+        for source, _ in discover_sources(self.inputs, allow_duplicates=True):
+            try:
+                stat = source.stat()
+            except FileNotFoundError:
+                continue
+            snapshot[source] = (stat.st_mtime_ns, stat.st_size)
+        return snapshot
+
+    def poll(self) -> Set[Path]:
+        """Check for changes since the last poll, without waiting"""
+        snapshot = self._scan()
+        changed = {source for source, stat in snapshot.items() if self._snapshot.get(source) != stat}
+        changed.update(self._snapshot.keys() - snapshot.keys())
+        self._snapshot = snapshot
+        return changed
+
+    def wait(self, timeout: Optional[float] = None) -> Set[Path]:
+        deadline = time.monotonic() + timeout if timeout is not None else None
+        while True:
+            changed = self.poll()
+            if changed or (deadline is not None and time.monotonic() >= deadline):
+                return changed
+            time.sleep(self.interval)
+
+
+class InotifyWatcher(ChangeWatcher):
+    """Detects changes with inotify, which requires Linux and the `inotify_simple` package"""
+    SETTLE_SECONDS = 0.02
+    """How long to wait for related events (like the rest of an editor's save)"""
+    inputs: List[Path]
+
+    def __init__(self, inputs: Sequence[Path]):
+        assert inotify_simple is not None, "Requires inotify_simple"
+        flags = inotify_simple.flags
+        self._mask = (flags.CLOSE_WRITE | flags.MOVED_TO | flags.MOVED_FROM
+                      | flags.CREATE | flags.DELETE | flags.DELETE_SELF)
+        self._inotify = inotify_simple.INotify()
+        self._directories: Dict[int, Path] = {}
+        self.inputs = list(inputs)
+        for input_path in self.inputs:
+            if input_path.is_dir():
+                self._watch_tree(input_path)
+            else:
+                self._watch(input_path.parent)
+
+    def _watch(self, directory: Path):
+        descriptor = self._inotify.add_watch(directory, self._mask)
+        self._directories[descriptor] = directory
+
+    def _watch_tree(self, root: Path) -> Set[Path]:
+        """Watch the directory and all its subdirectories, returning the sources they contain"""
+        sources = set()
+        for directory, _, files in os.walk(root):
+            self._watch(Path(directory))
+            sources.update(Path(directory, name) for name in files if name.endswith(SOURCE_EXTENSION))
+        return sources
+
+    def _read(self, timeout: Optional[float]) -> Set[Path]:
+        flags = inotify_simple.flags
+        changed = set()
+        for event in self._inotify.read(timeout=int(timeout * 1000) if timeout is not None else None):
+            directory = self._directories.get(event.wd)
+            if directory is None:
+                continue
+            if event.mask & flags.IGNORED:
+                del self._directories[event.wd]
+                continue
+            path = directory / event.name
+            if event.mask & flags.ISDIR:
+                if event.mask & (flags.CREATE | flags.MOVED_TO):
+                    changed.update(self._watch_tree(path))
+            elif event.name.endswith(SOURCE_EXTENSION):
+                changed.add(path)
+        return changed
+
+    def wait(self, timeout: Optional[float] = None) -> Set[Path]:
+        deadline = time.monotonic() + timeout if timeout is not None else None
+        while True:
+            remaining = max(deadline - time.monotonic(), 0) if deadline is not None else None
+            changed = self._read(remaining)
+            if changed:
+                # Coalesce the burst of events from a single save
+                while True:
+                    more = self._read(self.SETTLE_SECONDS)
+                    if not more:
+                        return changed
+                    changed.update(more)
+            elif deadline is not None and time.monotonic() >= deadline:
+                return changed
+
+    def close(self):
+        self._inotify.close()
+
+
+def create_watcher(inputs: Sequence[Path], poll: bool = False, interval: float = 0.1) -> ChangeWatcher:
+    """Watch the inputs with inotify if it's available, otherwise by polling"""
+    if not poll and inotify_simple is not None and sys.platform.startswith("linux"):
+        return InotifyWatcher(inputs)
+    return PollingWatcher(inputs, interval)
+
+
+def _report(results: Sequence[FileResult], verbose: bool):
+    for result in results:
+        if result.failed:
+            print(result.error, file=sys.stderr)
+        elif verbose or result.updated:
+            print(f"{result.source}: updated {len(result.updated)} of {result.total_outputs} outputs "
+                  f"({result.seconds * 1000:.2f} ms)")
+
+
+def run_watch(
+        inputs: Sequence[Path], targets: Sequence[Target],
+        poll: bool = False, interval: float = 0.1, verbose: bool = False
+) -> int:
+    """Build all the inputs, then rebuild them whenever they change (until interrupted)"""
+    workspace = Workspace(inputs, targets)
+    for target in workspace.targets:
+        target.output_dir.mkdir(parents=True, exist_ok=True)
+    watcher = create_watcher(inputs, poll=poll, interval=interval)
+    try:
+        start = time.perf_counter()
+        results = workspace.build_all()
+        _report(results, verbose)
+        num_failed = sum(result.failed for result in results)
+        print(f"Built {len(results) - num_failed} of {len(results)} files in "
+              f"{time.perf_counter() - start:.2f} s, watching for changes "
+              f"({'polling' if isinstance(watcher, PollingWatcher) else 'inotify'})")
+        while True:
+            changed = watcher.wait()
+            _report(workspace.rebuild(changed), verbose)
+    except KeyboardInterrupt:
+        return EXIT_SUCCESS
+    finally:
+        watcher.close()
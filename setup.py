@@ -1,8 +1,17 @@
-from setuptools import setup, find_namespace_packages
+from setuptools import setup, find_packages
 
 setup(
     name="ivan",
     version="0.1.0",
-    package_dir={"": "src"},
-    packages=find_namespace_packages(where="src"),
+    packages=find_packages(include=["ivan", "ivan.*"]),
+    extras_require={
+        # Faster change detection for `ivan watch` (polling is used otherwise)
+        "watch": ["inotify_simple"],
+    },
+    entry_points={
+        "console_scripts": [
+            "ivan = ivan.cli:main",
+            "ivan-client = ivan.client:main",
+        ],
+    },
 )
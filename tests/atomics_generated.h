@@ -0,0 +1,76 @@
+#ifndef IVAN_ATOMICS_H
+#define IVAN_ATOMICS_H
+
+#include <stdint.h>
+#include <stdbool.h>
+#include <stdlib.h>
+#include <assert.h>
+#include <stdatomic.h>
+
+/**
+ * A cache of shapes, shared between threads
+ */
+typedef struct Shape Shape;
+
+/**
+ * Lock-free statistics for a cache
+ */
+typedef struct CacheStats {
+    /**
+     * The number of lookups that found a shape
+     */
+    _Atomic(uint64_t) hits;
+    _Atomic(size_t) misses;
+    _Atomic(bool) enabled;
+    /**
+     * The most recently used shape (if any)
+     */
+    _Atomic(Shape*) last;
+    size_t capacity;
+} CacheStats;
+
+/** [AUTO] Atomically load `CacheStats.hits` */
+uint64_t CacheStats_load_hits(const CacheStats* self, memory_order order) {
+    return atomic_load_explicit(&self->hits, order);
+}
+
+/** [AUTO] Atomically store `CacheStats.hits` */
+void CacheStats_store_hits(CacheStats* self, uint64_t value, memory_order order) {
+    atomic_store_explicit(&self->hits, value, order);
+}
+
+/** [AUTO] Atomically load `CacheStats.misses` */
+size_t CacheStats_load_misses(const CacheStats* self, memory_order order) {
+    return atomic_load_explicit(&self->misses, order);
+}
+
+/** [AUTO] Atomically store `CacheStats.misses` */
+void CacheStats_store_misses(CacheStats* self, size_t value, memory_order order) {
+    atomic_store_explicit(&self->misses, value, order);
+}
+
+/** [AUTO] Atomically load `CacheStats.enabled` */
+bool CacheStats_load_enabled(const CacheStats* self, memory_order order) {
+    return atomic_load_explicit(&self->enabled, order);
+}
+
+/** [AUTO] Atomically store `CacheStats.enabled` */
+void CacheStats_store_enabled(CacheStats* self, bool value, memory_order order) {
+    atomic_store_explicit(&self->enabled, value, order);
+}
+
+/** [AUTO] Atomically load `CacheStats.last` */
+Shape* CacheStats_load_last(const CacheStats* self, memory_order order) {
+    return atomic_load_explicit(&self->last, order);
+}
+
+/** [AUTO] Atomically store `CacheStats.last` */
+void CacheStats_store_last(CacheStats* self, Shape* value, memory_order order) {
+    atomic_store_explicit(&self->last, value, order);
+}
+
+void recordHit(const CacheStats* stats, Shape* shape);
+
+// wrappers
+
+#endif /* IVAN_ATOMICS_H */
@@ -0,0 +1,70 @@
+//! Generated from the Ivan module `ivan.atomics`
+#![allow(non_snake_case, unused_variables, dead_code)]
+
+use core::sync::atomic::{AtomicBool, AtomicPtr, AtomicU64, AtomicUsize, Ordering};
+
+/// A cache of shapes, shared between threads
+#[repr(C)]
+pub struct Shape {
+    _private: [u8; 0],
+}
+
+/// Lock-free statistics for a cache
+#[repr(C)]
+pub struct CacheStats {
+    /// The number of lookups that found a shape
+    pub hits: AtomicU64,
+    pub misses: AtomicUsize,
+    pub enabled: AtomicBool,
+    /// The most recently used shape (if any)
+    pub last: AtomicPtr<Shape>,
+    pub capacity: usize,
+}
+impl CacheStats {
+    /// [AUTO] Atomically load `CacheStats.hits`
+    #[inline(always)]
+    pub fn load_hits(&self, order: Ordering) -> u64 {
+        self.hits.load(order)
+    }
+    /// [AUTO] Atomically store `CacheStats.hits`
+    #[inline(always)]
+    pub fn store_hits(&self, value: u64, order: Ordering) {
+        self.hits.store(value, order)
+    }
+    /// [AUTO] Atomically load `CacheStats.misses`
+    #[inline(always)]
+    pub fn load_misses(&self, order: Ordering) -> usize {
+        self.misses.load(order)
+    }
+    /// [AUTO] Atomically store `CacheStats.misses`
+    #[inline(always)]
+    pub fn store_misses(&self, value: usize, order: Ordering) {
+        self.misses.store(value, order)
+    }
+    /// [AUTO] Atomically load `CacheStats.enabled`
+    #[inline(always)]
+    pub fn load_enabled(&self, order: Ordering) -> bool {
+        self.enabled.load(order)
+    }
+    /// [AUTO] Atomically store `CacheStats.enabled`
+    #[inline(always)]
+    pub fn store_enabled(&self, value: bool, order: Ordering) {
+        self.enabled.store(value, order)
+    }
+    /// [AUTO] Atomically load `CacheStats.last`
+    #[inline(always)]
+    pub fn load_last(&self, order: Ordering) -> *mut Shape {
+        self.last.load(order)
+    }
+    /// [AUTO] Atomically store `CacheStats.last`
+    #[inline(always)]
+    pub fn store_last(&self, value: *mut Shape, order: Ordering) {
+        self.last.store(value, order)
+    }
+}
+
+extern "C" {
+    pub fn recordHit(stats: &CacheStats, shape: *mut Shape);
+}
+
+// wrappers
@@ -0,0 +1,105 @@
+//! Generated from the Ivan module `ivan.basic`
+#![allow(non_snake_case, unused_variables, dead_code)]
+
+/// This is a basic example of an ivan interface.
+#[repr(C)]
+#[derive(Copy, Clone)]
+pub struct Basic {
+    pub noArgs: Option<unsafe extern "C" fn() -> i64>,
+    /// Find the value by searching through the specified bytes.
+    ///
+    /// Bytes is a const '&' pointer, so you're expected not to mutate it.
+    /// It must be valid for the duration of the call.
+    ///
+    /// The output (if any) is placed in `result`.
+    /// It's a `&mut` pointer, so it's expected to be mutable
+    /// and have no-aliasing for the duration of the call.
+    pub findInBytes: Option<unsafe extern "C" fn(bytes: &u8, start: usize, result: &mut usize) -> bool>,
+    pub complexLifetime: Option<unsafe extern "C" fn() -> *mut u8>,
+}
+
+/// An implementation of the [Basic] interface
+pub trait BasicImpl {
+    unsafe extern "C" fn noArgs() -> i64;
+    /// Find the value by searching through the specified bytes.
+    ///
+    /// Bytes is a const '&' pointer, so you're expected not to mutate it.
+    /// It must be valid for the duration of the call.
+    ///
+    /// The output (if any) is placed in `result`.
+    /// It's a `&mut` pointer, so it's expected to be mutable
+    /// and have no-aliasing for the duration of the call.
+    unsafe extern "C" fn findInBytes(bytes: &u8, start: usize, result: &mut usize) -> bool;
+    unsafe extern "C" fn complexLifetime() -> *mut u8;
+
+    const VTABLE: Basic = Basic {
+        noArgs: Some(Self::noArgs),
+        findInBytes: Some(Self::findInBytes),
+        complexLifetime: Some(Self::complexLifetime),
+    };
+}
+
+/// Here is another interface
+///
+/// You can have multiple ones defined
+#[repr(C)]
+#[derive(Copy, Clone)]
+pub struct Other {
+    pub test: Option<unsafe extern "C" fn(d: f64)>,
+}
+
+/// An implementation of the [Other] interface
+pub trait OtherImpl {
+    unsafe extern "C" fn test(d: f64);
+
+    const VTABLE: Other = Other {
+        test: Some(Self::test),
+    };
+}
+
+#[repr(C)]
+#[derive(Copy, Clone)]
+pub struct NoMethods {
+}
+
+/// An implementation of the [NoMethods] interface
+pub trait NoMethodsImpl {
+    const VTABLE: NoMethods = NoMethods {
+    };
+}
+
+/// A type defined elsewhere in user code
+#[repr(C)]
+pub struct Example {
+    _private: [u8; 0],
+}
+
+extern "C" {
+    pub fn topLevel(e: Example);
+}
+
+// wrappers
+
+#[inline(always)]
+pub unsafe fn basic_noArgs(vtable: &Basic) -> i64 {
+    let func_ptr = vtable.noArgs.expect("Missing Basic.noArgs");
+    func_ptr()
+}
+
+#[inline(always)]
+pub unsafe fn basic_findInBytes(vtable: &Basic, bytes: &u8, start: usize, result: &mut usize) -> bool {
+    let func_ptr = vtable.findInBytes.expect("Missing Basic.findInBytes");
+    func_ptr(bytes, start, result)
+}
+
+#[inline(always)]
+pub unsafe fn basic_complexLifetime(vtable: &Basic) -> *mut u8 {
+    let func_ptr = vtable.complexLifetime.expect("Missing Basic.complexLifetime");
+    func_ptr()
+}
+
+#[inline(always)]
+pub unsafe fn other_test(vtable: Other, d: f64) {
+    let func_ptr = vtable.test.expect("Missing Other.test");
+    func_ptr(d)
+}
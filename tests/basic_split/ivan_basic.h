@@ -0,0 +1,16 @@
+#ifndef IVAN_BASIC_H
+#define IVAN_BASIC_H
+
+#include <stdint.h>
+#include <stdbool.h>
+#include <stdlib.h>
+#include <assert.h>
+
+#include "ivan_basic_Basic.h"
+#include "ivan_basic_Other.h"
+#include "ivan_basic_NoMethods.h"
+#include "ivan_basic_Example.h"
+
+void topLevel(Example e);
+
+#endif /* IVAN_BASIC_H */
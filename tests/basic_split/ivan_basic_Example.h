@@ -0,0 +1,14 @@
+#ifndef IVAN_BASIC_EXAMPLE_H
+#define IVAN_BASIC_EXAMPLE_H
+
+#include <stdint.h>
+#include <stdbool.h>
+#include <stdlib.h>
+#include <assert.h>
+
+/**
+ * A type defined elsewhere in user code
+ */
+typedef struct Example Example;
+
+#endif /* IVAN_BASIC_EXAMPLE_H */
@@ -0,0 +1,12 @@
+#ifndef IVAN_BASIC_NOMETHODS_H
+#define IVAN_BASIC_NOMETHODS_H
+
+#include <stdint.h>
+#include <stdbool.h>
+#include <stdlib.h>
+#include <assert.h>
+
+typedef struct NoMethods {
+} NoMethods;
+
+#endif /* IVAN_BASIC_NOMETHODS_H */
@@ -0,0 +1,24 @@
+#ifndef IVAN_BASIC_OTHER_H
+#define IVAN_BASIC_OTHER_H
+
+#include <stdint.h>
+#include <stdbool.h>
+#include <stdlib.h>
+#include <assert.h>
+
+/**
+ * Here is another interface
+ *
+ * You can have multiple ones defined
+ */
+typedef struct Other {
+    void (*test)(double d);
+} Other;
+
+void other_test(Other vtable, double d) {
+    void (*func_ptr)(double d) = vtable.test;
+    assert(func_ptr != NULL);
+    (*func_ptr)(d);
+}
+
+#endif /* IVAN_BASIC_OTHER_H */
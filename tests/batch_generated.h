@@ -0,0 +1,89 @@
+#ifndef IVAN_BATCH_H
+#define IVAN_BATCH_H
+
+#include <stdint.h>
+#include <stdbool.h>
+#include <stdlib.h>
+#include <assert.h>
+
+/**
+ * Hashes values, one at a time or in batches
+ */
+typedef struct Hasher {
+    /**
+     * Hash a single value
+     */
+    uint64_t (*hash)(uint64_t value, uint32_t seed);
+    /**
+     * [AUTO] Batched version of `hash`, called once for `count` elements
+     *
+     * If this is NULL, `hash` is called for each element instead.
+     */
+    void (*hash_batch)(const uint64_t* value, const uint32_t* seed, uint64_t* results, size_t count);
+    void (*update)(uint64_t* state, uint64_t value);
+    /**
+     * [AUTO] Batched version of `update`, called once for `count` elements
+     *
+     * If this is NULL, `update` is called for each element instead.
+     */
+    void (*update_batch)(uint64_t* const* state, const uint64_t* value, size_t count);
+    void (*reset)();
+} Hasher;
+
+// wrappers
+
+/**
+ * Hash a single value
+ *
+ * [AUTO] Generated wrapper which delegates to Hasher
+ */
+uint64_t hasher_hash(const Hasher* vtable, uint64_t value, uint32_t seed) {
+    uint64_t (*func_ptr)(uint64_t value, uint32_t seed) = vtable->hash;
+    assert(func_ptr != NULL);
+    return (*func_ptr)(value, seed);
+}
+
+/**
+ * Hash a single value
+ *
+ * [AUTO] Generated batch wrapper which delegates to Hasher
+ */
+void hasher_hash_batch(const Hasher* vtable, const uint64_t* value, const uint32_t* seed, uint64_t* results, size_t count) {
+    void (*batch_ptr)(const uint64_t* value, const uint32_t* seed, uint64_t* results, size_t count) = vtable->hash_batch;
+    if (batch_ptr != NULL) {
+        (*batch_ptr)(value, seed, results, count);
+        return;
+    }
+    uint64_t (*func_ptr)(uint64_t value, uint32_t seed) = vtable->hash;
+    assert(func_ptr != NULL);
+    for (size_t i = 0; i < count; i++) {
+        results[i] = (*func_ptr)(value[i], seed[i]);
+    }
+}
+
+void hasher_update(const Hasher* vtable, uint64_t* state, uint64_t value) {
+    void (*func_ptr)(uint64_t* state, uint64_t value) = vtable->update;
+    assert(func_ptr != NULL);
+    (*func_ptr)(state, value);
+}
+
+void hasher_update_batch(const Hasher* vtable, uint64_t* const* state, const uint64_t* value, size_t count) {
+    void (*batch_ptr)(uint64_t* const* state, const uint64_t* value, size_t count) = vtable->update_batch;
+    if (batch_ptr != NULL) {
+        (*batch_ptr)(state, value, count);
+        return;
+    }
+    void (*func_ptr)(uint64_t* state, uint64_t value) = vtable->update;
+    assert(func_ptr != NULL);
+    for (size_t i = 0; i < count; i++) {
+        (*func_ptr)(state[i], value[i]);
+    }
+}
+
+void hasher_reset(const Hasher* vtable) {
+    void (*func_ptr)() = vtable->reset;
+    assert(func_ptr != NULL);
+    (*func_ptr)();
+}
+
+#endif /* IVAN_BATCH_H */
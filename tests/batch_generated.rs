@@ -0,0 +1,100 @@
+//! Generated from the Ivan module `ivan.batch`
+#![allow(non_snake_case, unused_variables, dead_code)]
+
+/// Hashes values, one at a time or in batches
+#[repr(C)]
+#[derive(Copy, Clone)]
+pub struct Hasher {
+    /// Hash a single value
+    pub hash: Option<unsafe extern "C" fn(value: u64, seed: u32) -> u64>,
+    /// [AUTO] Batched version of `hash`, called once for `count` elements
+    ///
+    /// If this is `None`, `hash` is called for each element instead.
+    pub hash_batch: Option<unsafe extern "C" fn(value: *const u64, seed: *const u32, results: *mut u64, count: usize)>,
+    pub update: Option<unsafe extern "C" fn(state: &mut u64, value: u64)>,
+    /// [AUTO] Batched version of `update`, called once for `count` elements
+    ///
+    /// If this is `None`, `update` is called for each element instead.
+    pub update_batch: Option<unsafe extern "C" fn(state: *const &mut u64, value: *const u64, count: usize)>,
+    pub reset: Option<unsafe extern "C" fn()>,
+}
+
+/// An implementation of the [Hasher] interface
+pub trait HasherImpl {
+    /// Hash a single value
+    unsafe extern "C" fn hash(value: u64, seed: u32) -> u64;
+    /// [AUTO] Batched version of `hash`, called once for `count` elements
+    ///
+    /// If this is `None`, `hash` is called for each element instead.
+    unsafe extern "C" fn hash_batch(value: *const u64, seed: *const u32, results: *mut u64, count: usize) {
+        for i in 0..count {
+            results.add(i).write(Self::hash(value.add(i).read(), seed.add(i).read()));
+        }
+    }
+    unsafe extern "C" fn update(state: &mut u64, value: u64);
+    /// [AUTO] Batched version of `update`, called once for `count` elements
+    ///
+    /// If this is `None`, `update` is called for each element instead.
+    unsafe extern "C" fn update_batch(state: *const &mut u64, value: *const u64, count: usize) {
+        for i in 0..count {
+            Self::update(state.add(i).read(), value.add(i).read());
+        }
+    }
+    unsafe extern "C" fn reset();
+
+    const VTABLE: Hasher = Hasher {
+        hash: Some(Self::hash),
+        hash_batch: Some(Self::hash_batch),
+        update: Some(Self::update),
+        update_batch: Some(Self::update_batch),
+        reset: Some(Self::reset),
+    };
+}
+
+// wrappers
+
+/// Hash a single value
+///
+/// [AUTO] Generated wrapper which delegates to Hasher
+#[inline(always)]
+pub unsafe fn hasher_hash(vtable: &Hasher, value: u64, seed: u32) -> u64 {
+    let func_ptr = vtable.hash.expect("Missing Hasher.hash");
+    func_ptr(value, seed)
+}
+
+/// Hash a single value
+///
+/// [AUTO] Generated batch wrapper which delegates to Hasher
+#[inline(always)]
+pub unsafe fn hasher_hash_batch(vtable: &Hasher, value: *const u64, seed: *const u32, results: *mut u64, count: usize) {
+    if let Some(batch_ptr) = vtable.hash_batch {
+        return batch_ptr(value, seed, results, count);
+    }
+    let func_ptr = vtable.hash.expect("Missing Hasher.hash");
+    for i in 0..count {
+        results.add(i).write(func_ptr(value.add(i).read(), seed.add(i).read()));
+    }
+}
+
+#[inline(always)]
+pub unsafe fn hasher_update(vtable: &Hasher, state: &mut u64, value: u64) {
+    let func_ptr = vtable.update.expect("Missing Hasher.update");
+    func_ptr(state, value)
+}
+
+#[inline(always)]
+pub unsafe fn hasher_update_batch(vtable: &Hasher, state: *const &mut u64, value: *const u64, count: usize) {
+    if let Some(batch_ptr) = vtable.update_batch {
+        return batch_ptr(state, value, count);
+    }
+    let func_ptr = vtable.update.expect("Missing Hasher.update");
+    for i in 0..count {
+        func_ptr(state.add(i).read(), value.add(i).read());
+    }
+}
+
+#[inline(always)]
+pub unsafe fn hasher_reset(vtable: &Hasher) {
+    let func_ptr = vtable.reset.expect("Missing Hasher.reset");
+    func_ptr()
+}
@@ -0,0 +1,55 @@
+#ifndef IVAN_BATCH_H
+#define IVAN_BATCH_H
+
+#include <stdint.h>
+#include <stdbool.h>
+#include <stdlib.h>
+#include <assert.h>
+
+/**
+ * Hashes values, one at a time or in batches
+ */
+typedef struct Hasher {
+    /**
+     * Hash a single value
+     */
+    uint64_t (*hash)(uint64_t value, uint32_t seed);
+    /**
+     * [AUTO] Batched version of `hash`, called once for `count` elements
+     *
+     * If this is NULL, `hash` is called for each element instead.
+     */
+    void (*hash_batch)(const uint64_t* value, const uint32_t* seed, uint64_t* results, size_t count);
+    void (*update)(uint64_t* state, uint64_t value);
+    /**
+     * [AUTO] Batched version of `update`, called once for `count` elements
+     *
+     * If this is NULL, `update` is called for each element instead.
+     */
+    void (*update_batch)(uint64_t* const* state, const uint64_t* value, size_t count);
+    void (*reset)();
+} Hasher;
+
+// wrappers
+
+/**
+ * Hash a single value
+ *
+ * [AUTO] Generated wrapper which delegates to Hasher
+ */
+uint64_t hasher_hash(const Hasher* vtable, uint64_t value, uint32_t seed);
+
+/**
+ * Hash a single value
+ *
+ * [AUTO] Generated batch wrapper which delegates to Hasher
+ */
+void hasher_hash_batch(const Hasher* vtable, const uint64_t* value, const uint32_t* seed, uint64_t* results, size_t count);
+
+void hasher_update(const Hasher* vtable, uint64_t* state, uint64_t value);
+
+void hasher_update_batch(const Hasher* vtable, uint64_t* const* state, const uint64_t* value, size_t count);
+
+void hasher_reset(const Hasher* vtable);
+
+#endif /* IVAN_BATCH_H */
@@ -0,0 +1,15 @@
+// Generated from the Ivan module `ivan.batch`
+#include "ivan_batch.h"
+
+void hasher_hash_batch(const Hasher* vtable, const uint64_t* value, const uint32_t* seed, uint64_t* results, size_t count) {
+    void (*batch_ptr)(const uint64_t* value, const uint32_t* seed, uint64_t* results, size_t count) = vtable->hash_batch;
+    if (batch_ptr != NULL) {
+        (*batch_ptr)(value, seed, results, count);
+        return;
+    }
+    uint64_t (*func_ptr)(uint64_t value, uint32_t seed) = vtable->hash;
+    assert(func_ptr != NULL);
+    for (size_t i = 0; i < count; i++) {
+        results[i] = (*func_ptr)(value[i], seed[i]);
+    }
+}
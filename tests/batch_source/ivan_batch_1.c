@@ -0,0 +1,33 @@
+// Generated from the Ivan module `ivan.batch`
+#include "ivan_batch.h"
+
+uint64_t hasher_hash(const Hasher* vtable, uint64_t value, uint32_t seed) {
+    uint64_t (*func_ptr)(uint64_t value, uint32_t seed) = vtable->hash;
+    assert(func_ptr != NULL);
+    return (*func_ptr)(value, seed);
+}
+
+void hasher_update(const Hasher* vtable, uint64_t* state, uint64_t value) {
+    void (*func_ptr)(uint64_t* state, uint64_t value) = vtable->update;
+    assert(func_ptr != NULL);
+    (*func_ptr)(state, value);
+}
+
+void hasher_update_batch(const Hasher* vtable, uint64_t* const* state, const uint64_t* value, size_t count) {
+    void (*batch_ptr)(uint64_t* const* state, const uint64_t* value, size_t count) = vtable->update_batch;
+    if (batch_ptr != NULL) {
+        (*batch_ptr)(state, value, count);
+        return;
+    }
+    void (*func_ptr)(uint64_t* state, uint64_t value) = vtable->update;
+    assert(func_ptr != NULL);
+    for (size_t i = 0; i < count; i++) {
+        (*func_ptr)(state[i], value[i]);
+    }
+}
+
+void hasher_reset(const Hasher* vtable) {
+    void (*func_ptr)() = vtable->reset;
+    assert(func_ptr != NULL);
+    (*func_ptr)();
+}
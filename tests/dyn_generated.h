@@ -0,0 +1,309 @@
+#ifndef IVAN_DYN_H
+#define IVAN_DYN_H
+
+#include <stdint.h>
+#include <stdbool.h>
+#include <stdlib.h>
+#include <assert.h>
+
+#ifndef IVAN_ATTRIBUTES_DEFINED
+#define IVAN_ATTRIBUTES_DEFINED
+#if defined(__GNUC__)
+#define IVAN_NONNULL(...) __attribute__((nonnull(__VA_ARGS__)))
+#define IVAN_RETURNS_NONNULL __attribute__((returns_nonnull))
+#define IVAN_PURE __attribute__((pure))
+#define IVAN_CONST __attribute__((const))
+#define IVAN_HOT __attribute__((hot))
+#define IVAN_COLD __attribute__((cold))
+#define IVAN_NORETURN __attribute__((noreturn))
+#else
+#define IVAN_NONNULL(...)
+#define IVAN_RETURNS_NONNULL
+#define IVAN_PURE
+#define IVAN_CONST
+#define IVAN_HOT
+#define IVAN_COLD
+#define IVAN_NORETURN
+#endif
+#if defined(__cplusplus)
+#define IVAN_RESTRICT __restrict
+#else
+#define IVAN_RESTRICT restrict
+#endif
+#endif /* IVAN_ATTRIBUTES_DEFINED */
+
+#ifndef IVAN_DEFINED_IvanDyn_Shape
+#define IVAN_DEFINED_IvanDyn_Shape
+/**
+ * An object implementing `Shape`, along with its vtable
+ *
+ * This is always passed by value, which fits in two registers.
+ * So calling a method doesn't need to load the vtable from the object.
+ */
+typedef struct IvanDyn_Shape {
+    void* self;
+    const struct Shape* vtable;
+} IvanDyn_Shape;
+#endif /* IVAN_DEFINED_IvanDyn_Shape */
+
+/**
+ * A shape drawn by user code
+ */
+typedef struct Shape {
+    /**
+     * The area of the shape
+     */
+    double (*area)(const void* self);
+    void (*scale)(void* self, double factor);
+    bool (*contains)(const void* self, int32_t x);
+    /**
+     * [AUTO] Batched version of `contains`, called once for `count` elements
+     *
+     * If this is NULL, `contains` is called for each element instead.
+     */
+    void (*contains_batch)(const void* const* self, const int32_t* x, bool* results, size_t count);
+    void (*release)(void* self);
+    size_t (*count)();
+} Shape;
+
+#ifndef IVAN_DEFINED_IvanDyn_Solid
+#define IVAN_DEFINED_IvanDyn_Solid
+/**
+ * An object implementing `Solid`, along with its vtable
+ *
+ * This is always passed by value, which fits in two registers.
+ * So calling a method doesn't need to load the vtable from the object.
+ */
+typedef struct IvanDyn_Solid {
+    void* self;
+    const struct Solid* vtable;
+} IvanDyn_Solid;
+#endif /* IVAN_DEFINED_IvanDyn_Solid */
+
+typedef struct Solid {
+    /**
+     * [AUTO] The vtable of the base interface `Shape`
+     *
+     * This must be the first member, so upcasting is free.
+     */
+    Shape base;
+    double (*volume)(const void* self);
+} Solid;
+
+/** [AUTO] Upcast to the `Shape` vtable, which is at the same address */
+const Shape* Solid_as_Shape(const Solid* vtable) {
+    return &vtable->base;
+}
+
+#ifndef IVAN_DEFINED_IvanSlice_dyn_Shape
+#define IVAN_DEFINED_IvanSlice_dyn_Shape
+/**
+ * A borrowed slice `&[dyn Shape]`
+ *
+ * This is always passed by value.
+ */
+typedef struct IvanSlice_dyn_Shape {
+    const IvanDyn_Shape* ptr;
+    size_t len;
+} IvanSlice_dyn_Shape;
+#endif /* IVAN_DEFINED_IvanSlice_dyn_Shape */
+
+/**
+ * The shapes are passed along with their vtables
+ */
+void drawAll(IvanSlice_dyn_Shape shapes);
+
+IvanDyn_Shape largest(IvanDyn_Shape first, IvanDyn_Shape second);
+
+#ifndef IVAN_DEFINED_IvanStr
+#define IVAN_DEFINED_IvanStr
+/**
+ * A borrowed view of UTF-8 text (not null-terminated)
+ *
+ * This is always passed by value.
+ */
+typedef struct IvanStr {
+    const char* ptr;
+    size_t len;
+} IvanStr;
+#endif /* IVAN_DEFINED_IvanStr */
+
+IvanDyn_Solid lookupSolid(IvanStr name);
+
+// wrappers
+
+/**
+ * The area of the shape
+ *
+ * [AUTO] Generated wrapper which delegates to Shape
+ */
+IVAN_PURE double shape_area(const Shape* vtable, const void* self) {
+    double (*func_ptr)(const void* self) = vtable->area;
+    assert(func_ptr != NULL);
+    return (*func_ptr)(self);
+}
+
+/**
+ * The area of the shape
+ *
+ * [AUTO] Generated wrapper which delegates to the vtable of a `dyn Shape`
+ */
+IVAN_PURE double shape_area_dyn(IvanDyn_Shape object) {
+    double (*func_ptr)(const void* self) = object.vtable->area;
+    assert(func_ptr != NULL);
+    return (*func_ptr)(object.self);
+}
+
+void shape_scale(const Shape* vtable, void* self, double factor) {
+    void (*func_ptr)(void* self, double factor) = vtable->scale;
+    assert(func_ptr != NULL);
+    (*func_ptr)(self, factor);
+}
+
+void shape_scale_dyn(IvanDyn_Shape object, double factor) {
+    void (*func_ptr)(void* self, double factor) = object.vtable->scale;
+    assert(func_ptr != NULL);
+    (*func_ptr)(object.self, factor);
+}
+
+bool shape_contains(const Shape* vtable, const void* self, int32_t x) {
+    bool (*func_ptr)(const void* self, int32_t x) = vtable->contains;
+    assert(func_ptr != NULL);
+    return (*func_ptr)(self, x);
+}
+
+bool shape_contains_dyn(IvanDyn_Shape object, int32_t x) {
+    bool (*func_ptr)(const void* self, int32_t x) = object.vtable->contains;
+    assert(func_ptr != NULL);
+    return (*func_ptr)(object.self, x);
+}
+
+void shape_contains_batch(const Shape* vtable, const void* const* self, const int32_t* x, bool* results, size_t count) {
+    void (*batch_ptr)(const void* const* self, const int32_t* x, bool* results, size_t count) = vtable->contains_batch;
+    if (batch_ptr != NULL) {
+        (*batch_ptr)(self, x, results, count);
+        return;
+    }
+    bool (*func_ptr)(const void* self, int32_t x) = vtable->contains;
+    assert(func_ptr != NULL);
+    for (size_t i = 0; i < count; i++) {
+        results[i] = (*func_ptr)(self[i], x[i]);
+    }
+}
+
+void shape_release(const Shape* vtable, void* self) {
+    void (*func_ptr)(void* self) = vtable->release;
+    if (func_ptr == NULL) {
+    } else {
+        (*func_ptr)(self);
+    }
+}
+
+void shape_release_dyn(IvanDyn_Shape object) {
+    void (*func_ptr)(void* self) = object.vtable->release;
+    if (func_ptr == NULL) {
+    } else {
+        (*func_ptr)(object.self);
+    }
+}
+
+size_t shape_count(const Shape* vtable) {
+    size_t (*func_ptr)() = vtable->count;
+    assert(func_ptr != NULL);
+    return (*func_ptr)();
+}
+
+/**
+ * The area of the shape
+ *
+ * [AUTO] Generated wrapper which delegates to Shape
+ */
+IVAN_PURE double solid_area(const Solid* vtable, const void* self) {
+    double (*func_ptr)(const void* self) = vtable->base.area;
+    assert(func_ptr != NULL);
+    return (*func_ptr)(self);
+}
+
+/**
+ * The area of the shape
+ *
+ * [AUTO] Generated wrapper which delegates to the vtable of a `dyn Solid`
+ */
+IVAN_PURE double solid_area_dyn(IvanDyn_Solid object) {
+    double (*func_ptr)(const void* self) = object.vtable->base.area;
+    assert(func_ptr != NULL);
+    return (*func_ptr)(object.self);
+}
+
+void solid_scale(const Solid* vtable, void* self, double factor) {
+    void (*func_ptr)(void* self, double factor) = vtable->base.scale;
+    assert(func_ptr != NULL);
+    (*func_ptr)(self, factor);
+}
+
+void solid_scale_dyn(IvanDyn_Solid object, double factor) {
+    void (*func_ptr)(void* self, double factor) = object.vtable->base.scale;
+    assert(func_ptr != NULL);
+    (*func_ptr)(object.self, factor);
+}
+
+bool solid_contains(const Solid* vtable, const void* self, int32_t x) {
+    bool (*func_ptr)(const void* self, int32_t x) = vtable->base.contains;
+    assert(func_ptr != NULL);
+    return (*func_ptr)(self, x);
+}
+
+bool solid_contains_dyn(IvanDyn_Solid object, int32_t x) {
+    bool (*func_ptr)(const void* self, int32_t x) = object.vtable->base.contains;
+    assert(func_ptr != NULL);
+    return (*func_ptr)(object.self, x);
+}
+
+void solid_contains_batch(const Solid* vtable, const void* const* self, const int32_t* x, bool* results, size_t count) {
+    void (*batch_ptr)(const void* const* self, const int32_t* x, bool* results, size_t count) = vtable->base.contains_batch;
+    if (batch_ptr != NULL) {
+        (*batch_ptr)(self, x, results, count);
+        return;
+    }
+    bool (*func_ptr)(const void* self, int32_t x) = vtable->base.contains;
+    assert(func_ptr != NULL);
+    for (size_t i = 0; i < count; i++) {
+        results[i] = (*func_ptr)(self[i], x[i]);
+    }
+}
+
+void solid_release(const Solid* vtable, void* self) {
+    void (*func_ptr)(void* self) = vtable->base.release;
+    if (func_ptr == NULL) {
+    } else {
+        (*func_ptr)(self);
+    }
+}
+
+void solid_release_dyn(IvanDyn_Solid object) {
+    void (*func_ptr)(void* self) = object.vtable->base.release;
+    if (func_ptr == NULL) {
+    } else {
+        (*func_ptr)(object.self);
+    }
+}
+
+size_t solid_count(const Solid* vtable) {
+    size_t (*func_ptr)() = vtable->base.count;
+    assert(func_ptr != NULL);
+    return (*func_ptr)();
+}
+
+double solid_volume(const Solid* vtable, const void* self) {
+    double (*func_ptr)(const void* self) = vtable->volume;
+    assert(func_ptr != NULL);
+    return (*func_ptr)(self);
+}
+
+double solid_volume_dyn(IvanDyn_Solid object) {
+    double (*func_ptr)(const void* self) = object.vtable->volume;
+    assert(func_ptr != NULL);
+    return (*func_ptr)(object.self);
+}
+
+#endif /* IVAN_DYN_H */
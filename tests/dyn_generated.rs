@@ -0,0 +1,343 @@
+//! Generated from the Ivan module `ivan.dyn`
+#![allow(non_snake_case, unused_variables, dead_code)]
+
+/// An object implementing the interface `V`, passed by value as `{self, vtable}`
+///
+/// This fits in two registers, so calling a method doesn't need to load the vtable from the object.
+/// Vtables are constants (like the ones generated for `impl` blocks), so they are `'static`.
+#[repr(C)]
+pub struct IvanDyn<V: 'static> {
+    pub this: *mut core::ffi::c_void,
+    pub vtable: &'static V,
+}
+impl<V> Clone for IvanDyn<V> {
+    #[inline(always)]
+    fn clone(&self) -> Self {
+        *self
+    }
+}
+impl<V> Copy for IvanDyn<V> {}
+
+/// A shape drawn by user code
+#[repr(C)]
+#[derive(Copy, Clone)]
+pub struct Shape {
+    /// The area of the shape
+    pub area: Option<unsafe extern "C" fn(this: *const core::ffi::c_void) -> f64>,
+    pub scale: Option<unsafe extern "C" fn(this: *mut core::ffi::c_void, factor: f64)>,
+    pub contains: Option<unsafe extern "C" fn(this: *const core::ffi::c_void, x: i32) -> bool>,
+    /// [AUTO] Batched version of `contains`, called once for `count` elements
+    ///
+    /// If this is `None`, `contains` is called for each element instead.
+    pub contains_batch: Option<unsafe extern "C" fn(this: *const *const core::ffi::c_void, x: *const i32, results: *mut bool, count: usize)>,
+    pub release: Option<unsafe extern "C" fn(this: *mut core::ffi::c_void)>,
+    pub count: Option<unsafe extern "C" fn() -> usize>,
+}
+
+/// An implementation of the [Shape] interface
+pub trait ShapeImpl {
+    /// The area of the shape
+    #[must_use]
+    unsafe extern "C" fn area(this: *const core::ffi::c_void) -> f64;
+    unsafe extern "C" fn scale(this: *mut core::ffi::c_void, factor: f64);
+    unsafe extern "C" fn contains(this: *const core::ffi::c_void, x: i32) -> bool;
+    /// [AUTO] Batched version of `contains`, called once for `count` elements
+    ///
+    /// If this is `None`, `contains` is called for each element instead.
+    unsafe extern "C" fn contains_batch(this: *const *const core::ffi::c_void, x: *const i32, results: *mut bool, count: usize) {
+        for i in 0..count {
+            results.add(i).write(Self::contains(this.add(i).read(), x.add(i).read()));
+        }
+    }
+    unsafe extern "C" fn release(this: *mut core::ffi::c_void) {
+    }
+    unsafe extern "C" fn count() -> usize;
+
+    const VTABLE: Shape = Shape {
+        area: Some(Self::area),
+        scale: Some(Self::scale),
+        contains: Some(Self::contains),
+        contains_batch: Some(Self::contains_batch),
+        release: Some(Self::release),
+        count: Some(Self::count),
+    };
+}
+
+#[repr(C)]
+#[derive(Copy, Clone)]
+pub struct Solid {
+    /// [AUTO] The vtable of the base interface [Shape]
+    ///
+    /// This must be the first field, so upcasting is free.
+    pub base: Shape,
+    pub volume: Option<unsafe extern "C" fn(this: *const core::ffi::c_void) -> f64>,
+}
+
+/// [AUTO] Upcast to the [Shape] vtable, which is at the same address
+impl core::ops::Deref for Solid {
+    type Target = Shape;
+    #[inline(always)]
+    fn deref(&self) -> &Shape {
+        &self.base
+    }
+}
+
+/// An implementation of the [Solid] interface
+pub trait SolidImpl: ShapeImpl {
+    unsafe extern "C" fn volume(this: *const core::ffi::c_void) -> f64;
+
+    const VTABLE: Solid = Solid {
+        base: <Self as ShapeImpl>::VTABLE,
+        volume: Some(Self::volume),
+    };
+}
+
+/// Convert a `{ptr, len}` pair from C into a slice
+///
+/// C code is allowed to pass NULL for an empty slice, but Rust isn't.
+#[inline(always)]
+unsafe fn slice_from_raw<'a, T>(ptr: *const T, len: usize) -> &'a [T] {
+    if len == 0 {
+        &[]
+    } else {
+        core::slice::from_raw_parts(ptr, len)
+    }
+}
+
+/// A borrowed slice, passed by value as `{ptr, len}`
+#[repr(C)]
+pub struct IvanSlice<'a, T> {
+    pub ptr: *const T,
+    pub len: usize,
+    _marker: core::marker::PhantomData<&'a [T]>,
+}
+impl<'a, T> Clone for IvanSlice<'a, T> {
+    #[inline(always)]
+    fn clone(&self) -> Self {
+        *self
+    }
+}
+impl<'a, T> Copy for IvanSlice<'a, T> {}
+impl<'a, T> From<&'a [T]> for IvanSlice<'a, T> {
+    #[inline(always)]
+    fn from(s: &'a [T]) -> Self {
+        IvanSlice { ptr: s.as_ptr(), len: s.len(), _marker: core::marker::PhantomData }
+    }
+}
+impl<'a, T> core::ops::Deref for IvanSlice<'a, T> {
+    type Target = [T];
+    #[inline(always)]
+    fn deref(&self) -> &[T] {
+        unsafe { slice_from_raw(self.ptr, self.len) }
+    }
+}
+
+extern "C" {
+    /// The shapes are passed along with their vtables
+    pub fn drawAll(shapes: IvanSlice<'_, IvanDyn<Shape>>);
+}
+
+extern "C" {
+    pub fn largest(first: IvanDyn<Shape>, second: IvanDyn<Shape>) -> IvanDyn<Shape>;
+}
+
+/// A borrowed view of UTF-8 text, passed by value as `{ptr, len}`
+#[repr(C)]
+pub struct IvanStr<'a> {
+    pub ptr: *const u8,
+    pub len: usize,
+    _marker: core::marker::PhantomData<&'a str>,
+}
+impl<'a> Clone for IvanStr<'a> {
+    #[inline(always)]
+    fn clone(&self) -> Self {
+        *self
+    }
+}
+impl<'a> Copy for IvanStr<'a> {}
+impl<'a> From<&'a str> for IvanStr<'a> {
+    #[inline(always)]
+    fn from(s: &'a str) -> Self {
+        IvanStr { ptr: s.as_ptr(), len: s.len(), _marker: core::marker::PhantomData }
+    }
+}
+impl<'a> core::ops::Deref for IvanStr<'a> {
+    type Target = str;
+    #[inline(always)]
+    fn deref(&self) -> &str {
+        // The sender guarantees this is valid UTF-8
+        unsafe { core::str::from_utf8_unchecked(slice_from_raw(self.ptr, self.len)) }
+    }
+}
+
+extern "C" {
+    pub fn lookupSolid(name: IvanStr<'_>) -> IvanDyn<Solid>;
+}
+
+// wrappers
+
+/// The area of the shape
+///
+/// [AUTO] Generated wrapper which delegates to Shape
+#[must_use]
+#[inline(always)]
+pub unsafe fn shape_area(vtable: &Shape, this: *const core::ffi::c_void) -> f64 {
+    let func_ptr = vtable.area.expect("Missing Shape.area");
+    func_ptr(this)
+}
+
+/// The area of the shape
+///
+/// [AUTO] Generated wrapper which delegates to the vtable of a `dyn Shape`
+#[must_use]
+#[inline(always)]
+pub unsafe fn shape_area_dyn(object: IvanDyn<Shape>) -> f64 {
+    let func_ptr = object.vtable.area.expect("Missing Shape.area");
+    func_ptr(object.this)
+}
+
+#[inline(always)]
+pub unsafe fn shape_scale(vtable: &Shape, this: *mut core::ffi::c_void, factor: f64) {
+    let func_ptr = vtable.scale.expect("Missing Shape.scale");
+    func_ptr(this, factor)
+}
+
+#[inline(always)]
+pub unsafe fn shape_scale_dyn(object: IvanDyn<Shape>, factor: f64) {
+    let func_ptr = object.vtable.scale.expect("Missing Shape.scale");
+    func_ptr(object.this, factor)
+}
+
+#[inline(always)]
+pub unsafe fn shape_contains(vtable: &Shape, this: *const core::ffi::c_void, x: i32) -> bool {
+    let func_ptr = vtable.contains.expect("Missing Shape.contains");
+    func_ptr(this, x)
+}
+
+#[inline(always)]
+pub unsafe fn shape_contains_dyn(object: IvanDyn<Shape>, x: i32) -> bool {
+    let func_ptr = object.vtable.contains.expect("Missing Shape.contains");
+    func_ptr(object.this, x)
+}
+
+#[inline(always)]
+pub unsafe fn shape_contains_batch(vtable: &Shape, this: *const *const core::ffi::c_void, x: *const i32, results: *mut bool, count: usize) {
+    if let Some(batch_ptr) = vtable.contains_batch {
+        return batch_ptr(this, x, results, count);
+    }
+    let func_ptr = vtable.contains.expect("Missing Shape.contains");
+    for i in 0..count {
+        results.add(i).write(func_ptr(this.add(i).read(), x.add(i).read()));
+    }
+}
+
+#[inline(always)]
+pub unsafe fn shape_release(vtable: &Shape, this: *mut core::ffi::c_void) {
+    if let Some(func_ptr) = vtable.release {
+        func_ptr(this)
+    } else {
+    }
+}
+
+#[inline(always)]
+pub unsafe fn shape_release_dyn(object: IvanDyn<Shape>) {
+    if let Some(func_ptr) = object.vtable.release {
+        func_ptr(object.this)
+    } else {
+    }
+}
+
+#[inline(always)]
+pub unsafe fn shape_count(vtable: &Shape) -> usize {
+    let func_ptr = vtable.count.expect("Missing Shape.count");
+    func_ptr()
+}
+
+/// The area of the shape
+///
+/// [AUTO] Generated wrapper which delegates to Shape
+#[must_use]
+#[inline(always)]
+pub unsafe fn solid_area(vtable: &Solid, this: *const core::ffi::c_void) -> f64 {
+    let func_ptr = vtable.base.area.expect("Missing Solid.area");
+    func_ptr(this)
+}
+
+/// The area of the shape
+///
+/// [AUTO] Generated wrapper which delegates to the vtable of a `dyn Solid`
+#[must_use]
+#[inline(always)]
+pub unsafe fn solid_area_dyn(object: IvanDyn<Solid>) -> f64 {
+    let func_ptr = object.vtable.base.area.expect("Missing Solid.area");
+    func_ptr(object.this)
+}
+
+#[inline(always)]
+pub unsafe fn solid_scale(vtable: &Solid, this: *mut core::ffi::c_void, factor: f64) {
+    let func_ptr = vtable.base.scale.expect("Missing Solid.scale");
+    func_ptr(this, factor)
+}
+
+#[inline(always)]
+pub unsafe fn solid_scale_dyn(object: IvanDyn<Solid>, factor: f64) {
+    let func_ptr = object.vtable.base.scale.expect("Missing Solid.scale");
+    func_ptr(object.this, factor)
+}
+
+#[inline(always)]
+pub unsafe fn solid_contains(vtable: &Solid, this: *const core::ffi::c_void, x: i32) -> bool {
+    let func_ptr = vtable.base.contains.expect("Missing Solid.contains");
+    func_ptr(this, x)
+}
+
+#[inline(always)]
+pub unsafe fn solid_contains_dyn(object: IvanDyn<Solid>, x: i32) -> bool {
+    let func_ptr = object.vtable.base.contains.expect("Missing Solid.contains");
+    func_ptr(object.this, x)
+}
+
+#[inline(always)]
+pub unsafe fn solid_contains_batch(vtable: &Solid, this: *const *const core::ffi::c_void, x: *const i32, results: *mut bool, count: usize) {
+    if let Some(batch_ptr) = vtable.base.contains_batch {
+        return batch_ptr(this, x, results, count);
+    }
+    let func_ptr = vtable.base.contains.expect("Missing Solid.contains");
+    for i in 0..count {
+        results.add(i).write(func_ptr(this.add(i).read(), x.add(i).read()));
+    }
+}
+
+#[inline(always)]
+pub unsafe fn solid_release(vtable: &Solid, this: *mut core::ffi::c_void) {
+    if let Some(func_ptr) = vtable.base.release {
+        func_ptr(this)
+    } else {
+    }
+}
+
+#[inline(always)]
+pub unsafe fn solid_release_dyn(object: IvanDyn<Solid>) {
+    if let Some(func_ptr) = object.vtable.base.release {
+        func_ptr(object.this)
+    } else {
+    }
+}
+
+#[inline(always)]
+pub unsafe fn solid_count(vtable: &Solid) -> usize {
+    let func_ptr = vtable.base.count.expect("Missing Solid.count");
+    func_ptr()
+}
+
+#[inline(always)]
+pub unsafe fn solid_volume(vtable: &Solid, this: *const core::ffi::c_void) -> f64 {
+    let func_ptr = vtable.volume.expect("Missing Solid.volume");
+    func_ptr(this)
+}
+
+#[inline(always)]
+pub unsafe fn solid_volume_dyn(object: IvanDyn<Solid>) -> f64 {
+    let func_ptr = object.vtable.volume.expect("Missing Solid.volume");
+    func_ptr(object.this)
+}
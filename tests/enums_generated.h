@@ -0,0 +1,192 @@
+#ifndef IVAN_ENUMS_H
+#define IVAN_ENUMS_H
+
+#include <stdint.h>
+#include <stdbool.h>
+#include <stdlib.h>
+#include <assert.h>
+
+#ifndef IVAN_ATTRIBUTES_DEFINED
+#define IVAN_ATTRIBUTES_DEFINED
+#if defined(__GNUC__)
+#define IVAN_NONNULL(...) __attribute__((nonnull(__VA_ARGS__)))
+#define IVAN_RETURNS_NONNULL __attribute__((returns_nonnull))
+#define IVAN_PURE __attribute__((pure))
+#define IVAN_CONST __attribute__((const))
+#define IVAN_HOT __attribute__((hot))
+#define IVAN_COLD __attribute__((cold))
+#define IVAN_NORETURN __attribute__((noreturn))
+#else
+#define IVAN_NONNULL(...)
+#define IVAN_RETURNS_NONNULL
+#define IVAN_PURE
+#define IVAN_CONST
+#define IVAN_HOT
+#define IVAN_COLD
+#define IVAN_NORETURN
+#endif
+#if defined(__cplusplus)
+#define IVAN_RESTRICT __restrict
+#else
+#define IVAN_RESTRICT restrict
+#endif
+#endif /* IVAN_ATTRIBUTES_DEFINED */
+
+typedef struct Image Image;
+
+/** [AUTO] The fields of `Shape.Circle` */
+typedef struct Shape_Circle {
+    double radius;
+} Shape_Circle;
+
+/** [AUTO] The fields of `Shape.Rect` */
+typedef struct Shape_Rect {
+    double width;
+    double height;
+} Shape_Rect;
+
+/** [AUTO] The fields of `Shape.Sprite` */
+typedef struct Shape_Sprite {
+    const Image* image;
+} Shape_Sprite;
+
+/** [AUTO] The tags of `Shape` (stored as a `uint8_t`) */
+enum {
+    Shape_Tag_Circle = 0,
+    /**
+     * An axis-aligned rectangle
+     */
+    Shape_Tag_Rect = 1,
+    Shape_Tag_Sprite = 2,
+    Shape_Tag_Empty = 3,
+};
+
+/**
+ * A shape, which is one of a few variants
+ */
+typedef struct Shape {
+    uint8_t tag;
+    union {
+        Shape_Circle Circle;
+        Shape_Rect Rect;
+        Shape_Sprite Sprite;
+    };
+} Shape;
+
+IVAN_PURE double Shape_Circle_area(const Shape_Circle* fields);
+IVAN_PURE double Shape_Rect_area(const Shape_Rect* fields);
+IVAN_PURE double Shape_Sprite_area(const Shape_Sprite* fields);
+IVAN_PURE double Shape_Empty_area();
+
+/**
+ * The area of the shape
+ */
+IVAN_PURE double Shape_area(const Shape* self) {
+    switch (self->tag) {
+        case Shape_Tag_Circle:
+            return Shape_Circle_area(&self->Circle);
+        case Shape_Tag_Rect:
+            return Shape_Rect_area(&self->Rect);
+        case Shape_Tag_Sprite:
+            return Shape_Sprite_area(&self->Sprite);
+        case Shape_Tag_Empty:
+            return Shape_Empty_area();
+    }
+    // Not a valid tag
+    abort();
+}
+
+void Shape_Circle_scale(Shape_Circle* fields, double factor);
+void Shape_Rect_scale(Shape_Rect* fields, double factor);
+void Shape_Sprite_scale(Shape_Sprite* fields, double factor);
+void Shape_Empty_scale(double factor);
+
+void Shape_scale(Shape* self, double factor) {
+    switch (self->tag) {
+        case Shape_Tag_Circle:
+            Shape_Circle_scale(&self->Circle, factor);
+            return;
+        case Shape_Tag_Rect:
+            Shape_Rect_scale(&self->Rect, factor);
+            return;
+        case Shape_Tag_Sprite:
+            Shape_Sprite_scale(&self->Sprite, factor);
+            return;
+        case Shape_Tag_Empty:
+            Shape_Empty_scale(factor);
+            return;
+    }
+    // Not a valid tag
+    abort();
+}
+
+IVAN_NORETURN void Shape_Circle_fail(const Shape_Circle* fields, int32_t code);
+IVAN_NORETURN void Shape_Rect_fail(const Shape_Rect* fields, int32_t code);
+IVAN_NORETURN void Shape_Sprite_fail(const Shape_Sprite* fields, int32_t code);
+IVAN_NORETURN void Shape_Empty_fail(int32_t code);
+
+IVAN_NORETURN void Shape_fail(const Shape* self, int32_t code) {
+    switch (self->tag) {
+        case Shape_Tag_Circle:
+            Shape_Circle_fail(&self->Circle, code);
+        case Shape_Tag_Rect:
+            Shape_Rect_fail(&self->Rect, code);
+        case Shape_Tag_Sprite:
+            Shape_Sprite_fail(&self->Sprite, code);
+        case Shape_Tag_Empty:
+            Shape_Empty_fail(code);
+    }
+    // Not a valid tag
+    abort();
+}
+
+/** [AUTO] The tags of `Direction` (stored as a `uint8_t`) */
+enum {
+    Direction_Tag_North = 0,
+    Direction_Tag_South = 1,
+    Direction_Tag_East = 2,
+    Direction_Tag_West = 3,
+};
+
+typedef struct Direction {
+    uint8_t tag;
+} Direction;
+
+IVAN_CONST uint16_t Direction_North_degrees();
+IVAN_CONST uint16_t Direction_South_degrees();
+IVAN_CONST uint16_t Direction_East_degrees();
+IVAN_CONST uint16_t Direction_West_degrees();
+
+IVAN_PURE uint16_t Direction_degrees(const Direction* self) {
+    switch (self->tag) {
+        case Direction_Tag_North:
+            return Direction_North_degrees();
+        case Direction_Tag_South:
+            return Direction_South_degrees();
+        case Direction_Tag_East:
+            return Direction_East_degrees();
+        case Direction_Tag_West:
+            return Direction_West_degrees();
+    }
+    // Not a valid tag
+    abort();
+}
+
+#ifndef IVAN_DEFINED_IvanSlice_Shape
+#define IVAN_DEFINED_IvanSlice_Shape
+/**
+ * A borrowed slice `&[Shape]`
+ *
+ * This is always passed by value.
+ */
+typedef struct IvanSlice_Shape {
+    const Shape* ptr;
+    size_t len;
+} IvanSlice_Shape;
+#endif /* IVAN_DEFINED_IvanSlice_Shape */
+
+void drawAll(IvanSlice_Shape shapes);
+
+// wrappers
+
+#endif /* IVAN_ENUMS_H */
@@ -0,0 +1,170 @@
+//! Generated from the Ivan module `ivan.enums`
+#![allow(non_snake_case, unused_variables, dead_code)]
+
+#[repr(C)]
+pub struct Image {
+    _private: [u8; 0],
+}
+
+/// [AUTO] The fields of [Shape::Circle]
+#[repr(C)]
+#[allow(non_camel_case_types)]
+pub struct Shape_Circle {
+    pub radius: f64,
+}
+
+/// [AUTO] The fields of [Shape::Rect]
+#[repr(C)]
+#[allow(non_camel_case_types)]
+pub struct Shape_Rect {
+    pub width: f64,
+    pub height: f64,
+}
+
+/// [AUTO] The fields of [Shape::Sprite]
+#[repr(C)]
+#[allow(non_camel_case_types)]
+pub struct Shape_Sprite {
+    pub image: *const Image,
+}
+
+/// A shape, which is one of a few variants
+#[repr(C, u8)]
+pub enum Shape {
+    Circle(Shape_Circle),
+    /// An axis-aligned rectangle
+    Rect(Shape_Rect),
+    Sprite(Shape_Sprite),
+    Empty,
+}
+
+extern "C" {
+    #[must_use]
+    pub fn Shape_Circle_area(fields: &Shape_Circle) -> f64;
+    #[must_use]
+    pub fn Shape_Rect_area(fields: &Shape_Rect) -> f64;
+    #[must_use]
+    pub fn Shape_Sprite_area(fields: &Shape_Sprite) -> f64;
+    #[must_use]
+    pub fn Shape_Empty_area() -> f64;
+    pub fn Shape_Circle_scale(fields: &mut Shape_Circle, factor: f64);
+    pub fn Shape_Rect_scale(fields: &mut Shape_Rect, factor: f64);
+    pub fn Shape_Sprite_scale(fields: &mut Shape_Sprite, factor: f64);
+    pub fn Shape_Empty_scale(factor: f64);
+    pub fn Shape_Circle_fail(fields: &Shape_Circle, code: i32) -> !;
+    pub fn Shape_Rect_fail(fields: &Shape_Rect, code: i32) -> !;
+    pub fn Shape_Sprite_fail(fields: &Shape_Sprite, code: i32) -> !;
+    pub fn Shape_Empty_fail(code: i32) -> !;
+}
+
+impl Shape {
+    /// The area of the shape
+    #[must_use]
+    #[inline(always)]
+    pub unsafe fn area(&self) -> f64 {
+        match self {
+            Shape::Circle(fields) => Shape_Circle_area(fields),
+            Shape::Rect(fields) => Shape_Rect_area(fields),
+            Shape::Sprite(fields) => Shape_Sprite_area(fields),
+            Shape::Empty => Shape_Empty_area(),
+        }
+    }
+
+    #[inline(always)]
+    pub unsafe fn scale(&mut self, factor: f64) {
+        match self {
+            Shape::Circle(fields) => Shape_Circle_scale(fields, factor),
+            Shape::Rect(fields) => Shape_Rect_scale(fields, factor),
+            Shape::Sprite(fields) => Shape_Sprite_scale(fields, factor),
+            Shape::Empty => Shape_Empty_scale(factor),
+        }
+    }
+
+    #[inline(always)]
+    pub unsafe fn fail(&self, code: i32) -> ! {
+        match self {
+            Shape::Circle(fields) => Shape_Circle_fail(fields, code),
+            Shape::Rect(fields) => Shape_Rect_fail(fields, code),
+            Shape::Sprite(fields) => Shape_Sprite_fail(fields, code),
+            Shape::Empty => Shape_Empty_fail(code),
+        }
+    }
+}
+
+#[repr(u8)]
+pub enum Direction {
+    North,
+    South,
+    East,
+    West,
+}
+
+extern "C" {
+    #[must_use]
+    pub fn Direction_North_degrees() -> u16;
+    #[must_use]
+    pub fn Direction_South_degrees() -> u16;
+    #[must_use]
+    pub fn Direction_East_degrees() -> u16;
+    #[must_use]
+    pub fn Direction_West_degrees() -> u16;
+}
+
+impl Direction {
+    #[must_use]
+    #[inline(always)]
+    pub unsafe fn degrees(&self) -> u16 {
+        match self {
+            Direction::North => Direction_North_degrees(),
+            Direction::South => Direction_South_degrees(),
+            Direction::East => Direction_East_degrees(),
+            Direction::West => Direction_West_degrees(),
+        }
+    }
+}
+
+/// Convert a `{ptr, len}` pair from C into a slice
+///
+/// C code is allowed to pass NULL for an empty slice, but Rust isn't.
+#[inline(always)]
+unsafe fn slice_from_raw<'a, T>(ptr: *const T, len: usize) -> &'a [T] {
+    if len == 0 {
+        &[]
+    } else {
+        core::slice::from_raw_parts(ptr, len)
+    }
+}
+
+/// A borrowed slice, passed by value as `{ptr, len}`
+#[repr(C)]
+pub struct IvanSlice<'a, T> {
+    pub ptr: *const T,
+    pub len: usize,
+    _marker: core::marker::PhantomData<&'a [T]>,
+}
+impl<'a, T> Clone for IvanSlice<'a, T> {
+    #[inline(always)]
+    fn clone(&self) -> Self {
+        *self
+    }
+}
+impl<'a, T> Copy for IvanSlice<'a, T> {}
+impl<'a, T> From<&'a [T]> for IvanSlice<'a, T> {
+    #[inline(always)]
+    fn from(s: &'a [T]) -> Self {
+        IvanSlice { ptr: s.as_ptr(), len: s.len(), _marker: core::marker::PhantomData }
+    }
+}
+impl<'a, T> core::ops::Deref for IvanSlice<'a, T> {
+    type Target = [T];
+    #[inline(always)]
+    fn deref(&self) -> &[T] {
+        unsafe { slice_from_raw(self.ptr, self.len) }
+    }
+}
+
+extern "C" {
+    pub fn drawAll(shapes: IvanSlice<'_, Shape>);
+}
+
+// wrappers
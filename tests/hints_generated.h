@@ -0,0 +1,142 @@
+#ifndef IVAN_HINTS_H
+#define IVAN_HINTS_H
+
+#include <stdint.h>
+#include <stdbool.h>
+#include <stdlib.h>
+#include <assert.h>
+
+#ifndef IVAN_ATTRIBUTES_DEFINED
+#define IVAN_ATTRIBUTES_DEFINED
+#if defined(__GNUC__)
+#define IVAN_NONNULL(...) __attribute__((nonnull(__VA_ARGS__)))
+#define IVAN_RETURNS_NONNULL __attribute__((returns_nonnull))
+#define IVAN_PURE __attribute__((pure))
+#define IVAN_CONST __attribute__((const))
+#define IVAN_HOT __attribute__((hot))
+#define IVAN_COLD __attribute__((cold))
+#define IVAN_NORETURN __attribute__((noreturn))
+#else
+#define IVAN_NONNULL(...)
+#define IVAN_RETURNS_NONNULL
+#define IVAN_PURE
+#define IVAN_CONST
+#define IVAN_HOT
+#define IVAN_COLD
+#define IVAN_NORETURN
+#endif
+#if defined(__cplusplus)
+#define IVAN_RESTRICT __restrict
+#else
+#define IVAN_RESTRICT restrict
+#endif
+#endif /* IVAN_ATTRIBUTES_DEFINED */
+
+#ifndef IVAN_DEFINED_IvanSlice_i64
+#define IVAN_DEFINED_IvanSlice_i64
+/**
+ * A borrowed slice `&[i64]`
+ *
+ * This is always passed by value.
+ */
+typedef struct IvanSlice_i64 {
+    const int64_t* ptr;
+    size_t len;
+} IvanSlice_i64;
+#endif /* IVAN_DEFINED_IvanSlice_i64 */
+
+/**
+ * Optimization hints for the compiler
+ */
+typedef struct Math {
+    /**
+     * The result only depends on the arguments
+     */
+    int64_t (*square)(int64_t x);
+    int64_t (*sum)(IvanSlice_i64 values);
+    void (*scale)(int64_t* value, int64_t factor);
+    /**
+     * [AUTO] Batched version of `scale`, called once for `count` elements
+     *
+     * If this is NULL, `scale` is called for each element instead.
+     */
+    void (*scale_batch)(int64_t* const* value, const int64_t* factor, size_t count);
+    void (*reportOverflow)(int64_t value);
+    void (*fail)(int32_t code);
+} Math;
+
+/**
+ * Abort the process
+ */
+IVAN_NORETURN void ivanAbort(int32_t code);
+
+#ifndef IVAN_DEFINED_IvanSlice_u8
+#define IVAN_DEFINED_IvanSlice_u8
+/**
+ * A borrowed slice `&[u8]`
+ *
+ * This is always passed by value.
+ */
+typedef struct IvanSlice_u8 {
+    const uint8_t* ptr;
+    size_t len;
+} IvanSlice_u8;
+#endif /* IVAN_DEFINED_IvanSlice_u8 */
+
+IVAN_PURE uint32_t ivanChecksum(IvanSlice_u8 bytes);
+
+// wrappers
+
+/**
+ * The result only depends on the arguments
+ *
+ * [AUTO] Generated wrapper which delegates to Math
+ */
+IVAN_PURE int64_t math_square(const Math* vtable, int64_t x) {
+    int64_t (*func_ptr)(int64_t x) = vtable->square;
+    assert(func_ptr != NULL);
+    return (*func_ptr)(x);
+}
+
+IVAN_PURE int64_t math_sum(const Math* vtable, IvanSlice_i64 values) {
+    int64_t (*func_ptr)(IvanSlice_i64 values) = vtable->sum;
+    assert(func_ptr != NULL);
+    return (*func_ptr)(values);
+}
+
+IVAN_HOT void math_scale(const Math* vtable, int64_t* value, int64_t factor) {
+    void (*func_ptr)(int64_t* value, int64_t factor) = vtable->scale;
+    assert(func_ptr != NULL);
+    (*func_ptr)(value, factor);
+}
+
+IVAN_HOT void math_scale_batch(const Math* vtable, int64_t* const* value, const int64_t* factor, size_t count) {
+    void (*batch_ptr)(int64_t* const* value, const int64_t* factor, size_t count) = vtable->scale_batch;
+    if (batch_ptr != NULL) {
+        (*batch_ptr)(value, factor, count);
+        return;
+    }
+    void (*func_ptr)(int64_t* value, int64_t factor) = vtable->scale;
+    assert(func_ptr != NULL);
+    for (size_t i = 0; i < count; i++) {
+        (*func_ptr)(value[i], factor[i]);
+    }
+}
+
+IVAN_COLD void math_reportOverflow(const Math* vtable, int64_t value) {
+    void (*func_ptr)(int64_t value) = vtable->reportOverflow;
+    assert(func_ptr != NULL);
+    (*func_ptr)(value);
+}
+
+IVAN_COLD IVAN_NORETURN void math_fail(const Math* vtable, int32_t code) {
+    void (*func_ptr)(int32_t code) = vtable->fail;
+    if (func_ptr == NULL) {
+    } else {
+        (*func_ptr)(code);
+    }
+    // @NoReturn methods must never return
+    abort();
+}
+
+#endif /* IVAN_HINTS_H */
@@ -0,0 +1,154 @@
+//! Generated from the Ivan module `ivan.hints`
+#![allow(non_snake_case, unused_variables, dead_code)]
+
+/// Convert a `{ptr, len}` pair from C into a slice
+///
+/// C code is allowed to pass NULL for an empty slice, but Rust isn't.
+#[inline(always)]
+unsafe fn slice_from_raw<'a, T>(ptr: *const T, len: usize) -> &'a [T] {
+    if len == 0 {
+        &[]
+    } else {
+        core::slice::from_raw_parts(ptr, len)
+    }
+}
+
+/// A borrowed slice, passed by value as `{ptr, len}`
+#[repr(C)]
+pub struct IvanSlice<'a, T> {
+    pub ptr: *const T,
+    pub len: usize,
+    _marker: core::marker::PhantomData<&'a [T]>,
+}
+impl<'a, T> Clone for IvanSlice<'a, T> {
+    #[inline(always)]
+    fn clone(&self) -> Self {
+        *self
+    }
+}
+impl<'a, T> Copy for IvanSlice<'a, T> {}
+impl<'a, T> From<&'a [T]> for IvanSlice<'a, T> {
+    #[inline(always)]
+    fn from(s: &'a [T]) -> Self {
+        IvanSlice { ptr: s.as_ptr(), len: s.len(), _marker: core::marker::PhantomData }
+    }
+}
+impl<'a, T> core::ops::Deref for IvanSlice<'a, T> {
+    type Target = [T];
+    #[inline(always)]
+    fn deref(&self) -> &[T] {
+        unsafe { slice_from_raw(self.ptr, self.len) }
+    }
+}
+
+/// Optimization hints for the compiler
+#[repr(C)]
+#[derive(Copy, Clone)]
+pub struct Math {
+    /// The result only depends on the arguments
+    pub square: Option<unsafe extern "C" fn(x: i64) -> i64>,
+    pub sum: Option<unsafe extern "C" fn(values: IvanSlice<'_, i64>) -> i64>,
+    pub scale: Option<unsafe extern "C" fn(value: &mut i64, factor: i64)>,
+    /// [AUTO] Batched version of `scale`, called once for `count` elements
+    ///
+    /// If this is `None`, `scale` is called for each element instead.
+    pub scale_batch: Option<unsafe extern "C" fn(value: *const &mut i64, factor: *const i64, count: usize)>,
+    pub reportOverflow: Option<unsafe extern "C" fn(value: i64)>,
+    pub fail: Option<unsafe extern "C" fn(code: i32) -> !>,
+}
+
+/// An implementation of the [Math] interface
+pub trait MathImpl {
+    /// The result only depends on the arguments
+    #[must_use]
+    unsafe extern "C" fn square(x: i64) -> i64;
+    #[must_use]
+    unsafe extern "C" fn sum(values: IvanSlice<'_, i64>) -> i64;
+    unsafe extern "C" fn scale(value: &mut i64, factor: i64);
+    /// [AUTO] Batched version of `scale`, called once for `count` elements
+    ///
+    /// If this is `None`, `scale` is called for each element instead.
+    unsafe extern "C" fn scale_batch(value: *const &mut i64, factor: *const i64, count: usize) {
+        for i in 0..count {
+            Self::scale(value.add(i).read(), factor.add(i).read());
+        }
+    }
+    #[cold]
+    unsafe extern "C" fn reportOverflow(value: i64);
+    #[cold]
+    unsafe extern "C" fn fail(code: i32) -> ! {
+        unreachable!("@NoReturn methods must never return")
+    }
+
+    const VTABLE: Math = Math {
+        square: Some(Self::square),
+        sum: Some(Self::sum),
+        scale: Some(Self::scale),
+        scale_batch: Some(Self::scale_batch),
+        reportOverflow: Some(Self::reportOverflow),
+        fail: Some(Self::fail),
+    };
+}
+
+extern "C" {
+    /// Abort the process
+    pub fn ivanAbort(code: i32) -> !;
+}
+
+extern "C" {
+    #[must_use]
+    pub fn ivanChecksum(bytes: IvanSlice<'_, u8>) -> u32;
+}
+
+// wrappers
+
+/// The result only depends on the arguments
+///
+/// [AUTO] Generated wrapper which delegates to Math
+#[must_use]
+#[inline(always)]
+pub unsafe fn math_square(vtable: &Math, x: i64) -> i64 {
+    let func_ptr = vtable.square.expect("Missing Math.square");
+    func_ptr(x)
+}
+
+#[must_use]
+#[inline(always)]
+pub unsafe fn math_sum(vtable: &Math, values: IvanSlice<'_, i64>) -> i64 {
+    let func_ptr = vtable.sum.expect("Missing Math.sum");
+    func_ptr(values)
+}
+
+#[inline(always)]
+pub unsafe fn math_scale(vtable: &Math, value: &mut i64, factor: i64) {
+    let func_ptr = vtable.scale.expect("Missing Math.scale");
+    func_ptr(value, factor)
+}
+
+#[inline(always)]
+pub unsafe fn math_scale_batch(vtable: &Math, value: *const &mut i64, factor: *const i64, count: usize) {
+    if let Some(batch_ptr) = vtable.scale_batch {
+        return batch_ptr(value, factor, count);
+    }
+    let func_ptr = vtable.scale.expect("Missing Math.scale");
+    for i in 0..count {
+        func_ptr(value.add(i).read(), factor.add(i).read());
+    }
+}
+
+#[cold]
+#[inline(never)]
+pub unsafe fn math_reportOverflow(vtable: &Math, value: i64) {
+    let func_ptr = vtable.reportOverflow.expect("Missing Math.reportOverflow");
+    func_ptr(value)
+}
+
+#[cold]
+#[inline(never)]
+pub unsafe fn math_fail(vtable: &Math, code: i32) -> ! {
+    if let Some(func_ptr) = vtable.fail {
+        func_ptr(code)
+    } else {
+        unreachable!("@NoReturn methods must never return")
+    }
+}
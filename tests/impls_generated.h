@@ -0,0 +1,156 @@
+#ifndef IVAN_IMPLS_H
+#define IVAN_IMPLS_H
+
+#include <stdint.h>
+#include <stdbool.h>
+#include <stdlib.h>
+#include <assert.h>
+
+#ifndef IVAN_ATTRIBUTES_DEFINED
+#define IVAN_ATTRIBUTES_DEFINED
+#if defined(__GNUC__)
+#define IVAN_NONNULL(...) __attribute__((nonnull(__VA_ARGS__)))
+#define IVAN_RETURNS_NONNULL __attribute__((returns_nonnull))
+#define IVAN_PURE __attribute__((pure))
+#define IVAN_CONST __attribute__((const))
+#define IVAN_HOT __attribute__((hot))
+#define IVAN_COLD __attribute__((cold))
+#define IVAN_NORETURN __attribute__((noreturn))
+#else
+#define IVAN_NONNULL(...)
+#define IVAN_RETURNS_NONNULL
+#define IVAN_PURE
+#define IVAN_CONST
+#define IVAN_HOT
+#define IVAN_COLD
+#define IVAN_NORETURN
+#endif
+#if defined(__cplusplus)
+#define IVAN_RESTRICT __restrict
+#else
+#define IVAN_RESTRICT restrict
+#endif
+#endif /* IVAN_ATTRIBUTES_DEFINED */
+
+/**
+ * A file opened by user code
+ */
+typedef struct File File;
+
+#ifndef IVAN_DEFINED_IvanSliceMut_u8
+#define IVAN_DEFINED_IvanSliceMut_u8
+/**
+ * A borrowed slice `&mut [u8]`
+ *
+ * This is always passed by value.
+ */
+typedef struct IvanSliceMut_u8 {
+    uint8_t* ptr;
+    size_t len;
+} IvanSliceMut_u8;
+#endif /* IVAN_DEFINED_IvanSliceMut_u8 */
+
+typedef struct Reader {
+    size_t (*read)(IvanSliceMut_u8 buffer);
+    bool (*skip)(size_t amount);
+    /**
+     * [AUTO] Batched version of `skip`, called once for `count` elements
+     *
+     * If this is NULL, `skip` is called for each element instead.
+     */
+    void (*skip_batch)(const size_t* amount, bool* results, size_t count);
+    void (*close)();
+} Reader;
+
+typedef struct SeekableReader {
+    /**
+     * [AUTO] The vtable of the base interface `Reader`
+     *
+     * This must be the first member, so upcasting is free.
+     */
+    Reader base;
+    bool (*seek)(uint64_t offset);
+    void (*fail)(int32_t code);
+} SeekableReader;
+
+/** [AUTO] Upcast to the `Reader` vtable, which is at the same address */
+const Reader* SeekableReader_as_Reader(const SeekableReader* vtable) {
+    return &vtable->base;
+}
+
+size_t file_read(IvanSliceMut_u8 buffer);
+bool file_skip(size_t amount);
+void file_skip_many(const size_t* amount, bool* results, size_t count);
+bool file_seek(uint64_t offset);
+IVAN_NORETURN void file_fail(int32_t code);
+
+/** [AUTO] The default implementation of `close` */
+static IVAN_COLD void File_SeekableReader_close() {
+}
+
+/**
+ * Reads from a file, implemented in C
+ *
+ * [AUTO] The `SeekableReader` vtable of `File`, in read-only memory
+ */
+static const SeekableReader File_SeekableReader_vtable = {
+    .base.read = file_read,
+    .base.skip = file_skip,
+    .base.skip_batch = file_skip_many,
+    .base.close = File_SeekableReader_close,
+    .seek = file_seek,
+    .fail = file_fail,
+};
+
+size_t file_read(IvanSliceMut_u8 buffer);
+bool file_skip(size_t amount);
+
+/** [AUTO] The default implementation of `close` */
+static IVAN_COLD void File_Reader_close() {
+}
+
+/**
+ * [AUTO] The `Reader` vtable of `File`, in read-only memory
+ */
+static const Reader File_Reader_vtable = {
+    .read = file_read,
+    .skip = file_skip,
+    .close = File_Reader_close,
+};
+
+// wrappers
+
+size_t reader_read(const Reader* vtable, IvanSliceMut_u8 buffer) {
+    size_t (*func_ptr)(IvanSliceMut_u8 buffer) = vtable->read;
+    assert(func_ptr != NULL);
+    return (*func_ptr)(buffer);
+}
+
+bool reader_skip(const Reader* vtable, size_t amount) {
+    bool (*func_ptr)(size_t amount) = vtable->skip;
+    assert(func_ptr != NULL);
+    return (*func_ptr)(amount);
+}
+
+void reader_skip_batch(const Reader* vtable, const size_t* amount, bool* results, size_t count) {
+    void (*batch_ptr)(const size_t* amount, bool* results, size_t count) = vtable->skip_batch;
+    if (batch_ptr != NULL) {
+        (*batch_ptr)(amount, results, count);
+        return;
+    }
+    bool (*func_ptr)(size_t amount) = vtable->skip;
+    assert(func_ptr != NULL);
+    for (size_t i = 0; i < count; i++) {
+        results[i] = (*func_ptr)(amount[i]);
+    }
+}
+
+IVAN_COLD void reader_close(const Reader* vtable) {
+    void (*func_ptr)() = vtable->close;
+    if (func_ptr == NULL) {
+    } else {
+        (*func_ptr)();
+    }
+}
+
+#endif /* IVAN_IMPLS_H */
@@ -0,0 +1,198 @@
+//! Generated from the Ivan module `ivan.impls`
+#![allow(non_snake_case, unused_variables, dead_code)]
+
+/// A file opened by user code
+#[repr(C)]
+pub struct File {
+    _private: [u8; 0],
+}
+
+/// Convert a `{ptr, len}` pair from C into a slice
+///
+/// C code is allowed to pass NULL for an empty slice, but Rust isn't.
+#[inline(always)]
+unsafe fn slice_from_raw<'a, T>(ptr: *const T, len: usize) -> &'a [T] {
+    if len == 0 {
+        &[]
+    } else {
+        core::slice::from_raw_parts(ptr, len)
+    }
+}
+
+/// A mutably borrowed slice, passed by value as `{ptr, len}`
+#[repr(C)]
+pub struct IvanSliceMut<'a, T> {
+    pub ptr: *mut T,
+    pub len: usize,
+    _marker: core::marker::PhantomData<&'a mut [T]>,
+}
+impl<'a, T> From<&'a mut [T]> for IvanSliceMut<'a, T> {
+    #[inline(always)]
+    fn from(s: &'a mut [T]) -> Self {
+        IvanSliceMut { ptr: s.as_mut_ptr(), len: s.len(), _marker: core::marker::PhantomData }
+    }
+}
+impl<'a, T> core::ops::Deref for IvanSliceMut<'a, T> {
+    type Target = [T];
+    #[inline(always)]
+    fn deref(&self) -> &[T] {
+        unsafe { slice_from_raw(self.ptr, self.len) }
+    }
+}
+impl<'a, T> core::ops::DerefMut for IvanSliceMut<'a, T> {
+    #[inline(always)]
+    fn deref_mut(&mut self) -> &mut [T] {
+        if self.len == 0 {
+            &mut []
+        } else {
+            unsafe { core::slice::from_raw_parts_mut(self.ptr, self.len) }
+        }
+    }
+}
+
+#[repr(C)]
+#[derive(Copy, Clone)]
+pub struct Reader {
+    pub read: Option<unsafe extern "C" fn(buffer: IvanSliceMut<'_, u8>) -> usize>,
+    pub skip: Option<unsafe extern "C" fn(amount: usize) -> bool>,
+    /// [AUTO] Batched version of `skip`, called once for `count` elements
+    ///
+    /// If this is `None`, `skip` is called for each element instead.
+    pub skip_batch: Option<unsafe extern "C" fn(amount: *const usize, results: *mut bool, count: usize)>,
+    pub close: Option<unsafe extern "C" fn()>,
+}
+
+/// An implementation of the [Reader] interface
+pub trait ReaderImpl {
+    unsafe extern "C" fn read(buffer: IvanSliceMut<'_, u8>) -> usize;
+    unsafe extern "C" fn skip(amount: usize) -> bool;
+    /// [AUTO] Batched version of `skip`, called once for `count` elements
+    ///
+    /// If this is `None`, `skip` is called for each element instead.
+    unsafe extern "C" fn skip_batch(amount: *const usize, results: *mut bool, count: usize) {
+        for i in 0..count {
+            results.add(i).write(Self::skip(amount.add(i).read()));
+        }
+    }
+    #[cold]
+    unsafe extern "C" fn close() {
+    }
+
+    const VTABLE: Reader = Reader {
+        read: Some(Self::read),
+        skip: Some(Self::skip),
+        skip_batch: Some(Self::skip_batch),
+        close: Some(Self::close),
+    };
+}
+
+#[repr(C)]
+#[derive(Copy, Clone)]
+pub struct SeekableReader {
+    /// [AUTO] The vtable of the base interface [Reader]
+    ///
+    /// This must be the first field, so upcasting is free.
+    pub base: Reader,
+    pub seek: Option<unsafe extern "C" fn(offset: u64) -> bool>,
+    pub fail: Option<unsafe extern "C" fn(code: i32) -> !>,
+}
+
+/// [AUTO] Upcast to the [Reader] vtable, which is at the same address
+impl core::ops::Deref for SeekableReader {
+    type Target = Reader;
+    #[inline(always)]
+    fn deref(&self) -> &Reader {
+        &self.base
+    }
+}
+
+/// An implementation of the [SeekableReader] interface
+pub trait SeekableReaderImpl: ReaderImpl {
+    unsafe extern "C" fn seek(offset: u64) -> bool;
+    unsafe extern "C" fn fail(code: i32) -> ! {
+        unreachable!("@NoReturn methods must never return")
+    }
+
+    const VTABLE: SeekableReader = SeekableReader {
+        base: <Self as ReaderImpl>::VTABLE,
+        seek: Some(Self::seek),
+        fail: Some(Self::fail),
+    };
+}
+
+/// Reads from a file, implemented in C
+///
+/// [AUTO] The `SeekableReader` vtable of `File`, in read-only memory
+#[allow(non_upper_case_globals)]
+pub static File_SeekableReader_vtable: SeekableReader = {
+    extern "C" {
+        fn file_read(buffer: IvanSliceMut<'_, u8>) -> usize;
+        fn file_skip(amount: usize) -> bool;
+        fn file_skip_many(amount: *const usize, results: *mut bool, count: usize);
+        fn file_seek(offset: u64) -> bool;
+        fn file_fail(code: i32) -> !;
+    }
+    unsafe extern "C" fn default_close() {
+    }
+    SeekableReader {
+        base: Reader {
+            read: Some(file_read),
+            skip: Some(file_skip),
+            skip_batch: Some(file_skip_many),
+            close: Some(default_close),
+        },
+        seek: Some(file_seek),
+        fail: Some(file_fail),
+    }
+};
+
+/// [AUTO] The `Reader` vtable of `File`, in read-only memory
+#[allow(non_upper_case_globals)]
+pub static File_Reader_vtable: Reader = {
+    extern "C" {
+        fn file_read(buffer: IvanSliceMut<'_, u8>) -> usize;
+        fn file_skip(amount: usize) -> bool;
+    }
+    unsafe extern "C" fn default_close() {
+    }
+    Reader {
+        read: Some(file_read),
+        skip: Some(file_skip),
+        skip_batch: None,
+        close: Some(default_close),
+    }
+};
+
+// wrappers
+
+#[inline(always)]
+pub unsafe fn reader_read(vtable: &Reader, buffer: IvanSliceMut<'_, u8>) -> usize {
+    let func_ptr = vtable.read.expect("Missing Reader.read");
+    func_ptr(buffer)
+}
+
+#[inline(always)]
+pub unsafe fn reader_skip(vtable: &Reader, amount: usize) -> bool {
+    let func_ptr = vtable.skip.expect("Missing Reader.skip");
+    func_ptr(amount)
+}
+
+#[inline(always)]
+pub unsafe fn reader_skip_batch(vtable: &Reader, amount: *const usize, results: *mut bool, count: usize) {
+    if let Some(batch_ptr) = vtable.skip_batch {
+        return batch_ptr(amount, results, count);
+    }
+    let func_ptr = vtable.skip.expect("Missing Reader.skip");
+    for i in 0..count {
+        results.add(i).write(func_ptr(amount.add(i).read()));
+    }
+}
+
+#[cold]
+#[inline(never)]
+pub unsafe fn reader_close(vtable: &Reader) {
+    if let Some(func_ptr) = vtable.close {
+        func_ptr()
+    } else {
+    }
+}
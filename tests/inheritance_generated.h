@@ -0,0 +1,214 @@
+#ifndef IVAN_INHERITANCE_H
+#define IVAN_INHERITANCE_H
+
+#include <stdint.h>
+#include <stdbool.h>
+#include <stdlib.h>
+#include <assert.h>
+
+#ifndef IVAN_ATTRIBUTES_DEFINED
+#define IVAN_ATTRIBUTES_DEFINED
+#if defined(__GNUC__)
+#define IVAN_NONNULL(...) __attribute__((nonnull(__VA_ARGS__)))
+#define IVAN_RETURNS_NONNULL __attribute__((returns_nonnull))
+#define IVAN_PURE __attribute__((pure))
+#define IVAN_CONST __attribute__((const))
+#define IVAN_HOT __attribute__((hot))
+#define IVAN_COLD __attribute__((cold))
+#define IVAN_NORETURN __attribute__((noreturn))
+#else
+#define IVAN_NONNULL(...)
+#define IVAN_RETURNS_NONNULL
+#define IVAN_PURE
+#define IVAN_CONST
+#define IVAN_HOT
+#define IVAN_COLD
+#define IVAN_NORETURN
+#endif
+#if defined(__cplusplus)
+#define IVAN_RESTRICT __restrict
+#else
+#define IVAN_RESTRICT restrict
+#endif
+#endif /* IVAN_ATTRIBUTES_DEFINED */
+
+#ifndef IVAN_DEFINED_IvanSliceMut_u8
+#define IVAN_DEFINED_IvanSliceMut_u8
+/**
+ * A borrowed slice `&mut [u8]`
+ *
+ * This is always passed by value.
+ */
+typedef struct IvanSliceMut_u8 {
+    uint8_t* ptr;
+    size_t len;
+} IvanSliceMut_u8;
+#endif /* IVAN_DEFINED_IvanSliceMut_u8 */
+
+/**
+ * Reads bytes from somewhere
+ */
+typedef struct Reader {
+    size_t (*read)(IvanSliceMut_u8 buffer);
+    bool (*skip)(size_t amount);
+    /**
+     * [AUTO] Batched version of `skip`, called once for `count` elements
+     *
+     * If this is NULL, `skip` is called for each element instead.
+     */
+    void (*skip_batch)(const size_t* amount, bool* results, size_t count);
+} Reader;
+
+/**
+ * A reader which can also seek
+ *
+ * The `Reader` vtable comes first, so this can be passed as one.
+ */
+typedef struct SeekableReader {
+    /**
+     * [AUTO] The vtable of the base interface `Reader`
+     *
+     * This must be the first member, so upcasting is free.
+     */
+    Reader base;
+    bool (*seek)(uint64_t offset);
+    void (*rewind)();
+} SeekableReader;
+
+/** [AUTO] Upcast to the `Reader` vtable, which is at the same address */
+const Reader* SeekableReader_as_Reader(const SeekableReader* vtable) {
+    return &vtable->base;
+}
+
+typedef struct FileReader {
+    /**
+     * [AUTO] The vtable of the base interface `SeekableReader`
+     *
+     * This must be the first member, so upcasting is free.
+     */
+    SeekableReader base;
+    uint64_t (*size)();
+} FileReader;
+
+/** [AUTO] Upcast to the `SeekableReader` vtable, which is at the same address */
+const SeekableReader* FileReader_as_SeekableReader(const FileReader* vtable) {
+    return &vtable->base;
+}
+
+/** [AUTO] Upcast to the `Reader` vtable, which is at the same address */
+const Reader* FileReader_as_Reader(const FileReader* vtable) {
+    return &vtable->base.base;
+}
+
+// wrappers
+
+size_t reader_read(const Reader* vtable, IvanSliceMut_u8 buffer) {
+    size_t (*func_ptr)(IvanSliceMut_u8 buffer) = vtable->read;
+    assert(func_ptr != NULL);
+    return (*func_ptr)(buffer);
+}
+
+bool reader_skip(const Reader* vtable, size_t amount) {
+    bool (*func_ptr)(size_t amount) = vtable->skip;
+    assert(func_ptr != NULL);
+    return (*func_ptr)(amount);
+}
+
+void reader_skip_batch(const Reader* vtable, const size_t* amount, bool* results, size_t count) {
+    void (*batch_ptr)(const size_t* amount, bool* results, size_t count) = vtable->skip_batch;
+    if (batch_ptr != NULL) {
+        (*batch_ptr)(amount, results, count);
+        return;
+    }
+    bool (*func_ptr)(size_t amount) = vtable->skip;
+    assert(func_ptr != NULL);
+    for (size_t i = 0; i < count; i++) {
+        results[i] = (*func_ptr)(amount[i]);
+    }
+}
+
+size_t seekable_read(const SeekableReader* vtable, IvanSliceMut_u8 buffer) {
+    size_t (*func_ptr)(IvanSliceMut_u8 buffer) = vtable->base.read;
+    assert(func_ptr != NULL);
+    return (*func_ptr)(buffer);
+}
+
+bool seekable_skip(const SeekableReader* vtable, size_t amount) {
+    bool (*func_ptr)(size_t amount) = vtable->base.skip;
+    assert(func_ptr != NULL);
+    return (*func_ptr)(amount);
+}
+
+void seekable_skip_batch(const SeekableReader* vtable, const size_t* amount, bool* results, size_t count) {
+    void (*batch_ptr)(const size_t* amount, bool* results, size_t count) = vtable->base.skip_batch;
+    if (batch_ptr != NULL) {
+        (*batch_ptr)(amount, results, count);
+        return;
+    }
+    bool (*func_ptr)(size_t amount) = vtable->base.skip;
+    assert(func_ptr != NULL);
+    for (size_t i = 0; i < count; i++) {
+        results[i] = (*func_ptr)(amount[i]);
+    }
+}
+
+bool seekable_seek(const SeekableReader* vtable, uint64_t offset) {
+    bool (*func_ptr)(uint64_t offset) = vtable->seek;
+    assert(func_ptr != NULL);
+    return (*func_ptr)(offset);
+}
+
+void seekable_rewind(const SeekableReader* vtable) {
+    void (*func_ptr)() = vtable->rewind;
+    if (func_ptr == NULL) {
+    } else {
+        (*func_ptr)();
+    }
+}
+
+size_t file_read(FileReader vtable, IvanSliceMut_u8 buffer) {
+    size_t (*func_ptr)(IvanSliceMut_u8 buffer) = vtable.base.base.read;
+    assert(func_ptr != NULL);
+    return (*func_ptr)(buffer);
+}
+
+bool file_skip(FileReader vtable, size_t amount) {
+    bool (*func_ptr)(size_t amount) = vtable.base.base.skip;
+    assert(func_ptr != NULL);
+    return (*func_ptr)(amount);
+}
+
+void file_skip_batch(FileReader vtable, const size_t* amount, bool* results, size_t count) {
+    void (*batch_ptr)(const size_t* amount, bool* results, size_t count) = vtable.base.base.skip_batch;
+    if (batch_ptr != NULL) {
+        (*batch_ptr)(amount, results, count);
+        return;
+    }
+    bool (*func_ptr)(size_t amount) = vtable.base.base.skip;
+    assert(func_ptr != NULL);
+    for (size_t i = 0; i < count; i++) {
+        results[i] = (*func_ptr)(amount[i]);
+    }
+}
+
+bool file_seek(FileReader vtable, uint64_t offset) {
+    bool (*func_ptr)(uint64_t offset) = vtable.base.seek;
+    assert(func_ptr != NULL);
+    return (*func_ptr)(offset);
+}
+
+void file_rewind(FileReader vtable) {
+    void (*func_ptr)() = vtable.base.rewind;
+    if (func_ptr == NULL) {
+    } else {
+        (*func_ptr)();
+    }
+}
+
+IVAN_PURE uint64_t file_size(FileReader vtable) {
+    uint64_t (*func_ptr)() = vtable.size;
+    assert(func_ptr != NULL);
+    return (*func_ptr)();
+}
+
+#endif /* IVAN_INHERITANCE_H */
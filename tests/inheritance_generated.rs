@@ -0,0 +1,249 @@
+//! Generated from the Ivan module `ivan.inheritance`
+#![allow(non_snake_case, unused_variables, dead_code)]
+
+/// Convert a `{ptr, len}` pair from C into a slice
+///
+/// C code is allowed to pass NULL for an empty slice, but Rust isn't.
+#[inline(always)]
+unsafe fn slice_from_raw<'a, T>(ptr: *const T, len: usize) -> &'a [T] {
+    if len == 0 {
+        &[]
+    } else {
+        core::slice::from_raw_parts(ptr, len)
+    }
+}
+
+/// A mutably borrowed slice, passed by value as `{ptr, len}`
+#[repr(C)]
+pub struct IvanSliceMut<'a, T> {
+    pub ptr: *mut T,
+    pub len: usize,
+    _marker: core::marker::PhantomData<&'a mut [T]>,
+}
+impl<'a, T> From<&'a mut [T]> for IvanSliceMut<'a, T> {
+    #[inline(always)]
+    fn from(s: &'a mut [T]) -> Self {
+        IvanSliceMut { ptr: s.as_mut_ptr(), len: s.len(), _marker: core::marker::PhantomData }
+    }
+}
+impl<'a, T> core::ops::Deref for IvanSliceMut<'a, T> {
+    type Target = [T];
+    #[inline(always)]
+    fn deref(&self) -> &[T] {
+        unsafe { slice_from_raw(self.ptr, self.len) }
+    }
+}
+impl<'a, T> core::ops::DerefMut for IvanSliceMut<'a, T> {
+    #[inline(always)]
+    fn deref_mut(&mut self) -> &mut [T] {
+        if self.len == 0 {
+            &mut []
+        } else {
+            unsafe { core::slice::from_raw_parts_mut(self.ptr, self.len) }
+        }
+    }
+}
+
+/// Reads bytes from somewhere
+#[repr(C)]
+#[derive(Copy, Clone)]
+pub struct Reader {
+    pub read: Option<unsafe extern "C" fn(buffer: IvanSliceMut<'_, u8>) -> usize>,
+    pub skip: Option<unsafe extern "C" fn(amount: usize) -> bool>,
+    /// [AUTO] Batched version of `skip`, called once for `count` elements
+    ///
+    /// If this is `None`, `skip` is called for each element instead.
+    pub skip_batch: Option<unsafe extern "C" fn(amount: *const usize, results: *mut bool, count: usize)>,
+}
+
+/// An implementation of the [Reader] interface
+pub trait ReaderImpl {
+    unsafe extern "C" fn read(buffer: IvanSliceMut<'_, u8>) -> usize;
+    unsafe extern "C" fn skip(amount: usize) -> bool;
+    /// [AUTO] Batched version of `skip`, called once for `count` elements
+    ///
+    /// If this is `None`, `skip` is called for each element instead.
+    unsafe extern "C" fn skip_batch(amount: *const usize, results: *mut bool, count: usize) {
+        for i in 0..count {
+            results.add(i).write(Self::skip(amount.add(i).read()));
+        }
+    }
+
+    const VTABLE: Reader = Reader {
+        read: Some(Self::read),
+        skip: Some(Self::skip),
+        skip_batch: Some(Self::skip_batch),
+    };
+}
+
+/// A reader which can also seek
+///
+/// The `Reader` vtable comes first, so this can be passed as one.
+#[repr(C)]
+#[derive(Copy, Clone)]
+pub struct SeekableReader {
+    /// [AUTO] The vtable of the base interface [Reader]
+    ///
+    /// This must be the first field, so upcasting is free.
+    pub base: Reader,
+    pub seek: Option<unsafe extern "C" fn(offset: u64) -> bool>,
+    pub rewind: Option<unsafe extern "C" fn()>,
+}
+
+/// [AUTO] Upcast to the [Reader] vtable, which is at the same address
+impl core::ops::Deref for SeekableReader {
+    type Target = Reader;
+    #[inline(always)]
+    fn deref(&self) -> &Reader {
+        &self.base
+    }
+}
+
+/// An implementation of the [SeekableReader] interface
+pub trait SeekableReaderImpl: ReaderImpl {
+    unsafe extern "C" fn seek(offset: u64) -> bool;
+    unsafe extern "C" fn rewind() {
+    }
+
+    const VTABLE: SeekableReader = SeekableReader {
+        base: <Self as ReaderImpl>::VTABLE,
+        seek: Some(Self::seek),
+        rewind: Some(Self::rewind),
+    };
+}
+
+#[repr(C)]
+#[derive(Copy, Clone)]
+pub struct FileReader {
+    /// [AUTO] The vtable of the base interface [SeekableReader]
+    ///
+    /// This must be the first field, so upcasting is free.
+    pub base: SeekableReader,
+    pub size: Option<unsafe extern "C" fn() -> u64>,
+}
+
+/// [AUTO] Upcast to the [SeekableReader] vtable, which is at the same address
+impl core::ops::Deref for FileReader {
+    type Target = SeekableReader;
+    #[inline(always)]
+    fn deref(&self) -> &SeekableReader {
+        &self.base
+    }
+}
+
+/// An implementation of the [FileReader] interface
+pub trait FileReaderImpl: SeekableReaderImpl {
+    #[must_use]
+    unsafe extern "C" fn size() -> u64;
+
+    const VTABLE: FileReader = FileReader {
+        base: <Self as SeekableReaderImpl>::VTABLE,
+        size: Some(Self::size),
+    };
+}
+
+// wrappers
+
+#[inline(always)]
+pub unsafe fn reader_read(vtable: &Reader, buffer: IvanSliceMut<'_, u8>) -> usize {
+    let func_ptr = vtable.read.expect("Missing Reader.read");
+    func_ptr(buffer)
+}
+
+#[inline(always)]
+pub unsafe fn reader_skip(vtable: &Reader, amount: usize) -> bool {
+    let func_ptr = vtable.skip.expect("Missing Reader.skip");
+    func_ptr(amount)
+}
+
+#[inline(always)]
+pub unsafe fn reader_skip_batch(vtable: &Reader, amount: *const usize, results: *mut bool, count: usize) {
+    if let Some(batch_ptr) = vtable.skip_batch {
+        return batch_ptr(amount, results, count);
+    }
+    let func_ptr = vtable.skip.expect("Missing Reader.skip");
+    for i in 0..count {
+        results.add(i).write(func_ptr(amount.add(i).read()));
+    }
+}
+
+#[inline(always)]
+pub unsafe fn seekable_read(vtable: &SeekableReader, buffer: IvanSliceMut<'_, u8>) -> usize {
+    let func_ptr = vtable.base.read.expect("Missing SeekableReader.read");
+    func_ptr(buffer)
+}
+
+#[inline(always)]
+pub unsafe fn seekable_skip(vtable: &SeekableReader, amount: usize) -> bool {
+    let func_ptr = vtable.base.skip.expect("Missing SeekableReader.skip");
+    func_ptr(amount)
+}
+
+#[inline(always)]
+pub unsafe fn seekable_skip_batch(vtable: &SeekableReader, amount: *const usize, results: *mut bool, count: usize) {
+    if let Some(batch_ptr) = vtable.base.skip_batch {
+        return batch_ptr(amount, results, count);
+    }
+    let func_ptr = vtable.base.skip.expect("Missing SeekableReader.skip");
+    for i in 0..count {
+        results.add(i).write(func_ptr(amount.add(i).read()));
+    }
+}
+
+#[inline(always)]
+pub unsafe fn seekable_seek(vtable: &SeekableReader, offset: u64) -> bool {
+    let func_ptr = vtable.seek.expect("Missing SeekableReader.seek");
+    func_ptr(offset)
+}
+
+#[inline(always)]
+pub unsafe fn seekable_rewind(vtable: &SeekableReader) {
+    if let Some(func_ptr) = vtable.rewind {
+        func_ptr()
+    } else {
+    }
+}
+
+#[inline(always)]
+pub unsafe fn file_read(vtable: FileReader, buffer: IvanSliceMut<'_, u8>) -> usize {
+    let func_ptr = vtable.base.base.read.expect("Missing FileReader.read");
+    func_ptr(buffer)
+}
+
+#[inline(always)]
+pub unsafe fn file_skip(vtable: FileReader, amount: usize) -> bool {
+    let func_ptr = vtable.base.base.skip.expect("Missing FileReader.skip");
+    func_ptr(amount)
+}
+
+#[inline(always)]
+pub unsafe fn file_skip_batch(vtable: FileReader, amount: *const usize, results: *mut bool, count: usize) {
+    if let Some(batch_ptr) = vtable.base.base.skip_batch {
+        return batch_ptr(amount, results, count);
+    }
+    let func_ptr = vtable.base.base.skip.expect("Missing FileReader.skip");
+    for i in 0..count {
+        results.add(i).write(func_ptr(amount.add(i).read()));
+    }
+}
+
+#[inline(always)]
+pub unsafe fn file_seek(vtable: FileReader, offset: u64) -> bool {
+    let func_ptr = vtable.base.seek.expect("Missing FileReader.seek");
+    func_ptr(offset)
+}
+
+#[inline(always)]
+pub unsafe fn file_rewind(vtable: FileReader) {
+    if let Some(func_ptr) = vtable.base.rewind {
+        func_ptr()
+    } else {
+    }
+}
+
+#[must_use]
+#[inline(always)]
+pub unsafe fn file_size(vtable: FileReader) -> u64 {
+    let func_ptr = vtable.size.expect("Missing FileReader.size");
+    func_ptr()
+}
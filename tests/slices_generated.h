@@ -0,0 +1,113 @@
+#ifndef IVAN_SLICES_H
+#define IVAN_SLICES_H
+
+#include <stdint.h>
+#include <stdbool.h>
+#include <stdlib.h>
+#include <assert.h>
+
+#ifndef IVAN_DEFINED_IvanSlice_byte
+#define IVAN_DEFINED_IvanSlice_byte
+/**
+ * A borrowed slice `&[byte]`
+ *
+ * This is always passed by value.
+ */
+typedef struct IvanSlice_byte {
+    const char* ptr;
+    size_t len;
+} IvanSlice_byte;
+#endif /* IVAN_DEFINED_IvanSlice_byte */
+
+#ifndef IVAN_DEFINED_IvanStr
+#define IVAN_DEFINED_IvanStr
+/**
+ * A borrowed view of UTF-8 text (not null-terminated)
+ *
+ * This is always passed by value.
+ */
+typedef struct IvanStr {
+    const char* ptr;
+    size_t len;
+} IvanStr;
+#endif /* IVAN_DEFINED_IvanStr */
+
+#ifndef IVAN_DEFINED_IvanSlice_str
+#define IVAN_DEFINED_IvanSlice_str
+/**
+ * A borrowed slice `&[&str]`
+ *
+ * This is always passed by value.
+ */
+typedef struct IvanSlice_str {
+    const IvanStr* ptr;
+    size_t len;
+} IvanSlice_str;
+#endif /* IVAN_DEFINED_IvanSlice_str */
+
+#ifndef IVAN_DEFINED_IvanSliceMut_u64
+#define IVAN_DEFINED_IvanSliceMut_u64
+/**
+ * A borrowed slice `&mut [u64]`
+ *
+ * This is always passed by value.
+ */
+typedef struct IvanSliceMut_u64 {
+    uint64_t* ptr;
+    size_t len;
+} IvanSliceMut_u64;
+#endif /* IVAN_DEFINED_IvanSliceMut_u64 */
+
+/**
+ * Searches through buffers without copying them
+ */
+typedef struct Search {
+    /**
+     * Find the first index of `needle` in the specified bytes
+     */
+    bool (*findInBytes)(IvanSlice_byte bytes, char needle, size_t* result);
+    intptr_t (*findName)(IvanSlice_str names, IvanStr name);
+    void (*fill)(IvanSliceMut_u64 buffer, uint64_t value);
+} Search;
+
+#ifndef IVAN_DEFINED_IvanSlice_usize
+#define IVAN_DEFINED_IvanSlice_usize
+/**
+ * A borrowed slice `&[usize]`
+ *
+ * This is always passed by value.
+ */
+typedef struct IvanSlice_usize {
+    const size_t* ptr;
+    size_t len;
+} IvanSlice_usize;
+#endif /* IVAN_DEFINED_IvanSlice_usize */
+
+void describe(IvanStr text, IvanSlice_usize counts);
+
+// wrappers
+
+/**
+ * Find the first index of `needle` in the specified bytes
+ *
+ * [AUTO] Generated wrapper which delegates to Search
+ */
+bool search_findInBytes(const Search* vtable, IvanSlice_byte bytes, char needle, size_t* result) {
+    bool (*func_ptr)(IvanSlice_byte bytes, char needle, size_t* result) = vtable->findInBytes;
+    assert(func_ptr != NULL);
+    return (*func_ptr)(bytes, needle, result);
+}
+
+intptr_t search_findName(const Search* vtable, IvanSlice_str names, IvanStr name) {
+    intptr_t (*func_ptr)(IvanSlice_str names, IvanStr name) = vtable->findName;
+    assert(func_ptr != NULL);
+    return (*func_ptr)(names, name);
+}
+
+void search_fill(const Search* vtable, IvanSliceMut_u64 buffer, uint64_t value) {
+    void (*func_ptr)(IvanSliceMut_u64 buffer, uint64_t value) = vtable->fill;
+    assert(func_ptr != NULL);
+    (*func_ptr)(buffer, value);
+}
+
+#endif /* IVAN_SLICES_H */
@@ -0,0 +1,153 @@
+//! Generated from the Ivan module `ivan.slices`
+#![allow(non_snake_case, unused_variables, dead_code)]
+
+/// Convert a `{ptr, len}` pair from C into a slice
+///
+/// C code is allowed to pass NULL for an empty slice, but Rust isn't.
+#[inline(always)]
+unsafe fn slice_from_raw<'a, T>(ptr: *const T, len: usize) -> &'a [T] {
+    if len == 0 {
+        &[]
+    } else {
+        core::slice::from_raw_parts(ptr, len)
+    }
+}
+
+/// A borrowed slice, passed by value as `{ptr, len}`
+#[repr(C)]
+pub struct IvanSlice<'a, T> {
+    pub ptr: *const T,
+    pub len: usize,
+    _marker: core::marker::PhantomData<&'a [T]>,
+}
+impl<'a, T> Clone for IvanSlice<'a, T> {
+    #[inline(always)]
+    fn clone(&self) -> Self {
+        *self
+    }
+}
+impl<'a, T> Copy for IvanSlice<'a, T> {}
+impl<'a, T> From<&'a [T]> for IvanSlice<'a, T> {
+    #[inline(always)]
+    fn from(s: &'a [T]) -> Self {
+        IvanSlice { ptr: s.as_ptr(), len: s.len(), _marker: core::marker::PhantomData }
+    }
+}
+impl<'a, T> core::ops::Deref for IvanSlice<'a, T> {
+    type Target = [T];
+    #[inline(always)]
+    fn deref(&self) -> &[T] {
+        unsafe { slice_from_raw(self.ptr, self.len) }
+    }
+}
+
+/// A borrowed view of UTF-8 text, passed by value as `{ptr, len}`
+#[repr(C)]
+pub struct IvanStr<'a> {
+    pub ptr: *const u8,
+    pub len: usize,
+    _marker: core::marker::PhantomData<&'a str>,
+}
+impl<'a> Clone for IvanStr<'a> {
+    #[inline(always)]
+    fn clone(&self) -> Self {
+        *self
+    }
+}
+impl<'a> Copy for IvanStr<'a> {}
+impl<'a> From<&'a str> for IvanStr<'a> {
+    #[inline(always)]
+    fn from(s: &'a str) -> Self {
+        IvanStr { ptr: s.as_ptr(), len: s.len(), _marker: core::marker::PhantomData }
+    }
+}
+impl<'a> core::ops::Deref for IvanStr<'a> {
+    type Target = str;
+    #[inline(always)]
+    fn deref(&self) -> &str {
+        // The sender guarantees this is valid UTF-8
+        unsafe { core::str::from_utf8_unchecked(slice_from_raw(self.ptr, self.len)) }
+    }
+}
+
+/// A mutably borrowed slice, passed by value as `{ptr, len}`
+#[repr(C)]
+pub struct IvanSliceMut<'a, T> {
+    pub ptr: *mut T,
+    pub len: usize,
+    _marker: core::marker::PhantomData<&'a mut [T]>,
+}
+impl<'a, T> From<&'a mut [T]> for IvanSliceMut<'a, T> {
+    #[inline(always)]
+    fn from(s: &'a mut [T]) -> Self {
+        IvanSliceMut { ptr: s.as_mut_ptr(), len: s.len(), _marker: core::marker::PhantomData }
+    }
+}
+impl<'a, T> core::ops::Deref for IvanSliceMut<'a, T> {
+    type Target = [T];
+    #[inline(always)]
+    fn deref(&self) -> &[T] {
+        unsafe { slice_from_raw(self.ptr, self.len) }
+    }
+}
+impl<'a, T> core::ops::DerefMut for IvanSliceMut<'a, T> {
+    #[inline(always)]
+    fn deref_mut(&mut self) -> &mut [T] {
+        if self.len == 0 {
+            &mut []
+        } else {
+            unsafe { core::slice::from_raw_parts_mut(self.ptr, self.len) }
+        }
+    }
+}
+
+/// Searches through buffers without copying them
+#[repr(C)]
+#[derive(Copy, Clone)]
+pub struct Search {
+    /// Find the first index of `needle` in the specified bytes
+    pub findInBytes: Option<unsafe extern "C" fn(bytes: IvanSlice<'_, u8>, needle: u8, result: &mut usize) -> bool>,
+    pub findName: Option<unsafe extern "C" fn(names: IvanSlice<'_, IvanStr<'_>>, name: IvanStr<'_>) -> isize>,
+    pub fill: Option<unsafe extern "C" fn(buffer: IvanSliceMut<'_, u64>, value: u64)>,
+}
+
+/// An implementation of the [Search] interface
+pub trait SearchImpl {
+    /// Find the first index of `needle` in the specified bytes
+    unsafe extern "C" fn findInBytes(bytes: IvanSlice<'_, u8>, needle: u8, result: &mut usize) -> bool;
+    unsafe extern "C" fn findName(names: IvanSlice<'_, IvanStr<'_>>, name: IvanStr<'_>) -> isize;
+    unsafe extern "C" fn fill(buffer: IvanSliceMut<'_, u64>, value: u64);
+
+    const VTABLE: Search = Search {
+        findInBytes: Some(Self::findInBytes),
+        findName: Some(Self::findName),
+        fill: Some(Self::fill),
+    };
+}
+
+extern "C" {
+    pub fn describe(text: IvanStr<'_>, counts: IvanSlice<'_, usize>);
+}
+
+// wrappers
+
+/// Find the first index of `needle` in the specified bytes
+///
+/// [AUTO] Generated wrapper which delegates to Search
+#[inline(always)]
+pub unsafe fn search_findInBytes(vtable: &Search, bytes: IvanSlice<'_, u8>, needle: u8, result: &mut usize) -> bool {
+    let func_ptr = vtable.findInBytes.expect("Missing Search.findInBytes");
+    func_ptr(bytes, needle, result)
+}
+
+#[inline(always)]
+pub unsafe fn search_findName(vtable: &Search, names: IvanSlice<'_, IvanStr<'_>>, name: IvanStr<'_>) -> isize {
+    let func_ptr = vtable.findName.expect("Missing Search.findName");
+    func_ptr(names, name)
+}
+
+#[inline(always)]
+pub unsafe fn search_fill(vtable: &Search, buffer: IvanSliceMut<'_, u64>, value: u64) {
+    let func_ptr = vtable.fill.expect("Missing Search.fill");
+    func_ptr(buffer, value)
+}
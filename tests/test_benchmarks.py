@@ -0,0 +1,47 @@
+import dataclasses
+from pathlib import Path
+
+from ivan.ast import InterfaceDef, StructDef
+from ivan.ast.parser import parse_module, Parser
+
+from benchmarks.__main__ import main
+from benchmarks.corpus import CorpusConfig, SIZES, generate_corpus
+from benchmarks.runner import PHASES, BenchmarkResult, save_results
+
+
+def test_corpus_is_seeded():
+    config = SIZES["small"]
+    assert generate_corpus(config) == generate_corpus(config)
+    assert generate_corpus(config) != generate_corpus(dataclasses.replace(config, seed=1))
+
+
+def test_corpus_size():
+    config = CorpusConfig(interfaces=3, methods=4, structs=2, fields=5, opaque_types=2, functions=6)
+    module = parse_module(Parser.parse_str(generate_corpus(config)), name="bench.corpus")
+    interfaces = [item for item in module.items if isinstance(item, InterfaceDef)]
+    structs = [item for item in module.items if isinstance(item, StructDef)]
+    assert [len(interface.methods) for interface in interfaces] == [4, 4, 4]
+    assert [len(struct.fields) for struct in structs] == [5, 5]
+    assert len(module.items) == 3 + 2 + 2 + 6
+
+
+def test_run_and_compare(tmp_path: Path, capsys):
+    baseline = tmp_path / "baseline.json"
+    assert main(["run", "--size", "small", "--repeat", "1", "--output", str(baseline)]) == 0
+    assert main(["compare", str(baseline), str(baseline)]) == 0
+    # Make every phase twice as slow
+    current = tmp_path / "current.json"
+    save_results([
+        BenchmarkResult(f"small/{target}", SIZES["small"], {phase: 1.0 for phase in PHASES})
+        for target in ("c11", "rust")
+    ], current)
+    save_results([
+        BenchmarkResult(f"small/{target}", SIZES["small"], {phase: 0.5 for phase in PHASES})
+        for target in ("c11", "rust")
+    ], baseline)
+    capsys.readouterr()
+    assert main(["compare", str(baseline), str(current), "--threshold", "1.5"]) == 0
+    assert main(["compare", str(baseline), str(current)]) == 1
+    captured = capsys.readouterr()
+    assert captured.out.count("REGRESSION") == 2 * len(PHASES)
+    assert f"{2 * len(PHASES)} regression(s)" in captured.err
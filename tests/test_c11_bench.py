@@ -0,0 +1,59 @@
+import shutil
+import subprocess
+from pathlib import Path
+
+import pytest
+
+from ivan.ast import InterfaceDef, EnumDef
+from ivan.ast.parser import parse_module, Parser
+from ivan.generate import OptimizationHint, optimization_hints
+from ivan.generate.c11 import C11CodeGenerator, C11Options
+from ivan.types.context import TypeContext
+
+
+@pytest.mark.skipif(shutil.which("cc") is None, reason="Needs a C compiler")
+@pytest.mark.parametrize("name", ["basic", "slices", "batch", "hints", "enums"])
+@pytest.mark.parametrize("pointer_attributes", [False, True])
+def test_c11_benchmark(name: str, pointer_attributes: bool, tmp_path: Path):
+    with open(Path(Path(__file__).parent, f"{name}.ivan"), "rt") as f:
+        text = f.read()
+    parsed = parse_module(Parser.parse_str(text), name=f"ivan.{name}")
+    context = TypeContext.build_context(parsed)
+    options = C11Options(pointer_attributes=pointer_attributes)
+    generator = C11CodeGenerator(module=parsed, context=context, options=options)
+    generator.write_header()
+    generator.declare_types()
+    generator.generate_wrappers()
+    generator.write_benchmark()
+    generator.write_footer()
+    source = tmp_path / f"bench_{name}.c"
+    source.write_text(str(generator))
+    executable = tmp_path / f"bench_{name}"
+    subprocess.run(
+        ["cc", "-std=c11", "-O2", "-o", str(executable), str(source)],
+        check=True
+    )
+    result = subprocess.run(
+        [str(executable), "1000"],
+        check=True, capture_output=True, text=True
+    )
+    lines = result.stdout.splitlines()
+    assert lines[0].split() == ["ns/call", "direct", "vtable", "wrapper"]
+    # Enums are timed separately, after a header of their own
+    enum_start = next(
+        (index for index, line in enumerate(lines) if index > 0 and line.startswith("ns/call")),
+        len(lines)
+    )
+    if enum_start < len(lines):
+        assert lines[enum_start].split() == ["ns/call", "direct", "switch"]
+
+    def benchmarked(kind: type) -> set:
+        return {
+            f"{item.name}.{method.name}"
+            for item in parsed.items if isinstance(item, kind)
+            for method in item.methods
+            # These would never return from the benchmark
+            if OptimizationHint.NO_RETURN not in optimization_hints(method)
+        }
+    assert {line.split()[0] for line in lines[1:enum_start]} == benchmarked(InterfaceDef)
+    assert {line.split()[0] for line in lines[enum_start + 1:]} == benchmarked(EnumDef)
@@ -1,10 +1,15 @@
+import shutil
+import subprocess
 from pathlib import Path
+from typing import Tuple, Dict
+
+import pytest
 
 from ivan.ast import InterfaceDef
 from ivan.ast.parser import parse_module, Parser
-from ivan.generate import CodeWriter
-from ivan.generate.c11 import C11CodeGenerator
-from ivan.types.context import TypeContext
+from ivan.generate import CodeWriter, CodegenException
+from ivan.generate.c11 import C11CodeGenerator, C11Options, generate_split_headers, WrapperDefinitions
+from ivan.types.context import TypeContext, TypeResolutionException
 
 
 def test_basic_c11_codegen():
@@ -46,3 +51,454 @@ def test_shape_c11_codegen():
     generator.write_footer()
     actual_generated_text = str(generator)
     assert generated_text == actual_generated_text
+
+
+def generate_golden(ivan_file: str, module_name: str, options: C11Options = C11Options()) -> str:
+    return generate_golden_files(ivan_file, module_name, options)[0]
+
+
+def generate_golden_files(
+        ivan_file: str, module_name: str,
+        options: C11Options = C11Options()
+) -> Tuple[str, Dict[str, str]]:
+    """Generate the header and any source files"""
+    with open(Path(Path(__file__).parent, ivan_file), "rt") as f:
+        text = f.read()
+    parsed = parse_module(Parser.parse_str(text), name=module_name)
+    context = TypeContext.build_context(parsed)
+    generator = C11CodeGenerator(module=parsed, context=context, options=options)
+    generator.write_header()
+    generator.declare_types()
+
+    generator.writeln("// wrappers")
+    generator.writeln()
+
+    generator.generate_wrappers()
+
+    generator.write_footer()
+    return str(generator), generator.source_files()
+
+
+def test_slices_c11_codegen():
+    with open(Path(Path(__file__).parent, "slices_generated.h"), "rt") as f:
+        generated_text = f.read()
+    assert generated_text == generate_golden("slices.ivan", "ivan.slices")
+
+
+def test_batch_c11_codegen():
+    with open(Path(Path(__file__).parent, "batch_generated.h"), "rt") as f:
+        generated_text = f.read()
+    assert generated_text == generate_golden("batch.ivan", "ivan.batch")
+
+
+@pytest.mark.parametrize("source", [
+    "interface Reader { @Batch fun skip(amount: usize): bool; fun skip_batch(amount: usize); }",
+    "interface Reader { fun skip_batch(); } interface Seekable: Reader { @Batch fun skip(amount: usize); }",
+    "interface Reader { @Batch fun skip(amount: usize); } interface Seekable: Reader { fun skip_batch(); }",
+])
+def test_batch_slot_conflicts(source: str):
+    parsed = parse_module(Parser.parse_str(source), name="ivan.invalid")
+    generator = C11CodeGenerator(module=parsed, context=TypeContext.build_context(parsed))
+    with pytest.raises(CodegenException, match="skip_batch"):
+        generator.declare_types()
+
+
+@pytest.mark.parametrize("name", ["results", "count", "i", "batch_ptr", "func_ptr"])
+def test_batch_reserved_arguments(name: str):
+    source = f"interface Reader {{ @Batch fun skip({name}: usize): bool; }}"
+    parsed = parse_module(Parser.parse_str(source), name="ivan.invalid")
+    generator = C11CodeGenerator(module=parsed, context=TypeContext.build_context(parsed))
+    with pytest.raises(CodegenException, match=f"named '{name}': skip"):
+        generator.declare_types()
+
+
+def test_pointer_attributes_c11_codegen():
+    with open(Path(Path(__file__).parent, "basic_attributes_generated.h"), "rt") as f:
+        generated_text = f.read()
+    options = C11Options(pointer_attributes=True)
+    assert generated_text == generate_golden("basic.ivan", "ivan.basic", options)
+
+
+def test_hints_c11_codegen():
+    with open(Path(Path(__file__).parent, "hints_generated.h"), "rt") as f:
+        generated_text = f.read()
+    assert generated_text == generate_golden("hints.ivan", "ivan.hints")
+
+
+@pytest.mark.parametrize("source", [
+    "@Hot @Cold fun both();",
+    "@NoReturn fun returns(): i32;",
+    "@Pure fun nothing();",
+    "@Const opaque type NotAFunction;",
+    "@Cold(always=true) fun withValues();",
+])
+def test_invalid_hints(source: str):
+    parsed = parse_module(Parser.parse_str(source), name="ivan.invalid")
+    context = TypeContext.build_context(parsed)
+    generator = C11CodeGenerator(module=parsed, context=context)
+    with pytest.raises(CodegenException):
+        generator.write_header()
+        generator.declare_types()
+
+
+def test_atomics_c11_codegen():
+    with open(Path(Path(__file__).parent, "atomics_generated.h"), "rt") as f:
+        generated_text = f.read()
+    assert generated_text == generate_golden("atomics.ivan", "ivan.atomics")
+
+
+@pytest.mark.parametrize("source", [
+    "fun atomicArg(value: atomic u64);",
+    "struct NotAtomic { field value: atomic double; }",
+    "struct Nested { field value: &atomic u64; }",
+])
+def test_invalid_atomics(source: str):
+    parsed = parse_module(Parser.parse_str(source), name="ivan.invalid")
+    context = TypeContext.build_context(parsed)
+    with pytest.raises(TypeResolutionException):
+        context.resolve_module(parsed)
+
+
+def test_inheritance_c11_codegen():
+    with open(Path(Path(__file__).parent, "inheritance_generated.h"), "rt") as f:
+        generated_text = f.read()
+    assert generated_text == generate_golden("inheritance.ivan", "ivan.inheritance")
+
+
+@pytest.mark.parametrize("source", [
+    "interface Derived: Missing {}",
+    "opaque type Base; interface Derived: Base {}",
+    "interface Derived: Base {} interface Base {}",
+    "interface Derived: Derived {}",
+    "interface Base { fun test(); } interface Derived: Base { fun test(); }",
+    "interface Root { fun test(); } interface Base: Root {} interface Derived: Base { fun test(); }",
+    "interface Base {} interface Derived: Base { fun base(); }",
+])
+def test_invalid_inheritance(source: str):
+    parsed = parse_module(Parser.parse_str(source), name="ivan.invalid")
+    context = TypeContext.build_context(parsed)
+    with pytest.raises(TypeResolutionException):
+        context.resolve_module(parsed)
+
+
+@pytest.mark.skipif(shutil.which("cc") is None, reason="Needs a C compiler")
+def test_inherited_wrappers_without_prefix(tmp_path: Path):
+    source = "@GenerateWrappers interface Base { fun read(): u32; } " \
+             "@GenerateWrappers interface Derived: Base { fun seek(offset: u64); }"
+    parsed = parse_module(Parser.parse_str(source), name="ivan.wrappers")
+    generator = C11CodeGenerator(module=parsed, context=TypeContext.build_context(parsed))
+    generator.write_header()
+    generator.declare_types()
+    generator.generate_wrappers()
+    generator.write_footer()
+    # The base's wrapper is used instead, after upcasting with `Derived_as_Base`
+    assert "uint32_t read(const Base* vtable)" in str(generator)
+    assert "read(const Derived* vtable)" not in str(generator)
+    (tmp_path / "ivan_wrappers.h").write_text(str(generator))
+    (tmp_path / "main.c").write_text("""#include "ivan_wrappers.h"
+uint32_t derived_read(void) { return 3; }
+void derived_seek(uint64_t offset) {}
+int main(void) {
+    Derived vtable = { .base = { .read = derived_read }, .seek = derived_seek };
+    seek(&vtable, 0);
+    return read(Derived_as_Base(&vtable)) == 3 ? 0 : 1;
+}
+""")
+    executable = tmp_path / "main"
+    subprocess.run(["cc", "-std=c11", "-o", str(executable), str(tmp_path / "main.c")], check=True)
+    subprocess.run([str(executable)], check=True)
+
+
+def test_duplicate_wrapper_names():
+    source = "@GenerateWrappers interface Reader { fun read(): u32; } " \
+             "@GenerateWrappers interface Stream { fun read(): u32; }"
+    parsed = parse_module(Parser.parse_str(source), name="ivan.invalid")
+    generator = C11CodeGenerator(module=parsed, context=TypeContext.build_context(parsed))
+    generator.declare_types()
+    with pytest.raises(CodegenException, match="Reader.read and Stream.read"):
+        generator.generate_wrappers()
+
+
+def test_impls_c11_codegen():
+    with open(Path(Path(__file__).parent, "impls_generated.h"), "rt") as f:
+        generated_text = f.read()
+    assert generated_text == generate_golden("impls.ivan", "ivan.impls")
+
+
+@pytest.mark.parametrize("source", [
+    "opaque type File; impl Missing for File {}",
+    "opaque type File; struct Point {} impl Point for File {}",
+    "opaque type File; impl Reader for File {} interface Reader {}",
+    "interface Reader {} impl Reader for u8 {}",
+    "opaque type File; interface Reader { fun read(); } impl Reader for File {}",
+    "opaque type File; interface Reader {} impl Reader for File { fun read = file_read; }",
+    "opaque type File; interface Reader { fun read(); } impl Reader for File { fun read_batch = batch; }",
+    "opaque type File; interface Reader {} impl Reader for File {} impl Reader for File {}",
+    "opaque type File; interface Reader { @Batch fun skip(amount: usize); fun skip_batch(); } "
+    "impl Reader for File { fun skip = file_skip; fun skip_batch = file_skip_batch; }",
+])
+def test_invalid_impls(source: str):
+    parsed = parse_module(Parser.parse_str(source), name="ivan.invalid")
+    context = TypeContext.build_context(parsed)
+    with pytest.raises(TypeResolutionException):
+        context.resolve_module(parsed)
+
+
+@pytest.mark.skipif(shutil.which("cc") is None, reason="Needs a C compiler")
+def test_impl_vtables(tmp_path: Path):
+    (tmp_path / "ivan_impls.h").write_text(generate_golden("impls.ivan", "ivan.impls"))
+    (tmp_path / "main.c").write_text("""#include "ivan_impls.h"
+size_t file_read(IvanSliceMut_u8 buffer) { return buffer.len; }
+bool file_skip(size_t amount) { return amount > 1; }
+void file_skip_many(const size_t* amount, bool* results, size_t count) {
+    for (size_t i = 0; i < count; i++) results[i] = amount[i] == 0;
+}
+bool file_seek(uint64_t offset) { return offset == 3; }
+void file_fail(int32_t code) { exit(code); }
+int main(void) {
+    uint8_t buffer[4];
+    IvanSliceMut_u8 slice = { buffer, 4 };
+    // The vtable of the derived interface is also a valid `Reader`
+    const Reader* reader = SeekableReader_as_Reader(&File_SeekableReader_vtable);
+    if (reader_read(reader, slice) != 4) return 1;
+    size_t amounts[2] = { 0, 2 };
+    bool results[2];
+    reader_skip_batch(reader, amounts, results, 2);
+    if (!results[0] || results[1]) return 2;
+    reader_skip_batch(&File_Reader_vtable, amounts, results, 2);
+    if (results[0] || !results[1]) return 3;
+    // Default methods are filled in, so they can be called directly
+    File_Reader_vtable.close();
+    return File_SeekableReader_vtable.seek(3) ? 0 : 4;
+}
+""")
+    result = subprocess.run(
+        ["cc", "-std=c11", "-Wall", "-Werror", "-o", str(tmp_path / "main"), "main.c"],
+        cwd=tmp_path, capture_output=True, text=True
+    )
+    assert result.returncode == 0, result.stderr
+    assert subprocess.run([str(tmp_path / "main")]).returncode == 0
+
+
+def test_dyn_c11_codegen():
+    with open(Path(Path(__file__).parent, "dyn_generated.h"), "rt") as f:
+        generated_text = f.read()
+    assert generated_text == generate_golden("dyn.ivan", "ivan.dyn")
+
+
+@pytest.mark.parametrize("source", [
+    "fun draw(shape: dyn Missing);",
+    "opaque type Shape; fun draw(shape: dyn Shape);",
+    "struct Point {} fun draw(shape: &dyn Point);",
+])
+def test_invalid_dyn(source: str):
+    parsed = parse_module(Parser.parse_str(source), name="ivan.invalid")
+    context = TypeContext.build_context(parsed)
+    with pytest.raises(TypeResolutionException):
+        context.resolve_module(parsed)
+
+
+def test_dyn_reserved_argument():
+    source = "@GenerateWrappers interface Shape { fun moveTo(&mut self, object: u32); }"
+    parsed = parse_module(Parser.parse_str(source), name="ivan.invalid")
+    generator = C11CodeGenerator(module=parsed, context=TypeContext.build_context(parsed))
+    generator.declare_types()
+    with pytest.raises(CodegenException, match="Shape.moveTo"):
+        generator.generate_wrappers()
+
+
+@pytest.mark.skipif(shutil.which("cc") is None, reason="Needs a C compiler")
+def test_dyn_objects(tmp_path: Path):
+    (tmp_path / "ivan_dyn.h").write_text(generate_golden("dyn.ivan", "ivan.dyn"))
+    (tmp_path / "main.c").write_text("""#include "ivan_dyn.h"
+typedef struct Circle { double radius; } Circle;
+double circle_area(const void* self) { return 3 * ((const Circle*) self)->radius * ((const Circle*) self)->radius; }
+void circle_scale(void* self, double factor) { ((Circle*) self)->radius *= factor; }
+bool circle_contains(const void* self, int32_t x) { return x < ((const Circle*) self)->radius; }
+size_t circle_count(void) { return 1; }
+int main(void) {
+    static const Shape vtable = {
+        .area = circle_area, .scale = circle_scale,
+        .contains = circle_contains, .count = circle_count
+    };
+    Circle circle = { 2 };
+    IvanDyn_Shape object = { &circle, &vtable };
+    shape_scale_dyn(object, 2);
+    if (shape_area_dyn(object) != 48) return 1;
+    if (!shape_contains_dyn(object, 3) || shape_contains_dyn(object, 5)) return 2;
+    // Uses the default, since the slot is NULL
+    shape_release_dyn(object);
+    return 0;
+}
+""")
+    result = subprocess.run(
+        ["cc", "-std=c11", "-Wall", "-Werror", "-o", str(tmp_path / "main"), "main.c"],
+        cwd=tmp_path, capture_output=True, text=True
+    )
+    assert result.returncode == 0, result.stderr
+    assert subprocess.run([str(tmp_path / "main")]).returncode == 0
+
+
+def test_enums_c11_codegen():
+    with open(Path(Path(__file__).parent, "enums_generated.h"), "rt") as f:
+        generated_text = f.read()
+    assert generated_text == generate_golden("enums.ivan", "ivan.enums")
+
+
+@pytest.mark.parametrize("source", [
+    "enum Shape {}",
+    "enum Shape { fun area(&self): double; }",
+    "enum Counter { variant Shared { field count: atomic u64; } }",
+    "enum Shape { variant Circle { field radius: Missing; } }",
+])
+def test_invalid_enums(source: str):
+    parsed = parse_module(Parser.parse_str(source), name="ivan.invalid")
+    context = TypeContext.build_context(parsed)
+    with pytest.raises(TypeResolutionException):
+        context.resolve_module(parsed)
+
+
+def test_enum_reserved_argument():
+    source = "enum Shape { variant Circle { field radius: double; } fun resize(&mut self, fields: u32); }"
+    parsed = parse_module(Parser.parse_str(source), name="ivan.invalid")
+    generator = C11CodeGenerator(module=parsed, context=TypeContext.build_context(parsed))
+    with pytest.raises(CodegenException, match="Shape.resize"):
+        generator.declare_types()
+
+
+@pytest.mark.parametrize("variants, tag_type", [(1, "uint8_t"), (256, "uint8_t"), (257, "uint16_t")])
+def test_enum_discriminant(variants: int, tag_type: str):
+    source = "enum Large {" + "".join(f"variant V{index};" for index in range(variants)) + "}"
+    parsed = parse_module(Parser.parse_str(source), name="ivan.large")
+    generator = C11CodeGenerator(module=parsed, context=TypeContext.build_context(parsed))
+    generator.declare_types()
+    assert f"    {tag_type} tag;" in str(generator)
+
+
+@pytest.mark.skipif(shutil.which("cc") is None, reason="Needs a C compiler")
+def test_enum_dispatch(tmp_path: Path):
+    (tmp_path / "ivan_enums.h").write_text(generate_golden("enums.ivan", "ivan.enums"))
+    (tmp_path / "main.c").write_text("""#include "ivan_enums.h"
+double Shape_Circle_area(const Shape_Circle* fields) { return 3 * fields->radius * fields->radius; }
+double Shape_Rect_area(const Shape_Rect* fields) { return fields->width * fields->height; }
+double Shape_Sprite_area(const Shape_Sprite* fields) { return 0; }
+double Shape_Empty_area(void) { return 0; }
+void Shape_Circle_scale(Shape_Circle* fields, double factor) { fields->radius *= factor; }
+void Shape_Rect_scale(Shape_Rect* fields, double factor) { fields->width *= factor; fields->height *= factor; }
+void Shape_Sprite_scale(Shape_Sprite* fields, double factor) {}
+void Shape_Empty_scale(double factor) {}
+void Shape_Circle_fail(const Shape_Circle* fields, int32_t code) { exit(code); }
+void Shape_Rect_fail(const Shape_Rect* fields, int32_t code) { exit(code); }
+void Shape_Sprite_fail(const Shape_Sprite* fields, int32_t code) { exit(code); }
+void Shape_Empty_fail(int32_t code) { exit(code); }
+uint16_t Direction_North_degrees(void) { return 0; }
+uint16_t Direction_South_degrees(void) { return 180; }
+uint16_t Direction_East_degrees(void) { return 90; }
+uint16_t Direction_West_degrees(void) { return 270; }
+int main(void) {
+    Shape shapes[2] = {
+        { .tag = Shape_Tag_Circle, .Circle = { 1 } },
+        { .tag = Shape_Tag_Rect, .Rect = { 2, 3 } },
+    };
+    Shape_scale(&shapes[1], 2);
+    if (Shape_area(&shapes[0]) != 3 || Shape_area(&shapes[1]) != 24) return 1;
+    Direction west = { Direction_Tag_West };
+    if (Direction_degrees(&west) != 270) return 2;
+    // The tag fits in a byte, and the variants share their storage
+    if (sizeof(Direction) != 1 || sizeof(Shape) != 3 * sizeof(double)) return 3;
+    Shape empty = { .tag = Shape_Tag_Empty };
+    Shape_fail(&empty, 0);
+}
+""")
+    result = subprocess.run(
+        ["cc", "-std=c11", "-Wall", "-Werror", "-o", str(tmp_path / "main"), "main.c"],
+        cwd=tmp_path, capture_output=True, text=True
+    )
+    assert result.returncode == 0, result.stderr
+    assert subprocess.run([str(tmp_path / "main")]).returncode == 0
+
+
+def test_split_c11_codegen():
+    with open(Path(Path(__file__).parent, "basic.ivan"), "rt") as f:
+        basic_text = f.read()
+    parsed = parse_module(Parser.parse_str(basic_text), name="ivan.basic")
+    context = TypeContext.build_context(parsed)
+    headers = generate_split_headers(parsed, context)
+    golden_dir = Path(Path(__file__).parent, "basic_split")
+    assert sorted(headers) == sorted(path.name for path in golden_dir.iterdir())
+    for name, actual_text in headers.items():
+        assert (golden_dir / name).read_text() == actual_text, name
+
+
+def test_split_dependencies():
+    source = """
+    opaque type Shape;
+    struct Point { field x: int; field y: int; }
+    struct Placed { field shape: &Shape; field position: Point; }
+    """
+    parsed = parse_module(Parser.parse_str(source), name="ivan.deps")
+    headers = generate_split_headers(parsed, TypeContext.build_context(parsed))
+    placed = headers["ivan_deps_Placed.h"]
+    # Used by value, so the full definition is needed
+    assert '#include "ivan_deps_Point.h"' in placed
+    # Only used by pointer, so a forward declaration is enough
+    assert "typedef struct Shape Shape;" in placed
+    assert '#include "ivan_deps_Shape.h"' not in placed
+
+
+def test_split_inheritance():
+    source = "interface Base { fun test(); } interface Derived: Base { fun other(); }"
+    parsed = parse_module(Parser.parse_str(source), name="ivan.deps")
+    headers = generate_split_headers(parsed, TypeContext.build_context(parsed))
+    # The base vtable is embedded by value
+    assert '#include "ivan_deps_Base.h"' in headers["ivan_deps_Derived.h"]
+
+
+def test_split_impls():
+    source = "opaque type File; interface Reader { fun read(): int; } impl Reader for File { fun read = f; }"
+    parsed = parse_module(Parser.parse_str(source), name="ivan.deps")
+    headers = generate_split_headers(parsed, TypeContext.build_context(parsed))
+    assert '#include "ivan_deps_Reader.h"' in headers["ivan_deps_File_Reader.h"]
+    assert "static const Reader File_Reader_vtable = {" in headers["ivan_deps_File_Reader.h"]
+
+
+def test_split_dyn():
+    source = "interface Shape { fun area(&self): double; } struct Drawing { field shape: dyn Shape; }"
+    parsed = parse_module(Parser.parse_str(source), name="ivan.deps")
+    headers = generate_split_headers(parsed, TypeContext.build_context(parsed))
+    drawing = headers["ivan_deps_Drawing.h"]
+    # Objects only point to their vtable
+    assert "typedef struct Shape Shape;" in drawing
+    assert '#include "ivan_deps_Shape.h"' not in drawing
+    assert "typedef struct IvanDyn_Shape {" in drawing
+
+
+def test_source_c11_codegen():
+    options = C11Options(wrapper_definitions=WrapperDefinitions.SOURCE, source_shards=2)
+    header, sources = generate_golden_files("batch.ivan", "ivan.batch", options)
+    golden_dir = Path(Path(__file__).parent, "batch_source")
+    assert (golden_dir / "ivan_batch.h").read_text() == header
+    assert sorted(sources) == ["ivan_batch_0.c", "ivan_batch_1.c"]
+    for name, actual_text in sources.items():
+        assert (golden_dir / name).read_text() == actual_text, name
+
+
+@pytest.mark.skipif(shutil.which("cc") is None, reason="Needs a C compiler")
+@pytest.mark.parametrize("mode", list(WrapperDefinitions))
+def test_multiple_translation_units(mode: WrapperDefinitions, tmp_path: Path):
+    options = C11Options(wrapper_definitions=mode, source_shards=3)
+    header, sources = generate_golden_files("hints.ivan", "ivan.hints", options)
+    (tmp_path / "ivan_hints.h").write_text(header)
+    for name, text in sources.items():
+        (tmp_path / name).write_text(text)
+    (tmp_path / "main.c").write_text('#include "ivan_hints.h"\nint main(void) { return 0; }\n')
+    (tmp_path / "other.c").write_text('#include "ivan_hints.h"\n')
+    result = subprocess.run(
+        ["cc", "-std=c11", "-O0", "-o", str(tmp_path / "main"), "main.c", "other.c", *sources],
+        cwd=tmp_path, capture_output=True, text=True
+    )
+    if mode == WrapperDefinitions.HEADER:
+        # Both translation units define the wrappers
+        assert result.returncode != 0
+    else:
+        assert result.returncode == 0, result.stderr
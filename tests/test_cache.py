@@ -0,0 +1,88 @@
+from pathlib import Path
+
+from ivan.ast.parser import parse_module, Parser
+from ivan.generate.c11 import C11CodeGenerator, C11Options
+from ivan.generate.cache import FragmentCache, item_fingerprint
+from ivan.types.context import TypeContext
+
+
+def load_text(name: str) -> str:
+    with open(Path(Path(__file__).parent, name), "rt") as f:
+        return f.read()
+
+
+def generate(text: str, cache: FragmentCache, options: C11Options = C11Options()) -> str:
+    parsed = parse_module(Parser.parse_str(text), name="ivan.basic")
+    context = TypeContext.build_context(parsed)
+    generator = C11CodeGenerator(module=parsed, context=context, options=options, cache=cache)
+    generator.write_header()
+    generator.declare_types()
+
+    generator.writeln("// wrappers")
+    generator.writeln()
+
+    generator.generate_wrappers()
+
+    generator.write_footer()
+    return str(generator)
+
+
+def test_cached_codegen(tmp_path: Path):
+    text = load_text("basic.ivan")
+    expected = load_text("basic_generated.h")
+    cache = FragmentCache(tmp_path)
+    assert generate(text, cache) == expected
+    assert cache.hits == 0
+    fragments = cache.misses
+    assert generate(text, cache) == expected
+    assert cache.hits == fragments
+    # The fragments are also reused from disk
+    disk_cache = FragmentCache(tmp_path)
+    assert generate(text, disk_cache) == expected
+    assert (disk_cache.hits, disk_cache.misses) == (fragments, 0)
+    # Options are part of the fingerprint
+    options = C11Options(pointer_attributes=True)
+    assert generate(text, disk_cache, options) == load_text("basic_attributes_generated.h")
+    assert disk_cache.misses == fragments
+
+
+def test_only_changed_items_regenerated():
+    text = load_text("basic.ivan")
+    cache = FragmentCache()
+    generate(text, cache)
+    fragments = cache.misses
+    changed = text.replace("fun test(d: double);", "fun test(d: double, extra: int);")
+    assert changed != text
+    generated = generate(changed, cache)
+    assert "void other_test(Other vtable, double d, int extra)" in generated
+    # The declaration and wrappers of `Other` changed
+    assert cache.misses == fragments + 2
+    assert cache.hits == fragments - 2
+
+
+def test_fingerprint_ignores_spans():
+    text = "interface Example { fun test(): int; }"
+    first = parse_module(Parser.parse_str(text), name="ivan.example")
+    second = parse_module(Parser.parse_str("\n\n  " + text), name="ivan.example")
+    for module in (first, second):
+        TypeContext.build_context(module).resolve_module(module)
+    assert item_fingerprint(first.items[0]) == item_fingerprint(second.items[0])
+    changed = parse_module(Parser.parse_str(text.replace("(): int", "(): bool")), name="ivan.example")
+    TypeContext.build_context(changed).resolve_module(changed)
+    assert item_fingerprint(first.items[0]) != item_fingerprint(changed.items[0])
+
+
+def test_inherited_members_invalidate_cache():
+    text = load_text("inheritance.ivan")
+    cache = FragmentCache()
+    generate(text, cache)
+    fragments = cache.misses
+    changed = text.replace("fun read(buffer: &mut [u8]): usize;", "fun read(buffer: &mut [u8]): u64;")
+    assert changed != text
+    generated = generate(changed, cache)
+    assert "uint64_t seekable_read(const SeekableReader* vtable" in generated
+    # Every interface inherits `read`, so all of them are regenerated
+    assert cache.misses == 2 * fragments
+    # Changing a derived interface doesn't affect its bases
+    generate(changed.replace("fun size(): u64;", "fun size(): u32;"), cache)
+    assert cache.misses == 2 * fragments + 2
@@ -0,0 +1,113 @@
+import json
+import shutil
+from pathlib import Path
+
+import pytest
+
+from ivan.cli import main, discover_sources, DuplicateModuleException, EXIT_SUCCESS, EXIT_FAILURE, EXIT_USAGE
+
+TESTS_DIR = Path(__file__).parent
+
+
+def create_inputs(root: Path) -> Path:
+    inputs = root / "inputs"
+    (inputs / "nested").mkdir(parents=True)
+    shutil.copy(TESTS_DIR / "basic.ivan", inputs / "basic.ivan")
+    shutil.copy(TESTS_DIR / "slices.ivan", inputs / "nested" / "slices.ivan")
+    return inputs
+
+
+def test_discover_sources(tmp_path: Path):
+    inputs = create_inputs(tmp_path)
+    assert discover_sources([inputs]) == [
+        (inputs / "basic.ivan", "basic"),
+        (inputs / "nested" / "slices.ivan", "nested.slices"),
+    ]
+
+
+def test_duplicate_modules(tmp_path: Path, capsys):
+    first, second = tmp_path / "first", tmp_path / "second"
+    for inputs in (first, second):
+        inputs.mkdir()
+        shutil.copy(TESTS_DIR / "basic.ivan", inputs / "basic.ivan")
+    with pytest.raises(DuplicateModuleException):
+        discover_sources([first, second])
+    with pytest.raises(SystemExit) as e:
+        main(["build", str(first), str(second), "--c-out", str(tmp_path / "c")])
+    assert e.value.code == EXIT_USAGE
+    assert f"{first / 'basic.ivan'} and {second / 'basic.ivan'} are both the module 'basic'" in capsys.readouterr().err
+    assert not (tmp_path / "c" / "basic.h").exists()
+
+
+@pytest.mark.parametrize("jobs", ["1", "2"])
+def test_build(jobs: str, tmp_path: Path, capsys):
+    inputs = create_inputs(tmp_path)
+    args = ["build", str(inputs), "--c-out", str(tmp_path / "c"), "--rust-out", str(tmp_path / "rust"), "-j", jobs]
+    assert main(args) == EXIT_SUCCESS
+    assert sorted(path.name for path in (tmp_path / "c").iterdir()) == ["basic.h", "nested_slices.h"]
+    assert sorted(path.name for path in (tmp_path / "rust").iterdir()) == ["basic.rs", "nested_slices.rs"]
+    assert "Built 2 of 2 files" in capsys.readouterr().out
+    # Nothing changed, so nothing is rewritten
+    assert main(args) == EXIT_SUCCESS
+    assert "(updated 0 of 4 outputs)" in capsys.readouterr().out
+
+
+def test_build_failure_summary(tmp_path: Path, capsys):
+    inputs = create_inputs(tmp_path)
+    (inputs / "broken.ivan").write_text("struct Broken {\n    value: Missing;\n}\n")
+    assert main(["build", str(inputs), "--c-out", str(tmp_path / "c"), "-j", "2"]) == EXIT_FAILURE
+    captured = capsys.readouterr()
+    assert "Built 2 of 3 files" in captured.out
+    assert "1 file(s) failed" in captured.err
+    assert f"{inputs / 'broken.ivan'}:2:" in captured.err
+    # The other files are still generated
+    assert (tmp_path / "c" / "basic.h").exists()
+
+
+def test_build_usage_errors(tmp_path: Path, capsys):
+    with pytest.raises(SystemExit) as e:
+        main(["build", str(tmp_path)])
+    assert e.value.code == EXIT_USAGE
+    assert main(["build", str(tmp_path), "--c-out", str(tmp_path / "c")]) == EXIT_USAGE
+
+
+def test_build_depfile(tmp_path: Path):
+    inputs = create_inputs(tmp_path)
+    depfile = tmp_path / "ivan.d"
+    assert main(["build", str(inputs), "--c-out", str(tmp_path / "c"), "--depfile", str(depfile)]) == EXIT_SUCCESS
+    assert depfile.read_text() == (
+        f"{tmp_path / 'c' / 'basic.h'}: \\\n  {inputs / 'basic.ivan'}\n"
+        f"{tmp_path / 'c' / 'nested_slices.h'}: \\\n  {inputs / 'nested' / 'slices.ivan'}\n"
+    )
+
+
+def test_build_timings(tmp_path: Path, capsys):
+    inputs = create_inputs(tmp_path)
+    trace = tmp_path / "trace.json"
+    args = ["build", str(inputs), "--c-out", str(tmp_path / "c"), "-j", "2", "--timings", "--trace", str(trace)]
+    assert main(args) == EXIT_SUCCESS
+    assert "Slowest files:" in capsys.readouterr().out
+    events = json.loads(trace.read_text())["traceEvents"]
+    assert sorted(event["name"] for event in events if event["cat"] == "file") == [
+        str(inputs / "basic.ivan"), str(inputs / "nested" / "slices.ivan")
+    ]
+
+
+def test_build_memory_profile(tmp_path: Path, capsys):
+    inputs = create_inputs(tmp_path)
+    assert main(["build", str(inputs), "--c-out", str(tmp_path / "c"), "--memory-profile"]) == EXIT_SUCCESS
+    output = capsys.readouterr().out
+    assert "peak KiB" in output and "Top allocation sites" in output and "InterfaceDef" in output
+
+
+def test_build_memory_profile_timings(tmp_path: Path, capsys):
+    inputs = create_inputs(tmp_path)
+    trace = tmp_path / "trace.json"
+    args = ["build", str(inputs), "--c-out", str(tmp_path / "c"), "--memory-profile", "--timings", "--trace", str(trace)]
+    assert main(args) == EXIT_SUCCESS
+    output = capsys.readouterr().out
+    # The events are reported to the profile, which also provides the timings
+    assert "Slowest files:" in output and "Top allocation sites" in output
+    assert "declare_types" in output.split("peak KiB")[1]
+    events = json.loads(trace.read_text())["traceEvents"]
+    assert any(event["cat"] == "file" for event in events)
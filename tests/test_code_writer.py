@@ -0,0 +1,56 @@
+import io
+from pathlib import Path
+
+import pytest
+
+from ivan.ast.parser import parse_module, Parser
+from ivan.generate import CodeWriter
+from ivan.generate.c11 import C11CodeGenerator
+from ivan.types.context import TypeContext
+
+
+def test_multiline_write():
+    writer = CodeWriter()
+    writer.writeln("{")
+    with writer.with_indent():
+        writer.write("first\nsecond\n\nthird")
+        writer.writeln(";")
+    writer.write("}")
+    assert str(writer) == "{\n    first\n    second\n\n    third;\n}"
+
+
+@pytest.mark.parametrize("flush_threshold", [1, 100, CodeWriter.DEFAULT_FLUSH_THRESHOLD])
+def test_streaming_writer(flush_threshold: int):
+    expected = CodeWriter()
+    sink = io.StringIO()
+    actual = CodeWriter(sink=sink, flush_threshold=flush_threshold)
+    for writer in (expected, actual):
+        writer.writeln("first")
+        with writer.with_indent():
+            writer.writeln("indented")
+            writer.writeln()
+        writer.write("unfinished")
+    actual.flush()
+    assert sink.getvalue() == str(expected)
+    with pytest.raises(RuntimeError):
+        str(actual)
+
+
+def test_streaming_codegen(tmp_path: Path):
+    with open(Path(Path(__file__).parent, "hints.ivan"), "rt") as f:
+        text = f.read()
+    with open(Path(Path(__file__).parent, "hints_generated.h"), "rt") as f:
+        generated_text = f.read()
+    parsed = parse_module(Parser.parse_str(text), name="ivan.hints")
+    context = TypeContext.build_context(parsed)
+    output = tmp_path / "hints.h"
+    with open(output, "wt") as sink:
+        generator = C11CodeGenerator(module=parsed, context=context, sink=sink)
+        generator.write_header()
+        generator.declare_types()
+        generator.writeln("// wrappers")
+        generator.writeln()
+        generator.generate_wrappers()
+        generator.write_footer()
+        generator.flush()
+    assert output.read_text() == generated_text
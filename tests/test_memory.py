@@ -0,0 +1,52 @@
+from pathlib import Path
+
+from ivan.ast.parser import parse_module, Parser
+from ivan.memory import MemoryProfile, memory_by_type
+from ivan.pipeline import run_pipeline, C11Target
+from ivan.timings import collect_timings, timed
+
+ALLOCATION_SIZE = 1024 * 1024
+
+
+def test_memory_by_type():
+    with open(Path(Path(__file__).parent, "basic.ivan"), "rt") as f:
+        module = parse_module(Parser.parse_str(f.read()), name="ivan.basic")
+    types = memory_by_type([module])
+    assert types["IvanModule"].count == 1
+    assert types["InterfaceDef"].count == 3
+    assert types["FunctionDeclaration"].count == 5
+    assert types["Span"].count > 0 and types["Span"].size > 0
+    # Strings and containers are attributed to their owners, and enums aren't counted
+    assert "str" not in types and "list" not in types
+    assert "ReferenceKind" not in types
+
+
+def test_nested_peaks():
+    profile = MemoryProfile()
+    with profile.tracing(), collect_timings(profile):
+        with timed("outer", "file"):
+            data = bytearray(ALLOCATION_SIZE)
+            del data
+            with timed("inner", "item"):
+                retained = bytearray(ALLOCATION_SIZE // 2)
+    inner, outer = profile.memory_events
+    assert inner.name == "inner" and outer.name == "outer"
+    assert ALLOCATION_SIZE // 2 <= inner.peak < ALLOCATION_SIZE
+    assert inner.retained >= ALLOCATION_SIZE // 2
+    # The peak of the outer span is from before the inner span started
+    assert outer.peak >= ALLOCATION_SIZE
+    assert len(retained) == ALLOCATION_SIZE // 2
+
+
+def test_profile_pipeline(tmp_path: Path):
+    source = Path(Path(__file__).parent, "basic.ivan")
+    profile = MemoryProfile()
+    with profile.tracing(), collect_timings(profile):
+        result = run_pipeline(source, [C11Target(tmp_path)], module_name="ivan.basic", max_workers=1)
+        profile.record_module(result.module, source.read_text())
+    phases = {event.name for event in profile.memory_events if event.category != "item"}
+    assert phases == {str(source), "lex", "parse", "resolve", "c11", "declare_types", "generate_wrappers"}
+    assert profile.types["Token"].count > 0
+    assert any(filename.endswith("parser/__init__.py") for filename, _ in profile.sites)
+    report = profile.report()
+    assert "Top allocation sites" in report and "Token" in report
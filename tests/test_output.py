@@ -0,0 +1,77 @@
+import os
+from pathlib import Path
+
+import pytest
+
+from ivan.ast.parser import parse_module, Parser
+from ivan.generate.c11 import C11CodeGenerator
+from ivan.generate.output import OutputTracker, format_depfile
+from ivan.types.context import TypeContext
+
+OLD_MTIME = 1_000_000_000
+
+
+def test_write_if_changed(tmp_path: Path):
+    output = tmp_path / "example.h"
+    tracker = OutputTracker()
+    assert tracker.write_text(output, "first")
+    os.utime(output, (OLD_MTIME, OLD_MTIME))
+    assert not tracker.write_text(output, "first")
+    assert output.stat().st_mtime == OLD_MTIME
+    assert tracker.write_text(output, "second")
+    assert output.read_text() == "second"
+    assert tracker.updated == [output, output]
+    assert tracker.unchanged == [output]
+    assert tracker.summary() == "Updated 2 of 3 outputs"
+    assert os.listdir(tmp_path) == ["example.h"]
+
+
+def test_new_output_mode(tmp_path: Path):
+    output = tmp_path / "example.h"
+    reference = tmp_path / "reference.h"
+    reference.write_text("")
+    OutputTracker().write_text(output, "first")
+    # Like any other new file, the output only depends on the umask
+    assert output.stat().st_mode & 0o777 == reference.stat().st_mode & 0o777
+
+
+def test_failed_output_untouched(tmp_path: Path):
+    output = tmp_path / "example.h"
+    output.write_text("original")
+    tracker = OutputTracker()
+    with pytest.raises(RuntimeError):
+        with tracker.open(output) as sink:
+            sink.write("partial")
+            raise RuntimeError("Generation failed")
+    assert output.read_text() == "original"
+    assert os.listdir(tmp_path) == ["example.h"]
+    assert not tracker.updated and not tracker.unchanged
+
+
+def test_streamed_codegen_unchanged(tmp_path: Path):
+    with open(Path(Path(__file__).parent, "basic.ivan"), "rt") as f:
+        text = f.read()
+    output = tmp_path / "basic.h"
+    tracker = OutputTracker()
+    for _ in range(2):
+        parsed = parse_module(Parser.parse_str(text), name="ivan.basic")
+        context = TypeContext.build_context(parsed)
+        with tracker.open(output) as sink:
+            generator = C11CodeGenerator(module=parsed, context=context, sink=sink)
+            generator.write_header()
+            generator.declare_types()
+            generator.generate_wrappers()
+            generator.write_footer()
+            generator.flush()
+    assert tracker.updated == [output]
+    assert tracker.unchanged == [output]
+
+
+def test_format_depfile():
+    assert format_depfile([
+        (Path("out/example.h"), [Path("src/example.ivan")]),
+        (Path("out/with space.h"), [Path("src/$weird#name.ivan"), Path("src/other.ivan")]),
+    ]) == (
+        "out/example.h: \\\n  src/example.ivan\n"
+        "out/with\\ space.h: \\\n  src/$$weird\\#name.ivan \\\n  src/other.ivan\n"
+    )
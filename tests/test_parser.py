@@ -1,10 +1,14 @@
 from pathlib import Path
 
+import pytest
+
 from ivan.ast import FunctionDeclaration, DocString, InterfaceDef, FunctionArg, OpaqueTypeDef, FunctionSignature, \
-    Annotation, IvanModule, StructDef, FieldDef, SimpleArgument
-from ivan.ast.lexer import Span
+    Annotation, IvanModule, StructDef, FieldDef, SimpleArgument, ImplDef, ImplFunction, MethodSelfArgument, \
+    EnumDef, VariantDef
+from ivan.ast.lexer import Span, ParseException
 from ivan.ast.parser import parse_item, parse_module, Parser, parse_annotation, parse_type
-from ivan.ast.types import ReferenceKind, OptionalTypeRef, ReferenceTypeRef, NamedTypeRef
+from ivan.ast.types import ReferenceKind, OptionalTypeRef, ReferenceTypeRef, NamedTypeRef, SliceTypeRef, \
+    StrTypeRef, AtomicTypeRef, DynTypeRef, SyntheticTypeRef, SelfType
 
 
 def test_parse_types():
@@ -18,6 +22,71 @@ def test_parse_types():
     )
 
 
+def test_parse_slice_types():
+    assert parse_type(Parser.parse_str("&[u8]")) == SliceTypeRef(
+        usage_span=Span(1, 0),
+        element=NamedTypeRef(Span(1, 2), 'u8'),
+        kind=ReferenceKind.IMMUTABLE
+    )
+    assert parse_type(Parser.parse_str("&mut [&Example]")) == SliceTypeRef(
+        usage_span=Span(1, 0),
+        element=ReferenceTypeRef(
+            usage_span=Span(1, 6),
+            kind=ReferenceKind.IMMUTABLE,
+            inner=NamedTypeRef(Span(1, 7), 'Example')
+        ),
+        kind=ReferenceKind.MUTABLE
+    )
+    assert parse_type(Parser.parse_str("&str")) == StrTypeRef(Span(1, 0))
+    with pytest.raises(ParseException):
+        parse_type(Parser.parse_str("&mut str"))
+    with pytest.raises(ParseException):
+        parse_type(Parser.parse_str("&own [u8]"))
+
+
+def test_parse_atomic_types():
+    assert parse_type(Parser.parse_str("atomic u64")) == AtomicTypeRef(
+        usage_span=Span(1, 0),
+        inner=NamedTypeRef(Span(1, 7), 'u64')
+    )
+    assert parse_type(Parser.parse_str("atomic opt &raw Shape")) == AtomicTypeRef(
+        usage_span=Span(1, 0),
+        inner=OptionalTypeRef(
+            usage_span=Span(1, 7),
+            inner=ReferenceTypeRef(
+                usage_span=Span(1, 11),
+                kind=ReferenceKind.RAW,
+                inner=NamedTypeRef(Span(1, 16), 'Shape')
+            )
+        )
+    )
+
+
+def test_parse_dyn_types():
+    assert parse_type(Parser.parse_str("&[dyn Shape]")) == SliceTypeRef(
+        usage_span=Span(1, 0),
+        kind=ReferenceKind.IMMUTABLE,
+        element=DynTypeRef(Span(1, 2), NamedTypeRef(Span(1, 6), 'Shape'))
+    )
+
+
+def test_parse_receivers():
+    parsed = parse_item(Parser.parse_str("interface Shape { fun scale(&mut self, factor: double); }"))
+    assert parsed.methods[0].signature == FunctionSignature(
+        args=[
+            MethodSelfArgument(ReferenceKind.MUTABLE, SyntheticTypeRef(Span(1, 28), SelfType(mutable=True))),
+            SimpleArgument("factor", NamedTypeRef(Span(1, 47), 'double'))
+        ],
+        return_type=NamedTypeRef(Span(1, 55), 'unit')
+    )
+    assert parsed.methods[0].signature.is_method
+    with pytest.raises(ParseException):
+        # Only the first argument can be a receiver
+        parse_item(Parser.parse_str("interface Shape { fun scale(factor: double, &self); }"))
+    with pytest.raises(ParseException):
+        parse_item(Parser.parse_str("fun area(&self): double;"))
+
+
 def test_parse_struct():
     assert parse_item(Parser.parse_str("""struct Vector {
     field x: double;
@@ -80,6 +149,73 @@ def test_parse_func():
     )
 
 
+def test_parse_interface_base():
+    assert parse_item(Parser.parse_str("interface Derived: Base {}")) == InterfaceDef(
+        name="Derived",
+        span=Span(1, 10),
+        doc_string=None,
+        annotations=[],
+        members={},
+        base=NamedTypeRef(Span(1, 19), 'Base')
+    )
+    with pytest.raises(ParseException):
+        parse_item(Parser.parse_str("interface Derived: First, Second {}"))
+
+
+def test_parse_impl():
+    assert parse_item(Parser.parse_str("""impl Reader for File {
+    fun read = file_read;
+}""")) == ImplDef(
+        name="File_Reader",
+        span=Span(1, 5),
+        doc_string=None,
+        annotations=[],
+        interface=NamedTypeRef(Span(1, 5), 'Reader'),
+        target=NamedTypeRef(Span(1, 16), 'File'),
+        functions={"read": ImplFunction(slot="read", function="file_read", span=Span(2, 8))}
+    )
+    with pytest.raises(ParseException):
+        parse_item(Parser.parse_str("impl Reader for File { fun read = first; fun read = second; }"))
+
+
+def test_parse_enum():
+    parsed = parse_item(Parser.parse_str("""enum Shape {
+    variant Circle { field radius: double; }
+    variant Empty;
+    fun area(&self): double;
+}"""))
+    assert isinstance(parsed, EnumDef)
+    assert parsed.variants == [
+        VariantDef(
+            name="Circle",
+            span=Span(2, 12),
+            doc_string=None,
+            annotations=[],
+            fields={"radius": FieldDef(
+                name="radius",
+                span=Span(2, 27),
+                doc_string=None,
+                annotations=[],
+                static_type=NamedTypeRef(Span(2, 35), 'double')
+            )}
+        ),
+        VariantDef(name="Empty", span=Span(3, 12), doc_string=None, annotations=[], fields={}),
+    ]
+    assert [method.name for method in parsed.methods] == ["area"]
+
+
+@pytest.mark.parametrize("source", [
+    "enum Shape { fun area(): double; }",
+    "enum Shape { fun area(&self): double { return null; } }",
+    "enum Shape { variant Empty; variant Empty; }",
+    "enum Shape { field radius: double; }",
+    "struct Shape { variant Empty; }",
+])
+def test_parse_invalid_enum(source: str):
+    with pytest.raises(ParseException):
+        parse_item(Parser.parse_str(source))
+
+
 def test_parse_annotation():
     assert parse_annotation(Parser.parse_str("@Example")) == Annotation(
         name="Example",
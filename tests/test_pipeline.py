@@ -0,0 +1,39 @@
+from pathlib import Path
+
+import pytest
+
+from ivan.pipeline import run_pipeline, C11Target, RustTarget
+
+
+def load_golden(name: str) -> str:
+    with open(Path(Path(__file__).parent, name), "rt") as f:
+        # The tests write an extra marker before the wrappers
+        return f.read().replace("// wrappers\n\n", "", 1)
+
+
+@pytest.mark.parametrize("use_processes", [False, True])
+def test_pipeline(use_processes: bool, tmp_path: Path):
+    source = Path(Path(__file__).parent, "basic.ivan")
+    targets = [C11Target(tmp_path / "c"), RustTarget(tmp_path / "rust")]
+    result = run_pipeline(source, targets, module_name="ivan.basic", use_processes=use_processes)
+    assert [target.name for target in result.targets] == ["c11", "rust"]
+    assert (tmp_path / "c" / "ivan_basic.h").read_text() == load_golden("basic_generated.h")
+    assert (tmp_path / "rust" / "ivan_basic.rs").read_text() == load_golden("basic_generated.rs")
+    assert len(result.updated) == 2
+    assert "updated 1 of 1 outputs" in result.summary()
+    # Nothing changed, so nothing is rewritten
+    result = run_pipeline(source, targets, module_name="ivan.basic", use_processes=use_processes)
+    assert result.updated == []
+    assert all(target.seconds >= 0 for target in result.targets)
+
+
+def test_pipeline_depfile(tmp_path: Path):
+    source = Path(Path(__file__).parent, "basic.ivan")
+    depfile = tmp_path / "basic.d"
+    targets = [C11Target(tmp_path / "c"), RustTarget(tmp_path / "rust")]
+    result = run_pipeline(source, targets, module_name="ivan.basic", depfile=depfile)
+    assert result.dependencies == [source]
+    assert depfile.read_text() == (
+        f"{tmp_path / 'c' / 'ivan_basic.h'}: \\\n  {source}\n"
+        f"{tmp_path / 'rust' / 'ivan_basic.rs'}: \\\n  {source}\n"
+    )
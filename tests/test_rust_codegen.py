@@ -0,0 +1,108 @@
+from pathlib import Path
+
+from ivan.ast.parser import parse_module, Parser
+from ivan.generate.c11 import C11CodeGenerator
+from ivan.generate.rust import RustCodeGenerator
+from ivan.types.context import TypeContext
+
+
+def test_basic_rust_codegen():
+    with open(Path(Path(__file__).parent, "basic.ivan"), "rt") as f:
+        basic_text = f.read()
+    with open(Path(Path(__file__).parent, "basic_generated.rs"), "rt") as f:
+        generated_text = f.read()
+    parsed = parse_module(Parser.parse_str(basic_text), name="ivan.basic")
+    context = TypeContext.build_context(parsed)
+    generator = RustCodeGenerator(module=parsed, context=context)
+    generator.write_header()
+    generator.declare_types()
+
+    generator.writeln("// wrappers")
+    generator.writeln()
+
+    generator.generate_wrappers()
+
+    generator.write_footer()
+    actual_generated_text = str(generator)
+    assert generated_text == actual_generated_text
+
+
+def generate_golden(ivan_file: str, module_name: str) -> str:
+    with open(Path(Path(__file__).parent, ivan_file), "rt") as f:
+        text = f.read()
+    parsed = parse_module(Parser.parse_str(text), name=module_name)
+    context = TypeContext.build_context(parsed)
+    generator = RustCodeGenerator(module=parsed, context=context)
+    generator.write_header()
+    generator.declare_types()
+
+    generator.writeln("// wrappers")
+    generator.writeln()
+
+    generator.generate_wrappers()
+
+    generator.write_footer()
+    return str(generator)
+
+
+def test_slices_rust_codegen():
+    with open(Path(Path(__file__).parent, "slices_generated.rs"), "rt") as f:
+        generated_text = f.read()
+    assert generated_text == generate_golden("slices.ivan", "ivan.slices")
+
+
+def test_batch_rust_codegen():
+    with open(Path(Path(__file__).parent, "batch_generated.rs"), "rt") as f:
+        generated_text = f.read()
+    assert generated_text == generate_golden("batch.ivan", "ivan.batch")
+
+
+def test_hints_rust_codegen():
+    with open(Path(Path(__file__).parent, "hints_generated.rs"), "rt") as f:
+        generated_text = f.read()
+    assert generated_text == generate_golden("hints.ivan", "ivan.hints")
+
+
+def test_atomics_rust_codegen():
+    with open(Path(Path(__file__).parent, "atomics_generated.rs"), "rt") as f:
+        generated_text = f.read()
+    assert generated_text == generate_golden("atomics.ivan", "ivan.atomics")
+
+
+def test_inheritance_rust_codegen():
+    with open(Path(Path(__file__).parent, "inheritance_generated.rs"), "rt") as f:
+        generated_text = f.read()
+    assert generated_text == generate_golden("inheritance.ivan", "ivan.inheritance")
+
+
+def test_impls_rust_codegen():
+    with open(Path(Path(__file__).parent, "impls_generated.rs"), "rt") as f:
+        generated_text = f.read()
+    assert generated_text == generate_golden("impls.ivan", "ivan.impls")
+
+
+def test_dyn_rust_codegen():
+    with open(Path(Path(__file__).parent, "dyn_generated.rs"), "rt") as f:
+        generated_text = f.read()
+    assert generated_text == generate_golden("dyn.ivan", "ivan.dyn")
+
+
+def test_enums_rust_codegen():
+    with open(Path(Path(__file__).parent, "enums_generated.rs"), "rt") as f:
+        generated_text = f.read()
+    assert generated_text == generate_golden("enums.ivan", "ivan.enums")
+
+
+def test_shared_context():
+    with open(Path(Path(__file__).parent, "basic.ivan"), "rt") as f:
+        basic_text = f.read()
+    parsed = parse_module(Parser.parse_str(basic_text), name="ivan.basic")
+    context = TypeContext.build_context(parsed)
+    c11_generator = C11CodeGenerator(module=parsed, context=context)
+    rust_generator = RustCodeGenerator(module=parsed, context=context)
+    # The module is only resolved once
+    assert c11_generator.module is rust_generator.module
+    rust_generator.declare_types()
+    c11_generator.declare_types()
+    assert "pub struct Basic {" in str(rust_generator)
+    assert "typedef struct Basic {" in str(c11_generator)
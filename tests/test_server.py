@@ -0,0 +1,90 @@
+import os
+import shutil
+import threading
+from pathlib import Path
+
+import pytest
+
+from ivan import client
+from ivan.cli import EXIT_SUCCESS, EXIT_FAILURE, EXIT_USAGE
+from ivan.server import CompileServer
+
+TESTS_DIR = Path(__file__).parent
+
+
+@pytest.fixture
+def server(tmp_path: Path):
+    socket_path = str(tmp_path / "ivan.sock")
+    server = CompileServer(socket_path)
+    thread = threading.Thread(target=server.serve_until_shutdown)
+    thread.start()
+    try:
+        yield server
+    finally:
+        client.main(["--socket", socket_path, "--shutdown"])
+        thread.join(timeout=5)
+        server.server_close()
+    assert not thread.is_alive()
+    assert not Path(socket_path).exists()
+
+
+def test_server_build(server: CompileServer, tmp_path: Path, capsys):
+    inputs = tmp_path / "inputs"
+    inputs.mkdir()
+    shutil.copy(TESTS_DIR / "basic.ivan", inputs / "basic.ivan")
+    argv = ["--socket", server.server_address, "build", str(inputs), "--c-out", str(tmp_path / "c")]
+    assert client.main(argv) == EXIT_SUCCESS
+    assert "Built 1 of 1 files" in capsys.readouterr().out
+    assert (tmp_path / "c" / "basic.h").exists()
+    # The second build reuses the same (warm) workspace
+    [workspace] = server.workspaces.values()
+    [entry] = workspace.modules.values()
+    module = entry.module
+    assert client.main(argv + ["--verbose"]) == EXIT_SUCCESS
+    assert "(updated 0 of 1 outputs)" in capsys.readouterr().out
+    assert entry.module is module
+    # Failures are forwarded to the client
+    (inputs / "broken.ivan").write_text("struct {")
+    assert client.main(argv) == EXIT_FAILURE
+    assert "broken.ivan:1:" in capsys.readouterr().err
+    # So are invalid arguments
+    assert client.main(["--socket", server.server_address, "build", str(inputs)]) == EXIT_USAGE
+    assert "--c-out" in capsys.readouterr().err
+
+
+def test_stale_socket(server: CompileServer):
+    with pytest.raises(OSError, match="already listening"):
+        CompileServer(server.server_address)
+
+
+class _BindRecordingServer(CompileServer):
+    def server_activate(self):
+        # Right after binding, before the server starts listening
+        self.bound_mode = os.stat(self.server_address).st_mode
+        super().server_activate()
+
+
+def test_socket_permissions(tmp_path: Path):
+    server = _BindRecordingServer(str(tmp_path / "ivan.sock"))
+    try:
+        # Nobody else can ever connect, even before the server is listening
+        assert server.bound_mode & 0o077 == 0
+        assert Path(server.server_address).stat().st_mode & 0o077 == 0
+    finally:
+        server.server_close()
+
+
+def test_client_rejects_other_users(server: CompileServer, monkeypatch, capsys):
+    monkeypatch.setattr(client.os, "getuid", lambda: Path(server.server_address).stat().st_uid + 1)
+    with pytest.raises(PermissionError):
+        client.send_request(server.server_address, {"command": "shutdown"})
+    assert client.main(["--socket", server.server_address, "build", str(TESTS_DIR)]) == EXIT_FAILURE
+    assert "belongs to another user" in capsys.readouterr().err
+    assert not server.workspaces
+
+
+def test_client_fallback(tmp_path: Path, capsys):
+    argv = ["--socket", str(tmp_path / "missing.sock"), "build", str(TESTS_DIR / "basic.ivan"),
+            "--c-out", str(tmp_path / "c")]
+    assert client.main(argv) == EXIT_SUCCESS
+    assert "Built 1 of 1 files" in capsys.readouterr().out
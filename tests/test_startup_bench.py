@@ -0,0 +1,58 @@
+import subprocess
+import sys
+import time
+from pathlib import Path
+from typing import Dict, List, Tuple
+
+from ivan.cli import WRAPPER_DEFINITIONS
+from ivan.generate.c11 import WrapperDefinitions
+
+VERSION_BUDGET_SECONDS = 0.5
+"""The wall-clock budget for a cold `ivan --version`"""
+BUILD_BUDGET_SECONDS = 1.5
+"""The wall-clock budget for a cold build of a single small file"""
+RUNS = 3
+
+
+def run_with_importtime(args: List[str]) -> Tuple[float, Dict[str, int]]:
+    """Run `python -X importtime -m ivan ...`, returning the wall time and cumulative import time of each module"""
+    start = time.perf_counter()
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-m", "ivan", *args],
+        check=True, capture_output=True, text=True,
+        cwd=Path(__file__).parent.parent
+    )
+    elapsed = time.perf_counter() - start
+    imports = {}
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+        _, cumulative, name = line[len("import time:"):].split("|")
+        imports[name.strip()] = int(cumulative)
+    return elapsed, imports
+
+
+def fastest_run(args: List[str]) -> Tuple[float, Dict[str, int]]:
+    # The fastest run has the least noise from the rest of the system
+    return min((run_with_importtime(args) for _ in range(RUNS)), key=lambda run: run[0])
+
+
+def test_version_startup():
+    elapsed, imports = fastest_run(["--version"])
+    assert not {"ivan.ast", "ivan.generate", "ivan.pipeline", "multiprocessing"} & imports.keys()
+    assert elapsed < VERSION_BUDGET_SECONDS, \
+        f"ivan --version took {elapsed:.3f} s (importing ivan.cli took {imports['ivan.cli'] / 1000:.1f} ms)"
+
+
+def test_single_file_build_startup(tmp_path: Path):
+    source = Path(__file__).parent / "basic.ivan"
+    elapsed, imports = fastest_run(["build", str(source), "--c-out", str(tmp_path), "-j", "1"])
+    assert (tmp_path / "basic.h").exists()
+    # A single file never needs worker processes
+    assert "multiprocessing" not in imports
+    assert elapsed < BUILD_BUDGET_SECONDS, \
+        f"ivan build took {elapsed:.3f} s (importing ivan.pipeline took {imports['ivan.pipeline'] / 1000:.1f} ms)"
+
+
+def test_wrapper_definitions_choices():
+    assert WRAPPER_DEFINITIONS == tuple(mode.value for mode in WrapperDefinitions)
@@ -0,0 +1,49 @@
+import json
+from pathlib import Path
+
+from ivan.pipeline import run_pipeline, C11Target, RustTarget
+from ivan.timings import collect_timings, timed, TimingRegistry
+
+
+def test_disabled_timings():
+    assert timed("parse", "parse") is timed("resolve", "resolve")
+    with collect_timings() as registry:
+        pass
+    with timed("parse", "parse"):
+        pass
+    assert registry.events == []
+
+
+def test_pipeline_timings(tmp_path: Path):
+    source = Path(Path(__file__).parent, "basic.ivan")
+    with collect_timings() as registry:
+        run_pipeline(source, [C11Target(tmp_path / "c"), RustTarget(tmp_path / "rust")], module_name="ivan.basic")
+    categories = {}
+    for event in registry.events:
+        categories.setdefault(event.category, []).append(event.name)
+    assert categories["file"] == [str(source)]
+    assert categories["lex"] == ["lex"]
+    assert categories["parse"] == ["parse"]
+    assert categories["resolve"] == ["resolve"]
+    assert sorted(categories["target"]) == ["c11", "rust"]
+    assert sorted(categories["generate"]) == ["declare_types", "declare_types", "generate_wrappers", "generate_wrappers"]
+    # Each item is declared by both generators, and each interface with wrappers gets them too
+    assert sorted(categories["item"]) == sorted(["Basic", "Other", "NoMethods", "Example", "topLevel"] * 2
+                                                + ["Basic", "Other"] * 2)
+    summary = registry.summary()
+    assert "declare_types" in summary and "Slowest items:" in summary
+
+
+def test_chrome_trace(tmp_path: Path):
+    registry = TimingRegistry()
+    with collect_timings(registry):
+        with timed("outer", "file", module="example"):
+            with timed("inner", "item"):
+                pass
+    path = tmp_path / "trace.json"
+    registry.write_chrome_trace(path)
+    outer, inner = json.loads(path.read_text())["traceEvents"]
+    assert (outer["name"], outer["cat"], outer["ph"], outer["ts"]) == ("outer", "file", "X", 0)
+    assert outer["args"] == {"module": "example"}
+    assert inner["name"] == "inner"
+    assert inner["ts"] + inner["dur"] <= outer["ts"] + outer["dur"]
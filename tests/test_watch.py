@@ -0,0 +1,105 @@
+import os
+import shutil
+from pathlib import Path
+
+import pytest
+
+from ivan.pipeline import C11Target
+from ivan.watch import Workspace, PollingWatcher, InotifyWatcher, inotify_simple
+
+TESTS_DIR = Path(__file__).parent
+
+OLD_MTIME = 1_000_000_000
+
+
+def create_inputs(root: Path) -> Path:
+    inputs = root / "inputs"
+    inputs.mkdir()
+    shutil.copy(TESTS_DIR / "basic.ivan", inputs / "basic.ivan")
+    shutil.copy(TESTS_DIR / "slices.ivan", inputs / "slices.ivan")
+    return inputs
+
+
+def test_workspace_rebuild(tmp_path: Path):
+    inputs = create_inputs(tmp_path)
+    output_dir = tmp_path / "c"
+    output_dir.mkdir()
+    workspace = Workspace([inputs], [C11Target(output_dir)])
+    results = workspace.build_all()
+    assert [result.source.name for result in results] == ["basic.ivan", "slices.ivan"]
+    assert all(len(result.updated) == 1 for result in results)
+    # Touching a file without changing it doesn't regenerate anything
+    (inputs / "basic.ivan").touch()
+    [result] = workspace.rebuild([inputs / "basic.ivan"])
+    assert result.updated == [] and result.outputs == [output_dir / "basic.h"]
+    # Editing a file only regenerates its own outputs, reusing the fragments of unchanged items
+    hits = workspace.cache.hits
+    with open(inputs / "basic.ivan", "at") as f:
+        f.write("\nfun extraFunction(x: u32): u32;\n")
+    [result] = workspace.rebuild([inputs / "basic.ivan"])
+    assert result.updated == [output_dir / "basic.h"]
+    assert "extraFunction" in (output_dir / "basic.h").read_text()
+    assert workspace.cache.hits > hits
+    # Errors are reported, and leave the previous outputs alone
+    (inputs / "slices.ivan").write_text("struct {")
+    [result] = workspace.rebuild([inputs / "slices.ivan"])
+    assert result.failed and "slices.ivan:1:" in result.error
+    assert (output_dir / "slices.h").exists()
+    # Removing a file removes its outputs
+    (inputs / "slices.ivan").unlink()
+    assert workspace.rebuild([inputs / "slices.ivan"]) == []
+    assert os.listdir(output_dir) == ["basic.h"]
+
+
+def test_workspace_duplicate_modules(tmp_path: Path):
+    inputs = create_inputs(tmp_path)
+    other_inputs = tmp_path / "other"
+    other_inputs.mkdir()
+    (other_inputs / "basic.ivan").write_text("fun otherFunction();\n")
+    output_dir = tmp_path / "c"
+    output_dir.mkdir()
+    workspace = Workspace([inputs, other_inputs], [C11Target(output_dir)])
+    results = {result.source: result for result in workspace.build_all()}
+    assert not results[inputs / "basic.ivan"].failed
+    assert "are both the module 'basic'" in results[other_inputs / "basic.ivan"].error
+    assert "otherFunction" not in (output_dir / "basic.h").read_text()
+    # Once the first is removed, the other one is built instead (without deleting its outputs)
+    (inputs / "basic.ivan").unlink()
+    [result] = workspace.rebuild([inputs / "basic.ivan"])
+    assert result.source == other_inputs / "basic.ivan" and not result.failed
+    assert "otherFunction" in (output_dir / "basic.h").read_text()
+
+
+def test_polling_watcher(tmp_path: Path):
+    inputs = create_inputs(tmp_path)
+    for source in inputs.iterdir():
+        os.utime(source, (OLD_MTIME, OLD_MTIME))
+    watcher = PollingWatcher([inputs], interval=0.01)
+    assert watcher.wait(timeout=0) == set()
+    (inputs / "basic.ivan").touch()
+    (inputs / "nested").mkdir()
+    (inputs / "nested" / "added.ivan").write_text("")
+    (inputs / "slices.ivan").unlink()
+    assert watcher.wait(timeout=1) == {
+        inputs / "basic.ivan",
+        inputs / "nested" / "added.ivan",
+        inputs / "slices.ivan"
+    }
+    assert watcher.poll() == set()
+
+
+@pytest.mark.skipif(inotify_simple is None, reason="Requires inotify_simple")
+def test_inotify_watcher(tmp_path: Path):
+    inputs = create_inputs(tmp_path)
+    watcher = InotifyWatcher([inputs])
+    try:
+        assert watcher.wait(timeout=0) == set()
+        (inputs / "basic.ivan").write_text("")
+        (inputs / "ignored.txt").write_text("")
+        assert watcher.wait(timeout=1) == {inputs / "basic.ivan"}
+        (inputs / "nested").mkdir()
+        assert watcher.wait(timeout=0.1) == set()
+        (inputs / "nested" / "added.ivan").write_text("")
+        assert watcher.wait(timeout=1) == {inputs / "nested" / "added.ivan"}
+    finally:
+        watcher.close()